@@ -1,11 +1,27 @@
-# 
-
-
-
-# asgi.py (no Channels / WebSockets)
+# asgi.py - HTTP via Django, WebSockets via Channels
 import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'SampleDB.settings')
 
-application = get_asgi_application()
+# Initialize Django before importing consumers (they import models/managers)
+django_asgi_app = get_asgi_application()
+
+# Create tables once per server (once per host under gunicorn's preload_app)
+from core.utils.schema_bootstrap import bootstrap_on_startup
+try:
+    bootstrap_on_startup()
+except Exception as e:
+    import logging
+    logging.getLogger(__name__).error(f"❌ [STARTUP] Schema bootstrap failed: {e}")
+
+from channels.routing import ProtocolTypeRouter, URLRouter
+from channels.security.websocket import AllowedHostsOriginValidator
+from core.WebSocketConnection.routing import websocket_urlpatterns
+
+application = ProtocolTypeRouter({
+    "http": django_asgi_app,
+    "websocket": AllowedHostsOriginValidator(
+        URLRouter(websocket_urlpatterns)
+    ),
+})
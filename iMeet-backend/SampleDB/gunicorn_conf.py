@@ -0,0 +1,213 @@
+# SampleDB/gunicorn_conf.py
+
+"""
+Production Serving Profile
+==========================
+gunicorn master + uvicorn workers running SampleDB.asgi:application:
+
+    SERVER_ROLE=api gunicorn -c python:SampleDB.gunicorn_conf SampleDB.asgi:application
+
+One image, several pools. SERVER_ROLE picks the pool's worker count, timeouts
+and which URL modules it imports (DISABLED_URL_MODULES, see SampleDB/urls.py).
+The reverse proxy routes by path:
+
+    api        everything else, incl. /ws/ websockets       many workers, short timeouts
+    streaming  /api/videos/stream/, /api/videos/doc/        long-lived S3 streams, long drain
+    ml         /api/attendance/, /api/auth/face-login/,
+               /api/user/verify-face/                       few workers (models per process)
+    all        every route in one pool (default; same routes as runserver)
+
+Preloading: the app, settings and every enabled URL module are imported in the
+master before forking, then gc.freeze() moves those objects out of the
+collector so workers share the pages copy-on-write instead of each paying the
+import. Schema bootstrap (SampleDB/asgi.py) also runs once in the master.
+Nothing in the master may hold a live connection, thread or lock that a worker
+inherits: Django DB/cache connections are closed before each fork, MongoClients
+are created with connect=False (they connect on a worker's first query) and
+the face embedding index is loaded by each ml worker after fork.
+Loaded ONNX sessions are not fork-safe, so face models are shared per host by
+`manage.py face_inference_server` (FACE_INFERENCE_MODE=socket) rather than
+loaded here; PRELOAD_FACE_MODEL=True loads one per worker right after fork.
+
+Draining: on SIGTERM each worker stops accepting, lets in-flight requests and
+streams finish for up to GRACEFUL_TIMEOUT seconds, closes websockets with 1012
+(clients reconnect to another worker), then closes its DB/cache connections.
+
+Environment (all optional):
+    SERVER_ROLE             api | streaming | ml | all
+    PORT / GUNICORN_BIND    listen address (default 0.0.0.0:8000)
+    WEB_CONCURRENCY         worker count (default per role)
+    GRACEFUL_TIMEOUT        drain seconds (default per role)
+    GUNICORN_TIMEOUT        seconds before a silent worker is restarted
+    MAX_REQUESTS            restart workers after N requests (0 disables)
+    PRELOAD_FACE_MODEL      True: load the face model in each ml worker after fork
+"""
+
+import gc
+import logging
+import multiprocessing
+import os
+import time
+
+from uvicorn.workers import UvicornWorker
+
+logger = logging.getLogger("gunicorn.error")
+
+CPU_COUNT = multiprocessing.cpu_count()
+
+ROLES = {
+    "api": {
+        "workers": min(2 * CPU_COUNT + 1, 8),
+        "timeout": 60,
+        "graceful_timeout": 30,
+        "keepalive": 5,
+        "max_requests": 5000,
+        "disabled_url_modules": ["core.AI_Attendance.Attendance"],
+    },
+    "streaming": {
+        "workers": max(2, CPU_COUNT),
+        "timeout": 120,
+        "graceful_timeout": 300,
+        "keepalive": 75,
+        "max_requests": 0,
+        "disabled_url_modules": ["core.AI_Attendance.Attendance"],
+    },
+    "ml": {
+        "workers": 1,
+        "timeout": 120,
+        "graceful_timeout": 60,
+        "keepalive": 5,
+        "max_requests": 0,
+        "disabled_url_modules": [],
+    },
+    "all": {
+        "workers": min(CPU_COUNT + 1, 4),
+        "timeout": 120,
+        "graceful_timeout": 60,
+        "keepalive": 5,
+        "max_requests": 0,
+        "disabled_url_modules": [],
+    },
+}
+
+SERVER_ROLE = os.getenv("SERVER_ROLE", "all").lower()
+if SERVER_ROLE not in ROLES:
+    raise ValueError(f"SERVER_ROLE must be one of {', '.join(ROLES)}, got {SERVER_ROLE!r}")
+ROLE = ROLES[SERVER_ROLE]
+
+# Read by SampleDB/urls.py and settings when the app is imported below (explicit env wins)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "SampleDB.settings")
+os.environ.setdefault("DISABLED_URL_MODULES", ",".join(ROLE["disabled_url_modules"]))
+
+PRELOAD_FACE_MODEL = os.getenv("PRELOAD_FACE_MODEL", "False") == "True"
+
+# ---------------------------------------------------------------------------
+# gunicorn settings
+# ---------------------------------------------------------------------------
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+workers = int(os.getenv("WEB_CONCURRENCY", ROLE["workers"]))
+worker_class = "SampleDB.gunicorn_conf.IMeetUvicornWorker"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", ROLE["timeout"]))
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", ROLE["graceful_timeout"]))
+keepalive = ROLE["keepalive"]
+max_requests = int(os.getenv("MAX_REQUESTS", ROLE["max_requests"]))
+max_requests_jitter = max_requests // 10
+preload_app = True
+proc_name = f"imeet-{SERVER_ROLE}"
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+
+class IMeetUvicornWorker(UvicornWorker):
+    """uvicorn worker that drains within gunicorn's graceful_timeout"""
+
+    CONFIG_KWARGS = {
+        "loop": "auto",
+        "http": "auto",
+        # Django's ASGI handler does not implement the lifespan protocol
+        "lifespan": "off",
+        # Cancel leftover requests just before gunicorn would SIGKILL the worker
+        "timeout_graceful_shutdown": max(graceful_timeout - 5, 1),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Server hooks
+# ---------------------------------------------------------------------------
+def _close_connections():
+    """DB and cache connections must not be shared between master and workers"""
+    try:
+        from django.db import connections
+        from django.core.cache import caches
+
+        connections.close_all()
+        for cache in caches.all(initialized_only=True):
+            cache.close()
+    except Exception as e:
+        logger.error(f"❌ Closing connections failed: {e}")
+
+
+def preload_shared_state():
+    """Import everything workers would otherwise import on their first request"""
+    start = time.perf_counter()
+    from django.urls import get_resolver
+
+    # Importing the URL patterns imports every enabled URL module (and their clients/config)
+    patterns = get_resolver().url_patterns
+    try:
+        from core.utils.lazy_imports import lazy_load_times
+        lazy = lazy_load_times()
+    except ImportError:
+        lazy = {}
+
+    gc.collect()
+    # Objects created so far stay out of the GC; workers no longer touch (and copy) their pages
+    gc.freeze()
+    logger.info(
+        f"📦 [{SERVER_ROLE}] Preloaded {len(patterns)} URL patterns in "
+        f"{(time.perf_counter() - start) * 1000:.0f} ms; {gc.get_freeze_count()} objects frozen"
+        + (f"; lazy modules loaded: {', '.join(lazy)}" if lazy else "")
+    )
+
+
+def when_ready(server):
+    # The app (and Django) is already imported because preload_app=True
+    try:
+        preload_shared_state()
+    except Exception as e:
+        logger.error(f"❌ [{SERVER_ROLE}] Preload failed, workers will import on demand: {e}")
+    logger.info(
+        f"🚀 [{SERVER_ROLE}] Serving on {bind} with {workers} workers "
+        f"(timeout {timeout}s, drain {graceful_timeout}s, "
+        f"disabled URL modules: {os.environ.get('DISABLED_URL_MODULES') or 'none'})"
+    )
+
+
+def pre_fork(server, worker):
+    _close_connections()
+
+
+def post_fork(server, worker):
+    if SERVER_ROLE in ("ml", "all"):
+        try:
+            # Background thread started in the worker, so no lock is held across fork
+            from core.UserDashBoard.face_embeddings import warm_face_embedding_index
+            warm_face_embedding_index(background=True)
+        except Exception as e:
+            logger.error(f"❌ [{SERVER_ROLE}] Face index warm-up failed in worker {worker.pid}: {e}")
+
+    if PRELOAD_FACE_MODEL and SERVER_ROLE in ("ml", "all"):
+        try:
+            from core.FaceAuth.face_inference import get_face_inference
+            get_face_inference().load()
+        except Exception as e:
+            logger.error(f"❌ [{SERVER_ROLE}] Face model preload failed in worker {worker.pid}: {e}")
+
+
+def worker_int(worker):
+    logger.info(f"🛑 [{SERVER_ROLE}] Worker {worker.pid} interrupted")
+
+
+def worker_exit(server, worker):
+    _close_connections()
+    logger.info(f"👋 [{SERVER_ROLE}] Worker {worker.pid} drained and exited")
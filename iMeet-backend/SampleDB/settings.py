@@ -267,11 +267,31 @@ REST_FRAMEWORK = {
 }
 
 # Channels configuration
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer"
+# Redis-backed so meeting events published by one worker reach sockets held by another.
+# Set CHANNEL_LAYER_BACKEND=memory for single-process local development.
+CHANNEL_LAYER_REDIS_URL = os.getenv(
+    "CHANNEL_LAYER_REDIS_URL",
+    f"redis://{REDIS_HOST_OVERRIDE}:{os.getenv('REDIS_PORT', '6379')}/{os.getenv('CHANNEL_LAYER_REDIS_DB', '7')}"
+)
+
+if os.getenv("CHANNEL_LAYER_BACKEND", "redis") == "memory":
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer"
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {
+                "hosts": [CHANNEL_LAYER_REDIS_URL],
+                "capacity": int(os.getenv("CHANNEL_LAYER_CAPACITY", "1500")),
+                "expiry": int(os.getenv("CHANNEL_LAYER_EXPIRY", "10")),
+                "group_expiry": int(os.getenv("CHANNEL_LAYER_GROUP_EXPIRY", "86400")),
+            },
+        }
     }
-}
 
 # ======== CELERY CONFIGURATION FOR RECURRING MEETINGS ========
 # Set the default Django settings module for the 'celery' program
@@ -14,25 +14,40 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import os
+
 from django.contrib import admin
 from django.urls import path, include
 
+URL_MODULES = [
+    'core.livekit_recording.urls',
+    'core.WebSocketConnection.meetings',
+    'core.UserDashBoard.users',
+    'core.UserDashBoard.Analytics',
+    'core.WebSocketConnection.participants_urls',
+    'core.WebSocketConnection.chat_messages',
+    'core.AI_Attendance.Attendance',
+    # 'core.WebSocketConnection.hand_rise',
+    'core.WebSocketConnection.reactions',
+    'core.UserDashBoard.meeting_invitations',
+    'core.UserDashBoard.feedback',
+    'core.UserDashBoard.recordings',
+    'core.WebSocketConnection.notification_urls',
+    'core.WebSocketConnection.cache_only_hand_raise',
+    'core.Whiteboard.whiteboard_urls',
+    # 'core.recording_service.urls',
+]
+
+# Comma-separated URL modules this process should not import, e.g. a chat/meeting
+# worker pool that never serves attendance or recordings:
+#   DISABLED_URL_MODULES=core.AI_Attendance.Attendance,core.UserDashBoard.recordings
+# Route those paths to a pool that has them enabled. See `manage.py profile_startup`.
+DISABLED_URL_MODULES = {
+    module.strip() for module in os.getenv('DISABLED_URL_MODULES', '').split(',') if module.strip()
+}
+
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('', include('core.livekit_recording.urls')),
-    path('', include('core.WebSocketConnection.meetings')),
-    path('', include('core.UserDashBoard.users')),
-    path('', include('core.UserDashBoard.Analytics')),
-    path('', include('core.WebSocketConnection.participants_urls')),
-    path('', include('core.WebSocketConnection.chat_messages')),
-    path('', include('core.AI_Attendance.Attendance')),
-    # path('', include('core.WebSocketConnection.hand_rise')),
-    path('', include('core.WebSocketConnection.reactions')),
-    path('', include('core.UserDashBoard.meeting_invitations')),
-    path('', include('core.UserDashBoard.feedback')),
-    path('', include('core.UserDashBoard.recordings')),
-    path('', include('core.WebSocketConnection.notification_urls')),
-    path('', include('core.WebSocketConnection.cache_only_hand_raise')),
-    path('', include('core.Whiteboard.whiteboard_urls')),
-    # path('', include('core.recording_service.urls')),
-]
\ No newline at end of file
+] + [
+    path('', include(module)) for module in URL_MODULES if module not in DISABLED_URL_MODULES
+]
@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'SampleDB.settings')
 
 application = get_wsgi_application()
+
+# Create tables once per server process (runserver, WSGI servers)
+from core.utils.schema_bootstrap import bootstrap_on_startup
+try:
+    bootstrap_on_startup()
+except Exception as e:
+    import logging
+    logging.getLogger(__name__).error(f"❌ [STARTUP] Schema bootstrap failed: {e}")
@@ -6,8 +6,7 @@ import numpy as np
 import base64
 import io
 from PIL import Image
-import mediapipe as mp
-from scipy.spatial.distance import euclidean
+from math import dist as euclidean  # EAR points are (x, y) tuples; avoids importing scipy at startup
 from datetime import datetime, timedelta
 import uuid
 from functools import wraps
@@ -90,6 +89,7 @@ class AttendanceConfig:
     FACE_TRACKING_CONFIDENCE = 0.5  # Face tracking confidence threshold
     HAND_DETECTION_CONFIDENCE = 0.5  # Hand detection confidence threshold
     POSE_DETECTION_CONFIDENCE = 0.5  # Pose detection confidence threshold
+    POSE_CHECK_INTERVAL_FRAMES = 10  # Run pose on every Nth frame even when the face looks upright
     
     # ==================== IDENTITY VERIFICATION SETTINGS (NEW) ====================
     IDENTITY_CHECK_INTERVAL = 1.0  # Check identity every 1 second
@@ -1080,13 +1080,24 @@ class AttendanceSession(models.Model):
         }
         
 # ==================== MEDIAPIPE INITIALIZATION ====================
+# Graphs live in the behavior inference worker pool (one set per worker process)
 
-mp_face = mp.solutions.face_detection.FaceDetection(min_detection_confidence=AttendanceConfig.FACE_DETECTION_CONFIDENCE)
-mp_mesh = mp.solutions.face_mesh.FaceMesh(refine_landmarks=True, min_detection_confidence=0.5, min_tracking_confidence=0.5)
-mp_pose = mp.solutions.pose.Pose(min_detection_confidence=0.5)
-mp_hands = mp.solutions.hands.Hands(min_detection_confidence=0.5)
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from core.AI_Attendance.behavior_inference import (
+    behavior_inference_pool, BehaviorInferenceBusy,
+    POSE_BASELINE, POSE_MONITOR, POSE_FORCE,
+)
+
+LEFT_EYE_INDICES = [33, 160, 158, 133, 153, 144]
+RIGHT_EYE_INDICES = [362, 385, 387, 263, 373, 380]
 
-attendance_sessions = {}
+# Live session state: Redis-backed when available so every worker sees the same sessions
+from core.AI_Attendance.session_store import attendance_sessions, commits_attendance_sessions
+
+# Per-frame AttendanceSession writes are coalesced and flushed in the background
+from core.AI_Attendance.write_behind import create_write_behind
+attendance_write_behind = create_write_behind(AttendanceSession)
 
 def release_face_model_gpu():
     """Release face model GPU memory after detection"""
@@ -1113,7 +1124,7 @@ def validate_session_data(meeting_id: str, user_id):
         raise ValidationError("user_id too long")
     
     session_key = get_session_key(meeting_id, user_id)
-    concurrent_sessions = [k for k in attendance_sessions.keys() if k.startswith(f"{meeting_id}_")]
+    concurrent_sessions = attendance_sessions.meeting_keys(meeting_id)
     logger.debug(f"MULTI-USER: Validation for {user_id}. {len(concurrent_sessions)} sessions active")
 
 def get_session_key(meeting_id: str, user_id: str) -> str:
@@ -1130,17 +1141,35 @@ def decode_image(b64: str) -> Optional[np.ndarray]:
         logger.error(f"Error decoding image: {e}")
         return None
 
+def decode_image_bytes(b64: str) -> Optional[bytes]:
+    """Base64 frame -> encoded image bytes (decoded to pixels by the inference worker)"""
+    try:
+        b64 = b64.split(',')[1] if ',' in b64 else b64
+        return base64.b64decode(b64)
+    except Exception as e:
+        logger.error(f"Error decoding image: {e}")
+        return None
+
+def _point_xy(point) -> Tuple[float, float]:
+    """(x, y) of a MediaPipe landmark or a landmark array row"""
+    if hasattr(point, 'x'):
+        return point.x, point.y
+    return float(point[0]), float(point[1])
+
 def enhanced_ear(left_eye: List, right_eye: List) -> float:
     """Calculate Enhanced Eye Aspect Ratio"""
     try:
-        A = euclidean((left_eye[1].x, left_eye[1].y), (left_eye[5].x, left_eye[5].y))
-        B = euclidean((left_eye[2].x, left_eye[2].y), (left_eye[4].x, left_eye[4].y))
-        C = euclidean((left_eye[0].x, left_eye[0].y), (left_eye[3].x, left_eye[3].y))
+        left_eye = [_point_xy(p) for p in left_eye]
+        right_eye = [_point_xy(p) for p in right_eye]
+
+        A = euclidean(left_eye[1], left_eye[5])
+        B = euclidean(left_eye[2], left_eye[4])
+        C = euclidean(left_eye[0], left_eye[3])
         left_ear = (A + B) / (2.0 * C)
         
-        A = euclidean((right_eye[1].x, right_eye[1].y), (right_eye[5].x, right_eye[5].y))
-        B = euclidean((right_eye[2].x, right_eye[2].y), (right_eye[4].x, right_eye[4].y))
-        C = euclidean((right_eye[0].x, right_eye[0].y), (right_eye[3].x, right_eye[3].y))
+        A = euclidean(right_eye[1], right_eye[5])
+        B = euclidean(right_eye[2], right_eye[4])
+        C = euclidean(right_eye[0], right_eye[3])
         right_ear = (A + B) / (2.0 * C)
         
         return (left_ear + right_ear) / 2
@@ -1151,12 +1180,27 @@ def enhanced_ear(left_eye: List, right_eye: List) -> float:
 def is_fully_lying_down(landmarks) -> bool:
     """Check if person is lying down"""
     try:
-        y_vals = [landmarks[i].y for i in [11, 12, 23, 24, 25, 26]]
+        y_vals = [_point_xy(landmarks[i])[1] for i in [11, 12, 23, 24, 25, 26]]
         return np.std(y_vals) < AttendanceConfig.POSE_VARIANCE_THRESHOLD
     except Exception as e:
         logger.error(f"Error checking pose: {e}")
         return False
 
+def head_yaw(mesh: np.ndarray) -> float:
+    """Head yaw in degrees from the face-mesh cheek landmarks (234 / 454)"""
+    dx = mesh[454][0] - mesh[234][0]
+    dz = mesh[454][2] - mesh[234][2]
+    return float(np.degrees(np.arctan2(dz, dx)))
+
+def is_hand_near_face(hands: List[np.ndarray], mesh: np.ndarray) -> bool:
+    """Any hand landmark within HAND_FACE_DISTANCE of the nose tip"""
+    nose = mesh[1][:2]
+    for hand in hands:
+        distances = np.linalg.norm(hand[:, :2] - nose, axis=1)
+        if np.any(distances < AttendanceConfig.HAND_FACE_DISTANCE):
+            return True
+    return False
+
 def get_extended_tracking_data(attendance_obj):
     """Get extended tracking data from database"""
     try:
@@ -1231,7 +1275,7 @@ def save_extended_tracking_data(attendance_obj, extended_data):
     """Save extended tracking data"""
     try:
         attendance_obj.detection_counts = json.dumps(extended_data)
-        attendance_obj.save()
+        attendance_write_behind.save(attendance_obj)
         logger.info(f"DB SAVE: Extended tracking data for {attendance_obj.user_id}")
     except Exception as e:
         logger.error(f"Failed to save extended tracking data: {e}")
@@ -1280,31 +1324,22 @@ def run_async_verification(frame, user_id):
     ✅ NEW FUNCTION - Helper function to run identity verification in sync context
     """
     try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        from core.FaceAuth.unified_face_service import get_unified_face_service
+        face_service = get_unified_face_service()
         
-        try:
-            from core.FaceAuth.unified_face_service import get_unified_face_service
-            face_service = get_unified_face_service()
-            
-            result = loop.run_until_complete(
-                face_service.verify_face(
-                    frame=frame,
-                    user_id=user_id,
-                    threshold=AttendanceConfig.IDENTITY_FACE_THRESHOLD,
-                    method='cosine'
-                )
-            )
-            
-            logger.debug(
-                f"Identity verification result for {user_id}: "
-                f"verified={result[0]}, similarity={result[1]:.3f}"
-            )
-            
-            return result
-            
-        finally:
-            loop.close()
+        result = asyncio.run(face_service.verify_face(
+            frame=frame,
+            user_id=user_id,
+            threshold=AttendanceConfig.IDENTITY_FACE_THRESHOLD,
+            method='cosine'
+        ))
+        
+        logger.debug(
+            f"Identity verification result for {user_id}: "
+            f"verified={result[0]}, similarity={result[1]:.3f}"
+        )
+        
+        return result
             
     except ImportError as e:
         logger.error(f"Failed to import unified_face_service: {e}")
@@ -1391,7 +1426,7 @@ def check_identity_verification(session, db_session, frame, user_id, current_tim
             
             # Reset consecutive counter
             db_session.identity_consecutive_unknown_seconds = 0
-            db_session.save()
+            attendance_write_behind.save(db_session, immediate=db_session.identity_is_removed)
         
         # Update session state
         session['identity_consecutive_unknown_seconds'] = 0
@@ -1624,7 +1659,7 @@ def check_identity_verification(session, db_session, frame, user_id, current_tim
             # ============================================================
             # Save all changes to database
             # ============================================================
-            db_session.save()
+            attendance_write_behind.save(db_session, immediate=db_session.identity_is_removed)
             
             logger.info(
                 f"💾 Identity state saved to database for {user_id}\n"
@@ -1670,7 +1705,7 @@ def check_identity_verification(session, db_session, frame, user_id, current_tim
             )
             
             # Save consecutive counter update
-            db_session.save()
+            attendance_write_behind.save(db_session, immediate=db_session.identity_is_removed)
             
             # Return accumulation status (no popup yet)
             return {
@@ -1689,6 +1724,7 @@ def check_identity_verification(session, db_session, frame, user_id, current_tim
             }
 # ==================== INTEGRATION HOOKS ====================
 
+@commits_attendance_sessions
 def start_attendance_tracking(meeting_id: str, user_id, user_name: str = None) -> bool:
     """
     ✅ ENHANCED: Initialize attendance tracking with identity verification support
@@ -1717,7 +1753,7 @@ def start_attendance_tracking(meeting_id: str, user_id, user_name: str = None) -
     user_id = str(user_id)
     session_key = get_session_key(meeting_id, user_id)
     
-    concurrent_sessions = [k for k in attendance_sessions.keys() if k.startswith(f"{meeting_id}_")]
+    concurrent_sessions = attendance_sessions.meeting_keys(meeting_id)
     
     if session_key in attendance_sessions:
         logger.warning(f"MULTI-USER: Session already exists in memory for {meeting_id}_{user_id}")
@@ -2199,7 +2235,7 @@ def start_attendance_tracking(meeting_id: str, user_id, user_name: str = None) -
                 }
             )
             
-            final_concurrent_count = len([k for k in attendance_sessions.keys() if k.startswith(f"{meeting_id}_")])
+            final_concurrent_count = len(attendance_sessions.meeting_keys(meeting_id))
             
             logger.info(
                 f"✅ FIRST JOIN SUCCESSFUL for {user_id}:\n"
@@ -2236,19 +2272,20 @@ def start_attendance_tracking(meeting_id: str, user_id, user_name: str = None) -
 
 
 
+@commits_attendance_sessions
 def stop_attendance_tracking(meeting_id: str, user_id) -> bool:
     """Stop tracking for user"""
     user_id = str(user_id)
     session_key = get_session_key(meeting_id, user_id)
     
-    other_participants = [k for k in attendance_sessions.keys() 
-                         if k.startswith(f"{meeting_id}_") and k != session_key]
+    other_participants = [k for k in attendance_sessions.meeting_keys(meeting_id) if k != session_key]
     
     logger.info(f"MULTI-USER: Stopping tracking for {user_id}. {len(other_participants)} other participants unaffected")
     
     if session_key in attendance_sessions:
         session = attendance_sessions[session_key]
         current_time = time.time()
+        attendance_write_behind.flush(meeting_id, user_id)
         
         try:
             attendance_obj = AttendanceSession.objects.get(meeting_id=meeting_id, user_id=user_id)
@@ -2267,8 +2304,7 @@ def stop_attendance_tracking(meeting_id: str, user_id) -> bool:
         store_attendance_to_db(meeting_id, user_id)
         del attendance_sessions[session_key]
         
-        remaining_participants = [k for k in attendance_sessions.keys() 
-                                if k.startswith(f"{meeting_id}_")]
+        remaining_participants = attendance_sessions.meeting_keys(meeting_id)
         logger.info(f"MULTI-USER: User {user_id} stopped. {len(remaining_participants)} participants continue")
         
         return True
@@ -2278,6 +2314,7 @@ def stop_attendance_tracking(meeting_id: str, user_id) -> bool:
 
 
 
+@commits_attendance_sessions
 def store_attendance_to_db(meeting_id: str, user_id: str) -> bool:
     """
     ✅ ENHANCED: Store attendance session data to database with identity verification
@@ -2317,6 +2354,7 @@ def store_attendance_to_db(meeting_id: str, user_id: str) -> bool:
         return False
     
     state = attendance_sessions[session_key]
+    attendance_write_behind.flush(meeting_id, user_id)
     
     try:
         with transaction.atomic():
@@ -2516,6 +2554,7 @@ def store_attendance_to_db(meeting_id: str, user_id: str) -> bool:
         return False
 
 
+@commits_attendance_sessions
 def store_all_active_sessions_to_db(meeting_id: str = None) -> dict:
     """
     ✅ BATCH STORAGE - Store all active sessions to database at once
@@ -2573,15 +2612,18 @@ def store_all_active_sessions_to_db(meeting_id: str = None) -> dict:
     }
     
     try:
+        # Final flush of coalesced per-frame writes before the full-state save
+        results['write_behind_flushed'] = attendance_write_behind.flush(meeting_id)
+        
         # ============================================================
         # STEP 1: Filter sessions based on meeting_id
         # ============================================================
         if meeting_id:
             # Store only sessions for specific meeting
             sessions_to_store = [
-                (session_key, session_data) 
-                for session_key, session_data in attendance_sessions.items() 
-                if session_key.startswith(f"{meeting_id}_")
+                (session_key, attendance_sessions[session_key])
+                for session_key in attendance_sessions.meeting_keys(meeting_id)
+                if session_key in attendance_sessions
             ]
             logger.info(f"💾 BATCH STORAGE: Filtering sessions for meeting {meeting_id}")
         else:
@@ -2955,11 +2997,7 @@ def auto_store_attendance_periodic(meeting_id: str, interval_seconds: int = 60,
             # ============================================================
             # STEP 1: Check if meeting still has active sessions
             # ============================================================
-            active_sessions = [
-                session_key 
-                for session_key in attendance_sessions.keys() 
-                if session_key.startswith(f"{meeting_id}_")
-            ]
+            active_sessions = attendance_sessions.meeting_keys(meeting_id)
             
             if not active_sessions:
                 logger.info(
@@ -3016,6 +3054,9 @@ def auto_store_attendance_periodic(meeting_id: str, interval_seconds: int = 60,
                 logger.error(traceback.format_exc())
                 total_failed += len(active_sessions)
             
+            # This thread is not inside @commits_attendance_sessions: persist what it touched
+            attendance_sessions.flush()
+            
             # ============================================================
             # STEP 4: Sleep until next backup
             # ============================================================
@@ -3030,6 +3071,12 @@ def auto_store_attendance_periodic(meeting_id: str, interval_seconds: int = 60,
         logger.error(traceback.format_exc())
         
     finally:
+        try:
+            attendance_sessions.flush()
+            attendance_write_behind.flush(meeting_id)
+        except Exception as e:
+            logger.error(f"❌ AUTO-BACKUP final write-behind flush failed: {e}")
+        
         logger.info(
             f"\n{'='*80}\n"
             f"🛑 AUTO-BACKUP TERMINATED\n"
@@ -3047,6 +3094,7 @@ def auto_store_attendance_periodic(meeting_id: str, interval_seconds: int = 60,
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@commits_attendance_sessions
 def verify_camera_resumed(request):
     """Verify camera was re-enabled after break"""
     try:
@@ -3073,6 +3121,7 @@ def verify_camera_resumed(request):
             }, status=404)
         
         session = attendance_sessions[session_key]
+        attendance_write_behind.flush(meeting_id, user_id)
         expected_token = session.get('camera_confirmation_token')
         
         if not expected_token:
@@ -3146,6 +3195,7 @@ def verify_camera_resumed(request):
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@commits_attendance_sessions
 def pause_resume_attendance(request):
     """
     ✅ FIXED: Enhanced pause/resume with STRICT 5-minute break enforcement
@@ -3182,8 +3232,7 @@ def pause_resume_attendance(request):
         validate_session_data(meeting_id, user_id)
         session_key = get_session_key(meeting_id, user_id)
         
-        other_participants = [k for k in attendance_sessions.keys() 
-                            if k.startswith(f"{meeting_id}_") and k != session_key]
+        other_participants = [k for k in attendance_sessions.meeting_keys(meeting_id) if k != session_key]
         
         logger.info(f"MULTI-USER: {action} request for {user_id}. {len(other_participants)} other participants unaffected")
         
@@ -3194,6 +3243,7 @@ def pause_resume_attendance(request):
             }, status=404)
         
         session = attendance_sessions[session_key]
+        attendance_write_behind.flush(meeting_id, user_id)
         current_time = time.time()
         
         try:
@@ -3506,6 +3556,7 @@ def pause_resume_attendance(request):
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@commits_attendance_sessions
 def detect_violations(request):
     """
     ✅ UPDATED: Complete detect_violations with CORRECT 20-second threshold
@@ -3539,7 +3590,7 @@ def detect_violations(request):
             return JsonResponse({"status": "error", "message": "Missing data"}, status=400)
 
         session_key = get_session_key(meeting_id, user_id)
-        concurrent_sessions = [k for k in attendance_sessions.keys() if k.startswith(f"{meeting_id}_")]
+        concurrent_sessions = attendance_sessions.meeting_keys(meeting_id)
         
         if session_key not in attendance_sessions:
             logger.info(f"MULTI-USER: Auto-starting session for {user_id}")
@@ -3672,7 +3723,7 @@ def detect_violations(request):
         # SYNC FROM DATABASE
         # ============================================================
         try:
-            db_session = AttendanceSession.objects.get(meeting_id=meeting_id, user_id=user_id)
+            db_session = attendance_write_behind.get(meeting_id, user_id)
             extended_data = get_extended_tracking_data(db_session)
             
             if session.get('warning_count', 0) == 0 and extended_data.get('warning_count', 0) > 0:
@@ -3804,18 +3855,42 @@ def detect_violations(request):
         # ============================================================
         # PROCESS FRAME FOR BEHAVIOR DETECTION
         # ============================================================
-        frame = decode_image(frame_data)
-        if frame is None:
+        frame_bytes = decode_image_bytes(frame_data)
+        if not frame_bytes:
             return JsonResponse({"status": "error", "message": "Failed to decode frame"}, status=400)
         
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         session["frame_processing_count"] += 1
+        baseline_established = session.get("baseline_established", False)
+        
+        # Staged MediaPipe processing: pose only when it can change the outcome
+        if not baseline_established:
+            pose_policy = POSE_BASELINE
+        elif session["frame_processing_count"] % AttendanceConfig.POSE_CHECK_INTERVAL_FRAMES == 0:
+            pose_policy = POSE_FORCE
+        else:
+            pose_policy = POSE_MONITOR
+        
+        try:
+            inference = behavior_inference_pool.infer(
+                frame_bytes, pose_policy=pose_policy, need_hands=baseline_established
+            )
+        except (BehaviorInferenceBusy, FutureTimeoutError, BrokenProcessPool) as e:
+            # Backpressure: a full queue, a slow batch or a pool being rebuilt all skip this frame
+            reason = "queue full" if isinstance(e, BehaviorInferenceBusy) else (
+                "timed out" if isinstance(e, FutureTimeoutError) else "pool restarting"
+            )
+            logger.warning(f"⏭️ Behavior inference {reason}, skipping frame for {user_id}")
+            return JsonResponse({
+                "status": "skipped",
+                "message": "Server busy, frame skipped",
+                "retry_after_ms": 500,
+            })
+        
+        if not inference.get('ok'):
+            return JsonResponse({"status": "error", "message": "Failed to decode frame"}, status=400)
         
-        # MediaPipe processing
-        face_results = mp_face.process(rgb)
-        mesh_results = mp_mesh.process(rgb)
-        pose_results = mp_pose.process(rgb)
-        hand_results = mp_hands.process(rgb)
+        mesh = inference['mesh']
+        pose = inference['pose']
         
         violations = []
         immediate_violations = []
@@ -3827,33 +3902,26 @@ def detect_violations(request):
         # ============================================================
         # FACE DETECTION
         # ============================================================
-        if face_results.detections:
-            num_faces = len(face_results.detections)
-            if num_faces > 1:
-                violations.append("Multiple faces detected")
-                immediate_violations.append("Multiple faces detected")
-            elif num_faces == 1:
-                session["face_detected"] = True
-                session["last_face_movement_time"] = current_time
-                session["inactivity_popup_shown"] = False
+        num_faces = inference['num_faces']
+        if num_faces > 1:
+            violations.append("Multiple faces detected")
+            immediate_violations.append("Multiple faces detected")
+        elif num_faces == 1:
+            session["face_detected"] = True
+            session["last_face_movement_time"] = current_time
+            session["inactivity_popup_shown"] = False
+        
+        # Pose is skipped on most frames; keep the last verdict until it runs again
+        if inference['pose_ran']:
+            session["last_lying_down"] = pose is not None and is_fully_lying_down(pose)
         
         # ============================================================
         # BASELINE ESTABLISHMENT
         # ============================================================
-        if not session.get("baseline_established", False):
-            if mesh_results.multi_face_landmarks and pose_results.pose_landmarks:
-                landmarks = mesh_results.multi_face_landmarks[0].landmark
-                
-                left_eye = [landmarks[i] for i in [33, 160, 158, 133, 153, 144]]
-                right_eye = [landmarks[i] for i in [362, 385, 387, 263, 373, 380]]
-                ear = enhanced_ear(left_eye, right_eye)
-                
-                nose = landmarks[1]
-                left_face = landmarks[234]
-                right_face = landmarks[454]
-                dx = right_face.x - left_face.x
-                dz = right_face.z - left_face.z
-                yaw = np.degrees(np.arctan2(dz, dx))
+        if not baseline_established:
+            if mesh is not None and pose is not None:
+                ear = enhanced_ear(mesh[LEFT_EYE_INDICES], mesh[RIGHT_EYE_INDICES])
+                yaw = head_yaw(mesh)
                 
                 if session["baseline_ear"] is None:
                     session["baseline_ear"] = ear
@@ -3875,43 +3943,25 @@ def detect_violations(request):
         # VIOLATION DETECTION
         # ============================================================
         if session.get("baseline_established", False):
-            # Eyes closed
-            if mesh_results.multi_face_landmarks:
-                landmarks = mesh_results.multi_face_landmarks[0].landmark
-                left_eye = [landmarks[i] for i in [33, 160, 158, 133, 153, 144]]
-                right_eye = [landmarks[i] for i in [362, 385, 387, 263, 373, 380]]
-                ear = enhanced_ear(left_eye, right_eye)
+            if mesh is not None:
+                # Eyes closed
+                ear = enhanced_ear(mesh[LEFT_EYE_INDICES], mesh[RIGHT_EYE_INDICES])
                 baseline_ear = session.get("baseline_ear", 0.22)
                 if ear < baseline_ear * 0.7:
                     violations.append("Eyes closed")
-            
-            # Head turned
-            if mesh_results.multi_face_landmarks:
-                landmarks = mesh_results.multi_face_landmarks[0].landmark
-                left_face = landmarks[234]
-                right_face = landmarks[454]
-                dx = right_face.x - left_face.x
-                dz = right_face.z - left_face.z
-                yaw = np.degrees(np.arctan2(dz, dx))
+                
+                # Head turned
                 baseline_yaw = session.get("baseline_yaw", 0)
-                if abs(yaw - baseline_yaw) > 25:
+                if abs(head_yaw(mesh) - baseline_yaw) > AttendanceConfig.HEAD_YAW_THRESHOLD:
                     violations.append("Head turned")
-            
-            # Hand near face
-            if hand_results.multi_hand_landmarks and mesh_results.multi_face_landmarks:
-                face_landmarks = mesh_results.multi_face_landmarks[0].landmark
-                nose = face_landmarks[1]
-                for hand_landmarks in hand_results.multi_hand_landmarks:
-                    for landmark in hand_landmarks.landmark:
-                        distance = np.sqrt((landmark.x - nose.x)**2 + (landmark.y - nose.y)**2)
-                        if distance < 0.12:
-                            violations.append("Hand near face")
-                            break
+                
+                # Hand near face
+                if inference['hands'] and is_hand_near_face(inference['hands'], mesh):
+                    violations.append("Hand near face")
             
             # Lying down
-            if pose_results.pose_landmarks:
-                if is_fully_lying_down(pose_results.pose_landmarks.landmark):
-                    violations.append("Lying down")
+            if session.get("last_lying_down", False):
+                violations.append("Lying down")
             
             # Face not visible
             if not session.get("face_detected", False):
@@ -3984,25 +4034,25 @@ def detect_violations(request):
                 
                 # Save to database
                 try:
-                    db_session = AttendanceSession.objects.get(meeting_id=meeting_id, user_id=user_id)
+                    db_session = attendance_write_behind.get(meeting_id, user_id)
                     extended_data = get_extended_tracking_data(db_session)
                     extended_data['warning_count'] = session["popup_count"]
                     db_session.popup_count = session["popup_count"]
                     save_extended_tracking_data(db_session, extended_data)
-                    db_session.save()
+                    attendance_write_behind.save(db_session)
                 except Exception as e:
                     logger.error(f"Failed to save warning: {e}")
                 
                 # Save warning message
                 try:
-                    db_session = AttendanceSession.objects.get(meeting_id=meeting_id, user_id=user_id)
+                    db_session = attendance_write_behind.get(meeting_id, user_id)
                     db_session.add_behavior_warning(
                         warning_number=session["popup_count"],
                         violation_type=violation_to_show,
                         duration=violation_duration,
                         timestamp=current_time
                     )
-                    db_session.save()
+                    attendance_write_behind.save(db_session)
                     session["behavior_messages"] = db_session.get_behavior_messages()
                 except Exception as e:
                     logger.error(f"Failed to save warning message: {e}")
@@ -4026,7 +4076,7 @@ def detect_violations(request):
                     
                     # Save detection
                     try:
-                        db_session = AttendanceSession.objects.get(meeting_id=meeting_id, user_id=user_id)
+                        db_session = attendance_write_behind.get(meeting_id, user_id)
                         extended_data = get_extended_tracking_data(db_session)
                         extended_data['detection_counts'] = session["detection_counts"]
                         extended_data['last_detection_time'] = current_time
@@ -4055,7 +4105,7 @@ def detect_violations(request):
                         
                         # Save penalty
                         try:
-                            db_session = AttendanceSession.objects.get(meeting_id=meeting_id, user_id=user_id)
+                            db_session = attendance_write_behind.get(meeting_id, user_id)
                             db_session.attendance_penalty = session["attendance_penalty"]
                             db_session.attendance_percentage = max(0, 100 - session["attendance_penalty"])
                             db_session.engagement_score = max(0, 100 - session["attendance_penalty"])
@@ -4064,7 +4114,7 @@ def detect_violations(request):
                             extended_data['detection_penalty_applied'] = True
                             extended_data['total_detection_penalty'] = total_detection_penalty
                             save_extended_tracking_data(db_session, extended_data)
-                            db_session.save()
+                            attendance_write_behind.save(db_session)
                         except Exception as e:
                             logger.error(f"Failed to save penalty: {e}")
                     else:
@@ -4072,7 +4122,7 @@ def detect_violations(request):
                     
                     # Save detection message
                     try:
-                        db_session = AttendanceSession.objects.get(meeting_id=meeting_id, user_id=user_id)
+                        db_session = attendance_write_behind.get(meeting_id, user_id)
                         db_session.add_behavior_detection(
                             detection_number=session["detection_counts"],
                             violation_type=violation_to_show,
@@ -4080,7 +4130,7 @@ def detect_violations(request):
                             timestamp=current_time,
                             penalty=new_penalty if new_penalty > 0 else 0.0
                         )
-                        db_session.save()
+                        attendance_write_behind.save(db_session)
                         session["behavior_messages"] = db_session.get_behavior_messages()
                     except Exception as e:
                         logger.error(f"Failed to save detection message: {e}")
@@ -4121,7 +4171,7 @@ def detect_violations(request):
                     
                     # Save removal
                     try:
-                        db_session = AttendanceSession.objects.get(meeting_id=meeting_id, user_id=user_id)
+                        db_session = attendance_write_behind.get(meeting_id, user_id)
                         db_session.behavior_removal_count = session["behavior_removal_count"]
                         db_session.continuous_violation_removal_count = session["continuous_violation_removal_count"]
                         
@@ -4140,7 +4190,7 @@ def detect_violations(request):
                         
                         db_session.attendance_penalty = session["attendance_penalty"]
                         db_session.session_active = False
-                        db_session.save()
+                        attendance_write_behind.save(db_session, immediate=True)
                         
                         # Update session behavior messages
                         session["behavior_messages"] = db_session.get_behavior_messages()
@@ -4195,7 +4245,7 @@ def detect_violations(request):
         # SAVE TO DATABASE
         # ============================================================
         try:
-            db_session = AttendanceSession.objects.get(meeting_id=meeting_id, user_id=user_id)
+            db_session = attendance_write_behind.get(meeting_id, user_id)
             
             extended_data = {
                 'detection_counts': session.get("detection_counts", 0),
@@ -4245,7 +4295,7 @@ def detect_violations(request):
             db_session.behavior_removal_count = session.get("behavior_removal_count", 0)
             db_session.continuous_violation_removal_count = session.get("continuous_violation_removal_count", 0)
             
-            db_session.save()
+            attendance_write_behind.save(db_session)
         except AttendanceSession.DoesNotExist:
             pass
         
@@ -4333,6 +4383,7 @@ def detect_violations(request):
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@commits_attendance_sessions
 def take_break(request):
     """Handle break (legacy endpoint)"""
     try:
@@ -4343,13 +4394,13 @@ def take_break(request):
         validate_session_data(meeting_id, user_id)
         session_key = get_session_key(meeting_id, user_id)
         
-        other_participants = [k for k in attendance_sessions.keys() 
-                            if k.startswith(f"{meeting_id}_") and k != session_key]
+        other_participants = [k for k in attendance_sessions.meeting_keys(meeting_id) if k != session_key]
         
         if session_key not in attendance_sessions:
             return JsonResponse({"status": "error", "message": "Session not active"}, status=403)
 
         session = attendance_sessions[session_key]
+        attendance_write_behind.flush(meeting_id, user_id)
         if session["break_used"]:
             return JsonResponse({"status": "error", "message": "Break already used"}, status=400)
 
@@ -4372,9 +4423,12 @@ def take_break(request):
         except AttendanceSession.DoesNotExist:
             pass
 
+        @commits_attendance_sessions
         def resume_after_break():
             time.sleep(AttendanceConfig.BREAK_DURATION)
             if session_key in attendance_sessions:
+                # Re-read: another worker may have updated the session during the break
+                session = attendance_sessions[session_key]
                 session["session_active"] = True
                 session["last_face_movement_time"] = time.time()
                 session["popup_count"] = 0
@@ -4440,6 +4494,7 @@ def take_break(request):
 
 @csrf_exempt
 @require_http_methods(["GET"])
+@commits_attendance_sessions
 def get_attendance_status(request):
     """
     ✅ ENHANCED: Get attendance status with continuous violation tracking
@@ -4465,7 +4520,7 @@ def get_attendance_status(request):
         validate_session_data(meeting_id, user_id)
         session_key = get_session_key(meeting_id, user_id)
         
-        concurrent_sessions = [k for k in attendance_sessions.keys() if k.startswith(f"{meeting_id}_")]
+        concurrent_sessions = attendance_sessions.meeting_keys(meeting_id)
         other_participants_count = len([k for k in concurrent_sessions if k != session_key])
         
         # ============================================================
@@ -4829,6 +4884,7 @@ def get_attendance_status(request):
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@commits_attendance_sessions
 def start_attendance_tracking_api(request):
     """Start tracking API"""
     try:
@@ -4843,11 +4899,11 @@ def start_attendance_tracking_api(request):
         user_id_str = str(user_id)
         validate_session_data(meeting_id, user_id_str)
         
-        concurrent_sessions = [k for k in attendance_sessions.keys() if k.startswith(f"{meeting_id}_")]
+        concurrent_sessions = attendance_sessions.meeting_keys(meeting_id)
         success = start_attendance_tracking(meeting_id, user_id_str, user_name)
         
         if success:
-            final_concurrent_sessions = [k for k in attendance_sessions.keys() if k.startswith(f"{meeting_id}_")]
+            final_concurrent_sessions = attendance_sessions.meeting_keys(meeting_id)
             
             return JsonResponse({
                 'success': True,
@@ -4880,6 +4936,7 @@ def start_attendance_tracking_api(request):
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@commits_attendance_sessions
 def stop_attendance_tracking_api(request):
     """Stop tracking API with SAFE GPU cleanup"""
     try:
@@ -4893,14 +4950,14 @@ def stop_attendance_tracking_api(request):
         user_id_str = str(user_id)
         validate_session_data(meeting_id, user_id_str)
         
-        concurrent_sessions_before = [k for k in attendance_sessions.keys() if k.startswith(f"{meeting_id}_")]
+        concurrent_sessions_before = attendance_sessions.meeting_keys(meeting_id)
         session_key = get_session_key(meeting_id, user_id_str)
         other_participants_before = [k for k in concurrent_sessions_before if k != session_key]
         
         # ✅ FIRST: Stop the attendance session (stops frame processing)
         success = stop_attendance_tracking(meeting_id, user_id_str)
         
-        concurrent_sessions_after = [k for k in attendance_sessions.keys() if k.startswith(f"{meeting_id}_")]
+        concurrent_sessions_after = attendance_sessions.meeting_keys(meeting_id)
         
         is_last_participant = len(concurrent_sessions_after) == 0
         gpu_released = False
@@ -4929,17 +4986,7 @@ def stop_attendance_tracking_api(request):
             try:
                 logger.info(f"🔄 Attempting to release face model GPU memory...")
                 
-                import sys
-                import os
-                
-                current_dir = os.path.dirname(os.path.abspath(__file__))
-                faceauth_dir = os.path.join(current_dir, '..', 'FaceAuth')
-                faceauth_dir = os.path.abspath(faceauth_dir)
-                
-                if faceauth_dir not in sys.path:
-                    sys.path.insert(0, faceauth_dir)
-                
-                from face_model_shared import unload_face_model
+                from core.FaceAuth.face_model_shared import unload_face_model
                 unload_face_model()
                 gpu_released = True
                 logger.info(f"✅ Face model GPU memory released safely for meeting {meeting_id}")
@@ -0,0 +1,380 @@
+# core/AI_Attendance/behavior_inference.py
+
+"""
+Behavior Inference Pool
+=======================
+MediaPipe inference for detect_violations, shared by every attendee.
+
+- Worker processes each own one set of FaceDetection / FaceMesh / Pose / Hands
+  graphs (MediaPipe graphs are not safe to share between threads)
+- Requests go through a bounded queue; a dispatcher thread groups them into
+  micro-batches across participants so one IPC round trip covers many frames
+- Inference is staged: face detection first, the mesh only if a face was
+  found, hands only when the caller needs them and a mesh exists, and pose
+  only for baseline frames, when the face looks tilted/missing, or on the
+  caller's periodic check
+
+Frames from different participants interleave through the same graphs, so
+the mesh/pose/hands graphs run in static image mode (no cross-frame tracking).
+
+Kept free of Django imports: worker processes import only this module.
+"""
+
+import atexit
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger('core.AI_Attendance.Attendance')
+
+# Per web process: under gunicorn the host runs workers x this many inference processes
+BEHAVIOR_INFERENCE_WORKERS = int(os.getenv("BEHAVIOR_INFERENCE_WORKERS", 2))
+BEHAVIOR_INFERENCE_QUEUE_SIZE = int(os.getenv("BEHAVIOR_INFERENCE_QUEUE_SIZE", 256))
+BEHAVIOR_INFERENCE_BATCH_SIZE = int(os.getenv("BEHAVIOR_INFERENCE_BATCH_SIZE", 8))
+BEHAVIOR_INFERENCE_BATCH_WAIT_MS = float(os.getenv("BEHAVIOR_INFERENCE_BATCH_WAIT_MS", 10))
+BEHAVIOR_INFERENCE_TIMEOUT = float(os.getenv("BEHAVIOR_INFERENCE_TIMEOUT", 5))
+
+FACE_DETECTION_CONFIDENCE = 0.7
+LANDMARK_CONFIDENCE = 0.5
+
+# Pose policies
+POSE_BASELINE = 'baseline'   # pose needed together with the mesh for baseline
+POSE_MONITOR = 'monitor'     # pose only if the face is missing or tilted
+POSE_FORCE = 'force'         # periodic full check
+
+# Eye-line roll above which a lying-down check is worth running
+POSE_ROLL_TRIGGER_DEGREES = 35.0
+
+# FaceMesh indices of the outer eye corners (left 33, right 263)
+_LEFT_EYE_CORNER = 33
+_RIGHT_EYE_CORNER = 263
+
+
+class BehaviorInferenceBusy(Exception):
+    """Raised when the request queue is full (frame should be skipped)"""
+
+
+# ============================================================================
+# WORKER SIDE
+# ============================================================================
+
+_worker_graphs = None
+_thread_graphs = threading.local()
+
+
+def _create_graphs():
+    import mediapipe as mp
+    return {
+        'face': mp.solutions.face_detection.FaceDetection(
+            min_detection_confidence=FACE_DETECTION_CONFIDENCE
+        ),
+        'mesh': mp.solutions.face_mesh.FaceMesh(
+            static_image_mode=True, max_num_faces=1, refine_landmarks=True,
+            min_detection_confidence=LANDMARK_CONFIDENCE
+        ),
+        'pose': mp.solutions.pose.Pose(
+            static_image_mode=True, min_detection_confidence=LANDMARK_CONFIDENCE
+        ),
+        'hands': mp.solutions.hands.Hands(
+            static_image_mode=True, min_detection_confidence=LANDMARK_CONFIDENCE
+        ),
+    }
+
+
+def _init_worker():
+    global _worker_graphs
+    _worker_graphs = _create_graphs()
+
+
+def _decode_frame(frame):
+    """Raw JPEG/PNG bytes or a BGR array -> RGB array"""
+    if isinstance(frame, (bytes, bytearray)):
+        frame = cv2.imdecode(np.frombuffer(frame, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            return None
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+
+def _landmarks_to_array(landmark_list, with_visibility=False):
+    if with_visibility:
+        return np.array([(p.x, p.y, p.z, p.visibility) for p in landmark_list.landmark], dtype=np.float32)
+    return np.array([(p.x, p.y, p.z) for p in landmark_list.landmark], dtype=np.float32)
+
+
+def _eye_roll_degrees(mesh):
+    left = mesh[_LEFT_EYE_CORNER]
+    right = mesh[_RIGHT_EYE_CORNER]
+    return abs(float(np.degrees(np.arctan2(right[1] - left[1], right[0] - left[0]))))
+
+
+def _infer_one(graphs, frame, pose_policy, need_hands):
+    started = time.perf_counter()
+    result = {
+        'ok': False,
+        'num_faces': 0,
+        'mesh': None,
+        'pose': None,
+        'pose_ran': False,
+        'hands': [],
+        'hands_ran': False,
+    }
+
+    rgb = _decode_frame(frame)
+    if rgb is None:
+        return result
+    result['ok'] = True
+
+    face_results = graphs['face'].process(rgb)
+    result['num_faces'] = len(face_results.detections) if face_results.detections else 0
+
+    if result['num_faces']:
+        mesh_results = graphs['mesh'].process(rgb)
+        if mesh_results.multi_face_landmarks:
+            result['mesh'] = _landmarks_to_array(mesh_results.multi_face_landmarks[0])
+
+    mesh = result['mesh']
+    if pose_policy == POSE_FORCE:
+        run_pose = True
+    elif pose_policy == POSE_BASELINE:
+        run_pose = mesh is not None
+    else:
+        run_pose = mesh is None or _eye_roll_degrees(mesh) > POSE_ROLL_TRIGGER_DEGREES
+
+    if run_pose:
+        pose_results = graphs['pose'].process(rgb)
+        result['pose_ran'] = True
+        if pose_results.pose_landmarks:
+            result['pose'] = _landmarks_to_array(pose_results.pose_landmarks, with_visibility=True)
+
+    if need_hands and mesh is not None:
+        hand_results = graphs['hands'].process(rgb)
+        result['hands_ran'] = True
+        if hand_results.multi_hand_landmarks:
+            result['hands'] = [_landmarks_to_array(h) for h in hand_results.multi_hand_landmarks]
+
+    result['inference_ms'] = (time.perf_counter() - started) * 1000
+    return result
+
+
+def _process_batch(batch):
+    """Runs in a worker process: [(frame, pose_policy, need_hands), ...] -> [result, ...]"""
+    graphs = _worker_graphs or _create_graphs()
+    results = []
+    for frame, pose_policy, need_hands in batch:
+        try:
+            results.append(_infer_one(graphs, frame, pose_policy, need_hands))
+        except Exception as e:
+            results.append({'ok': False, 'error': str(e)})
+    return results
+
+
+# ============================================================================
+# DISPATCHER SIDE
+# ============================================================================
+
+class BehaviorInferencePool:
+    """Singleton front-end: bounded queue -> micro-batches -> worker processes"""
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                instance = super().__new__(cls)
+                instance._lock = threading.Lock()
+                instance._reset()
+                cls._instance = instance
+        return cls._instance
+
+    def _reset(self):
+        self.workers = BEHAVIOR_INFERENCE_WORKERS
+        self.batch_size = max(1, BEHAVIOR_INFERENCE_BATCH_SIZE)
+        self.batch_wait = BEHAVIOR_INFERENCE_BATCH_WAIT_MS / 1000.0
+        self._queue = queue.Queue(maxsize=BEHAVIOR_INFERENCE_QUEUE_SIZE)
+        self._executor = None
+        self._dispatcher = None
+        self._in_flight = threading.Semaphore(max(1, self.workers) * 2)
+        self._started = False
+
+        self.requests = 0
+        self.batches = 0
+        self.frames_batched = 0
+        self.rejected = 0
+        self.failed = 0
+        self.pose_runs = 0
+        self.hands_runs = 0
+        self.total_latency_ms = 0.0
+
+    def _ensure_started(self):
+        if self._started:
+            return
+        with self._lock:
+            if self._started:
+                return
+            self._executor = self._create_executor()
+            self._dispatcher = threading.Thread(
+                target=self._dispatch_loop, daemon=True, name="BehaviorInferenceDispatcher"
+            )
+            self._dispatcher.start()
+            self._started = True
+
+    def _create_executor(self):
+        if self.workers <= 0:
+            return None
+        try:
+            # spawn: workers must not inherit Django's threads / DB connections
+            executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker
+            )
+            logger.info(f"🧠 Behavior inference pool: {self.workers} worker process(es), "
+                        f"batch {self.batch_size}, queue {self._queue.maxsize}")
+            return executor
+        except Exception as e:
+            logger.error(f"❌ Could not start inference processes, running in-process: {e}")
+            return None
+
+    def _replace_broken_executor(self, broken):
+        """A worker process died (OOM, segfault): start a fresh pool once per breakage"""
+        with self._lock:
+            if self._executor is not broken:
+                return
+            logger.warning("⚠️ Behavior inference pool broken, restarting worker processes")
+            try:
+                broken.shutdown(wait=False, cancel_futures=True)
+            except Exception:
+                pass
+            self._executor = self._create_executor()
+
+    def submit(self, frame, pose_policy=POSE_MONITOR, need_hands=False) -> Future:
+        """
+        Queue one frame (encoded image bytes or BGR array).
+
+        Raises:
+            BehaviorInferenceBusy: the bounded queue is full
+        """
+        self._ensure_started()
+        future = Future()
+        try:
+            self._queue.put_nowait(((frame, pose_policy, need_hands), future, time.perf_counter()))
+        except queue.Full:
+            self.rejected += 1
+            raise BehaviorInferenceBusy("Behavior inference queue is full")
+        self.requests += 1
+        return future
+
+    def infer(self, frame, pose_policy=POSE_MONITOR, need_hands=False, timeout=BEHAVIOR_INFERENCE_TIMEOUT) -> dict:
+        """Blocking helper around submit()"""
+        return self.submit(frame, pose_policy, need_hands).result(timeout=timeout)
+
+    def _collect_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _dispatch_loop(self):
+        while True:
+            try:
+                batch = self._collect_batch()
+                self.batches += 1
+                self.frames_batched += len(batch)
+                payload = [item[0] for item in batch]
+
+                if self._executor is None:
+                    self._complete(batch, self._run_inline(payload))
+                    continue
+
+                executor = self._executor
+                self._in_flight.acquire()
+                try:
+                    pending = executor.submit(_process_batch, payload)
+                except Exception as e:
+                    self._in_flight.release()
+                    if isinstance(e, BrokenProcessPool):
+                        self._replace_broken_executor(executor)
+                    self._fail(batch, e)
+                    continue
+                pending.add_done_callback(lambda f, b=batch, ex=executor: self._on_batch_done(f, b, ex))
+            except Exception as e:
+                logger.error(f"❌ Behavior inference dispatcher error: {e}")
+
+    def _run_inline(self, payload):
+        graphs = getattr(_thread_graphs, 'graphs', None)
+        if graphs is None:
+            graphs = _thread_graphs.graphs = _create_graphs()
+        results = []
+        for frame, pose_policy, need_hands in payload:
+            try:
+                results.append(_infer_one(graphs, frame, pose_policy, need_hands))
+            except Exception as e:
+                results.append({'ok': False, 'error': str(e)})
+        return results
+
+    def _on_batch_done(self, pending, batch, executor):
+        self._in_flight.release()
+        try:
+            self._complete(batch, pending.result())
+        except BrokenProcessPool as e:
+            self._replace_broken_executor(executor)
+            self._fail(batch, e)
+        except Exception as e:
+            self._fail(batch, e)
+
+    def _complete(self, batch, results):
+        now = time.perf_counter()
+        for (_, future, queued_at), result in zip(batch, results):
+            self.total_latency_ms += (now - queued_at) * 1000
+            self.pose_runs += bool(result.get('pose_ran'))
+            self.hands_runs += bool(result.get('hands_ran'))
+            if not future.done():
+                future.set_result(result)
+
+    def _fail(self, batch, error):
+        self.failed += len(batch)
+        logger.error(f"❌ Behavior inference batch failed ({len(batch)} frames): {error}")
+        for _, future, _ in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    def stats(self) -> dict:
+        completed = max(self.frames_batched - self._queue.qsize(), 1)
+        return {
+            'workers': self.workers if self._executor else 0,
+            'queue_depth': self._queue.qsize(),
+            'queue_capacity': self._queue.maxsize,
+            'requests': self.requests,
+            'rejected': self.rejected,
+            'failed': self.failed,
+            'batches': self.batches,
+            'avg_batch_size': round(self.frames_batched / self.batches, 2) if self.batches else 0,
+            'avg_latency_ms': round(self.total_latency_ms / completed, 2),
+            'pose_run_ratio': round(self.pose_runs / completed, 3),
+            'hands_run_ratio': round(self.hands_runs / completed, 3),
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+behavior_inference_pool = BehaviorInferencePool()
+atexit.register(behavior_inference_pool.shutdown)
@@ -0,0 +1,515 @@
+# core/AI_Attendance/session_store.py
+
+"""
+Attendance Session Store
+========================
+Live attendance state shared by every worker process.
+
+`attendance_sessions` keeps its dict-like interface (`in`, `[]`, `del`,
+`keys()`, `items()`), so views keep mutating the returned session dict in
+place. Changes are written back when the outermost `@commits_attendance_sessions`
+function returns. Threads that touch sessions outside a decorated call
+(background loops) must call `attendance_sessions.flush()` themselves.
+
+Backends (ATTENDANCE_SESSION_BACKEND):
+- 'redis'  : one hash per session, one compact JSON value per field, a
+             `__v` version field for optimistic concurrency, TTL refreshed
+             on every write, plus a per-meeting index set
+- 'memory' : the old process-local dict (single worker only)
+- 'auto'   : redis when reachable, memory otherwise (default)
+
+The backend is picked (and Redis pinged) on first use, not at import, so
+management commands and a preforking server master never connect.
+
+Reads go through a small local cache: a session read again within
+ATTENDANCE_SESSION_LOCAL_TTL seconds costs nothing, and after that only the
+version field is re-checked before the full hash is reloaded. Writes send
+just the fields that changed. On a version conflict the remote copy is
+reloaded, this worker's changed fields are applied on top, and the write is
+retried.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import MutableMapping
+from datetime import date, datetime
+from decimal import Decimal
+from functools import wraps
+
+import redis
+
+logger = logging.getLogger('core.AI_Attendance.Attendance')
+
+ATTENDANCE_SESSION_BACKEND = os.getenv("ATTENDANCE_SESSION_BACKEND", "auto").lower()
+ATTENDANCE_SESSION_TTL = int(os.getenv("ATTENDANCE_SESSION_TTL", 6 * 3600))
+ATTENDANCE_SESSION_LOCAL_TTL = float(os.getenv("ATTENDANCE_SESSION_LOCAL_TTL", 1.0))
+ATTENDANCE_SESSION_MAX_RETRIES = 5
+
+ATTENDANCE_SESSION_REDIS_CONFIG = {
+    'host': os.getenv("ATTENDANCE_SESSION_REDIS_HOST", os.getenv("REDIS_HOST", "localhost")),
+    'port': int(os.getenv("ATTENDANCE_SESSION_REDIS_PORT", os.getenv("REDIS_PORT", 6379))),
+    # 7 is the channel layer's default DB (CHANNEL_LAYER_REDIS_DB)
+    'db': int(os.getenv("ATTENDANCE_SESSION_REDIS_DB", 9)),
+    'decode_responses': True,
+    'socket_timeout': int(os.getenv("ATTENDANCE_SESSION_REDIS_SOCKET_TIMEOUT", 5)),
+    'socket_connect_timeout': int(os.getenv("ATTENDANCE_SESSION_REDIS_CONNECT_TIMEOUT", 5)),
+    'retry_on_timeout': True,
+}
+
+SESSION_KEYS = {
+    'session': 'attendance:session:{session_key}',
+    'meeting_index': 'attendance:sessions:{meeting_id}',
+    'all_meetings': 'attendance:meetings',
+}
+
+VERSION_FIELD = '__v'
+
+
+# ============================================================================
+# ENCODING
+# ============================================================================
+
+def _encode_default(value):
+    if isinstance(value, datetime):
+        return {'$dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'$d': value.isoformat()}
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if hasattr(value, 'item'):  # numpy scalars
+        return value.item()
+    if hasattr(value, 'tolist'):  # numpy arrays
+        return value.tolist()
+    raise TypeError(f"Cannot encode {type(value).__name__} in attendance session")
+
+
+def _decode_hook(obj):
+    if len(obj) == 1:
+        if '$dt' in obj:
+            return datetime.fromisoformat(obj['$dt'])
+        if '$d' in obj:
+            return date.fromisoformat(obj['$d'])
+    return obj
+
+
+def encode_value(value) -> str:
+    return json.dumps(value, separators=(',', ':'), default=_encode_default)
+
+
+def decode_value(raw: str):
+    return json.loads(raw, object_hook=_decode_hook)
+
+
+def _meeting_id_of(session_key: str, session=None) -> str:
+    """Meeting of a session; falls back to splitting the "{meeting_id}_{user_id}" key"""
+    if session and session.get('meeting_id'):
+        return str(session['meeting_id'])
+    return session_key.rsplit('_', 1)[0]
+
+
+# ============================================================================
+# COMMIT SCOPE
+# ============================================================================
+
+_scope = threading.local()
+
+
+def _touched() -> set:
+    if not hasattr(_scope, 'touched'):
+        _scope.touched = set()
+        _scope.depth = 0
+    return _scope.touched
+
+
+def commits_attendance_sessions(func):
+    """
+    Write back every session read or written by this thread when the
+    outermost decorated call returns (or raises).
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        _touched()
+        _scope.depth += 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _scope.depth -= 1
+            if _scope.depth == 0:
+                attendance_sessions.flush()
+    return wrapper
+
+
+# ============================================================================
+# BACKENDS
+# ============================================================================
+
+class MemorySessionStore(dict):
+    """Process-local store (the original behaviour)"""
+
+    backend_name = 'memory'
+
+    def meeting_keys(self, meeting_id) -> list:
+        prefix = f"{meeting_id}_"
+        return [k for k in list(self.keys()) if k.startswith(prefix)]
+
+    def save(self, session_key) -> bool:
+        return session_key in self
+
+    def flush(self) -> int:
+        _touched().clear()
+        return 0
+
+    def stats(self) -> dict:
+        return {'backend': self.backend_name, 'sessions': len(self)}
+
+
+class _CachedSession:
+    __slots__ = ('data', 'snapshot', 'version', 'checked_at')
+
+    def __init__(self, data, snapshot, version):
+        self.data = data
+        self.snapshot = snapshot
+        self.version = version
+        self.checked_at = time.time()
+
+
+class RedisSessionStore(MutableMapping):
+    """Redis-hash session store with optimistic versioning and a local read-through cache"""
+
+    backend_name = 'redis'
+
+    def __init__(self, client):
+        self.redis = client
+        self._local = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.version_checks = 0
+        self.reloads = 0
+        self.writes = 0
+        self.fields_written = 0
+        self.conflicts = 0
+
+    # ---------------------------------------------------------------- keys
+    @staticmethod
+    def _key(session_key):
+        return SESSION_KEYS['session'].format(session_key=session_key)
+
+    @staticmethod
+    def _meeting_index(meeting_id):
+        return SESSION_KEYS['meeting_index'].format(meeting_id=meeting_id)
+
+    # ---------------------------------------------------------------- loading
+    def _decode_hash(self, raw):
+        version = int(raw.pop(VERSION_FIELD, 0))
+        data = {field: decode_value(value) for field, value in raw.items()}
+        return data, dict(raw), version
+
+    def _load(self, session_key, max_age=ATTENDANCE_SESSION_LOCAL_TTL):
+        """Return the working copy of a session, or None if it does not exist"""
+        with self._lock:
+            entry = self._local.get(session_key)
+            now = time.time()
+            if entry is not None and now - entry.checked_at < max_age:
+                self.hits += 1
+                return entry
+
+            if entry is not None:
+                self.version_checks += 1
+                remote_version = self.redis.hget(self._key(session_key), VERSION_FIELD)
+                if remote_version is not None and int(remote_version) == entry.version:
+                    entry.checked_at = now
+                    return entry
+
+            raw = self.redis.hgetall(self._key(session_key))
+            self.reloads += 1
+            if not raw:
+                self._local.pop(session_key, None)
+                return None
+
+            data, snapshot, version = self._decode_hash(raw)
+            if entry is not None:
+                # Keep callers' references valid: refresh the same dict object,
+                # re-applying fields changed locally but not yet written
+                pending = self._pending_changes(entry)
+                entry.data.clear()
+                entry.data.update(data)
+                for field, value in pending[0].items():
+                    entry.data[field] = decode_value(value)
+                for field in pending[1]:
+                    entry.data.pop(field, None)
+                entry.snapshot = snapshot
+                entry.version = version
+                entry.checked_at = now
+            else:
+                entry = _CachedSession(data, snapshot, version)
+                self._local[session_key] = entry
+            return entry
+
+    # ---------------------------------------------------------------- mapping API
+    def __getitem__(self, session_key):
+        entry = self._load(session_key)
+        if entry is None:
+            raise KeyError(session_key)
+        _touched().add(session_key)
+        return entry.data
+
+    def __setitem__(self, session_key, session):
+        """Replace a whole session (used when tracking starts)"""
+        encoded = {field: encode_value(value) for field, value in session.items()}
+        key = self._key(session_key)
+        meeting_id = _meeting_id_of(session_key, session)
+        index_key = self._meeting_index(meeting_id)
+
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.delete(key)
+        pipe.hset(key, mapping=encoded)
+        version_index = len(pipe)
+        pipe.hincrby(key, VERSION_FIELD, 1)
+        pipe.expire(key, ATTENDANCE_SESSION_TTL)
+        pipe.sadd(index_key, session_key)
+        pipe.expire(index_key, ATTENDANCE_SESSION_TTL)
+        pipe.sadd(SESSION_KEYS['all_meetings'], meeting_id)
+        result = pipe.execute()
+        self.writes += 1
+        self.fields_written += len(encoded)
+
+        with self._lock:
+            self._local[session_key] = _CachedSession(session, encoded, int(result[version_index]))
+        _touched().add(session_key)
+
+    def __delitem__(self, session_key):
+        entry = self._local.get(session_key)
+        meeting_id = _meeting_id_of(session_key, entry.data if entry else None)
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.delete(self._key(session_key))
+        pipe.srem(self._meeting_index(meeting_id), session_key)
+        deleted = pipe.execute()[0]
+        with self._lock:
+            self._local.pop(session_key, None)
+        _touched().discard(session_key)
+        if not deleted:
+            raise KeyError(session_key)
+
+    def __contains__(self, session_key):
+        return self._load(session_key) is not None
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def get(self, session_key, default=None):
+        try:
+            return self[session_key]
+        except KeyError:
+            return default
+
+    def _live_members(self, index_key):
+        members = list(self.redis.smembers(index_key))
+        if not members:
+            return []
+        pipe = self.redis.pipeline(transaction=False)
+        for session_key in members:
+            pipe.exists(self._key(session_key))
+        alive = pipe.execute()
+        stale = [k for k, exists in zip(members, alive) if not exists]
+        if stale:
+            self.redis.srem(index_key, *stale)
+        return [k for k, exists in zip(members, alive) if exists]
+
+    def meeting_keys(self, meeting_id) -> list:
+        """Session keys of one meeting (replaces prefix scans over keys())"""
+        return self._live_members(self._meeting_index(meeting_id))
+
+    def keys(self):
+        keys = []
+        for meeting_id in list(self.redis.smembers(SESSION_KEYS['all_meetings'])):
+            meeting_keys = self.meeting_keys(meeting_id)
+            if not meeting_keys:
+                self.redis.srem(SESSION_KEYS['all_meetings'], meeting_id)
+            keys.extend(meeting_keys)
+        return keys
+
+    def items(self):
+        items = []
+        for session_key in self.keys():
+            session = self.get(session_key)
+            if session is not None:
+                items.append((session_key, session))
+        return items
+
+    def values(self):
+        return [session for _, session in self.items()]
+
+    # ---------------------------------------------------------------- writes
+    @staticmethod
+    def _pending_changes(entry):
+        changed = {}
+        for field, value in entry.data.items():
+            encoded = encode_value(value)
+            if entry.snapshot.get(field) != encoded:
+                changed[field] = encoded
+        removed = [field for field in entry.snapshot if field not in entry.data]
+        return changed, removed
+
+    def save(self, session_key) -> bool:
+        """Write the changed fields of one session back to Redis"""
+        with self._lock:
+            entry = self._local.get(session_key)
+            if entry is None:
+                return False
+
+            key = self._key(session_key)
+            for _ in range(ATTENDANCE_SESSION_MAX_RETRIES):
+                changed, removed = self._pending_changes(entry)
+                if not changed and not removed:
+                    return True
+
+                try:
+                    with self.redis.pipeline(transaction=True) as pipe:
+                        pipe.watch(key)
+                        remote_version = pipe.hget(key, VERSION_FIELD)
+                        if remote_version is None:
+                            # Stopped (or expired) elsewhere: do not resurrect it
+                            self._local.pop(session_key, None)
+                            return False
+                        if int(remote_version) != entry.version:
+                            raise redis.WatchError()
+
+                        pipe.multi()
+                        if changed:
+                            pipe.hset(key, mapping=changed)
+                        if removed:
+                            pipe.hdel(key, *removed)
+                        version_index = len(pipe)
+                        pipe.hincrby(key, VERSION_FIELD, 1)
+                        pipe.expire(key, ATTENDANCE_SESSION_TTL)
+                        pipe.expire(self._meeting_index(_meeting_id_of(session_key, entry.data)), ATTENDANCE_SESSION_TTL)
+                        result = pipe.execute()
+                except redis.WatchError:
+                    # Another worker wrote first: reload and re-apply our fields on top
+                    self.conflicts += 1
+                    entry.checked_at = 0
+                    if self._load(session_key, max_age=0) is None:
+                        return False
+                    continue
+
+                entry.snapshot.update(changed)
+                for field in removed:
+                    entry.snapshot.pop(field, None)
+                entry.version = int(result[version_index])
+                entry.checked_at = time.time()
+                self.writes += 1
+                self.fields_written += len(changed) + len(removed)
+                return True
+
+            logger.error(f"❌ Attendance session {session_key}: gave up after {ATTENDANCE_SESSION_MAX_RETRIES} write conflicts")
+            return False
+
+    def flush(self) -> int:
+        """Save every session touched by the current thread"""
+        touched = _touched()
+        saved = 0
+        for session_key in list(touched):
+            try:
+                if self.save(session_key):
+                    saved += 1
+            except Exception as e:
+                logger.error(f"❌ Failed to save attendance session {session_key}: {e}")
+        touched.clear()
+        return saved
+
+    def stats(self) -> dict:
+        return {
+            'backend': self.backend_name,
+            'local_sessions': len(self._local),
+            'local_hits': self.hits,
+            'version_checks': self.version_checks,
+            'reloads': self.reloads,
+            'writes': self.writes,
+            'fields_written': self.fields_written,
+            'conflicts': self.conflicts,
+        }
+
+
+def create_session_store():
+    """Pick the session backend from ATTENDANCE_SESSION_BACKEND"""
+    if ATTENDANCE_SESSION_BACKEND == 'memory':
+        logger.info("🗂️ Attendance sessions: in-process memory store")
+        return MemorySessionStore()
+
+    try:
+        client = redis.Redis(**ATTENDANCE_SESSION_REDIS_CONFIG)
+        client.ping()
+        logger.info("✅ Attendance sessions: Redis store connected")
+        return RedisSessionStore(client)
+    except Exception as e:
+        if ATTENDANCE_SESSION_BACKEND == 'redis':
+            raise
+        logger.warning(f"⚠️ Attendance session Redis not available, using in-process store (single worker only): {e}")
+        return MemorySessionStore()
+
+
+class LazySessionStore(MutableMapping):
+    """Module-level handle that creates the session backend on first use"""
+
+    def __init__(self):
+        self._store = None
+        self._lock = threading.Lock()
+
+    @property
+    def store(self):
+        if self._store is None:
+            with self._lock:
+                if self._store is None:
+                    self._store = create_session_store()
+        return self._store
+
+    def __getitem__(self, session_key):
+        return self.store[session_key]
+
+    def __setitem__(self, session_key, session):
+        self.store[session_key] = session
+
+    def __delitem__(self, session_key):
+        del self.store[session_key]
+
+    def __contains__(self, session_key):
+        return session_key in self.store
+
+    def __iter__(self):
+        return iter(self.store)
+
+    def __len__(self):
+        return len(self.store)
+
+    def __getattr__(self, name):
+        # keys/items/get/meeting_keys/save/flush/stats of the real backend
+        return getattr(self.store, name)
+
+    def keys(self):
+        return self.store.keys()
+
+    def items(self):
+        return self.store.items()
+
+    def values(self):
+        return self.store.values()
+
+    def get(self, session_key, default=None):
+        return self.store.get(session_key, default)
+
+    def flush(self) -> int:
+        if self._store is None:
+            _touched().clear()
+            return 0
+        return self._store.flush()
+
+
+attendance_sessions = LazySessionStore()
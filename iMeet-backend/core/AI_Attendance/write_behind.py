@@ -0,0 +1,269 @@
+# core/AI_Attendance/write_behind.py
+
+"""
+Write-Behind Persistence for AttendanceSession
+==============================================
+detect_violations / check_identity_verification used to re-SELECT the
+AttendanceSession row and issue a full-row UPDATE (large JSON text columns
+included) several times per frame.
+
+ModelWriteBehind keeps one model instance per (meeting_id, user_id) in an
+identity map:
+- get() returns the cached instance, so every mutation within the flush
+  window lands on the same object (one SELECT per window)
+- save() marks it dirty; nothing is written yet
+- dirty instances are flushed with save(update_fields=<changed columns>)
+  every ATTENDANCE_WRITE_BEHIND_INTERVAL seconds by a background thread,
+  or immediately on state transitions (removal, break, stop) via
+  save(obj, immediate=True) / flush(meeting_id, user_id)
+- flushed instances are evicted, so other workers' writes are picked up on
+  the next window
+
+Instances that did not come from get() are saved straight through, after
+any pending write for the same row has been flushed.
+
+A flush copies the changed column values under the lock and writes them with
+an UPDATE after releasing it, so DB latency never blocks get()/save().
+"""
+
+import atexit
+import copy
+import logging
+import os
+import threading
+import time
+
+from django.db import close_old_connections
+
+logger = logging.getLogger('core.AI_Attendance.Attendance')
+
+ATTENDANCE_WRITE_BEHIND_ENABLED = os.getenv("ATTENDANCE_WRITE_BEHIND_ENABLED", "True") == "True"
+ATTENDANCE_WRITE_BEHIND_INTERVAL = float(os.getenv("ATTENDANCE_WRITE_BEHIND_INTERVAL", 5.0))
+
+
+class _Entry:
+    __slots__ = ('obj', 'snapshot', 'dirty_since', 'loaded_at')
+
+    def __init__(self, obj, snapshot):
+        self.obj = obj
+        self.snapshot = snapshot
+        self.dirty_since = None
+        self.loaded_at = time.time()
+
+
+class ModelWriteBehind:
+    """Identity map + dirty-field coalescing for one model keyed by (meeting_id, user_id)"""
+
+    def __init__(self, model, interval=ATTENDANCE_WRITE_BEHIND_INTERVAL, enabled=ATTENDANCE_WRITE_BEHIND_ENABLED):
+        self.model = model
+        self.interval = interval
+        self.enabled = enabled
+        self._entries = {}
+        self._lock = threading.RLock()
+        self._flusher = None
+
+        self.deferred_saves = 0
+        self.rows_written = 0
+        self.fields_written = 0
+        self.selects = 0
+        self.cache_hits = 0
+
+        # Columns written by every flush (auto_now must be listed explicitly)
+        self._always_fields = [
+            f.name for f in model._meta.concrete_fields if getattr(f, 'auto_now', False)
+        ]
+
+    # ---------------------------------------------------------------- helpers
+    @staticmethod
+    def _key(meeting_id, user_id):
+        return (str(meeting_id), str(user_id))
+
+    def _snapshot(self, obj):
+        return {f.attname: getattr(obj, f.attname) for f in self.model._meta.concrete_fields}
+
+    def _dirty_fields(self, entry):
+        return [
+            f.name for f in self.model._meta.concrete_fields
+            if not f.primary_key and getattr(entry.obj, f.attname) != entry.snapshot.get(f.attname)
+        ]
+
+    def _ensure_flusher(self):
+        if self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(
+                    target=self._flush_loop, daemon=True, name="AttendanceWriteBehind"
+                )
+                self._flusher.start()
+
+    # ---------------------------------------------------------------- reads
+    def get(self, meeting_id, user_id):
+        """
+        Cached equivalent of model.objects.get(meeting_id=..., user_id=...).
+
+        Raises:
+            model.DoesNotExist: as objects.get() does
+        """
+        if not self.enabled:
+            return self.model.objects.get(meeting_id=meeting_id, user_id=user_id)
+
+        key = self._key(meeting_id, user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.cache_hits += 1
+                return entry.obj
+
+        obj = self.model.objects.get(meeting_id=meeting_id, user_id=user_id)
+        self.selects += 1
+        with self._lock:
+            # Another thread may have loaded it meanwhile; keep the first one
+            entry = self._entries.setdefault(key, _Entry(obj, self._snapshot(obj)))
+        self._ensure_flusher()
+        return entry.obj
+
+    # ---------------------------------------------------------------- writes
+    def save(self, obj, immediate=False) -> bool:
+        """
+        Record a save of `obj`. Writes are deferred unless `immediate` is set
+        or `obj` is not the tracked instance for its row.
+        """
+        key = self._key(obj.meeting_id, obj.user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            tracked = self.enabled and entry is not None and entry.obj is obj
+
+            if tracked:
+                if entry.dirty_since is None:
+                    entry.dirty_since = time.time()
+                self.deferred_saves += 1
+                if not immediate:
+                    return True
+
+        if tracked:
+            return self._flush_key(key)
+        if entry is not None:
+            # Untracked copy of a tracked row: write ours first so the full save wins
+            self.flush(obj.meeting_id, obj.user_id)
+        obj.save()
+        self.rows_written += 1
+        return True
+
+    def _flush_key(self, key, evict=True) -> bool:
+        # Snapshot what to write under the lock; the DB write happens without it
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            if evict:
+                self._entries.pop(key, None)
+
+            fields = self._dirty_fields(entry)
+            if not fields:
+                return False
+
+            meta = self.model._meta
+            written = {}
+            for name in fields:
+                attname = meta.get_field(name).attname
+                written[attname] = copy.deepcopy(getattr(entry.obj, attname))
+            for name in self._always_fields:
+                if name not in fields:
+                    # auto_now: pre_save sets the new timestamp on the instance too
+                    field = meta.get_field(name)
+                    written[field.attname] = field.pre_save(entry.obj, False)
+            pk = entry.obj.pk
+
+        try:
+            updated = self.model._default_manager.filter(pk=pk).update(**written)
+        except Exception as e:
+            logger.error(f"❌ WRITE-BEHIND flush failed for {key[1]} @ {key[0]}: {e}")
+            if evict:
+                with self._lock:
+                    # Keep the pending changes for the next attempt
+                    self._entries.setdefault(key, entry)
+            return False
+
+        if not updated:
+            logger.warning(f"⚠️ WRITE-BEHIND: row for {key[1]} @ {key[0]} no longer exists, dropping changes")
+            return False
+
+        with self._lock:
+            # Fields changed while we were writing stay dirty
+            entry.snapshot.update(written)
+            entry.dirty_since = entry.dirty_since if self._dirty_fields(entry) else None
+            self.rows_written += 1
+            self.fields_written += len(fields)
+        logger.debug(f"💾 WRITE-BEHIND: {key[1]} @ {key[0]} -> {', '.join(fields)}")
+        return True
+
+    def flush(self, meeting_id=None, user_id=None, older_than=None) -> int:
+        """
+        Write pending changes and evict the flushed instances.
+
+        Args:
+            meeting_id: Only this meeting (None = all)
+            user_id: Only this participant (requires meeting_id)
+            older_than: Only entries dirty/loaded for at least this many seconds
+        """
+        now = time.time()
+        with self._lock:
+            keys = []
+            for key, entry in self._entries.items():
+                if meeting_id is not None and key[0] != str(meeting_id):
+                    continue
+                if user_id is not None and key[1] != str(user_id):
+                    continue
+                if older_than is not None:
+                    since = entry.dirty_since if entry.dirty_since is not None else entry.loaded_at
+                    if now - since < older_than:
+                        continue
+                keys.append(key)
+
+        written = 0
+        for key in keys:
+            if self._flush_key(key):
+                written += 1
+        return written
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                written = self.flush(older_than=self.interval)
+                if written:
+                    logger.debug(f"💾 WRITE-BEHIND: flushed {written} attendance row(s)")
+            except Exception as e:
+                logger.error(f"❌ WRITE-BEHIND loop error: {e}")
+            finally:
+                close_old_connections()
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = sum(1 for e in self._entries.values() if e.dirty_since is not None)
+            cached = len(self._entries)
+        return {
+            'enabled': self.enabled,
+            'interval_seconds': self.interval,
+            'cached_rows': cached,
+            'pending_rows': pending,
+            'deferred_saves': self.deferred_saves,
+            'rows_written': self.rows_written,
+            'fields_written': self.fields_written,
+            'selects': self.selects,
+            'cache_hits': self.cache_hits,
+            'coalescing_ratio': round(self.deferred_saves / self.rows_written, 2) if self.rows_written else None,
+        }
+
+    def shutdown(self):
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"❌ WRITE-BEHIND final flush failed: {e}")
+
+
+def create_write_behind(model) -> ModelWriteBehind:
+    write_behind = ModelWriteBehind(model)
+    atexit.register(write_behind.shutdown)
+    return write_behind
@@ -0,0 +1,90 @@
+# embedding_codec.py
+
+"""
+Face Embedding Storage Format
+=============================
+Embeddings used to be stored in Mongo as BSON arrays of 512 doubles
+(~4.6 KB per document, parsed into Python floats and copied into numpy on
+every verification, with norms recomputed on every comparison).
+
+Version 2 documents store the L2-normalized vector as little-endian float32
+bytes (BSON binary, 2 KB):
+
+    {
+        'user_id': 42,                 # canonical: int (MySQL user ID)
+        'embedding': b'...',           # 512 x float32, unit length
+        'embedding_version': 2,
+        'embedding_norm': 23.7,        # norm of the raw model output
+        'embedding_size': 512,
+        ...
+    }
+
+decode_embedding() turns either version into a unit-length float32 vector;
+for version 2 that is np.frombuffer over the BSON bytes (no copy). With both
+sides unit length, cosine distance is 1 - dot(a, b).
+
+Migrate old documents with `python manage.py migrate_face_embeddings`.
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+
+EMBEDDING_FORMAT_VERSION = 2
+EMBEDDING_DTYPE = np.dtype('<f4')
+
+
+def normalize_embedding(embedding) -> Optional[np.ndarray]:
+    """Unit-length float32 copy of a vector, or None for zero/non-finite vectors"""
+    vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+    norm = float(np.linalg.norm(vector))
+    if norm == 0.0 or not np.isfinite(norm):
+        return None
+    return vector / norm
+
+
+def encode_embedding(embedding) -> Dict:
+    """
+    Mongo fields for a raw model embedding.
+
+    Raises:
+        ValueError: for an empty, zero or non-finite vector
+    """
+    vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+    norm = float(np.linalg.norm(vector))
+    if vector.size == 0 or norm == 0.0 or not np.isfinite(norm):
+        raise ValueError("Cannot store an empty, zero or non-finite embedding")
+    return {
+        'embedding': (vector / norm).astype(EMBEDDING_DTYPE).tobytes(),
+        'embedding_version': EMBEDDING_FORMAT_VERSION,
+        'embedding_norm': norm,
+        'embedding_size': int(vector.size),
+    }
+
+
+def decode_embedding(doc: Dict) -> Optional[np.ndarray]:
+    """
+    Unit-length float32 vector from an embedding document (any version).
+
+    Version 2 arrays are read-only views over the document's bytes.
+    Returns None when the document has no usable embedding.
+    """
+    value = doc.get('embedding')
+    if value is None or len(value) == 0:
+        return None
+    if isinstance(value, np.ndarray):
+        return normalize_embedding(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        if len(value) % EMBEDDING_DTYPE.itemsize:
+            return None
+        vector = np.frombuffer(value, dtype=EMBEDDING_DTYPE)
+        if doc.get('embedding_version') == EMBEDDING_FORMAT_VERSION:
+            return vector
+        return normalize_embedding(vector)
+    # Version 1: list of doubles
+    return normalize_embedding(value)
+
+
+def canonical_user_id(user_id) -> int:
+    """Face embedding documents key users by their integer MySQL ID"""
+    return int(str(user_id).strip())
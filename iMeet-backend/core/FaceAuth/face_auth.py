@@ -26,7 +26,6 @@ Endpoints:
 import os
 import numpy as np
 import json
-from io import BytesIO
 from dotenv import load_dotenv
 from django.conf import settings
 from django.core.asgi import get_asgi_application
@@ -38,11 +37,14 @@ from rest_framework.decorators import api_view
 from channels.routing import ProtocolTypeRouter
 from pymongo import MongoClient
 from bson import ObjectId
-from PIL import Image
-from insightface.app import FaceAnalysis
+try:
+    from core.FaceAuth.face_inference import get_face_inference
+    from core.FaceAuth.embedding_codec import canonical_user_id, decode_embedding
+except ImportError:
+    from face_inference import get_face_inference
+    from embedding_codec import canonical_user_id, decode_embedding
 import logging
 from datetime import datetime, timedelta
-import base64
 
 # Configure logging
 logging.basicConfig(
@@ -192,7 +194,7 @@ logger.info(f"⚙️ Max Allowed Faces: {MAX_ALLOWED_FACES}")
 # Face Model - Singleton Pattern
 # ---------------------------------------------------------------------
 class FaceModel:
-    """Singleton class for InsightFace model management"""
+    """Singleton facade over the shared face inference service (face_inference.py)"""
     _instance = None
     _initialized = False
 
@@ -205,13 +207,10 @@ class FaceModel:
         if not self._initialized:
             logger.info(f"🔹 Initializing InsightFace model: {FACE_MODEL_NAME}...")
             try:
-                self.app = FaceAnalysis(
-                    name=FACE_MODEL_NAME,
-                    providers=['CPUExecutionProvider']
-                )
-                self.app.prepare(ctx_id=-1, det_size=FACE_DETECTION_SIZE)
+                self.inference = get_face_inference()
+                self.inference.load()
                 self._initialized = True
-                logger.info("✅ InsightFace model loaded successfully")
+                logger.info(f"✅ InsightFace model ready (inference mode: {self.inference.mode})")
             except Exception as e:
                 logger.error(f"❌ Failed to initialize InsightFace model: {e}")
                 raise
@@ -223,7 +222,7 @@ class FaceModel:
         NEW: Enhanced with multi-face detection for single participant enforcement
         
         Args:
-            image_data: Image data (bytes, file, numpy array, base64)
+            image_data: Image data (bytes, file, numpy array in BGR order, base64)
             return_all_faces: If True, return ALL faces detected (for multi-face check)
         
         Returns:
@@ -239,26 +238,8 @@ class FaceModel:
                 }
         """
         try:
-            if hasattr(image_data, 'read'):
-                image_data = image_data.read()
-            
-            if isinstance(image_data, bytes):
-                img = Image.open(BytesIO(image_data)).convert("RGB")
-                np_img = np.array(img)
-            elif isinstance(image_data, np.ndarray):
-                np_img = image_data
-            elif isinstance(image_data, str):
-                # Handle base64 encoded images
-                if image_data.startswith('data:image'):
-                    image_data = image_data.split(',')[1]
-                img_bytes = base64.b64decode(image_data)
-                img = Image.open(BytesIO(img_bytes)).convert("RGB")
-                np_img = np.array(img)
-            else:
-                raise ValueError("Invalid image data type")
-            
-            # Detect all faces in image
-            faces = self.app.get(np_img)
+            # Detect all faces in image (records come back largest first)
+            faces = self.inference.analyze(image_data)
             
             if not faces:
                 raise ValueError("No face detected in the image. Please ensure your face is clearly visible and well-lit.")
@@ -269,25 +250,18 @@ class FaceModel:
             # NEW: Return ALL faces information if requested
             # ================================================================
             if return_all_faces:
-                face_list = []
-                
-                for idx, face in enumerate(faces):
-                    bbox = face.bbox.tolist()
-                    bbox_area = (bbox[2] - bbox[0]) * (bbox[3] - bbox[1])
-                    
-                    face_info = {
-                        'index': idx,
-                        'embedding': face.embedding.tolist(),
-                        'bbox': bbox,
-                        'bbox_area': bbox_area,
-                        'det_score': float(face.det_score),
-                        'age': int(face.age) if hasattr(face, 'age') else None,
-                        'gender': 'male' if hasattr(face, 'gender') and face.gender == 1 else 'female' if hasattr(face, 'gender') and face.gender == 0 else None
+                face_list = [
+                    {
+                        'index': face['index'],
+                        'embedding': face['embedding'].tolist(),
+                        'bbox': face['bbox'],
+                        'bbox_area': face['bbox_area'],
+                        'det_score': face['det_score'],
+                        'age': face['age'],
+                        'gender': face['gender']
                     }
-                    face_list.append(face_info)
-                
-                # Sort by bbox area (largest first)
-                face_list.sort(key=lambda x: x['bbox_area'], reverse=True)
+                    for face in faces
+                ]
                 
                 logger.info(f"✅ Detected {face_count} face(s) in image")
                 
@@ -304,9 +278,7 @@ class FaceModel:
             if face_count > 1:
                 logger.warning(f"⚠️ Multiple faces detected ({face_count}). Using the largest face.")
             
-            # Use largest face (by bounding box area)
-            largest_face = max(faces, key=lambda f: (f.bbox[2] - f.bbox[0]) * (f.bbox[3] - f.bbox[1]))
-            embedding = largest_face.embedding.tolist()
+            embedding = faces[0]['embedding'].tolist()
             
             logger.debug(f"✅ Embedding extracted (dimension: {len(embedding)})")
             
@@ -351,29 +323,34 @@ def cosine_distance(vec1, vec2):
 # Database Helper Functions
 # ---------------------------------------------------------------------
 def get_user_embedding(user_id):
-    """Fetch stored face embedding from MongoDB"""
+    """
+    Fetch stored face embedding from MongoDB.
+    
+    New documents store user_id as an int (see embedding_codec.canonical_user_id).
+    Documents written before `manage.py migrate_face_embeddings` may still hold it
+    as a string, so both forms are matched in one indexed $in query.
+    The returned record's "embedding" is a unit-length float32 vector.
+    """
     try:
-        record = db[FACE_EMBEDDINGS_COLLECTION].find_one({"user_id": str(user_id)})
+        try:
+            user_key = canonical_user_id(user_id)
+        except (ValueError, TypeError):
+            logger.warning(f"⚠️ Invalid user_id for embedding lookup: {user_id}")
+            return None
         
-        if not record:
-            try:
-                record = db[FACE_EMBEDDINGS_COLLECTION].find_one({"user_id": int(user_id)})
-            except (ValueError, TypeError):
-                pass
+        record = db[FACE_EMBEDDINGS_COLLECTION].find_one({"user_id": {"$in": [user_key, str(user_key)]}})
         
         if not record:
             logger.warning(f"⚠️ No embedding found for user_id: {user_id}")
             return None
         
-        if "embedding" not in record or not record["embedding"]:
+        embedding = decode_embedding(record)
+        if embedding is None:
             logger.error(f"❌ Record found but no valid 'embedding' field for user_id: {user_id}")
             return None
         
-        if not isinstance(record["embedding"], list) or len(record["embedding"]) == 0:
-            logger.error(f"❌ Invalid embedding format for user_id: {user_id}")
-            return None
-        
-        logger.debug(f"✅ Retrieved embedding for user_id: {user_id} (dimension: {len(record['embedding'])})")
+        record["embedding"] = embedding
+        logger.debug(f"✅ Retrieved embedding for user_id: {user_id} (dimension: {len(embedding)})")
         return record
         
     except Exception as e:
@@ -1749,6 +1726,7 @@ def get_stats(request):
                 "failed": recent_verifications - recent_successful,
                 "success_rate": round((recent_successful / recent_verifications * 100), 2) if recent_verifications > 0 else 0,
             },
+            "face_inference": face_model.inference.stats(),
             "timestamp": datetime.utcnow().isoformat(),
             "protocol": SERVER_PROTOCOL,
             "port": int(SERVER_PORT),
@@ -0,0 +1,578 @@
+# face_inference.py
+
+"""
+Shared Face Inference Service
+=============================
+One InsightFace FaceAnalysis per process, used by registration
+(face_embeddings.py), login/verification (face_auth.py) and the meeting
+verifiers (unified_face_service.py, meeting_continuous_verification.py).
+
+Callers never touch the model directly. They submit an image and get back
+the detected faces (largest first, each with its 512-d embedding):
+
+    from core.FaceAuth.face_inference import get_face_inference
+
+    faces = get_face_inference().analyze(image_data)
+    faces = await get_face_inference().analyze_async(frame)
+
+Requests go through a queue. A single worker thread drains up to
+FACE_INFERENCE_MAX_BATCH requests (waiting at most FACE_INFERENCE_BATCH_WAIT_MS
+for stragglers), runs detection per image and then ONE recognition pass over
+every aligned face crop of the batch. Concurrent verifiers therefore share
+recognition runs instead of queueing behind a lock.
+
+FACE_INFERENCE_MODE:
+    local   the model lives in this process (default)
+    socket  send requests to `python manage.py face_inference_server` over a
+            unix socket (FACE_INFERENCE_SOCKET), so all gunicorn/uvicorn
+            workers share one loaded model
+
+Images are decoded to BGR (OpenCV order, what InsightFace expects) before
+they are queued, in the caller's thread.
+"""
+
+import os
+
+# --- Force deterministic CUDA visibility ---
+os.environ.update({
+    "CUDA_VISIBLE_DEVICES": "0",        # pick your active GPU
+    "CUDA_MODULE_LOADING": "LAZY",
+    "ORT_CUDA_UNAVAILABLE_FAIL": "0",
+    "ORT_TENSORRT_UNAVAILABLE_FAIL": "0",
+    "OMP_NUM_THREADS": "4",
+})
+
+import asyncio
+import base64
+import json
+import logging
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger("face_inference")
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+FACE_MODEL_NAME = os.getenv("FACE_MODEL_NAME", "buffalo_l")
+FACE_DETECTION_SIZE = tuple(map(int, os.getenv("FACE_DETECTION_SIZE", "640,640").split(",")))
+
+FACE_INFERENCE_MODE = os.getenv("FACE_INFERENCE_MODE", "local").lower()
+FACE_INFERENCE_SOCKET = os.getenv("FACE_INFERENCE_SOCKET", "/tmp/imeet_face_inference.sock")
+FACE_INFERENCE_SOCKET_FALLBACK = os.getenv("FACE_INFERENCE_SOCKET_FALLBACK", "true").lower() == "true"
+FACE_INFERENCE_MAX_BATCH = int(os.getenv("FACE_INFERENCE_MAX_BATCH", 8))
+FACE_INFERENCE_BATCH_WAIT_MS = float(os.getenv("FACE_INFERENCE_BATCH_WAIT_MS", 5))
+FACE_INFERENCE_DETECT_THREADS = int(os.getenv("FACE_INFERENCE_DETECT_THREADS", 1))
+FACE_INFERENCE_TIMEOUT = float(os.getenv("FACE_INFERENCE_TIMEOUT", 30))
+
+
+# ============================================================================
+# IMAGE DECODING
+# ============================================================================
+def to_bgr_array(image_data) -> np.ndarray:
+    """
+    Decode any supported image input to a BGR numpy array.
+
+    Accepts raw bytes, file-like uploads, PIL images, base64 strings (with or
+    without a data URI prefix) and numpy arrays (assumed to be BGR already).
+    """
+    try:
+        if hasattr(image_data, 'read'):
+            image_data = image_data.read()
+
+        if isinstance(image_data, np.ndarray):
+            return image_data
+
+        if isinstance(image_data, str):
+            if 'base64,' in image_data:
+                image_data = image_data.split('base64,')[1]
+            image_data = base64.b64decode(image_data)
+
+        if isinstance(image_data, (bytes, bytearray)):
+            image_data = Image.open(BytesIO(image_data))
+
+        if hasattr(image_data, 'mode'):  # PIL Image
+            if image_data.mode != 'RGB':
+                image_data = image_data.convert('RGB')
+            # RGB -> BGR
+            return np.ascontiguousarray(np.asarray(image_data)[:, :, ::-1])
+
+        raise ValueError(f"Unsupported image data type: {type(image_data)}")
+
+    except ValueError:
+        raise
+    except Exception as e:
+        raise ValueError(f"Failed to convert image: {str(e)}")
+
+
+def _bbox_area(bbox) -> float:
+    return float((bbox[2] - bbox[0]) * (bbox[3] - bbox[1]))
+
+
+def face_records(faces) -> list:
+    """InsightFace Face objects -> plain dicts, largest face first"""
+    records = []
+    for index, face in enumerate(faces):
+        bbox = [float(v) for v in face.bbox]
+        gender = getattr(face, 'gender', None)
+        age = getattr(face, 'age', None)
+        kps = getattr(face, 'kps', None)
+        records.append({
+            'index': index,
+            'embedding': np.asarray(face.embedding, dtype=np.float32),
+            'bbox': bbox,
+            'bbox_area': _bbox_area(bbox),
+            'landmarks': kps.tolist() if kps is not None else None,
+            'det_score': float(face.det_score),
+            'age': int(age) if age is not None else None,
+            'gender': 'male' if gender == 1 else 'female' if gender == 0 else None,
+        })
+    records.sort(key=lambda r: r['bbox_area'], reverse=True)
+    return records
+
+
+# ============================================================================
+# MODEL
+# ============================================================================
+class FaceInferenceEngine:
+    """The loaded FaceAnalysis app plus a batched analyze()"""
+
+    def __init__(self, model_name=FACE_MODEL_NAME, det_size=FACE_DETECTION_SIZE,
+                 detect_threads=FACE_INFERENCE_DETECT_THREADS):
+        from insightface.app import FaceAnalysis
+
+        logger.info(f"🔹 Initializing InsightFace model: {model_name} (det size {det_size})")
+        self.app = FaceAnalysis(
+            name=model_name,
+            providers=['CUDAExecutionProvider', 'CPUExecutionProvider']
+        )
+        self.app.prepare(ctx_id=-1, det_size=det_size)
+        self.recognition = self.app.models.get('recognition')
+        self._detect_pool = ThreadPoolExecutor(detect_threads, thread_name_prefix="face-detect") if detect_threads > 1 else None
+        self._batched_recognition = self.recognition is not None
+        logger.info(f"✅ InsightFace model loaded (providers: {self.app.det_model.session.get_providers()})")
+
+    def _detect(self, img):
+        """Detection plus the per-face heads (landmarks, age/gender); embeddings come later"""
+        from insightface.app.common import Face
+
+        bboxes, kpss = self.app.det_model.detect(img, max_num=0, metric='default')
+        faces = []
+        for i in range(bboxes.shape[0]):
+            face = Face(bbox=bboxes[i, 0:4], kps=kpss[i] if kpss is not None else None, det_score=bboxes[i, 4])
+            for taskname, model in self.app.models.items():
+                if taskname in ('detection', 'recognition'):
+                    continue
+                model.get(img, face)
+            faces.append(face)
+        return faces
+
+    def _embed(self, pairs):
+        """One recognition run over every (image, face) of the batch"""
+        from insightface.utils import face_align
+
+        size = self.recognition.input_size[0]
+        crops = [face_align.norm_crop(img, landmark=face.kps, image_size=size) for img, face in pairs]
+        if self._batched_recognition:
+            try:
+                feats = self.recognition.get_feat(crops)
+                for (_, face), feat in zip(pairs, feats):
+                    face.embedding = feat.flatten()
+                return
+            except Exception as e:
+                # Recognition model exported with a fixed batch size of 1
+                logger.warning(f"⚠️ Batched recognition unavailable, falling back to per-face runs: {e}")
+                self._batched_recognition = False
+        for (_, face), crop in zip(pairs, crops):
+            face.embedding = self.recognition.get_feat(crop).flatten()
+
+    def analyze_batch(self, images) -> list:
+        """Face records for each image; an exception instance in place of a failed image"""
+        if self._detect_pool is not None and len(images) > 1:
+            futures = [self._detect_pool.submit(self._detect, img) for img in images]
+            detected = []
+            for future in futures:
+                try:
+                    detected.append(future.result())
+                except Exception as e:
+                    detected.append(e)
+        else:
+            detected = []
+            for img in images:
+                try:
+                    detected.append(self._detect(img))
+                except Exception as e:
+                    detected.append(e)
+
+        if self.recognition is not None:
+            pairs = [(img, face) for img, faces in zip(images, detected)
+                     if not isinstance(faces, Exception) for face in faces]
+            if pairs:
+                self._embed(pairs)
+
+        return [faces if isinstance(faces, Exception) else face_records(faces) for faces in detected]
+
+    def close(self):
+        if self._detect_pool is not None:
+            self._detect_pool.shutdown(wait=False)
+
+
+# ============================================================================
+# IN-PROCESS SERVICE (request queue + micro-batching worker)
+# ============================================================================
+class FaceInferenceService:
+    """Queue in front of the per-process engine; one worker thread batches requests"""
+
+    mode = "local"
+
+    def __init__(self, max_batch=FACE_INFERENCE_MAX_BATCH, batch_wait_ms=FACE_INFERENCE_BATCH_WAIT_MS,
+                 timeout=FACE_INFERENCE_TIMEOUT, engine_factory=FaceInferenceEngine):
+        self.max_batch = max(1, max_batch)
+        self.batch_wait = max(0.0, batch_wait_ms) / 1000.0
+        self.timeout = timeout
+        self._engine_factory = engine_factory
+        self._engine = None
+        self._engine_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self._busy = False
+        self._stats = {
+            'requests': 0,
+            'batches': 0,
+            'images': 0,
+            'max_batch_seen': 0,
+            'inference_ms': 0.0,
+            'errors': 0,
+        }
+
+    # ---------------------------------------------------------------- model
+    def load(self):
+        """Load the model now (otherwise the first request loads it)"""
+        if self._engine is None:
+            with self._engine_lock:
+                if self._engine is None:
+                    self._engine = self._engine_factory()
+        return self._engine
+
+    def is_ready(self) -> bool:
+        return self._engine is not None
+
+    def get_app(self):
+        """The underlying FaceAnalysis app (only for code that needs raw InsightFace access)"""
+        return self.load().app
+
+    def unload(self) -> bool:
+        """Drop the model when no request is pending; the next request reloads it"""
+        with self._engine_lock:
+            if self._engine is None:
+                return False
+            if self._busy or not self._queue.empty():
+                logger.info("🔹 Face model still serving requests - not unloading")
+                return False
+            self._engine.close()
+            self._engine = None
+
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
+        import gc
+        gc.collect()
+        logger.info("✅ InsightFace model unloaded")
+        return True
+
+    # ------------------------------------------------------------- requests
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            with self._worker_lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._run, name="face-inference", daemon=True)
+                    self._worker.start()
+
+    def submit(self, image_data) -> Future:
+        """Queue one image; the future resolves to its face records"""
+        future = Future()
+        img = to_bgr_array(image_data)
+        self._stats['requests'] += 1
+        self._ensure_worker()
+        self._queue.put((img, future))
+        return future
+
+    def analyze(self, image_data, timeout=None) -> list:
+        return self.submit(image_data).result(timeout or self.timeout)
+
+    async def analyze_async(self, image_data) -> list:
+        return await asyncio.wait_for(asyncio.wrap_future(self.submit(image_data)), self.timeout)
+
+    def _collect_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            self._busy = True
+            try:
+                self._process(batch)
+            except Exception as e:
+                # The single worker must survive, or every later request waits for its timeout
+                logger.error(f"❌ Face inference worker error: {e}")
+            finally:
+                self._busy = False
+
+    def _process(self, batch):
+        start = time.perf_counter()
+        try:
+            results = self.load().analyze_batch([img for img, _ in batch])
+        except Exception as e:
+            logger.error(f"❌ Face inference batch failed: {e}")
+            self._stats['errors'] += 1
+            results = [e] * len(batch)
+
+        for (_, future), result in zip(batch, results):
+            if future.cancelled():
+                continue
+            try:
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+            except InvalidStateError:
+                # Cancelled by the caller's timeout after the check above
+                pass
+
+        self._stats['batches'] += 1
+        self._stats['images'] += len(batch)
+        self._stats['max_batch_seen'] = max(self._stats['max_batch_seen'], len(batch))
+        self._stats['inference_ms'] += (time.perf_counter() - start) * 1000
+
+    def stats(self) -> dict:
+        batches = self._stats['batches'] or 1
+        return {
+            'mode': self.mode,
+            'model_loaded': self.is_ready(),
+            'queue_depth': self._queue.qsize(),
+            'avg_batch_size': round(self._stats['images'] / batches, 2),
+            'avg_batch_ms': round(self._stats['inference_ms'] / batches, 2),
+            **self._stats,
+        }
+
+
+# ============================================================================
+# OUT-OF-PROCESS MODE (unix socket)
+# ============================================================================
+# Frame: 4-byte big-endian header length, JSON header, then header["size"] payload bytes.
+_FRAME_HEADER = struct.Struct(">I")
+
+
+def _recv_exact(sock, size) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("Face inference socket closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def _send_message(sock, header: dict, payload: bytes = b""):
+    header = dict(header, size=len(payload))
+    raw = json.dumps(header).encode()
+    sock.sendall(_FRAME_HEADER.pack(len(raw)) + raw + payload)
+
+
+def _recv_message(sock):
+    (length,) = _FRAME_HEADER.unpack(_recv_exact(sock, _FRAME_HEADER.size))
+    header = json.loads(_recv_exact(sock, length))
+    payload = _recv_exact(sock, header.get("size", 0)) if header.get("size") else b""
+    return header, payload
+
+
+def _encode_records(records) -> list:
+    encoded = []
+    for record in records:
+        item = dict(record)
+        item['embedding'] = base64.b64encode(np.asarray(record['embedding'], dtype=np.float32).tobytes()).decode()
+        encoded.append(item)
+    return encoded
+
+
+def _decode_records(records) -> list:
+    for record in records:
+        record['embedding'] = np.frombuffer(base64.b64decode(record['embedding']), dtype=np.float32)
+    return records
+
+
+class _InferenceRequestHandler(socketserver.BaseRequestHandler):
+    """One client connection (a web worker thread); serves requests until it closes"""
+
+    def handle(self):
+        service = self.server.service
+        while True:
+            try:
+                header, payload = _recv_message(self.request)
+            except (ConnectionError, OSError, ValueError):
+                return
+
+            op = header.get("op")
+            try:
+                if op == "analyze":
+                    img = np.frombuffer(payload, dtype=header["dtype"]).reshape(header["shape"])
+                    records = service.analyze(img)
+                    _send_message(self.request, {"ok": True, "faces": _encode_records(records)})
+                elif op == "stats":
+                    _send_message(self.request, {"ok": True, "stats": service.stats()})
+                elif op == "ping":
+                    _send_message(self.request, {"ok": True, "model_loaded": service.is_ready()})
+                else:
+                    _send_message(self.request, {"ok": False, "error": f"Unknown op: {op}"})
+            except OSError:
+                return
+            except Exception as e:
+                _send_message(self.request, {"ok": False, "error": str(e), "value_error": isinstance(e, ValueError)})
+
+
+class FaceInferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket front for one FaceInferenceService, shared by every web worker on the host"""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path=FACE_INFERENCE_SOCKET, service=None):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        self.socket_path = socket_path
+        self.service = service or FaceInferenceService()
+        super().__init__(socket_path, _InferenceRequestHandler)
+        os.chmod(socket_path, 0o660)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+class FaceInferenceClient:
+    """Same interface as FaceInferenceService, answered by face_inference_server"""
+
+    mode = "socket"
+
+    def __init__(self, socket_path=FACE_INFERENCE_SOCKET, timeout=FACE_INFERENCE_TIMEOUT):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _drop_connection(self):
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def _call(self, header, payload=b""):
+        # One retry: the server may have restarted since this thread connected
+        for attempt in (1, 2):
+            try:
+                sock = self._connection()
+                _send_message(sock, header, payload)
+                response, _ = _recv_message(sock)
+                break
+            except (ConnectionError, OSError) as e:
+                self._drop_connection()
+                if attempt == 2:
+                    raise ConnectionError(f"Face inference server unavailable at {self.socket_path}: {e}")
+        if not response.get("ok"):
+            error_type = ValueError if response.get("value_error") else RuntimeError
+            raise error_type(response.get("error", "Face inference failed"))
+        return response
+
+    def analyze(self, image_data, timeout=None) -> list:
+        img = np.ascontiguousarray(to_bgr_array(image_data))
+        response = self._call({"op": "analyze", "shape": list(img.shape), "dtype": str(img.dtype)}, img.tobytes())
+        return _decode_records(response["faces"])
+
+    async def analyze_async(self, image_data) -> list:
+        return await asyncio.get_running_loop().run_in_executor(None, self.analyze, image_data)
+
+    def ping(self) -> bool:
+        try:
+            self._call({"op": "ping"})
+            return True
+        except Exception:
+            return False
+
+    def load(self):
+        return None
+
+    def is_ready(self) -> bool:
+        return self.ping()
+
+    def get_app(self):
+        raise RuntimeError("FaceAnalysis app lives in face_inference_server (FACE_INFERENCE_MODE=socket)")
+
+    def unload(self) -> bool:
+        # The server owns the model; workers never unload it
+        return False
+
+    def stats(self) -> dict:
+        try:
+            return {**self._call({"op": "stats"})["stats"], 'mode': 'socket', 'socket': self.socket_path}
+        except Exception as e:
+            return {'mode': 'socket', 'socket': self.socket_path, 'error': str(e)}
+
+
+# ============================================================================
+# GLOBAL INSTANCE
+# ============================================================================
+_face_inference = None
+_face_inference_lock = threading.Lock()
+
+
+def get_face_inference():
+    """The process-wide face inference service (local or socket client, per FACE_INFERENCE_MODE)"""
+    global _face_inference
+
+    if _face_inference is None:
+        with _face_inference_lock:
+            if _face_inference is None:
+                if FACE_INFERENCE_MODE == "socket":
+                    client = FaceInferenceClient()
+                    if client.ping() or not FACE_INFERENCE_SOCKET_FALLBACK:
+                        logger.info(f"🔌 Face inference via server socket {FACE_INFERENCE_SOCKET}")
+                        _face_inference = client
+                    else:
+                        logger.error(f"❌ Face inference server not reachable at {FACE_INFERENCE_SOCKET} - loading model in this process")
+                        _face_inference = FaceInferenceService()
+                else:
+                    _face_inference = FaceInferenceService()
+    return _face_inference
@@ -5,63 +5,64 @@
 """
 Shared Face Recognition Model Module
 =====================================
-Singleton InsightFace model that can be imported by both:
+Singleton face model facade that can be imported by both:
 - face_embeddings.py (Registration)
 - face_auth.py (Verification)
 
-This ensures both services use the SAME model instance.
+The model itself is owned by face_inference.py (one per process, or one per
+host with FACE_INFERENCE_MODE=socket), so every service uses the SAME model.
 
 Author: Face Recognition System
 Version: 1.0.0
 """
 
-import os
-
-# --- Force deterministic CUDA visibility ---
-os.environ.update({
-    "CUDA_VISIBLE_DEVICES": "0",        # pick your active GPU
-    "CUDA_MODULE_LOADING": "LAZY",
-    "ORT_CUDA_UNAVAILABLE_FAIL": "0",
-    "ORT_TENSORRT_UNAVAILABLE_FAIL": "0",
-    "OMP_NUM_THREADS": "4",
-})
-
-import os
 import numpy as np
-from io import BytesIO
-from PIL import Image
-import cv2
-from insightface.app import FaceAnalysis
 import logging
 
+try:
+    from core.FaceAuth.face_inference import (
+        FACE_MODEL_NAME, FACE_DETECTION_SIZE, get_face_inference, to_bgr_array,
+    )
+except ImportError:
+    from face_inference import FACE_MODEL_NAME, FACE_DETECTION_SIZE, get_face_inference, to_bgr_array
+
 # ============================================================================
 # LOGGING
 # ============================================================================
 logger = logging.getLogger("face_model_shared")
 
-# ============================================================================
-# CONFIGURATION
-# ============================================================================
-FACE_MODEL_NAME = os.getenv("FACE_MODEL_NAME", "buffalo_l")
-FACE_DETECTION_SIZE = tuple(map(int, os.getenv("FACE_DETECTION_SIZE", "640,640").split(",")))
+
+def _face_info(record, face_count):
+    """Face record from the inference service -> extract_embedding(return_face_info=True) format"""
+    return {
+        'embedding': record['embedding'].tolist(),
+        'bbox': record['bbox'],
+        'landmarks': record['landmarks'],
+        'det_score': record['det_score'],
+        'age': record['age'],
+        'gender': record['gender'],
+        'face_count': face_count
+    }
+
 
 # ============================================================================
 # SHARED INSIGHTFACE MODEL - SINGLETON
 # ============================================================================
 class SharedFaceModel:
     """
-    Singleton class for InsightFace model management.
+    Singleton facade over the shared face inference service (face_inference.py).
     Can be imported and used by multiple services.
     
     Usage:
-        from face_model_shared import get_face_model
+        from core.FaceAuth.face_model_shared import get_face_model
         
         face_model = get_face_model()
         embedding = face_model.extract_embedding(image_data)
+        embedding = await face_model.extract_embedding_async(frame)
     """
     _instance = None
     _initialized = False
-    _app = None
+    _inference = None
 
     def __new__(cls):
         if cls._instance is None:
@@ -74,66 +75,45 @@ class SharedFaceModel:
             self._initialized = True
 
     def _initialize_model(self):
-        """Initialize InsightFace model once"""
+        """Attach to the process-wide inference service and make sure its model is loaded"""
         try:
             logger.info(f"🔹 Initializing Shared InsightFace Model: {FACE_MODEL_NAME}")
             logger.info(f"   Detection Size: {FACE_DETECTION_SIZE}")
             
-            self._app = FaceAnalysis(
-                name=FACE_MODEL_NAME,
-                providers=['CUDAExecutionProvider', 'CPUExecutionProvider']
-            )
-            
-            # Prepare with detection size
-            self._app.prepare(ctx_id=-1, det_size=FACE_DETECTION_SIZE)
+            self._inference = get_face_inference()
+            self._inference.load()
             
-            logger.info("✅ Shared InsightFace Model initialized successfully")
-            logger.info(f"   Model: {FACE_MODEL_NAME}")
-            logger.info(f"   Providers: {self._app.det_model.session.get_providers()}")
+            logger.info(f"✅ Shared InsightFace Model ready (inference mode: {self._inference.mode})")
             
         except Exception as e:
             logger.error(f"❌ Failed to initialize InsightFace model: {e}")
             raise
 
     def unload_model(self):
-        """Unload the model and free GPU memory"""
+        """Unload the model and free GPU memory (skipped while other callers are mid-request)"""
         try:
-            if self._app is not None:
-                logger.info("🔹 Unloading InsightFace model and releasing GPU memory...")
-                
-                # Delete the model
-                del self._app
-                self._app = None
-                
-                # Force GPU cache cleanup
-                try:
-                    import torch
-                    if torch.cuda.is_available():
-                        torch.cuda.empty_cache()
-                        torch.cuda.synchronize()
-                        logger.info("✅ CUDA cache cleared")
-                except ImportError:
-                    pass
-                
-                # Force garbage collection
-                import gc
-                gc.collect()
-                
-                logger.info("✅ InsightFace model unloaded, GPU memory released")
+            if self._inference is not None and self._inference.unload():
                 self._initialized = False
-                
         except Exception as e:
             logger.error(f"❌ Error unloading model: {e}")
             
     def get_app(self):
         """Get the FaceAnalysis app instance"""
-        if self._app is None:
+        if self._inference is None:
             raise RuntimeError("FaceAnalysis model not initialized")
-        return self._app
+        return self._inference.get_app()
 
     def is_ready(self):
         """Check if model is ready"""
-        return self._app is not None
+        return self._inference is not None and self._inference.is_ready()
+
+    def inference_stats(self):
+        """Queue depth, batch sizes and timings of the shared inference service"""
+        return self._inference.stats() if self._inference is not None else {}
+
+    def analyze(self, image_data):
+        """All faces in the image as face records (largest first), see face_inference.face_records"""
+        return self._inference.analyze(image_data)
 
     def extract_embedding(self, image_data, return_face_info=False):
         """
@@ -145,6 +125,7 @@ class SharedFaceModel:
                 - file-like object: File upload object
                 - numpy array: BGR image array
                 - PIL Image: PIL Image object
+                - str: base64 encoded image
             return_face_info: If True, return additional face detection info
         
         Returns:
@@ -165,48 +146,42 @@ class SharedFaceModel:
             ValueError: If no face detected or processing fails
         """
         try:
-            # Convert input to numpy array (BGR format)
-            np_img = self._convert_to_numpy(image_data)
-            
-            # Detect faces
-            faces = self._app.get(np_img)
-            
-            if not faces:
-                raise ValueError("No face detected. Ensure face is clearly visible and well-lit.")
-            
-            if len(faces) > 1:
-                logger.warning(f"⚠️  Multiple faces detected ({len(faces)}). Using largest face.")
-            
-            # Use largest face (by bounding box area)
-            face = max(faces, key=lambda f: (f.bbox[2] - f.bbox[0]) * (f.bbox[3] - f.bbox[1]))
-            
-            # Extract embedding
-            embedding = face.embedding.tolist()
-            
-            logger.debug(f"✅ Embedding extracted (dimension: {len(embedding)})")
-            
-            # Return based on flag
-            if not return_face_info:
-                return embedding
-            
-            # Return with additional info
-            face_info = {
-                'embedding': embedding,
-                'bbox': face.bbox.tolist(),
-                'landmarks': face.kps.tolist() if hasattr(face, 'kps') else None,
-                'det_score': float(face.det_score),
-                'age': int(face.age) if hasattr(face, 'age') else None,
-                'gender': 'male' if hasattr(face, 'gender') and face.gender == 1 else 'female' if hasattr(face, 'gender') and face.gender == 0 else None,
-                'face_count': len(faces)
-            }
-            
-            return face_info
-            
+            faces = self._inference.analyze(image_data)
         except ValueError as ve:
             raise ve
         except Exception as e:
             logger.error(f"❌ Error extracting embedding: {e}", exc_info=True)
             raise ValueError(f"Failed to process image: {str(e)}")
+        return self._largest_face(faces, return_face_info)
+
+    async def extract_embedding_async(self, image_data, return_face_info=False):
+        """
+        extract_embedding for async callers: awaits the inference queue instead of
+        blocking the event loop, so concurrent verifiers share batches.
+        """
+        try:
+            faces = await self._inference.analyze_async(image_data)
+        except ValueError as ve:
+            raise ve
+        except Exception as e:
+            logger.error(f"❌ Error extracting embedding: {e}", exc_info=True)
+            raise ValueError(f"Failed to process image: {str(e)}")
+        return self._largest_face(faces, return_face_info)
+
+    def _largest_face(self, faces, return_face_info):
+        if not faces:
+            raise ValueError("No face detected. Ensure face is clearly visible and well-lit.")
+        
+        if len(faces) > 1:
+            logger.warning(f"⚠️  Multiple faces detected ({len(faces)}). Using largest face.")
+        
+        # Face records are sorted by bounding box area, largest first
+        face = faces[0]
+        logger.debug(f"✅ Embedding extracted (dimension: {len(face['embedding'])})")
+        
+        if not return_face_info:
+            return face['embedding'].tolist()
+        return _face_info(face, len(faces))
 
     def _convert_to_numpy(self, image_data):
         """
@@ -218,39 +193,7 @@ class SharedFaceModel:
         Returns:
             numpy.ndarray: Image in BGR format (OpenCV)
         """
-        try:
-            # Handle file-like objects (Django UploadedFile)
-            if hasattr(image_data, 'read'):
-                image_data = image_data.read()
-            
-            # Handle bytes
-            if isinstance(image_data, bytes):
-                img = Image.open(BytesIO(image_data)).convert("RGB")
-                np_img = np.array(img)
-                # Convert RGB to BGR (OpenCV format)
-                np_img = cv2.cvtColor(np_img, cv2.COLOR_RGB2BGR)
-                return np_img
-            
-            # Handle PIL Image
-            elif hasattr(image_data, 'mode'):  # PIL Image
-                if image_data.mode != 'RGB':
-                    image_data = image_data.convert('RGB')
-                np_img = np.array(image_data)
-                # Convert RGB to BGR
-                np_img = cv2.cvtColor(np_img, cv2.COLOR_RGB2BGR)
-                return np_img
-            
-            # Handle numpy array
-            elif isinstance(image_data, np.ndarray):
-                # Assume already in BGR format
-                return image_data
-            
-            else:
-                raise ValueError(f"Unsupported image data type: {type(image_data)}")
-                
-        except Exception as e:
-            logger.error(f"❌ Error converting image to numpy: {e}")
-            raise ValueError(f"Failed to convert image: {str(e)}")
+        return to_bgr_array(image_data)
 
     def detect_face(self, image_data):
         """
@@ -268,8 +211,7 @@ class SharedFaceModel:
             }
         """
         try:
-            np_img = self._convert_to_numpy(image_data)
-            faces = self._app.get(np_img)
+            faces = self._inference.analyze(image_data)
             
             if not faces:
                 return {
@@ -279,14 +221,11 @@ class SharedFaceModel:
                     'det_score': 0.0
                 }
             
-            # Get largest face
-            face = max(faces, key=lambda f: (f.bbox[2] - f.bbox[0]) * (f.bbox[3] - f.bbox[1]))
-            
             return {
                 'detected': True,
                 'face_count': len(faces),
-                'largest_face_bbox': face.bbox.tolist(),
-                'det_score': float(face.det_score)
+                'largest_face_bbox': faces[0]['bbox'],
+                'det_score': faces[0]['det_score']
             }
             
         except Exception as e:
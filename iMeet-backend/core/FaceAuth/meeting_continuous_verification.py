@@ -48,6 +48,8 @@ from bson import ObjectId
 # ============================================================================
 from core.FaceAuth.face_model_shared import get_face_model
 from core.UserDashBoard.face_embeddings import get_user_embeddings, base64_to_numpy
+from core.FaceAuth.embedding_codec import normalize_embedding
+from core.FaceAuth.unified_face_service import UserEmbeddingSet
 
 # ============================================================================
 # OPTIONAL: DATABASE IMPORTS (Add if available)
@@ -587,8 +589,8 @@ class MeetingContinuousVerifier:
             f"{'='*80}\n"
         )
     
-    def _load_user_embeddings(self) -> Optional[List[Dict]]:
-        """Load user's stored embeddings from MongoDB"""
+    def _load_user_embeddings(self) -> Optional[UserEmbeddingSet]:
+        """Load user's stored embeddings from MongoDB as one pre-normalized matrix"""
         try:
             user_embeddings = get_user_embeddings(self.user_id)
             
@@ -598,15 +600,19 @@ class MeetingContinuousVerifier:
             
             embeddings_list = []
             for emb_doc in user_embeddings:
-                if emb_doc.get('embedding'):
+                # get_user_embeddings already decoded the stored bytes to unit-length float32
+                if emb_doc.get('embedding') is not None:
                     embeddings_list.append({
-                        'embedding': np.array(emb_doc['embedding'], dtype=np.float32),
+                        'embedding': emb_doc['embedding'],
                         'embedding_id': str(emb_doc['_id']),
                         'det_score': emb_doc.get('det_score', 0.0)
                     })
             
+            if not embeddings_list:
+                return None
+            
             logger.info(f"✅ Loaded {len(embeddings_list)} embeddings for user {self.user_id}")
-            return embeddings_list
+            return UserEmbeddingSet(embeddings_list)
             
         except Exception as e:
             logger.error(f"❌ Error loading embeddings: {e}")
@@ -739,7 +745,7 @@ class MeetingContinuousVerifier:
             
             # Extract embedding from live frame
             try:
-                live_embedding = self.face_model.extract_embedding(
+                live_embedding = await self.face_model.extract_embedding_async(
                     frame,
                     return_face_info=False
                 )
@@ -751,37 +757,17 @@ class MeetingContinuousVerifier:
                 logger.error(f"❌ Error extracting embedding: {e}")
                 return True, 1.0
             
-            # Convert to numpy array
-            live_embedding = np.array(live_embedding, dtype=np.float32)
+            # Normalize once; stored embeddings are unit length, so cosine similarity is a dot product
+            live_embedding = normalize_embedding(live_embedding)
             
             # Validate embedding
-            if live_embedding.size == 0:
+            if live_embedding is None or live_embedding.size == 0:
                 logger.warning(f"⚠️  Empty embedding for user {self.user_id}")
                 return True, 1.0
             
-            # Compare with all stored embeddings
-            max_similarity = 0.0
-            best_match_id = None
-            
-            for stored_emb_data in self.stored_embeddings:
-                try:
-                    # Calculate cosine distance
-                    distance = self.face_model.compare_embeddings(
-                        live_embedding,
-                        stored_emb_data['embedding'],
-                        method='cosine'
-                    )
-                    
-                    # Convert distance to similarity
-                    similarity = 1 - distance
-                    
-                    if similarity > max_similarity:
-                        max_similarity = similarity
-                        best_match_id = stored_emb_data['embedding_id']
-                        
-                except Exception as e:
-                    logger.error(f"❌ Error comparing embeddings: {e}")
-                    continue
+            # Compare with all stored embeddings: one matmul + argmax over the (k, 512) matrix
+            best_similarity, best_match_id, _ = self.stored_embeddings.best_match(live_embedding, 'cosine')
+            max_similarity = max(0.0, best_similarity)
             
             # Determine if verified
             threshold = MeetingVerificationConfig.FACE_DISTANCE_THRESHOLD
@@ -54,6 +54,8 @@ except ImportError:
     FACE_MODEL_AVAILABLE = False
     logging.warning("face_model_shared not available")
 
+from core.FaceAuth.embedding_codec import normalize_embedding
+
 try:
     from core.UserDashBoard.face_embeddings import get_user_embeddings, base64_to_numpy
     USER_EMBEDDINGS_AVAILABLE = True
@@ -228,6 +230,55 @@ class FrameCache:
                 'oldest_frame_age': max(ages) if ages else 0,
             }
 
+# ============================================================================
+# USER EMBEDDING MATRIX
+# ============================================================================
+
+class UserEmbeddingSet:
+    """
+    A user's stored embeddings as one pre-normalized (k, 512) float32 matrix.
+    
+    Matching a live embedding is one matrix-vector product plus an argmax,
+    so no per-embedding Python loop or norm computation on the frame path.
+    Instances are immutable once built and safe to share between threads.
+    """
+    
+    __slots__ = ('matrix', 'embedding_ids', 'det_scores')
+    
+    def __init__(self, embeddings: List[Dict]):
+        vectors = np.vstack([np.asarray(e['embedding'], dtype=np.float32).reshape(-1) for e in embeddings])
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.matrix = np.ascontiguousarray(vectors / norms, dtype=np.float32)
+        self.embedding_ids = [e['embedding_id'] for e in embeddings]
+        self.det_scores = [e.get('det_score', 0.0) for e in embeddings]
+    
+    def __len__(self):
+        return len(self.embedding_ids)
+    
+    def similarities(self, live_embedding: np.ndarray, method: str = 'cosine') -> np.ndarray:
+        """
+        Similarity (1 - distance) of a unit-length live embedding to every stored row.
+        Euclidean distance between unit vectors is sqrt(2 - 2 * cosine).
+        """
+        cosine = self.matrix @ live_embedding
+        if method == 'cosine':
+            return cosine
+        return 1.0 - np.sqrt(np.maximum(0.0, 2.0 - 2.0 * cosine))
+    
+    def best_match(self, live_embedding: np.ndarray, method: str = 'cosine') -> Tuple[float, Optional[str], np.ndarray]:
+        """(best similarity, its embedding_id, all similarities)"""
+        similarities = self.similarities(live_embedding, method)
+        best = int(np.argmax(similarities))
+        return float(similarities[best]), self.embedding_ids[best], similarities
+    
+    def as_list(self) -> List[Dict]:
+        """Row-per-embedding view in the get_user_embeddings format"""
+        return [
+            {'embedding': row, 'embedding_id': embedding_id, 'det_score': det_score}
+            for row, embedding_id, det_score in zip(self.matrix, self.embedding_ids, self.det_scores)
+        ]
+
 # ============================================================================
 # EMBEDDING CACHE
 # ============================================================================
@@ -244,7 +295,7 @@ class EmbeddingCache:
         self.max_size = max_size
         self._lock = Lock()
     
-    def store(self, user_id: int, embeddings: List[Dict]):
+    def store(self, user_id: int, embeddings: UserEmbeddingSet):
         """Store user embeddings in cache"""
         with self._lock:
             # Check cache size
@@ -259,7 +310,7 @@ class EmbeddingCache:
             
             logger.debug(f"Embeddings stored: user {user_id} ({len(embeddings)} embeddings)")
     
-    def get(self, user_id: int) -> Optional[List[Dict]]:
+    def get(self, user_id: int) -> Optional[UserEmbeddingSet]:
         """Get user embeddings from cache"""
         with self._lock:
             if user_id not in self.cache:
@@ -460,15 +511,15 @@ class UnifiedFaceService:
         """Clear cached frame for a user"""
         self.frame_cache.clear(meeting_id, user_id)
     
-    def get_user_embeddings(self, user_id: int) -> Optional[List[Dict]]:
+    def get_user_embedding_set(self, user_id: int) -> Optional[UserEmbeddingSet]:
         """
-        Get user embeddings (with caching)
+        Get user embeddings as a pre-normalized matrix (with caching)
         
         Args:
             user_id: User identifier
         
         Returns:
-            List of embedding dictionaries or None
+            UserEmbeddingSet or None
         """
         if not USER_EMBEDDINGS_AVAILABLE:
             logger.error("❌ User embeddings module not available")
@@ -494,28 +545,59 @@ class UnifiedFaceService:
             # Convert to standard format
             embeddings_list = []
             for emb_doc in user_embeddings:
-                if emb_doc.get('embedding'):
+                # get_user_embeddings already decoded the stored bytes to unit-length float32
+                if emb_doc.get('embedding') is not None:
                     embeddings_list.append({
-                        'embedding': np.array(emb_doc['embedding'], dtype=np.float32),
+                        'embedding': emb_doc['embedding'],
                         'embedding_id': str(emb_doc['_id']),
                         'det_score': emb_doc.get('det_score', 0.0)
                     })
             
+            if not embeddings_list:
+                return None
+            
+            embedding_set = UserEmbeddingSet(embeddings_list)
+            
             # Store in cache
-            if UnifiedFaceServiceConfig.ENABLE_EMBEDDING_CACHE and embeddings_list:
-                self.embedding_cache.store(user_id, embeddings_list)
+            if UnifiedFaceServiceConfig.ENABLE_EMBEDDING_CACHE:
+                self.embedding_cache.store(user_id, embedding_set)
             
-            logger.info(f"✅ Loaded {len(embeddings_list)} embeddings for user {user_id}")
-            return embeddings_list
+            logger.info(f"✅ Loaded {len(embedding_set)} embeddings for user {user_id}")
+            return embedding_set
             
         except Exception as e:
             logger.error(f"❌ Error loading embeddings for user {user_id}: {e}")
             return None
     
+    def get_user_embeddings(self, user_id: int) -> Optional[List[Dict]]:
+        """
+        Get user embeddings (with caching)
+        
+        Returns:
+            List of embedding dictionaries or None
+        """
+        embedding_set = self.get_user_embedding_set(user_id)
+        return embedding_set.as_list() if embedding_set is not None else None
+    
     def clear_user_embeddings(self, user_id: int):
         """Clear cached embeddings for a user"""
         self.embedding_cache.clear(user_id)
     
+    def _prepare_frame(self, frame) -> Optional[np.ndarray]:
+        """Decode a base64 frame; None for frames that cannot be verified"""
+        if isinstance(frame, str):
+            frame = base64_to_numpy(frame)
+        
+        if frame is None or not isinstance(frame, np.ndarray):
+            logger.warning("⚠️  Invalid frame format")
+            return None
+        
+        if frame.size == 0:
+            logger.warning("⚠️  Empty frame")
+            return None
+        
+        return frame
+    
     async def verify_face(
         self,
         frame,
@@ -541,25 +623,11 @@ class UnifiedFaceService:
         """
         self._stats['total_verifications'] += 1
         
-        if threshold is None:
-            threshold = UnifiedFaceServiceConfig.FACE_DISTANCE_THRESHOLD
-        
-        if method is None:
-            method = UnifiedFaceServiceConfig.COMPARISON_METHOD
-        
         try:
-            # Convert frame if needed
-            if isinstance(frame, str):
-                frame = base64_to_numpy(frame)
-            
-            if frame is None or not isinstance(frame, np.ndarray):
-                logger.warning("⚠️  Invalid frame format")
+            frame = self._prepare_frame(frame)
+            if frame is None:
                 return True, 1.0  # Skip invalid frames
             
-            if frame.size == 0:
-                logger.warning("⚠️  Empty frame")
-                return True, 1.0
-            
             # Check if model is loaded
             if self.face_model is None:
                 logger.error("❌ Face model not loaded")
@@ -568,11 +636,12 @@ class UnifiedFaceService:
             
             # Extract embedding from live frame
             try:
-                with self._model_lock:
-                    live_embedding = self.face_model.extract_embedding(
-                        frame,
-                        return_face_info=False
-                    )
+                # Awaits the shared inference queue: concurrent verifiers are batched
+                # together instead of serializing behind a lock on the event loop
+                live_embedding = await self.face_model.extract_embedding_async(
+                    frame,
+                    return_face_info=False
+                )
             except ValueError as e:
                 # No face detected - not an error, just skip
                 logger.debug(f"No face detected: {e}")
@@ -582,165 +651,172 @@ class UnifiedFaceService:
                 self._stats['errors'] += 1
                 return True, 1.0
             
-            # Convert to numpy array
-            live_embedding = np.array(live_embedding, dtype=np.float32)
-            
-            if live_embedding.size == 0:
-                logger.warning("⚠️  Empty embedding extracted")
-                return True, 1.0
+            return self._match_embedding(live_embedding, user_id, threshold, method)
             
-            # Get stored embeddings
-            stored_embeddings = self.get_user_embeddings(user_id)
-            if not stored_embeddings:
-                logger.warning(f"⚠️  No stored embeddings for user {user_id}")
-                self._stats['errors'] += 1
-                return False, 0.0
-            
-            # Compare with all stored embeddings
-            max_similarity = 0.0
-            best_match_id = None
-            all_similarities = []
-            
-            for stored_emb_data in stored_embeddings:
-                try:
-                    with self._model_lock:
-                        distance = self.face_model.compare_embeddings(
-                            live_embedding,
-                            stored_emb_data['embedding'],
-                            method=method
-                        )
-                    
-                    # Convert distance to similarity
-                    similarity = 1 - distance
-                    all_similarities.append(similarity)
-                    
-                    if similarity > max_similarity:
-                        max_similarity = similarity
-                        best_match_id = stored_emb_data['embedding_id']
-                        
-                except Exception as e:
-                    logger.error(f"Error comparing embeddings: {e}")
-                    continue
-            
-            # Determine if verified
-            similarity_threshold = 1 - threshold
-            is_verified = max_similarity >= similarity_threshold
-            
-            # Update statistics
+        except Exception as e:
+            logger.error(f"❌ Error in verify_face: {e}")
+            import traceback
+            logger.error(traceback.format_exc())
+            self._stats['errors'] += 1
+            return True, 1.0  # Don't penalize on errors
+    
+    def _match_embedding(
+        self,
+        live_embedding,
+        user_id: int,
+        threshold: float = None,
+        method: str = None
+    ) -> Tuple[bool, float]:
+        """
+        Match an already extracted live embedding against a user's stored embeddings.
+        
+        One matmul + argmax over the cached (k, 512) matrix; no lock is held.
+        
+        Returns:
+            Tuple[bool, float]: (is_verified, similarity_score)
+        """
+        if threshold is None:
+            threshold = UnifiedFaceServiceConfig.FACE_DISTANCE_THRESHOLD
+        
+        if method is None:
+            method = UnifiedFaceServiceConfig.COMPARISON_METHOD
+        
+        # Normalize once; stored embeddings are unit length
+        live_embedding = normalize_embedding(live_embedding)
+        
+        if live_embedding is None or live_embedding.size == 0:
+            logger.warning("⚠️  Empty embedding extracted")
+            return True, 1.0
+        
+        # Get stored embeddings
+        embedding_set = self.get_user_embedding_set(user_id)
+        if embedding_set is None:
+            logger.warning(f"⚠️  No stored embeddings for user {user_id}")
+            self._stats['errors'] += 1
+            return False, 0.0
+        
+        if live_embedding.shape[0] != embedding_set.matrix.shape[1]:
+            logger.error(f"Embedding dimension mismatch: {live_embedding.shape[0]} vs {embedding_set.matrix.shape[1]}")
+            self._stats['errors'] += 1
+            return True, 1.0
+        
+        # Compare with all stored embeddings in one product
+        best_similarity, best_match_id, similarities = embedding_set.best_match(live_embedding, method)
+        max_similarity = max(0.0, best_similarity)
+        all_similarities = similarities.tolist()
+        
+        # Determine if verified
+        similarity_threshold = 1 - threshold
+        is_verified = max_similarity >= similarity_threshold
+        
+        # Update statistics
+        if is_verified:
+            self._stats['successful_verifications'] += 1
+        else:
+            self._stats['failed_verifications'] += 1
+            self._stats['unknown_person_detections'] += 1
+            self._stats['last_unknown_detection'] = datetime.now().isoformat()
+        
+        # ============================================================
+        # CONSOLE LOGGING - Complete Verification Details
+        # ============================================================
+        if UnifiedFaceServiceConfig.LOG_VERIFICATIONS:
             if is_verified:
-                self._stats['successful_verifications'] += 1
+                # ✅ Verification successful
+                logger.info(
+                    f"\n{'='*75}\n"
+                    f"✅ UNIFIED FACE SERVICE: VERIFICATION SUCCESS\n"
+                    f"{'='*75}\n"
+                    f"User ID: {user_id}\n"
+                    f"Similarity Score: {max_similarity:.3f}\n"
+                    f"Threshold: {similarity_threshold:.3f}\n"
+                    f"Best Match Embedding ID: {best_match_id}\n"
+                    f"Comparison Method: {method}\n"
+                    f"Total Stored Embeddings: {len(embedding_set)}\n"
+                    f"Result: AUTHORIZED PERSON VERIFIED\n"
+                    f"Status: Face matches registered user\n"
+                    f"Cache Stats:\n"
+                    f"  - Frame Cache Enabled: {UnifiedFaceServiceConfig.ENABLE_FRAME_CACHE}\n"
+                    f"  - Embedding Cache Enabled: {UnifiedFaceServiceConfig.ENABLE_EMBEDDING_CACHE}\n"
+                    f"Service Stats:\n"
+                    f"  - Total Verifications: {self._stats['total_verifications']}\n"
+                    f"  - Successful: {self._stats['successful_verifications']}\n"
+                    f"  - Failed: {self._stats['failed_verifications']}\n"
+                    f"  - Success Rate: {(self._stats['successful_verifications']/self._stats['total_verifications']*100):.1f}%\n"
+                    f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+                    f"{'='*75}\n"
+                )
             else:
-                self._stats['failed_verifications'] += 1
-                self._stats['unknown_person_detections'] += 1
-                self._stats['last_unknown_detection'] = datetime.now().isoformat()
-            
-            # ============================================================
-            # CONSOLE LOGGING - Complete Verification Details
-            # ============================================================
-            if UnifiedFaceServiceConfig.LOG_VERIFICATIONS:
-                if is_verified:
-                    # ✅ Verification successful
-                    logger.info(
-                        f"\n{'='*75}\n"
-                        f"✅ UNIFIED FACE SERVICE: VERIFICATION SUCCESS\n"
-                        f"{'='*75}\n"
-                        f"User ID: {user_id}\n"
-                        f"Similarity Score: {max_similarity:.3f}\n"
-                        f"Threshold: {similarity_threshold:.3f}\n"
-                        f"Best Match Embedding ID: {best_match_id}\n"
-                        f"Comparison Method: {method}\n"
-                        f"Total Stored Embeddings: {len(stored_embeddings)}\n"
-                        f"Result: AUTHORIZED PERSON VERIFIED\n"
-                        f"Status: Face matches registered user\n"
-                        f"Cache Stats:\n"
-                        f"  - Frame Cache Enabled: {UnifiedFaceServiceConfig.ENABLE_FRAME_CACHE}\n"
-                        f"  - Embedding Cache Enabled: {UnifiedFaceServiceConfig.ENABLE_EMBEDDING_CACHE}\n"
-                        f"Service Stats:\n"
-                        f"  - Total Verifications: {self._stats['total_verifications']}\n"
-                        f"  - Successful: {self._stats['successful_verifications']}\n"
-                        f"  - Failed: {self._stats['failed_verifications']}\n"
-                        f"  - Success Rate: {(self._stats['successful_verifications']/self._stats['total_verifications']*100):.1f}%\n"
-                        f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-                        f"{'='*75}\n"
-                    )
-                else:
-                    # 🚫 Verification failed - Unknown person
+                # 🚫 Verification failed - Unknown person
+                logger.error(
+                    f"\n{'='*75}\n"
+                    f"🚫 UNIFIED FACE SERVICE: UNKNOWN PERSON DETECTED\n"
+                    f"{'='*75}\n"
+                    f"⚠️  CRITICAL: Face does not match registered user!\n"
+                    f"{'='*75}\n"
+                    f"Expected User ID: {user_id}\n"
+                    f"Similarity Score: {max_similarity:.3f}\n"
+                    f"Threshold Required: {similarity_threshold:.3f}\n"
+                    f"Difference: {(similarity_threshold - max_similarity):.3f}\n"
+                    f"Best Match Embedding ID: {best_match_id}\n"
+                    f"Comparison Method: {method}\n"
+                    f"Total Stored Embeddings Checked: {len(embedding_set)}\n"
+                    f"Result: UNAUTHORIZED PERSON\n"
+                    f"Status: Face does NOT match any stored embedding\n"
+                    f"Verdict: Someone else is using this account\n"
+                    f"Service Stats:\n"
+                    f"  - Total Verifications: {self._stats['total_verifications']}\n"
+                    f"  - Successful: {self._stats['successful_verifications']}\n"
+                    f"  - Failed: {self._stats['failed_verifications']}\n"
+                    f"  - Unknown Person Detections: {self._stats['unknown_person_detections']}\n"
+                    f"  - Current Success Rate: {(self._stats['successful_verifications']/self._stats['total_verifications']*100):.1f}%\n"
+                    f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+                    f"{'='*75}\n"
+                )
+                
+                # Detailed analysis if enabled
+                if UnifiedFaceServiceConfig.LOG_DETAILED_ANALYSIS:
+                    avg_similarity = sum(all_similarities) / len(all_similarities) if all_similarities else 0
+                    min_similarity = min(all_similarities) if all_similarities else 0
+                    
                     logger.error(
-                        f"\n{'='*75}\n"
-                        f"🚫 UNIFIED FACE SERVICE: UNKNOWN PERSON DETECTED\n"
                         f"{'='*75}\n"
-                        f"⚠️  CRITICAL: Face does not match registered user!\n"
+                        f"DETAILED ANALYSIS:\n"
                         f"{'='*75}\n"
-                        f"Expected User ID: {user_id}\n"
-                        f"Similarity Score: {max_similarity:.3f}\n"
-                        f"Threshold Required: {similarity_threshold:.3f}\n"
-                        f"Difference: {(similarity_threshold - max_similarity):.3f}\n"
-                        f"Best Match Embedding ID: {best_match_id}\n"
-                        f"Comparison Method: {method}\n"
-                        f"Total Stored Embeddings Checked: {len(stored_embeddings)}\n"
-                        f"Result: UNAUTHORIZED PERSON\n"
-                        f"Status: Face does NOT match any stored embedding\n"
-                        f"Verdict: Someone else is using this account\n"
-                        f"Service Stats:\n"
-                        f"  - Total Verifications: {self._stats['total_verifications']}\n"
-                        f"  - Successful: {self._stats['successful_verifications']}\n"
-                        f"  - Failed: {self._stats['failed_verifications']}\n"
-                        f"  - Unknown Person Detections: {self._stats['unknown_person_detections']}\n"
-                        f"  - Current Success Rate: {(self._stats['successful_verifications']/self._stats['total_verifications']*100):.1f}%\n"
-                        f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+                        f"  ❌ The person's face embedding does not match user {user_id}\n"
+                        f"  ❌ All {len(embedding_set)} stored embeddings were checked\n"
+                        f"  ❌ Best similarity: {max_similarity:.3f}\n"
+                        f"  ❌ Average similarity: {avg_similarity:.3f}\n"
+                        f"  ❌ Minimum similarity: {min_similarity:.3f}\n"
+                        f"  ❌ Required threshold: {similarity_threshold:.3f}\n"
+                        f"  ❌ Shortfall: {(similarity_threshold - max_similarity):.3f}\n"
+                        f"  ❌ This indicates a different person is in front of the camera\n"
                         f"{'='*75}\n"
+                        f"RECOMMENDED ACTIONS:\n"
+                        f"  1. Issue warning to user\n"
+                        f"  2. Log security incident\n"
+                        f"  3. Monitor for repeated violations\n"
+                        f"  4. Consider account suspension if pattern continues\n"
+                        f"  5. Alert system administrators\n"
+                        f"{'='*75}\n"
+                        f"ALL SIMILARITY SCORES:\n"
                     )
                     
-                    # Detailed analysis if enabled
-                    if UnifiedFaceServiceConfig.LOG_DETAILED_ANALYSIS:
-                        avg_similarity = sum(all_similarities) / len(all_similarities) if all_similarities else 0
-                        min_similarity = min(all_similarities) if all_similarities else 0
-                        
-                        logger.error(
-                            f"{'='*75}\n"
-                            f"DETAILED ANALYSIS:\n"
-                            f"{'='*75}\n"
-                            f"  ❌ The person's face embedding does not match user {user_id}\n"
-                            f"  ❌ All {len(stored_embeddings)} stored embeddings were checked\n"
-                            f"  ❌ Best similarity: {max_similarity:.3f}\n"
-                            f"  ❌ Average similarity: {avg_similarity:.3f}\n"
-                            f"  ❌ Minimum similarity: {min_similarity:.3f}\n"
-                            f"  ❌ Required threshold: {similarity_threshold:.3f}\n"
-                            f"  ❌ Shortfall: {(similarity_threshold - max_similarity):.3f}\n"
-                            f"  ❌ This indicates a different person is in front of the camera\n"
-                            f"{'='*75}\n"
-                            f"RECOMMENDED ACTIONS:\n"
-                            f"  1. Issue warning to user\n"
-                            f"  2. Log security incident\n"
-                            f"  3. Monitor for repeated violations\n"
-                            f"  4. Consider account suspension if pattern continues\n"
-                            f"  5. Alert system administrators\n"
-                            f"{'='*75}\n"
-                            f"ALL SIMILARITY SCORES:\n"
-                        )
-                        
-                        # Log all individual similarity scores
-                        for idx, sim in enumerate(all_similarities, 1):
-                            status = "✓ PASS" if sim >= similarity_threshold else "✗ FAIL"
-                            logger.error(f"  Embedding {idx}: {sim:.3f} {status}")
-                        
-                        logger.error(f"{'='*75}\n")
+                    # Log all individual similarity scores
+                    for idx, sim in enumerate(all_similarities, 1):
+                        status = "✓ PASS" if sim >= similarity_threshold else "✗ FAIL"
+                        logger.error(f"  Embedding {idx}: {sim:.3f} {status}")
                     
-                    # Critical security alert
-                    logger.critical(
-                        f"🚨 SECURITY ALERT: Unknown person detected for user {user_id} | "
-                        f"Similarity: {max_similarity:.3f} | Threshold: {similarity_threshold:.3f} | "
-                        f"Detection #{self._stats['unknown_person_detections']}"
-                    )
-            
-            return is_verified, max_similarity
-            
-        except Exception as e:
-            logger.error(f"❌ Error in verify_face: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
-            self._stats['errors'] += 1
-            return True, 1.0  # Don't penalize on errors
+                    logger.error(f"{'='*75}\n")
+                
+                # Critical security alert
+                logger.critical(
+                    f"🚨 SECURITY ALERT: Unknown person detected for user {user_id} | "
+                    f"Similarity: {max_similarity:.3f} | Threshold: {similarity_threshold:.3f} | "
+                    f"Detection #{self._stats['unknown_person_detections']}"
+                )
+        
+        return is_verified, max_similarity
     
     def cleanup_session(self, meeting_id: str, user_id: int):
         """
@@ -810,7 +886,8 @@ class UnifiedFaceService:
                 'cache_hit_rate': f"{embedding_cache_rate:.1f}%",
                 'total_hits': self._stats['embedding_cache_hits'],
                 'total_misses': self._stats['embedding_cache_misses'],
-            }
+            },
+            'inference': self.face_model.inference_stats() if self.face_model is not None else None,
         }
     
     def reset_stats(self):
@@ -1012,6 +1089,7 @@ __all__ = [
     # Cache classes (for advanced usage)
     'FrameCache',
     'EmbeddingCache',
+    'UserEmbeddingSet',
 ]
 
 __version__ = "1.0.0"
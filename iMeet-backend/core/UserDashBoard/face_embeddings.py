@@ -21,8 +21,9 @@ os.environ.update({
 })
 
 import os
-import sys
 import logging
+import threading
+import time
 import numpy as np
 import base64
 from io import BytesIO
@@ -32,7 +33,7 @@ import cv2
 from PIL import Image
 
 # MongoDB and S3 imports
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
 from bson import ObjectId
 import boto3
 from botocore.exceptions import ClientError
@@ -40,25 +41,24 @@ from botocore.exceptions import ClientError
 # ============================================================================
 # IMPORT SHARED FACE MODEL FROM FACEAUTH FOLDER
 # ============================================================================
-# Add FaceAuth folder to Python path
-current_dir = os.path.dirname(os.path.abspath(__file__))
-faceauth_dir = os.path.join(current_dir, '..', 'FaceAuth')
-faceauth_dir = os.path.abspath(faceauth_dir)
-
-if faceauth_dir not in sys.path:
-    sys.path.insert(0, faceauth_dir)
-
+# Import through the package path: a sys.path import of face_model_shared would
+# load a second copy of the module (and a second model) next to the one used by
+# core.FaceAuth.unified_face_service.
 try:
-    from face_model_shared import get_face_model, compare_embeddings
+    from core.FaceAuth.face_model_shared import get_face_model, compare_embeddings
     FACE_RECOGNITION_ENABLED = True
     face_model = None
 except ImportError as e:
     FACE_RECOGNITION_ENABLED = False
     face_model = None
-    print(f"⚠️  Warning: Could not import face_model_shared from {faceauth_dir}")
+    print("⚠️  Warning: Could not import core.FaceAuth.face_model_shared")
     print(f"   Error: {e}")
     print("   Face recognition features will be disabled")
 
+from core.FaceAuth.embedding_codec import (
+    EMBEDDING_FORMAT_VERSION, canonical_user_id, decode_embedding, encode_embedding, normalize_embedding,
+)
+
 # Configure logging
 logger = logging.getLogger("face_embeddings")
 logging.basicConfig(
@@ -89,13 +89,24 @@ AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
 AWS_REGION = os.getenv("AWS_REGION", "ap-south-1")
 AWS_S3_BUCKET = os.getenv("AWS_S3_BUCKET", "connectly-storage")
 
+# Resident embedding index configuration
+FACE_INDEX_SNAPSHOT_PATH = os.getenv("FACE_INDEX_SNAPSHOT_PATH", "")  # empty = no snapshot
+FACE_INDEX_REFRESH_SECONDS = int(os.getenv("FACE_INDEX_REFRESH_SECONDS", "30"))
+# Each incremental sync re-reads this far behind its watermark (late commits, writer clock skew)
+FACE_INDEX_SYNC_OVERLAP_SECONDS = int(os.getenv("FACE_INDEX_SYNC_OVERLAP_SECONDS", "120"))
+# Full id-level reconcile against Mongo for anything the watermarks still missed (0 disables)
+FACE_INDEX_RECONCILE_SECONDS = int(os.getenv("FACE_INDEX_RECONCILE_SECONDS", "600"))
+FACE_INDEX_DIMENSION = 512
+
 # Initialize MongoDB client
+# connect=False: no monitor threads or sockets until the first query, so a
+# gunicorn master that imports this module (preload_app) forks a clean client
 try:
-    mongo_client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=5000)
+    mongo_client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=5000, connect=False)
     db = mongo_client[MONGO_DB]
     face_embeddings_collection = db["face_embeddings"]
     profile_photos_collection = db["profile_photos"]
-    logger.info(f"✓ MongoDB connected successfully to {MONGO_DB}")
+    logger.info(f"✓ MongoDB client configured for {MONGO_DB}")
 except Exception as e:
     logger.error(f"✗ MongoDB connection failed: {e}")
     db = None
@@ -115,6 +126,33 @@ except Exception as e:
     logger.error(f"✗ S3 client initialization failed: {e}")
     s3_client = None
 
+FACE_EMBEDDING_INDEXES = [
+    # Used by the resident index's incremental sync
+    [('status', 1), ('created_at', 1)],
+    [('status', 1), ('deleted_at', 1)],
+    # get_user_embeddings / face_auth.get_user_embedding (user_id is always an int)
+    [('user_id', 1), ('status', 1), ('created_at', -1)],
+]
+_face_indexes_ready = False
+_face_indexes_lock = threading.Lock()
+
+
+def ensure_face_embedding_indexes() -> bool:
+    """Create the face_embeddings indexes once per process (create_index is a no-op when they exist)"""
+    global _face_indexes_ready
+    if _face_indexes_ready or face_embeddings_collection is None:
+        return _face_indexes_ready
+    with _face_indexes_lock:
+        if _face_indexes_ready:
+            return True
+        try:
+            for keys in FACE_EMBEDDING_INDEXES:
+                face_embeddings_collection.create_index(keys, background=True)
+            _face_indexes_ready = True
+        except Exception as e:
+            logger.warning(f"⚠ Could not ensure face_embeddings indexes: {e}")
+    return _face_indexes_ready
+
 # ============================================================================
 # BACKWARD COMPATIBILITY - Keep old class for imports
 # ============================================================================
@@ -152,6 +190,408 @@ except Exception as e:
     face_engine = None
 
 
+# ============================================================================
+# RESIDENT EMBEDDING INDEX - 1:N search for face login
+# ============================================================================
+class FaceEmbeddingIndex:
+    """
+    In-memory index of all active face embeddings.
+
+    Embeddings live in one contiguous float32 matrix whose rows are
+    L2-normalized on insert, so a 1:N search is a single matrix-vector
+    product followed by a top-k selection. Rows are kept in sync by
+    store_face_embedding / delete_face_embedding in this process and by a
+    cheap incremental Mongo sync (created_at / deleted_at watermarks) for
+    writes made by other workers. Watermarks are the newest timestamps
+    actually read, each sync re-reads an overlap window behind them, and a
+    periodic id-level reconcile catches whatever still slipped through.
+
+    Optionally the matrix is snapshotted to FACE_INDEX_SNAPSHOT_PATH so a
+    restarted worker only has to fetch the delta since the snapshot.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(FaceEmbeddingIndex, cls).__new__(cls)
+            cls._instance._lock = threading.RLock()
+            cls._instance._reset()
+        return cls._instance
+
+    def _reset(self, dimension: int = FACE_INDEX_DIMENSION):
+        self._dimension = dimension
+        self._matrix = np.zeros((0, dimension), dtype=np.float32)
+        self._count = 0
+        self._embedding_ids: List[str] = []
+        self._user_ids: List[int] = []
+        self._det_scores: List[float] = []
+        self._positions: Dict[str, int] = {}
+        self._loaded = False
+        self._synced_at: Optional[datetime] = None
+        self._deleted_synced_at: Optional[datetime] = None
+        self._last_sync_check = 0.0
+        self._last_reconcile = 0.0
+
+    # ------------------------------------------------------------------
+    # Row management
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _normalize(embedding) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        norm = float(np.linalg.norm(vector))
+        if norm == 0.0 or not np.isfinite(norm):
+            return None
+        return vector / norm
+
+    def _ensure_capacity(self, rows: int):
+        capacity = self._matrix.shape[0]
+        if rows <= capacity:
+            return
+        new_capacity = max(rows, capacity * 2, 1024)
+        grown = np.zeros((new_capacity, self._dimension), dtype=np.float32)
+        grown[:self._count] = self._matrix[:self._count]
+        self._matrix = grown
+
+    def _add_locked(self, embedding_id: str, user_id, embedding, det_score) -> bool:
+        vector = self._normalize(embedding)
+        if vector is None or vector.shape[0] != self._dimension:
+            logger.warning(f"Skipping embedding {embedding_id} for index: invalid vector")
+            return False
+
+        row = self._positions.get(embedding_id)
+        if row is None:
+            self._ensure_capacity(self._count + 1)
+            row = self._count
+            self._count += 1
+            self._positions[embedding_id] = row
+            self._embedding_ids.append(embedding_id)
+            self._user_ids.append(user_id)
+            self._det_scores.append(float(det_score or 0.0))
+        else:
+            self._user_ids[row] = user_id
+            self._det_scores[row] = float(det_score or 0.0)
+
+        self._matrix[row] = vector
+        return True
+
+    def _remove_locked(self, embedding_id: str) -> bool:
+        row = self._positions.pop(embedding_id, None)
+        if row is None:
+            return False
+
+        # Swap the last row into the hole so removal stays O(1)
+        last = self._count - 1
+        if row != last:
+            moved_id = self._embedding_ids[last]
+            self._matrix[row] = self._matrix[last]
+            self._embedding_ids[row] = moved_id
+            self._user_ids[row] = self._user_ids[last]
+            self._det_scores[row] = self._det_scores[last]
+            self._positions[moved_id] = row
+
+        self._embedding_ids.pop()
+        self._user_ids.pop()
+        self._det_scores.pop()
+        self._count = last
+        return True
+
+    def add(self, embedding_id: str, user_id, embedding, det_score: float = 0.0) -> bool:
+        """Insert or replace a single embedding row"""
+        with self._lock:
+            return self._add_locked(str(embedding_id), user_id, embedding, det_score)
+
+    def remove(self, embedding_id: str) -> bool:
+        """Drop an embedding row (no-op if not indexed)"""
+        with self._lock:
+            return self._remove_locked(str(embedding_id))
+
+    def __len__(self):
+        return self._count
+
+    # ------------------------------------------------------------------
+    # Loading / syncing
+    # ------------------------------------------------------------------
+    def load(self, force: bool = False) -> int:
+        """
+        Build the index from the snapshot (if configured) plus Mongo.
+
+        Returns:
+            Number of indexed embeddings
+        """
+        with self._lock:
+            if self._loaded and not force:
+                return self._count
+
+            start = time.perf_counter()
+            ensure_face_embedding_indexes()
+            self._reset(self._dimension)
+
+            if FACE_INDEX_SNAPSHOT_PATH and self._load_snapshot(FACE_INDEX_SNAPSHOT_PATH):
+                self._sync_from_mongo()
+                if not self._count_matches_mongo():
+                    logger.warning("Face index snapshot out of date, rebuilding from MongoDB")
+                    self._reset(self._dimension)
+                    self._load_from_mongo()
+            else:
+                self._load_from_mongo()
+
+            self._loaded = True
+            self._last_sync_check = self._last_reconcile = time.monotonic()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            logger.info(f"✓ Face embedding index ready: {self._count} embeddings in {elapsed_ms:.1f}ms")
+
+            if FACE_INDEX_SNAPSHOT_PATH:
+                self.save_snapshot(FACE_INDEX_SNAPSHOT_PATH)
+
+            return self._count
+
+    @staticmethod
+    def _newest(watermark: Optional[datetime], value) -> Optional[datetime]:
+        if not isinstance(value, datetime):
+            return watermark
+        return value if watermark is None or value > watermark else watermark
+
+    @staticmethod
+    def _since_filter(watermark: Optional[datetime]) -> Dict:
+        # $gte plus the overlap: equal timestamps and late or clock-skewed writes are read again
+        if watermark is None:
+            return {}
+        return {'$gte': watermark - timedelta(seconds=FACE_INDEX_SYNC_OVERLAP_SECONDS)}
+
+    def _add_docs_locked(self, cursor):
+        for doc in cursor:
+            vector = decode_embedding(doc)
+            if vector is not None:
+                self._add_locked(str(doc['_id']), doc['user_id'], vector, doc.get('det_score'))
+            self._synced_at = self._newest(self._synced_at, doc.get('created_at'))
+
+    def _load_from_mongo(self):
+        if face_embeddings_collection is None:
+            return
+
+        self._add_docs_locked(face_embeddings_collection.find(
+            {'status': 'active'},
+            {'embedding': 1, 'embedding_version': 1, 'user_id': 1, 'det_score': 1, 'created_at': 1}
+        ))
+        self._deleted_synced_at = self._synced_at
+
+    def _sync_from_mongo(self):
+        """Apply inserts and soft deletes made since the last sync watermarks"""
+        if face_embeddings_collection is None:
+            return
+
+        added_query = {'status': 'active'}
+        since = self._since_filter(self._synced_at)
+        if since:
+            added_query['created_at'] = since
+        self._add_docs_locked(face_embeddings_collection.find(
+            added_query,
+            {'embedding': 1, 'embedding_version': 1, 'user_id': 1, 'det_score': 1, 'created_at': 1}
+        ))
+
+        removed_query = {'status': 'deleted'}
+        since = self._since_filter(self._deleted_synced_at or self._synced_at)
+        if since:
+            removed_query['deleted_at'] = since
+        for doc in face_embeddings_collection.find(removed_query, {'_id': 1, 'deleted_at': 1}):
+            self._remove_locked(str(doc['_id']))
+            self._deleted_synced_at = self._newest(self._deleted_synced_at, doc.get('deleted_at'))
+
+    def _reconcile_with_mongo(self):
+        """Diff indexed ids against every active id in Mongo (also covers hard deletes)"""
+        if face_embeddings_collection is None:
+            return
+
+        active = {str(doc['_id']): doc['_id'] for doc in face_embeddings_collection.find({'status': 'active'}, {'_id': 1})}
+        missing = [raw_id for embedding_id, raw_id in active.items() if embedding_id not in self._positions]
+        stale = [embedding_id for embedding_id in self._embedding_ids if embedding_id not in active]
+
+        for start in range(0, len(missing), 500):
+            self._add_docs_locked(face_embeddings_collection.find(
+                {'_id': {'$in': missing[start:start + 500]}},
+                {'embedding': 1, 'embedding_version': 1, 'user_id': 1, 'det_score': 1, 'created_at': 1}
+            ))
+        for embedding_id in stale:
+            self._remove_locked(embedding_id)
+
+        if missing or stale:
+            logger.warning(f"⚠ Face index reconcile: added {len(missing)}, removed {len(stale)} embeddings")
+
+    def _count_matches_mongo(self) -> bool:
+        if face_embeddings_collection is None:
+            return True
+        # Hard deletes leave no watermark, so fall back to a count check
+        return face_embeddings_collection.count_documents({'status': 'active'}) == self._count
+
+    def refresh_if_stale(self):
+        """Pick up writes from other workers at most every FACE_INDEX_REFRESH_SECONDS"""
+        if not self._loaded:
+            self.load()
+            return
+
+        now = time.monotonic()
+        if now - self._last_sync_check < FACE_INDEX_REFRESH_SECONDS:
+            return
+
+        with self._lock:
+            if now - self._last_sync_check < FACE_INDEX_REFRESH_SECONDS:
+                return
+            self._last_sync_check = now
+            try:
+                if FACE_INDEX_RECONCILE_SECONDS and now - self._last_reconcile >= FACE_INDEX_RECONCILE_SECONDS:
+                    self._last_reconcile = now
+                    self._reconcile_with_mongo()
+                self._sync_from_mongo()
+            except Exception as e:
+                logger.error(f"✗ Face index incremental sync failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Snapshots
+    # ------------------------------------------------------------------
+    def save_snapshot(self, path: str) -> bool:
+        """Write the index to disk atomically for warm restarts"""
+        try:
+            with self._lock:
+                matrix = self._matrix[:self._count].copy()
+                embedding_ids = np.array(self._embedding_ids, dtype=object)
+                user_ids = np.array(self._user_ids, dtype=object)
+                det_scores = np.array(self._det_scores, dtype=np.float32)
+                synced_at = self._synced_at.isoformat() if self._synced_at else ""
+
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.savez(
+                    f,
+                    matrix=matrix,
+                    embedding_ids=embedding_ids,
+                    user_ids=user_ids,
+                    det_scores=det_scores,
+                    synced_at=np.array(synced_at)
+                )
+            os.replace(tmp_path, path)
+            logger.info(f"✓ Saved face index snapshot ({len(matrix)} embeddings) to {path}")
+            return True
+        except Exception as e:
+            logger.error(f"✗ Failed to save face index snapshot: {e}")
+            return False
+
+    def _load_snapshot(self, path: str) -> bool:
+        if not os.path.exists(path):
+            return False
+        try:
+            with np.load(path, allow_pickle=True) as data:
+                matrix = np.ascontiguousarray(data['matrix'], dtype=np.float32)
+                if matrix.ndim != 2 or (len(matrix) and matrix.shape[1] != self._dimension):
+                    logger.warning(f"Ignoring face index snapshot with shape {matrix.shape}")
+                    return False
+                embedding_ids = [str(x) for x in data['embedding_ids'].tolist()]
+                user_ids = data['user_ids'].tolist()
+                det_scores = [float(x) for x in data['det_scores'].tolist()]
+                synced_at = str(data['synced_at'])
+
+            if not synced_at:
+                return False
+
+            self._ensure_capacity(len(matrix))
+            self._matrix[:len(matrix)] = matrix
+            self._count = len(matrix)
+            self._embedding_ids = embedding_ids
+            self._user_ids = user_ids
+            self._det_scores = det_scores
+            self._positions = {eid: row for row, eid in enumerate(embedding_ids)}
+            self._synced_at = datetime.fromisoformat(synced_at)
+            self._deleted_synced_at = self._synced_at
+            logger.info(f"✓ Loaded face index snapshot ({self._count} embeddings) from {path}")
+            return True
+        except Exception as e:
+            logger.error(f"✗ Failed to load face index snapshot {path}: {e}")
+            return False
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+    def search(self, query_embedding, top_k: int = 1, threshold: float = 0.0) -> List[Dict]:
+        """
+        Return the top_k most similar embeddings at or above threshold.
+
+        Args:
+            query_embedding: Query face embedding
+            top_k: Maximum number of matches to return
+            threshold: Minimum cosine similarity (0-1)
+
+        Returns:
+            List of match dicts sorted by similarity (descending)
+        """
+        self.refresh_if_stale()
+
+        query = self._normalize(query_embedding)
+        if query is None or query.shape[0] != self._dimension:
+            return []
+
+        with self._lock:
+            n = self._count
+            if n == 0:
+                return []
+            scores = self._matrix[:n] @ query
+
+            k = min(top_k, n)
+            if k < n:
+                candidates = np.argpartition(scores, -k)[-k:]
+            else:
+                candidates = np.arange(n)
+            candidates = candidates[np.argsort(scores[candidates])[::-1]]
+
+            matches = []
+            for row in candidates:
+                similarity = float(scores[row])
+                if similarity < threshold:
+                    break
+                matches.append({
+                    'user_id': self._user_ids[row],
+                    'embedding_id': self._embedding_ids[row],
+                    'similarity': similarity,
+                    'det_score': self._det_scores[row]
+                })
+            return matches
+
+    def stats(self) -> Dict:
+        return {
+            'loaded': self._loaded,
+            'indexed_embeddings': self._count,
+            'capacity': int(self._matrix.shape[0]),
+            'memory_bytes': int(self._matrix.nbytes),
+            'synced_at': self._synced_at.isoformat() if self._synced_at else None,
+            'snapshot_path': FACE_INDEX_SNAPSHOT_PATH or None
+        }
+
+
+face_index = FaceEmbeddingIndex()
+
+
+def warm_face_embedding_index(background: bool = True):
+    """
+    Load the resident index ahead of the first face login.
+
+    Call it from a serving process (e.g. gunicorn post_fork), never at import:
+    management commands don't need the index, and a preforking master must not
+    hold the index lock while workers fork. Without a warm-up, the first
+    search() loads the index.
+    """
+    def _warm():
+        try:
+            face_index.load()
+        except Exception as e:
+            logger.error(f"✗ Face embedding index warm-up failed: {e}")
+
+    if background:
+        threading.Thread(target=_warm, name="face-index-warmup", daemon=True).start()
+    else:
+        _warm()
+
+
 # ============================================================================
 # IMAGE PROCESSING UTILITIES
 # ============================================================================
@@ -323,10 +763,10 @@ def store_face_embedding(user_id: int, photo_id: str, embedding_data: Dict) -> O
         
         # Create embedding document
         embedding_doc = {
-            'user_id': int(user_id),
+            'user_id': canonical_user_id(user_id),
             'photo_id': photo_id,
-            'embedding': embedding_data['embedding'],
-            'embedding_size': embedding_data['embedding_size'],
+            # normalized float32 bytes + embedding_version/embedding_norm/embedding_size
+            **encode_embedding(embedding_data['embedding']),
             'bbox': embedding_data['bbox'],
             'landmarks': embedding_data['landmarks'],
             'det_score': embedding_data['det_score'],
@@ -342,6 +782,9 @@ def store_face_embedding(user_id: int, photo_id: str, embedding_data: Dict) -> O
         result = face_embeddings_collection.insert_one(embedding_doc)
         embedding_id = str(result.inserted_id)
         
+        # Keep the resident login index in sync
+        face_index.add(embedding_id, canonical_user_id(user_id), embedding_data['embedding'], embedding_data['det_score'])
+        
         logger.info(f"✓ Stored embedding {embedding_id} for user {user_id}")
         return embedding_id
         
@@ -368,6 +811,7 @@ def get_face_embedding(embedding_id: str) -> Optional[Dict]:
         doc = face_embeddings_collection.find_one({'_id': ObjectId(embedding_id)})
         
         if doc and doc.get('status') == 'active':
+            doc['embedding'] = decode_embedding(doc)
             doc['_id'] = str(doc['_id'])
             doc['photo_id'] = str(doc['photo_id'])
             return doc
@@ -387,19 +831,23 @@ def get_user_embeddings(user_id: int) -> List[Dict]:
         user_id: User ID from MySQL
         
     Returns:
-        List of embedding documents
+        List of embedding documents; 'embedding' is decoded to a
+        unit-length float32 numpy vector (see embedding_codec)
     """
     try:
         if face_embeddings_collection is None:
             return []
             
         embeddings = face_embeddings_collection.find(
-            {'user_id': int(user_id), 'status': 'active'},
+            {'user_id': canonical_user_id(user_id), 'status': 'active'},
             sort=[('created_at', -1)]
         )
         
         result = []
         for doc in embeddings:
+            doc['embedding'] = decode_embedding(doc)
+            if doc['embedding'] is None:
+                continue
             doc['_id'] = str(doc['_id'])
             doc['photo_id'] = str(doc['photo_id'])
             result.append(doc)
@@ -430,14 +878,19 @@ def delete_face_embedding(embedding_id: str, permanent: bool = False) -> bool:
         if permanent:
             result = face_embeddings_collection.delete_one({'_id': ObjectId(embedding_id)})
             logger.info(f"✓ Permanently deleted embedding {embedding_id}")
-            return result.deleted_count > 0
+            deleted = result.deleted_count > 0
         else:
             result = face_embeddings_collection.update_one(
                 {'_id': ObjectId(embedding_id)},
                 {'$set': {'status': 'deleted', 'deleted_at': datetime.utcnow()}}
             )
             logger.info(f"✓ Soft deleted embedding {embedding_id}")
-            return result.modified_count > 0
+            deleted = result.modified_count > 0
+        
+        # Evict only after the write succeeded so the index never drops a row Mongo still has
+        if deleted:
+            face_index.remove(embedding_id)
+        return deleted
         
     except Exception as e:
         logger.error(f"✗ Error deleting embedding {embedding_id}: {e}")
@@ -478,13 +931,15 @@ def calculate_similarity(embedding1: np.ndarray, embedding2: np.ndarray) -> floa
         return 0.0
 
 
-def find_matching_user(query_embedding: np.ndarray, threshold: float = 0.6) -> Optional[Dict]:
+def find_matching_user(query_embedding: np.ndarray, threshold: float = 0.6, top_k: int = 1) -> Optional[Dict]:
     """
     Find user with matching face embedding
+    Uses the resident FaceEmbeddingIndex (one matrix-vector product)
     
     Args:
         query_embedding: Query face embedding
         threshold: Similarity threshold (0-1)
+        top_k: Number of candidates to return in 'candidates'
         
     Returns:
         Dictionary with user_id and similarity score, or None
@@ -493,33 +948,21 @@ def find_matching_user(query_embedding: np.ndarray, threshold: float = 0.6) -> O
         if face_embeddings_collection is None:
             logger.error("Face embeddings collection not available")
             return None
-            
-        # Get all active embeddings
-        all_embeddings = face_embeddings_collection.find({'status': 'active'})
         
-        best_match = None
-        best_similarity = 0.0
-        comparisons = 0
+        start = time.perf_counter()
+        matches = face_index.search(query_embedding, top_k=max(1, top_k), threshold=threshold)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        comparisons = len(face_index)
         
-        for doc in all_embeddings:
-            stored_embedding = np.array(doc['embedding'])
-            similarity = calculate_similarity(query_embedding, stored_embedding)
-            comparisons += 1
-            
-            if similarity > best_similarity and similarity >= threshold:
-                best_similarity = similarity
-                best_match = {
-                    'user_id': doc['user_id'],
-                    'embedding_id': str(doc['_id']),
-                    'similarity': similarity,
-                    'det_score': doc['det_score']
-                }
+        if not matches:
+            logger.info(f"No matching user found above threshold {threshold} (searched {comparisons} embeddings in {elapsed_ms:.1f}ms)")
+            return None
         
-        if best_match:
-            logger.info(f"✓ Found match: User {best_match['user_id']}, similarity: {best_similarity:.3f} (compared {comparisons} embeddings)")
-        else:
-            logger.info(f"No matching user found above threshold {threshold} (compared {comparisons} embeddings)")
+        best_match = dict(matches[0])
+        if top_k > 1:
+            best_match['candidates'] = matches
         
+        logger.info(f"✓ Found match: User {best_match['user_id']}, similarity: {best_match['similarity']:.3f} (searched {comparisons} embeddings in {elapsed_ms:.1f}ms)")
         return best_match
         
     except Exception as e:
@@ -580,9 +1023,14 @@ def verify_face_match(user_id: int, query_image: np.ndarray, threshold: float =
         logger.info(f"✅ Single face detected (face_count: {face_count}) - proceeding with verification")
         # ================================================================
         
-        query_embedding = np.array(query_result['embedding'])
+        query_embedding = normalize_embedding(query_result['embedding'])
+        if query_embedding is None:
+            return {
+                'verified': False,
+                'error': 'Invalid embedding extracted from image'
+            }
         
-        # Get user's stored embeddings
+        # Get user's stored embeddings (already unit length)
         user_embeddings = get_user_embeddings(user_id)
         
         if not user_embeddings:
@@ -591,12 +1039,8 @@ def verify_face_match(user_id: int, query_image: np.ndarray, threshold: float =
                 'error': 'No stored embeddings for user'
             }
         
-        # Compare with all user embeddings
-        similarities = []
-        for emb_doc in user_embeddings:
-            stored_embedding = np.array(emb_doc['embedding'])
-            similarity = calculate_similarity(query_embedding, stored_embedding)
-            similarities.append(similarity)
+        # Compare with all user embeddings: cosine similarity of unit vectors is a dot product
+        similarities = [float(np.dot(query_embedding, emb_doc['embedding'])) for emb_doc in user_embeddings]
         
         max_similarity = max(similarities)
         verified = max_similarity >= threshold
@@ -785,6 +1229,7 @@ def cleanup_orphaned_embeddings() -> int:
                     {'_id': emb_doc['_id']},
                     {'$set': {'status': 'deleted', 'deleted_at': datetime.utcnow()}}
                 )
+                face_index.remove(str(emb_doc['_id']))
                 cleanup_count += 1
         
         logger.info(f"✓ Cleaned up {cleanup_count} orphaned embeddings")
@@ -795,6 +1240,59 @@ def cleanup_orphaned_embeddings() -> int:
         return 0
 
 
+def migrate_embeddings_to_binary(batch_size: int = 500, dry_run: bool = False) -> Dict:
+    """
+    One-time batch job: rewrite version 1 documents (BSON double arrays) as normalized
+    float32 bytes with embedding_version/embedding_norm, and store every user_id as an int.
+    Documents whose vector or user_id cannot be converted are counted and left as they are.
+    """
+    stats = {'scanned': 0, 'updated': 0, 'embeddings': 0, 'user_ids': 0, 'skipped': 0, 'batches': 0}
+    if face_embeddings_collection is None:
+        logger.error("Face embeddings collection not available")
+        return stats
+
+    pending = []
+
+    def flush():
+        if pending and not dry_run:
+            face_embeddings_collection.bulk_write(pending, ordered=False)
+        if pending:
+            stats['batches'] += 1
+            stats['updated'] += len(pending)
+        pending.clear()
+
+    cursor = face_embeddings_collection.find(
+        {'$or': [
+            {'embedding_version': {'$ne': EMBEDDING_FORMAT_VERSION}},
+            {'user_id': {'$type': 'string'}},
+        ]},
+        {'embedding': 1, 'embedding_version': 1, 'user_id': 1}
+    ).sort('_id', 1).batch_size(batch_size)
+
+    for doc in cursor:
+        stats['scanned'] += 1
+        updates = {}
+        try:
+            if doc.get('embedding_version') != EMBEDDING_FORMAT_VERSION and doc.get('embedding') is not None:
+                updates.update(encode_embedding(doc['embedding']))
+                stats['embeddings'] += 1
+            if not isinstance(doc.get('user_id'), int):
+                updates['user_id'] = canonical_user_id(doc.get('user_id'))
+                stats['user_ids'] += 1
+        except (ValueError, TypeError) as e:
+            logger.warning(f"Skipping embedding {doc['_id']} in migration: {e}")
+            stats['skipped'] += 1
+            continue
+        if updates:
+            pending.append(UpdateOne({'_id': doc['_id']}, {'$set': updates}))
+        if len(pending) >= batch_size:
+            flush()
+    flush()
+
+    logger.info(f"✓ Face embedding migration{' (dry run)' if dry_run else ''}: {stats}")
+    return stats
+
+
 def get_embedding_stats() -> Dict:
     """
     Get statistics about stored embeddings
@@ -823,7 +1321,8 @@ def get_embedding_stats() -> Dict:
             'average_detection_score': round(avg_score, 3),
             'model': 'buffalo_l (shared)',
             'embedding_dimension': 512,
-            'using_shared_model': FACE_RECOGNITION_ENABLED
+            'using_shared_model': FACE_RECOGNITION_ENABLED,
+            'index': face_index.stats()
         }
         
         logger.info(f"Embedding stats: {stats}")
@@ -6,10 +6,12 @@ from django.urls import path
 from django.db import models
 from django.conf import settings
 import json
+import logging
 from django.db.utils import ProgrammingError, OperationalError
 from django.utils import timezone
 import pytz
 from core.WebSocketConnection.meetings import Meetings  # Import Meeting model
+from core.utils.schema_bootstrap import schema_task
 
 # Global Variables
 TBL_FEEDBACK = 'tbl_Feedback'
@@ -70,6 +72,7 @@ class Feedback(models.Model):
     class Meta:
         db_table = 'tbl_Feedback'
 
+@schema_task("tbl_Feedback", order=40)
 def create_feedback_table():
     """Create tbl_Feedback table if it doesn't exist - MYSQL VERSION"""
     try:
@@ -94,7 +97,8 @@ def create_feedback_table():
             )
             """)
     except (ProgrammingError, OperationalError) as e:
-        return JsonResponse({"Error": f"Failed to create tbl_Feedback table: {str(e)}"}, status=SERVER_ERROR_STATUS)
+        logging.error(f"Failed to create tbl_Feedback table: {e}")
+        raise
 
 @require_http_methods(["POST"])
 @csrf_exempt
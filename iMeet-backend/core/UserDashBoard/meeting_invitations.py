@@ -13,8 +13,10 @@ import uuid
 import re
 from datetime import datetime
 import pytz
-from core.WebSocketConnection.meetings import Meetings
+from core.WebSocketConnection.meetings import Meetings, sync_meeting_invitees
+from core.UserDashBoard.recording_acl import refresh_recording_acl
 from core.UserDashBoard.users import User  # Adjust if path differs
+from core.utils.schema_bootstrap import schema_task
 
 # Global Variables
 TBL_MEETING_INVITATIONS = 'tbl_Meeting_Invitations'
@@ -132,6 +134,11 @@ class MeetingInvitation(models.Model):
     class Meta:
         db_table = 'tbl_Meeting_Invitations'
 
+def _refresh_recording_acl_on_commit(meeting_id):
+    """Invites changed: rebuild the meeting's materialized recording ACL once the transaction commits"""
+    transaction.on_commit(lambda: refresh_recording_acl(str(meeting_id), only_if_materialized=True))
+
+@schema_task("tbl_Meeting_Invitations", order=40)
 def create_meeting_invitations_table():
     """Create tbl_Meeting_Invitations table if it doesn't exist"""
     try:
@@ -166,7 +173,7 @@ def create_meeting_invitations_table():
             logging.debug("tbl_Meeting_Invitations table created or exists")
     except (ProgrammingError, OperationalError) as e:
         logging.error(f"Failed to create tbl_Meeting_Invitations table: {e}")
-        return JsonResponse({"Error": f"Failed to create tbl_Meeting_Invitations table: {str(e)}"}, status=SERVER_ERROR_STATUS)
+        raise
 
 @require_http_methods(["POST"])
 @csrf_exempt
@@ -294,6 +301,8 @@ def Create_Meeting_Invitation(request):
                 cursor.execute(insert_query, values)
                 result = cursor.fetchone()
                 invitation_id, inserted_token = result[0], result[1]
+                sync_meeting_invitees(str(meeting_id), cursor)
+                _refresh_recording_acl_on_commit(meeting_id)
 
             log_modification(
                 request,
@@ -653,11 +662,20 @@ def Update_Meeting_Invitation(request, invite_token):
                     responded_at,
                     str(invite_token)
                 ]
+                cursor.execute(f"SELECT Meeting_ID FROM {TBL_MEETING_INVITATIONS} WHERE Invite_Token = %s", [str(invite_token)])
+                previous = cursor.fetchone()
                 cursor.execute(update_query, values)
                 if cursor.rowcount == 0:
                     logging.error(f"Invite_Token {invite_token} not found")
                     return JsonResponse({"Error": "Invitation not found"}, status=NOT_FOUND_STATUS)
 
+                # Re-index both meetings when the invitation moved
+                sync_meeting_invitees(str(meeting_id), cursor)
+                _refresh_recording_acl_on_commit(meeting_id)
+                if previous and str(previous[0]) != str(meeting_id):
+                    sync_meeting_invitees(str(previous[0]), cursor)
+                    _refresh_recording_acl_on_commit(previous[0])
+
             log_modification(
                 request,
                 login_type='user',
@@ -685,7 +703,7 @@ def Delete_Meeting_Invitation(request, invite_token):
     try:
         with transaction.atomic():
             with connection.cursor() as cursor:
-                select_query = f"SELECT ID FROM {TBL_MEETING_INVITATIONS} WHERE Invite_Token = %s"
+                select_query = f"SELECT ID, Meeting_ID FROM {TBL_MEETING_INVITATIONS} WHERE Invite_Token = %s"
                 cursor.execute(select_query, [str(invite_token)])
                 row = cursor.fetchone()
                 if not row:
@@ -695,6 +713,8 @@ def Delete_Meeting_Invitation(request, invite_token):
 
                 delete_query = f"DELETE FROM {TBL_MEETING_INVITATIONS} WHERE Invite_Token = %s"
                 cursor.execute(delete_query, [str(invite_token)])
+                sync_meeting_invitees(str(row[1]), cursor)
+                _refresh_recording_acl_on_commit(row[1])
 
                 log_modification(
                     request,
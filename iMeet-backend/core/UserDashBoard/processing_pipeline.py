@@ -0,0 +1,283 @@
+# core/UserDashBoard/processing_pipeline.py
+
+"""
+Post-Recording Processing Pipeline Runner
+=========================================
+process_video_sync used to run probe -> compress -> audio -> transcription
+-> subtitles -> summary -> PDFs -> uploads strictly one after another.
+
+StageGraph runs the same work as a dependency graph:
+- every stage declares the stages it depends on; a stage starts as soon as
+  its dependencies are done, on a shared thread pool, so independent
+  branches (video upload, per-language subtitles, summary, PDFs) overlap and
+  wall-clock time is bounded by the slowest branch
+- every finished stage result is checkpointed (JSON) in a per-recording
+  work directory, so a crashed or failed run resumes from the last completed
+  stages instead of starting over
+- stages may list files they produced under 'artifacts'; a checkpoint is only
+  reused if those files still exist (otherwise the stage is re-run when a
+  pending stage needs it)
+- the first failing stage cancels everything that has not started yet and
+  raises PipelineStageError; stages already running finish and checkpoint
+
+The work directory is removed once the pipeline succeeds. Directories left
+behind by failed runs are pruned after RECORDING_PIPELINE_RETENTION_HOURS.
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+logger = logging.getLogger("video_processor")
+
+RECORDING_PIPELINE_DIR = os.getenv(
+    "RECORDING_PIPELINE_DIR", os.path.join(tempfile.gettempdir(), "imeet_recording_pipeline")
+)
+RECORDING_PIPELINE_WORKERS = int(os.getenv("RECORDING_PIPELINE_WORKERS", 6))
+RECORDING_PIPELINE_RETENTION_HOURS = float(os.getenv("RECORDING_PIPELINE_RETENTION_HOURS", 24))
+
+_CHECKPOINT_FILE = "checkpoint.json"
+
+# One pipeline per work directory at a time within this process
+_active_lock = threading.Lock()
+_active_keys = {}
+
+
+class PipelineStageError(Exception):
+    """Raised by StageGraph.run() when a stage fails"""
+
+    def __init__(self, stage, error):
+        super().__init__(f"Stage '{stage}' failed: {error}")
+        self.stage = stage
+        self.error = error
+
+
+class PipelineCheckpoint:
+    """Per-recording work directory + JSON checkpoint of finished stage results"""
+
+    def __init__(self, key, root=RECORDING_PIPELINE_DIR):
+        self.key = re.sub(r"[^\w.-]", "_", str(key))
+        self.workdir = os.path.join(root, self.key)
+        self.path = os.path.join(self.workdir, _CHECKPOINT_FILE)
+        self._lock = threading.Lock()
+        self._data = {}
+
+    def __enter__(self):
+        with _active_lock:
+            key_lock = _active_keys.setdefault(self.key, threading.Lock())
+        key_lock.acquire()
+        self._key_lock = key_lock
+
+        os.makedirs(self.workdir, exist_ok=True)
+        self._data = self._load()
+        if self._data:
+            logger.info(f"♻️ Resuming pipeline {self.key}: {len(self._data)} checkpoint(s) found")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._key_lock.release()
+        return False
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"⚠ Ignoring unreadable pipeline checkpoint {self.path}: {e}")
+            return {}
+
+    def get(self, name):
+        with self._lock:
+            return self._data.get(name)
+
+    def put(self, name, result):
+        """Store a stage (or partial) result and persist the checkpoint atomically"""
+        with self._lock:
+            self._data[name] = result
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._data, f, default=str)
+            os.replace(tmp_path, self.path)
+
+    def discard(self):
+        """Remove the work directory (and checkpoint) after a successful run"""
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    @staticmethod
+    def prune_stale(root=RECORDING_PIPELINE_DIR, max_age_hours=RECORDING_PIPELINE_RETENTION_HOURS):
+        """Delete work directories of failed runs that were never resumed"""
+        if not os.path.isdir(root):
+            return 0
+        cutoff = time.time() - max_age_hours * 3600
+        removed = 0
+        for entry in os.scandir(root):
+            try:
+                if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                    with _active_lock:
+                        if entry.name in _active_keys and _active_keys[entry.name].locked():
+                            continue
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                    removed += 1
+            except OSError:
+                continue
+        if removed:
+            logger.info(f"🧹 Pruned {removed} stale pipeline work dir(s)")
+        return removed
+
+
+class StageGraph:
+    """Runs checkpointed stages in dependency order on a thread pool"""
+
+    def __init__(self, name, checkpoint=None, max_workers=RECORDING_PIPELINE_WORKERS):
+        self.name = name
+        self.checkpoint = checkpoint
+        self.max_workers = max(1, max_workers)
+        self._stages = {}  # name -> (func, deps)
+
+        self.timings = {}
+        self.resumed = []
+
+    def stage(self, name, func, deps=()):
+        """
+        Register a stage.
+
+        Args:
+            name: Unique stage name (checkpoint key)
+            func: Called as func(results) with the results of all finished stages;
+                  must return a JSON-serializable dict
+            deps: Names of stages that must finish first
+        """
+        if name in self._stages:
+            raise ValueError(f"Duplicate pipeline stage: {name}")
+        self._stages[name] = (func, tuple(deps))
+        return self
+
+    def _validate(self):
+        for name, (_, deps) in self._stages.items():
+            for dep in deps:
+                if dep not in self._stages:
+                    raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}'")
+
+        # Kahn's algorithm just to reject cycles
+        indegree = {name: len(deps) for name, (_, deps) in self._stages.items()}
+        ready = [name for name, degree in indegree.items() if degree == 0]
+        seen = 0
+        while ready:
+            current = ready.pop()
+            seen += 1
+            for name, (_, deps) in self._stages.items():
+                if current in deps:
+                    indegree[name] -= 1
+                    if indegree[name] == 0:
+                        ready.append(name)
+        if seen != len(self._stages):
+            raise ValueError(f"Pipeline '{self.name}' has a dependency cycle")
+
+    @staticmethod
+    def _artifacts_present(result):
+        return all(os.path.exists(path) for path in (result.get("artifacts") or []))
+
+    def _plan(self):
+        """Split stages into restored results and stages that must run"""
+        restored = {}
+        if self.checkpoint is not None:
+            for name in self._stages:
+                result = self.checkpoint.get(name)
+                if isinstance(result, dict):
+                    restored[name] = result
+
+        pending = {name for name in self._stages if name not in restored}
+
+        # A restored stage whose files are gone must re-run if a pending stage needs them
+        changed = True
+        while changed:
+            changed = False
+            for name in list(pending):
+                for dep in self._stages[name][1]:
+                    if dep in restored and not self._artifacts_present(restored[dep]):
+                        restored.pop(dep)
+                        pending.add(dep)
+                        changed = True
+
+        return restored, pending
+
+    def run(self) -> dict:
+        """
+        Execute the graph.
+
+        Returns:
+            dict: stage name -> result
+
+        Raises:
+            PipelineStageError: first stage that raised
+        """
+        self._validate()
+        results, pending = self._plan()
+        self.resumed = sorted(results)
+        if self.resumed:
+            logger.info(f"♻️ {self.name}: reusing checkpointed stages {', '.join(self.resumed)}")
+
+        started = time.time()
+        running = {}
+        failure = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"{self.name}-stage") as executor:
+            while pending or running:
+                if failure is None:
+                    for name in sorted(pending):
+                        func, deps = self._stages[name]
+                        if all(dep in results for dep in deps):
+                            pending.discard(name)
+                            running[executor.submit(self._run_stage, name, func, dict(results))] = name
+
+                if not running:
+                    if pending and failure is None:
+                        raise PipelineStageError(sorted(pending)[0], "dependencies never completed")
+                    break
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        if failure is None:
+                            failure = PipelineStageError(name, e)
+                            logger.error(f"❌ {self.name}: stage '{name}' failed: {e}")
+
+                if failure is not None:
+                    # Nothing new starts; let running stages finish and checkpoint
+                    pending.clear()
+
+        if failure is not None:
+            raise failure
+
+        logger.info(
+            f"✅ {self.name}: {len(self._stages)} stages in {time.time() - started:.1f}s "
+            f"({len(self.resumed)} resumed)"
+        )
+        return results
+
+    def _run_stage(self, name, func, results):
+        stage_started = time.time()
+        logger.info(f"▶️ {self.name}: stage '{name}' started")
+        result = func(results)
+        if result is None:
+            result = {}
+        if not isinstance(result, dict):
+            raise TypeError(f"Stage '{name}' must return a dict, got {type(result).__name__}")
+
+        elapsed = time.time() - stage_started
+        self.timings[name] = round(elapsed, 2)
+        if self.checkpoint is not None:
+            self.checkpoint.put(name, result)
+        logger.info(f"⏹️ {self.name}: stage '{name}' finished in {elapsed:.1f}s")
+        return result
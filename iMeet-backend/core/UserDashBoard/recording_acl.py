@@ -0,0 +1,175 @@
+# core/UserDashBoard/recording_acl.py
+
+"""
+Pre-computed Recording Access Control Lists
+===========================================
+is_user_allowed used to answer "can this user see this recording" with up
+to four MySQL queries (scheduled invite list, calendar guest lists,
+tbl_Participants count, tbl_Meetings host) on every stream_video,
+handle_document, view_mindmap and get_subtitles request.
+
+A RecordingACL is the whole answer for one meeting, built once:
+- user_ids: the host plus everyone in tbl_Participants
+- emails:   the meeting's tbl_MeetingInvitees index (scheduled / calendar
+            email columns and tbl_Meeting_Invitations), the same source as
+            a recording's visible_to
+so each access check is two set lookups.
+
+ACLs are materialized in Mongo (RECORDING_ACL_COLLECTION) when a recording
+enters the processing pipeline and rebuilt when a meeting's invites or
+host change (Update_Meeting, meeting invitation create/update/delete). Every process keeps them in a TTL cache
+(RECORDING_ACL_TTL seconds), which bounds how long another worker can
+serve a stale list. Meetings without a materialized ACL (uploads, meetings
+still running) are built from MySQL on demand and only cached in-process.
+"""
+
+import logging
+import os
+import threading
+from datetime import datetime
+
+from django.db import connection
+
+from core.UserDashBoard.video_streaming import TTLCache
+
+logger = logging.getLogger("video_processor")
+
+RECORDING_ACL_COLLECTION = os.getenv("RECORDING_ACL_COLLECTION", "recording_acls")
+RECORDING_ACL_TTL = float(os.getenv("RECORDING_ACL_TTL", 300))
+RECORDING_ACL_CACHE_SIZE = int(os.getenv("RECORDING_ACL_CACHE_SIZE", 20000))
+
+class RecordingACL:
+    """Who may see the recordings of one meeting"""
+
+    __slots__ = ("meeting_id", "user_ids", "emails", "built_at", "source")
+
+    def __init__(self, meeting_id, user_ids=(), emails=(), built_at=None, source="sql"):
+        self.meeting_id = str(meeting_id)
+        self.user_ids = frozenset(str(u) for u in user_ids if u is not None and str(u) != "")
+        self.emails = frozenset(e.strip().lower() for e in emails if e and e.strip())
+        self.built_at = built_at or datetime.now()
+        self.source = source
+
+    def allows(self, email: str = "", user_id: str = "") -> bool:
+        if email and email.strip().lower() in self.emails:
+            return True
+        return bool(user_id) and str(user_id) in self.user_ids
+
+    def to_document(self) -> dict:
+        return {
+            "meeting_id": self.meeting_id,
+            "user_ids": sorted(self.user_ids),
+            "emails": sorted(self.emails),
+            "updated_at": self.built_at,
+        }
+
+    @classmethod
+    def from_document(cls, doc):
+        return cls(doc["meeting_id"], doc.get("user_ids", []), doc.get("emails", []),
+                   built_at=doc.get("updated_at"), source="mongo")
+
+
+def build_acl_from_sql(meeting_id: str) -> RecordingACL:
+    """Collect every grant is_user_allowed used to check, in one pass over the meeting tables"""
+    # meetings.py imports this module; import lazily to avoid the cycle
+    from core.WebSocketConnection.meetings import get_meeting_invitee_emails
+
+    emails = set(get_meeting_invitee_emails(meeting_id))
+    user_ids = set()
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT DISTINCT User_ID FROM tbl_Participants WHERE Meeting_ID = %s", [meeting_id])
+        user_ids.update(r[0] for r in cursor.fetchall() if r[0] is not None)
+
+        cursor.execute("SELECT Host_ID FROM tbl_Meetings WHERE ID = %s", [meeting_id])
+        row = cursor.fetchone()
+        if row and row[0] is not None:
+            user_ids.add(row[0])
+
+    return RecordingACL(meeting_id, user_ids, emails)
+
+
+class RecordingACLStore:
+    """Mongo-materialized ACLs behind a per-process TTL cache"""
+
+    def __init__(self, ttl=RECORDING_ACL_TTL, max_entries=RECORDING_ACL_CACHE_SIZE, mongo_uri=None, db_name=None):
+        self.cache = TTLCache(ttl, max_entries)
+        self._mongo_uri = mongo_uri or os.getenv("MONGO_URI")
+        self._db_name = db_name or os.getenv("MONGO_DB", "connectlydb")
+        self._collection = None
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            with self._lock:
+                if self._collection is None:
+                    from pymongo import MongoClient
+                    collection = MongoClient(self._mongo_uri)[self._db_name][RECORDING_ACL_COLLECTION]
+                    try:
+                        collection.create_index("meeting_id", unique=True)
+                    except Exception as e:
+                        logger.warning(f"⚠️ Could not ensure recording ACL index: {e}")
+                    self._collection = collection
+        return self._collection
+
+    def _load_materialized(self, meeting_id):
+        try:
+            doc = self.collection.find_one({"meeting_id": str(meeting_id)})
+            return RecordingACL.from_document(doc) if doc else None
+        except Exception as e:
+            logger.warning(f"⚠️ Recording ACL lookup failed for {meeting_id}: {e}")
+            return None
+
+    def get(self, meeting_id) -> RecordingACL:
+        """Cached ACL -> materialized ACL -> built from MySQL (cached, not persisted)"""
+        key = str(meeting_id)
+        acl = self.cache.get(key)
+        if acl is None:
+            acl = self._load_materialized(key)
+            if acl is None:
+                acl = build_acl_from_sql(key)
+                self.builds += 1
+            self.cache.set(key, acl)
+        return acl
+
+    def is_allowed(self, meeting_id, email: str = "", user_id: str = "") -> bool:
+        return self.get(meeting_id).allows(email, user_id)
+
+    def refresh(self, meeting_id, only_if_materialized: bool = False):
+        """
+        Rebuild the ACL from MySQL and store it.
+
+        With only_if_materialized, meetings that never had a recording just
+        drop their cached entry instead of getting a new Mongo document.
+        """
+        key = str(meeting_id)
+        if only_if_materialized and self._load_materialized(key) is None:
+            self.cache.pop(key)
+            return None
+
+        acl = build_acl_from_sql(key)
+        self.builds += 1
+        self.collection.update_one({"meeting_id": key}, {"$set": acl.to_document()}, upsert=True)
+        self.cache.set(key, acl)
+        logger.info(f"🔐 Recording ACL for {key}: {len(acl.user_ids)} users, {len(acl.emails)} emails")
+        return acl
+
+    def invalidate(self, meeting_id):
+        self.cache.pop(str(meeting_id))
+
+    def stats(self) -> dict:
+        return {**self.cache.stats(), 'builds': self.builds}
+
+
+recording_acl_store = RecordingACLStore()
+
+
+def refresh_recording_acl(meeting_id, only_if_materialized: bool = False):
+    """Rebuild a meeting's recording ACL; never raises (callers are request/pipeline paths)"""
+    try:
+        return recording_acl_store.refresh(meeting_id, only_if_materialized=only_if_materialized)
+    except Exception as e:
+        recording_acl_store.invalidate(meeting_id)
+        logger.error(f"❌ Failed to refresh recording ACL for {meeting_id}: {e}")
+        return None
@@ -4,7 +4,10 @@ import shutil
 import subprocess
 import json
 import re
+import base64
 import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import quote_plus
 import time
 from datetime import datetime, timedelta
@@ -17,9 +20,6 @@ from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.utils.decorators import method_decorator
 from django.views import View
-from graphviz import Source
-import torch
-from transformers import MarianMTModel, MarianTokenizer
 import logging
 from urllib.parse import quote_plus
 from django.http import StreamingHttpResponse
@@ -34,16 +34,21 @@ from io import BytesIO
 from wsgiref.util import FileWrapper
 import mimetypes
 from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING, DESCENDING, UpdateOne
 import boto3
 from botocore.exceptions import NoCredentialsError
-from pydub import AudioSegment
-from deep_translator import GoogleTranslator
-import torch
 from django.utils import timezone
-from core.WebSocketConnection.meetings import BAD_REQUEST_STATUS, NOT_FOUND_STATUS, SERVER_ERROR_STATUS, SUCCESS_STATUS, TBL_MEETINGS, create_meetings_table
+from core.utils.lazy_imports import is_loaded, lazy_import
+from core.UserDashBoard.translation_memory import get_translation_memory, normalize_source_text
+from core.UserDashBoard.video_streaming import S3BlockCache, TTLCache, VIDEO_STREAM_MODE, VIDEO_STREAM_META_TTL, VIDEO_STREAM_ACCESS_TTL
+from core.UserDashBoard.recording_acl import recording_acl_store
+from core.UserDashBoard.processing_pipeline import PipelineCheckpoint, PipelineStageError, StageGraph
+from core.livekit_recording.live_transcription import load_live_transcript
+from core.WebSocketConnection.meetings import BAD_REQUEST_STATUS, NOT_FOUND_STATUS, SERVER_ERROR_STATUS, SUCCESS_STATUS, TBL_MEETINGS, create_meetings_table, get_meeting_invitee_emails
 
-# === GPU CHECK ===
-print("Using GPU:", torch.cuda.is_available())
+# torch/transformers/graphviz load on first use (translation, mind maps), not when URLs load
+torch = lazy_import("torch")
 
 # === CONFIGURATION ===
 # AWS Configuration
@@ -284,7 +289,7 @@ mongo_port = os.getenv("MONGO_PORT", "27017")
 mongo_db = os.getenv("MONGO_DB", "connectlydb")
 
 MONGO_URI = os.getenv("MONGO_URI")
-mongo_client = MongoClient(MONGO_URI)
+mongo_client = MongoClient(MONGO_URI, connect=False)  # fork-safe: opens on first use
 db = mongo_client[mongo_db]
 collection = db["test"]
 TRASH_RETENTION_DAYS = 15
@@ -531,52 +536,19 @@ def build_s3_document_path(meeting_id: str, user_id: str, meeting_type: str, doc
 
 ### ✅ FIXED `is_user_allowed` FUNCTION
 def is_user_allowed(meeting_id: str, email: str = "", user_id: str = "") -> bool:
-    """Check if user is allowed to access meeting recording - FIXED OR LOGIC"""
+    """
+    Check if user is allowed to access meeting recording - FIXED OR LOGIC.
+
+    Access comes from the meeting's pre-computed RecordingACL (see recording_acl.py):
+    scheduled/calendar invite emails, tbl_Participants users or the meeting host.
+    """
     try:
         if not email and not user_id:
             return False
-            
-        with connection.cursor() as cursor:
-            # Check 1: ScheduledMeeting email
-            if email:
-                cursor.execute("SELECT email FROM tbl_ScheduledMeetings WHERE id = %s", [meeting_id])
-                row = cursor.fetchone()
-                if row and row[0]:
-                    scheduled_emails = [e.strip().lower() for e in row[0].split(',') if e.strip()]
-                    if email.strip().lower() in scheduled_emails:
-                        logger.info(f"✅ Access granted via ScheduledMeeting: {email}")
-                        return True  # ✅ RETURN IMMEDIATELY
-
-            # Check 2: CalendarMeeting email
-            if email:
-                cursor.execute("SELECT email, guestEmails, attendees FROM tbl_CalendarMeetings WHERE id = %s", [meeting_id])
-                row = cursor.fetchone()
-                if row:
-                    for field in row:
-                        if field:
-                            emails = [e.strip().lower() for e in re.split(r'[;,]', field) if e.strip()]
-                            if email.strip().lower() in emails:
-                                logger.info(f"✅ Access granted via CalendarMeeting: {email}")
-                                return True  # ✅ RETURN IMMEDIATELY
-
-            # Check 3: InstantMeeting participant (only for instant meetings)
-            if user_id:
-                cursor.execute("""
-                    SELECT COUNT(*) FROM tbl_Participants 
-                    WHERE Meeting_ID = %s AND User_ID = %s
-                """, [meeting_id, user_id])
-                count = cursor.fetchone()[0]
-                if count > 0:
-                    logger.info(f"✅ Access granted: User {user_id} joined meeting")
-                    return True  # ✅ RETURN IMMEDIATELY
-
-            # Check 4: Meeting host
-            if user_id:
-                cursor.execute("SELECT Host_ID FROM tbl_Meetings WHERE ID = %s", [meeting_id])
-                row = cursor.fetchone()
-                if row and str(row[0]) == str(user_id):
-                    logger.info(f"✅ Access granted: User {user_id} is host")
-                    return True  # ✅ RETURN IMMEDIATELY
+
+        if recording_acl_store.is_allowed(meeting_id, email=email, user_id=user_id):
+            logger.debug(f"✅ Access granted via recording ACL: {user_id}/{email} for {meeting_id}")
+            return True
 
         # ALL checks failed
         logger.debug(f"❌ Access denied: No authorization found for {user_id}/{email}")
@@ -600,22 +572,10 @@ def get_meeting_participants_emails(meeting_id: str) -> list:
     visible_to_emails = []
     
     try:
-        with connection.cursor() as cursor:
-            # Check Scheduled Meetings
-            cursor.execute("SELECT email FROM tbl_ScheduledMeetings WHERE id = %s", [meeting_id])
-            row = cursor.fetchone()
-            if row and row[0]:
-                visible_to_emails += [e.strip() for e in row[0].split(',') if e.strip()]
-
-            # Check Calendar Meetings
-            cursor.execute("SELECT email, guestEmails, attendees FROM tbl_CalendarMeetings WHERE id = %s", [meeting_id])
-            row = cursor.fetchone()
-            if row:
-                for field in row:
-                    if field:
-                        emails = [e.strip() for e in re.split(r'[;,]', field) if e.strip()]
-                        visible_to_emails += emails
+        # Scheduled/Calendar invitees come from the normalized tbl_MeetingInvitees index
+        visible_to_emails += get_meeting_invitee_emails(meeting_id)
 
+        with connection.cursor() as cursor:
             # Check Instant Meeting Participants
             cursor.execute("SELECT User_ID FROM tbl_Participants WHERE Meeting_ID = %s", [meeting_id])
             user_ids = [r[0] for r in cursor.fetchall() if r[0]]
@@ -651,6 +611,7 @@ def create_srt_from_segments(segments: List[dict], output_path: str):
                 f.write(f"{i}\n{start} --> {end}\n{text}\n\n")
 
 def generate_graph(dot_code: str, output_path: str):
+    from graphviz import Source
     s = Source(dot_code)
     return s.render(filename=output_path, format="png", cleanup=True)
 
@@ -936,15 +897,10 @@ Suggested next steps: No specific next steps mentioned in this segment.
         return "Summary generation failed."
 
 # === ENHANCED VIDEO PROCESSING WITH FASTAPI FEATURES ===
-# Add these imports at the very top of your file
-import torch
-from transformers import MarianMTModel, MarianTokenizer
-import logging
-
 class LocalIndianLanguageTranslator:
     """Fast local translation for Hindi and Telugu using Helsinki-NLP models"""
     
-    def __init__(self):
+    def __init__(self, use_memory=True):
         self.models = {}
         self.tokenizers = {}
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
@@ -954,6 +910,12 @@ class LocalIndianLanguageTranslator:
             "hi": "Helsinki-NLP/opus-mt-en-hi",  # English to Hindi
             "te": "Helsinki-NLP/opus-mt-en-hi",  # Use Hindi model for Telugu (fallback)
         }
+        self.num_beams = 4
+        self._load_lock = threading.Lock()
+        
+        # Shared across meetings/workers; None when disabled
+        self.memory = get_translation_memory() if use_memory else None
+        self.last_run = {}
         
         logging.info(f"🔧 LocalTranslator initialized on device: {self.device}")
     
@@ -962,27 +924,79 @@ class LocalIndianLanguageTranslator:
         if lang in self.models:
             return  # Already loaded
         
+        with self._load_lock:
+            if lang not in self.models:
+                self._load_model(lang)
+    
+    def _load_model(self, lang):
         try:
             model_name = self.model_names.get(lang)
             if not model_name:
                 raise Exception(f"No model available for {lang}")
             
+            # Languages that fall back to the same model share one copy
+            for loaded_lang, loaded_model in list(self.models.items()):
+                if self.model_names.get(loaded_lang) == model_name:
+                    self.tokenizers[lang] = self.tokenizers[loaded_lang]
+                    self.models[lang] = loaded_model
+                    logging.info(f"♻️ {lang} reuses the loaded {loaded_lang} model ({model_name})")
+                    return
+            
             logging.info(f"📥 Loading {lang} translation model: {model_name}")
             
-            self.tokenizers[lang] = MarianTokenizer.from_pretrained(model_name)
-            self.models[lang] = MarianMTModel.from_pretrained(model_name)
+            from transformers import MarianMTModel, MarianTokenizer
+            tokenizer = MarianTokenizer.from_pretrained(model_name)
+            model = MarianMTModel.from_pretrained(model_name)
             
             # Move to GPU if available
             if self.device == "cuda":
-                self.models[lang] = self.models[lang].cuda()
+                model = model.cuda()
                 logging.info(f"✅ {lang} model loaded on GPU")
             else:
                 logging.info(f"✅ {lang} model loaded on CPU")
+            
+            # Publish only fully loaded models (other threads check self.models without the lock)
+            self.tokenizers[lang] = tokenizer
+            self.models[lang] = model
                 
         except Exception as e:
             logging.error(f"❌ Failed to load {lang} model: {e}")
             raise
     
+    def memory_key(self, target_lang):
+        """Translation memory namespace: model + generation settings"""
+        return f"{self.model_names[target_lang]}|beams{self.num_beams}"
+
+    def _generate(self, texts, target_lang):
+        """Run the model on one batch; raises on failure"""
+        # Tokenize input texts
+        inputs = self.tokenizers[target_lang](
+            texts, 
+            return_tensors="pt", 
+            padding=True, 
+            truncation=True, 
+            max_length=512
+        )
+        
+        # Move to GPU if available
+        if self.device == "cuda":
+            inputs = {k: v.cuda() for k, v in inputs.items()}
+        
+        # Generate translations
+        with torch.no_grad():  # Disable gradient calculation for inference
+            outputs = self.models[target_lang].generate(
+                **inputs,
+                max_length=512,
+                num_beams=self.num_beams,  # Better quality
+                early_stopping=True
+            )
+        
+        # Decode translations
+        return self.tokenizers[target_lang].batch_decode(
+            outputs, 
+            skip_special_tokens=True
+        )
+    
     def translate_batch(self, texts, target_lang):
         """Translate a batch of texts to target language"""
         if target_lang not in self.model_names:
@@ -992,72 +1006,88 @@ class LocalIndianLanguageTranslator:
         self.load_model(target_lang)
         
         try:
-            # Tokenize input texts
-            inputs = self.tokenizers[target_lang](
-                texts, 
-                return_tensors="pt", 
-                padding=True, 
-                truncation=True, 
-                max_length=512
-            )
-            
-            # Move to GPU if available
-            if self.device == "cuda":
-                inputs = {k: v.cuda() for k, v in inputs.items()}
-            
-            # Generate translations
-            with torch.no_grad():  # Disable gradient calculation for inference
-                outputs = self.models[target_lang].generate(
-                    **inputs,
-                    max_length=512,
-                    num_beams=4,  # Better quality
-                    early_stopping=True
-                )
-            
-            # Decode translations
-            translations = self.tokenizers[target_lang].batch_decode(
-                outputs, 
-                skip_special_tokens=True
-            )
-            
-            return translations
-            
+            return self._generate(texts, target_lang)
         except Exception as e:
             logging.error(f"Translation error for {target_lang}: {e}")
             # Return fallback translations
             return ["[Translation unavailable]"] * len(texts)
     
     def translate_segments(self, segments, target_lang, batch_size=32):
-        """Translate all segments for a language in batches"""
+        """
+        Translate all segments for a language.
+
+        Each distinct (normalized) text is translated once: hits come from the
+        translation memory, the rest are sorted by length so every batch pads
+        to similar lengths, and results are mapped back in transcript order.
+        """
         if target_lang == "en":
             return segments  # No translation needed
+        if target_lang not in self.model_names:
+            raise Exception(f"Unsupported language: {target_lang}")
         
         logging.info(f"🌐 Translating {len(segments)} segments to {target_lang} using local model...")
+        started = time.perf_counter()
+        
+        texts = [seg["text"].strip() for seg in segments]
+        normalized = [normalize_source_text(text) for text in texts]
+        
+        # First occurrence of each distinct text is the one sent to the model
+        source_for = {}
+        for text, key in zip(texts, normalized):
+            if key and key not in source_for:
+                source_for[key] = text
+        
+        memory_key = self.memory_key(target_lang)
+        translations = self.memory.get_many(memory_key, list(source_for)) if self.memory else {}
+        pending = [key for key in source_for if key not in translations]
+        
+        # Length buckets: neighbouring texts have similar token counts
+        pending.sort(key=lambda key: len(source_for[key]))
+        total_batches = (len(pending) + batch_size - 1) // batch_size
+        if pending:
+            self.load_model(target_lang)
+        
+        learned = {}
+        for batch_number, batch_idx in enumerate(range(0, len(pending), batch_size), start=1):
+            batch_keys = pending[batch_idx:batch_idx + batch_size]
+            try:
+                outputs = self._generate([source_for[key] for key in batch_keys], target_lang)
+                for key, translated in zip(batch_keys, outputs):
+                    learned[key] = translated
+            except Exception as e:
+                logging.error(f"Translation error for {target_lang}: {e}")
+                for key in batch_keys:
+                    translations[key] = "[Translation unavailable]"
+            
+            if batch_number % 5 == 0 or batch_number == total_batches:
+                progress = (batch_idx + len(batch_keys)) / len(pending) * 100
+                logging.info(f"   {target_lang}: {progress:.1f}% ({batch_idx + len(batch_keys)}/{len(pending)} new texts)")
         
-        translated_segments = []
-        total_batches = (len(segments) + batch_size - 1) // batch_size
+        translations.update(learned)
+        if self.memory and learned:
+            self.memory.put_many(memory_key, learned)
         
-        for batch_idx in range(0, len(segments), batch_size):
-            batch_segments = segments[batch_idx:batch_idx + batch_size]
-            batch_texts = [seg["text"].strip() for seg in batch_segments]
-            
-            # Translate batch
-            translations = self.translate_batch(batch_texts, target_lang)
-            
-            # Create translated segments
-            for i, seg in enumerate(batch_segments):
-                translated_segments.append({
-                    "start": seg["start"],
-                    "end": seg["end"],
-                    "text": translations[i] if i < len(translations) else "[Translation failed]"
-                })
-            
-            # Progress logging
-            current_batch = (batch_idx // batch_size) + 1
-            if current_batch % 5 == 0 or current_batch == total_batches:
-                progress = (len(translated_segments) / len(segments)) * 100
-                logging.info(f"   {target_lang}: {progress:.1f}% ({len(translated_segments)}/{len(segments)} segments)")
+        translated_segments = []
+        for seg, text, key in zip(segments, texts, normalized):
+            translated_segments.append({
+                "start": seg["start"],
+                "end": seg["end"],
+                "text": translations.get(key, "[Translation failed]") if key else text
+            })
         
+        elapsed = time.perf_counter() - started
+        self.last_run = {
+            "segments": len(segments),
+            "distinct_texts": len(source_for),
+            "memory_hits": len(source_for) - len(pending),
+            "translated": len(learned),
+            "batches": total_batches,
+            "seconds": round(elapsed, 3),
+        }
+        logging.info(
+            f"✅ {target_lang}: {len(segments)} segments in {elapsed:.1f}s "
+            f"({len(source_for) - len(pending)}/{len(source_for)} distinct texts from translation memory)"
+        )
         return translated_segments
     
     def cleanup(self):
@@ -1067,913 +1097,1097 @@ class LocalIndianLanguageTranslator:
         self.models.clear()
         self.tokenizers.clear()
         
-        if torch.cuda.is_available():
+        if is_loaded("torch") and torch.cuda.is_available():
             torch.cuda.empty_cache()
 
-# Replace your process_video_sync function with this improved version:
-def process_video_sync(video_path: str, meeting_id: str, user_id: str):
-    """Process video with GPU acceleration - OPTIMIZED FOR PYAV MP4 INPUT - ONLY FINAL MP4"""
-    import logging
-    import subprocess
-    from tempfile import TemporaryDirectory
-    import os
-    import json
-    from datetime import datetime
-    import openai
-    
-    logging.info(f"🎬 Starting video processing: {video_path}")
-    
-    with TemporaryDirectory() as workdir:
-        try:
-            # Check input file
-            if not os.path.exists(video_path):
-                raise Exception(f"Input video file not found: {video_path}")
-            
-            input_size = os.path.getsize(video_path)
-            logging.info(f"📁 Input file size: {input_size} bytes")
-            
-            if input_size == 0:
-                raise Exception("Input video file is empty")
-            
-            # Check input file format
-            input_ext = os.path.splitext(video_path)[1].lower()
-            logging.info(f"📹 Processing {input_ext} file: {video_path}")
-            
-            # ========== ENHANCED PROBE FOR PYAV MP4 INPUT ==========
-            compressed = os.path.join(workdir, "compressed.mp4")
-            
-            # Probe the PyAV MP4 input file
-            probe_cmd = [
-                "ffprobe", "-v", "quiet", "-print_format", "json", 
-                "-show_streams", "-show_format", video_path
+TRANSCRIBE_CHUNK_SECONDS = int(os.getenv("RECORDING_TRANSCRIBE_CHUNK_SECONDS", 600))
+TRANSCRIBE_MAX_UPLOAD_MB = float(os.getenv("RECORDING_TRANSCRIBE_MAX_UPLOAD_MB", 24))
+TRANSCRIBE_CONCURRENCY = int(os.getenv("RECORDING_TRANSCRIBE_CONCURRENCY", 4))
+SUBTITLE_LANGUAGES = ["en", "hi", "te"]
+
+
+def _build_compression_command(video_path: str, compressed: str, input_ext: str, has_audio: bool, nvenc_available: bool) -> list:
+    """ffmpeg command that turns the recording into the final streamable MP4"""
+    if input_ext == '.webm':
+        logging.info("🔄 Converting WebM to MP4...")
+
+        if nvenc_available:
+            if has_audio:
+                logging.info("🚀 GPU - Converting WebM with audio using NVENC")
+                return [
+                    "ffmpeg", "-y",
+                    # "-hwaccel", "cuda",
+                    "-i", video_path,
+                    "-c:v", "h264_nvenc",
+                    "-preset", "p1",
+                    "-tune", "hq",
+                    "-rc", "vbr",
+                    "-cq", "23",
+                    "-b:v", "5M",
+                    "-maxrate", "8M",
+                    "-bufsize", "16M",
+                    "-c:a", "aac", "-ar", "44100", "-ac", "2", "-b:a", "192k",
+                    "-movflags", "+faststart",
+                    "-pix_fmt", "yuv420p",
+                    "-avoid_negative_ts", "make_zero",
+                    compressed
+                ]
+            logging.info("🚀 GPU - Converting WebM (adding silent audio) using NVENC")
+            return [
+                "ffmpeg", "-y",
+                # "-hwaccel", "cuda",
+                "-i", video_path,
+                "-f", "lavfi", "-i", "anullsrc=channel_layout=stereo:sample_rate=44100",
+                "-c:v", "h264_nvenc",
+                "-preset", "p1",
+                "-tune", "hq",
+                "-rc", "vbr",
+                "-cq", "23",
+                "-b:v", "5M",
+                "-maxrate", "8M",
+                "-bufsize", "16M",
+                "-c:a", "aac", "-ar", "44100", "-ac", "2", "-b:a", "64k",
+                "-shortest",
+                "-movflags", "+faststart",
+                "-pix_fmt", "yuv420p",
+                compressed
             ]
-            
-            try:
-                probe_result = subprocess.run(probe_cmd, capture_output=True, text=True, check=True, timeout=30)
-                streams_info = json.loads(probe_result.stdout)
-                
-                has_audio = any(stream.get('codec_type') == 'audio' for stream in streams_info.get('streams', []))
-                has_video = any(stream.get('codec_type') == 'video' for stream in streams_info.get('streams', []))
-                
-                video_duration = float(streams_info.get('format', {}).get('duration', 0))
-                
-                video_stream = next((s for s in streams_info.get('streams', []) if s.get('codec_type') == 'video'), {})
-                audio_stream = next((s for s in streams_info.get('streams', []) if s.get('codec_type') == 'audio'), {})
-                
-                logging.info(f"📊 PyAV MP4 analysis: has_video={has_video}, has_audio={has_audio}, duration={video_duration:.2f}s")
-                
-                if video_stream:
-                    logging.info(f"📺 Video: {video_stream.get('codec_name', 'unknown')} {video_stream.get('width', 0)}x{video_stream.get('height', 0)}")
-                if audio_stream:
-                    logging.info(f"🔊 Audio: {audio_stream.get('codec_name', 'unknown')} {audio_stream.get('sample_rate', 0)}Hz")
-                
-            except Exception as probe_error:
-                logging.warning(f"⚠ Failed to probe PyAV input file: {probe_error}")
-                has_audio = True
-                has_video = True
-                video_duration = 0
-            
-            if not has_video:
-                raise Exception("Input file does not contain a valid video stream")
-            
-            if video_duration <= 0:
-                logging.warning(f"⚠ Duration detection failed, using file analysis")
-                try:
-                    duration_cmd = ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "default=noprint_wrappers=1:nokey=1", video_path]
-                    duration_result = subprocess.run(duration_cmd, capture_output=True, text=True, check=True)
-                    video_duration = float(duration_result.stdout.strip())
-                    logging.info(f"📏 Duration detected: {video_duration:.2f}s")
-                except:
-                    video_duration = 30.0
-                    logging.warning(f"⚠ Using default duration assumption: {video_duration}s")
-            
-            # ========== GPU DETECTION ==========
-            nvenc_available = False
+
+        # CPU fallback for WebM
+        if has_audio:
+            logging.info("ℹ️ CPU - Converting WebM with audio using libx264")
+            return [
+                "ffmpeg", "-y", "-i", video_path,
+                "-c:v", "libx264", "-preset", "fast", "-crf", "23",
+                "-maxrate", "8M", "-bufsize", "16M",
+                "-c:a", "aac", "-ar", "44100", "-ac", "2", "-b:a", "192k",
+                "-movflags", "+faststart", "-profile:v", "high", "-level", "4.0",
+                "-pix_fmt", "yuv420p",
+                "-avoid_negative_ts", "make_zero",
+                compressed
+            ]
+        logging.info("ℹ️ CPU - Converting WebM (adding silent audio) using libx264")
+        return [
+            "ffmpeg", "-y", "-i", video_path,
+            "-f", "lavfi", "-i", "anullsrc=channel_layout=stereo:sample_rate=44100",
+            "-c:v", "libx264", "-preset", "fast", "-crf", "23",
+            "-maxrate", "8M", "-bufsize", "16M",
+            "-c:a", "aac", "-ar", "44100", "-ac", "2", "-b:a", "64k",
+            "-shortest",
+            "-movflags", "+faststart", "-profile:v", "high", "-level", "4.0",
+            "-pix_fmt", "yuv420p",
+            compressed
+        ]
+
+    # PyAV MP4 input that still needs optimization
+    logging.info("🔄 Optimizing PyAV MP4...")
+    if nvenc_available:
+        if has_audio:
+            logging.info("🚀 GPU - Optimizing PyAV MP4 (preserving audio) using NVENC")
+            return [
+                "ffmpeg", "-y",
+                "-i", video_path,
+                "-c:v", "h264_nvenc",
+                "-preset", "p1",
+                "-tune", "hq",
+                "-rc", "vbr",
+                "-cq", "23",
+                "-b:v", "5M",
+                "-maxrate", "10M",
+                "-bufsize", "20M",
+                "-c:a", "copy",
+                "-movflags", "+faststart+frag_keyframe+separate_moof+omit_tfhd_offset",
+                "-pix_fmt", "yuv420p",
+                "-avoid_negative_ts", "make_zero",
+                "-fflags", "+genpts",
+                compressed
+            ]
+        logging.info("🚀 GPU - Optimizing PyAV MP4 (adding silent audio) using NVENC")
+        return [
+            "ffmpeg", "-y",
+            # "-hwaccel", "cuda",
+            "-i", video_path,
+            "-f", "lavfi", "-i", "anullsrc=channel_layout=stereo:sample_rate=44100",
+            "-c:v", "h264_nvenc",
+            "-preset", "p1",
+            "-tune", "hq",
+            "-rc", "vbr",
+            "-cq", "23",
+            "-b:v", "3M",
+            "-maxrate", "5M",
+            "-bufsize", "6M",
+            "-c:a", "aac", "-ar", "44100", "-ac", "2", "-b:a", "64k",
+            "-shortest",
+            "-movflags", "+faststart",
+            "-pix_fmt", "yuv420p",
+            "-avoid_negative_ts", "make_zero",
+            "-fflags", "+genpts",
+            "-vsync", "cfr",
+            compressed
+        ]
+
+    # CPU fallback for PyAV MP4
+    if has_audio:
+        logging.info("ℹ️ CPU - Optimizing PyAV MP4 (preserving audio) using libx264")
+        return [
+            "ffmpeg", "-y", "-i", video_path,
+            "-c:v", "libx264", "-preset", "fast", "-crf", "23",
+            "-maxrate", "10M", "-bufsize", "20M",
+            "-c:a", "copy",
+            "-movflags", "+faststart+frag_keyframe+separate_moof+omit_tfhd_offset",
+            "-profile:v", "baseline",
+            "-level", "3.1",
+            "-pix_fmt", "yuv420p",
+            "-avoid_negative_ts", "make_zero",
+            "-fflags", "+genpts",
+            "-vsync", "cfr",
+            compressed
+        ]
+    logging.info("ℹ️ CPU - Optimizing PyAV MP4 (adding silent audio) using libx264")
+    return [
+        "ffmpeg", "-y", "-i", video_path,
+        "-f", "lavfi", "-i", "anullsrc=channel_layout=stereo:sample_rate=44100",
+        "-c:v", "libx264", "-preset", "fast", "-crf", "23",
+        "-maxrate", "3M", "-bufsize", "6M",
+        "-c:a", "aac", "-ar", "44100", "-ac", "2", "-b:a", "64k",
+        "-shortest",
+        "-movflags", "+faststart", "-profile:v", "high", "-level", "4.0",
+        "-pix_fmt", "yuv420p",
+        "-avoid_negative_ts", "make_zero",
+        "-fflags", "+genpts",
+        "-vsync", "cfr",
+        compressed
+    ]
+
+
+def _probe_media(path: str, timeout: int = 30) -> dict:
+    probe_cmd = [
+        "ffprobe", "-v", "quiet", "-print_format", "json",
+        "-show_streams", "-show_format", path
+    ]
+    probe_result = subprocess.run(probe_cmd, capture_output=True, text=True, check=True, timeout=timeout)
+    return json.loads(probe_result.stdout)
+
+
+def _build_processing_graph(video_path: str, meeting_id: str, user_id: str, checkpoint: PipelineCheckpoint):
+    """
+    Stage graph for process_video_sync. Returns (graph, release_models);
+    call release_models() once the graph has finished to free translation models.
+
+        probe ─┬─ compress ──────────── upload_video ─────────────┐
+        encoder┘                                                   │
+        probe ── live_transcript ─┐                               │
+        probe ── extract_audio ── transcribe ─┬─ subtitles_<lang> ─┼─ save_document ── notify
+                                              ├─ transcript_doc ───┤
+                                              └─ summary ── summary_doc
+        meeting_info ─────────────────────────────────────────────┘
+    """
+    workdir = checkpoint.workdir
+    graph = StageGraph(f"recording-{meeting_id}", checkpoint=checkpoint)
+
+    # One translator shared by the per-language stages (models load lazily per language)
+    translator_lock = threading.Lock()
+    translator_holder = {}
+
+    def get_translator():
+        with translator_lock:
+            if "translator" not in translator_holder:
+                translator_holder["translator"] = LocalIndianLanguageTranslator()
+            return translator_holder["translator"]
+
+    def probe(results):
+        try:
+            streams_info = _probe_media(video_path)
+            streams = streams_info.get('streams', [])
+
+            has_audio = any(stream.get('codec_type') == 'audio' for stream in streams)
+            has_video = any(stream.get('codec_type') == 'video' for stream in streams)
+            video_duration = float(streams_info.get('format', {}).get('duration', 0))
+
+            video_stream = next((s for s in streams if s.get('codec_type') == 'video'), {})
+            audio_stream = next((s for s in streams if s.get('codec_type') == 'audio'), {})
+
+            logging.info(f"📊 PyAV MP4 analysis: has_video={has_video}, has_audio={has_audio}, duration={video_duration:.2f}s")
+            if video_stream:
+                logging.info(f"📺 Video: {video_stream.get('codec_name', 'unknown')} {video_stream.get('width', 0)}x{video_stream.get('height', 0)}")
+            if audio_stream:
+                logging.info(f"🔊 Audio: {audio_stream.get('codec_name', 'unknown')} {audio_stream.get('sample_rate', 0)}Hz")
+
+        except Exception as probe_error:
+            logging.warning(f"⚠ Failed to probe PyAV input file: {probe_error}")
+            has_audio = True
+            has_video = True
+            video_duration = 0
+
+        if not has_video:
+            raise Exception("Input file does not contain a valid video stream")
+
+        if video_duration <= 0:
+            logging.warning(f"⚠ Duration detection failed, using file analysis")
             try:
-                check_nvenc = subprocess.run(
-                    ['ffmpeg', '-h', 'encoder=h264_nvenc'],
-                    capture_output=True,
-                    text=True,
-                    timeout=5
-                )
-                nvenc_available = (check_nvenc.returncode == 0)
-                if nvenc_available:
-                    logging.info("🚀 GPU (NVENC) detected - Will use GPU acceleration for encoding")
-                else:
-                    logging.info("ℹ️ GPU not available - Will use CPU encoding")
+                duration_cmd = ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "default=noprint_wrappers=1:nokey=1", video_path]
+                duration_result = subprocess.run(duration_cmd, capture_output=True, text=True, check=True)
+                video_duration = float(duration_result.stdout.strip())
+                logging.info(f"📏 Duration detected: {video_duration:.2f}s")
             except:
-                nvenc_available = False
-                logging.info("ℹ️ GPU check failed - Will use CPU encoding")
-            
-            # ========== OPTIMIZED COMPRESSION WITH GPU SUPPORT ==========
-            if input_ext == '.webm':
-                logging.info("🔄 Converting WebM to MP4...")
-                
-                if nvenc_available:
-                    if has_audio:
-                        logging.info("🚀 GPU - Converting WebM with audio using NVENC")
-                        ffmpeg_cmd = [
-                            "ffmpeg", "-y",
-                            # "-hwaccel", "cuda",
-                            "-i", video_path,
-                            "-c:v", "h264_nvenc",
-                            "-preset", "p1",
-                            "-tune", "hq",
-                            "-rc", "vbr",
-                            "-cq", "23",
-                            "-b:v", "5M",
-                            "-maxrate", "8M",
-                            "-bufsize", "16M",
-                            "-c:a", "aac", "-ar", "44100", "-ac", "2", "-b:a", "192k",
-                            "-movflags", "+faststart",
-                            "-pix_fmt", "yuv420p",
-                            "-avoid_negative_ts", "make_zero",
-                            compressed
-                        ]
-                    else:
-                        logging.info("🚀 GPU - Converting WebM (adding silent audio) using NVENC")
-                        ffmpeg_cmd = [
-                            "ffmpeg", "-y",
-                            # "-hwaccel", "cuda",
-                            "-i", video_path,
-                            "-f", "lavfi", "-i", "anullsrc=channel_layout=stereo:sample_rate=44100",
-                            "-c:v", "h264_nvenc",
-                            "-preset", "p1",
-                            "-tune", "hq",
-                            "-rc", "vbr",
-                            "-cq", "23",
-                            "-b:v", "5M",
-                            "-maxrate", "8M",
-                            "-bufsize", "16M",
-                            "-c:a", "aac", "-ar", "44100", "-ac", "2", "-b:a", "64k",
-                            "-shortest",
-                            "-movflags", "+faststart",
-                            "-pix_fmt", "yuv420p",
-                            compressed
-                        ]
-                else:
-                    # CPU fallback for WebM
-                    if has_audio:
-                        logging.info("ℹ️ CPU - Converting WebM with audio using libx264")
-                        ffmpeg_cmd = [
-                            "ffmpeg", "-y", "-i", video_path,
-                            "-c:v", "libx264", "-preset", "fast", "-crf", "23",
-                            "-maxrate", "8M", "-bufsize", "16M",
-                            "-c:a", "aac", "-ar", "44100", "-ac", "2", "-b:a", "192k",
-                            "-movflags", "+faststart", "-profile:v", "high", "-level", "4.0",
-                            "-pix_fmt", "yuv420p",
-                            "-avoid_negative_ts", "make_zero",
-                            compressed
-                        ]
-                    else:
-                        logging.info("ℹ️ CPU - Converting WebM (adding silent audio) using libx264")
-                        ffmpeg_cmd = [
-                            "ffmpeg", "-y", "-i", video_path,
-                            "-f", "lavfi", "-i", "anullsrc=channel_layout=stereo:sample_rate=44100",
-                            "-c:v", "libx264", "-preset", "fast", "-crf", "23",
-                            "-maxrate", "8M", "-bufsize", "16M",
-                            "-c:a", "aac", "-ar", "44100", "-ac", "2", "-b:a", "64k",
-                            "-shortest",
-                            "-movflags", "+faststart", "-profile:v", "high", "-level", "4.0",
-                            "-pix_fmt", "yuv420p",
-                            compressed
-                        ]
-            else:
-                # PyAV MP4 input - CHECK IF ALREADY OPTIMIZED
-                
-                # ========== SKIP REDUNDANT COMPRESSION ==========
-                # If this is a final MP4 from recording_service, don't re-compress
-                if "_final.mp4" in video_path:
-                    logging.info("✅ Input is already optimized final MP4 from recording_service - skipping re-compression")
-                    compressed = video_path
-                    
-                    # Verify file is valid
-                    if not os.path.exists(compressed) or os.path.getsize(compressed) == 0:
-                        raise Exception("Final MP4 file is missing or empty")
-                    
-                    compressed_size = os.path.getsize(compressed)
-                    logging.info(f"✅ Using existing optimized MP4: {compressed_size} bytes")
-                    
-                    # ✅ SET FLAG TO SKIP COMPRESSION EXECUTION
-                    skip_compression = True
-                    
-                else:
-                    # Original file needs optimization
-                    logging.info("🔄 Optimizing PyAV MP4...")
-                    skip_compression = False
-                                    
-                    if nvenc_available:
-                        if has_audio:
-                            logging.info("🚀 GPU - Optimizing PyAV MP4 (preserving audio) using NVENC")
-                            ffmpeg_cmd = [
-                                "ffmpeg", "-y",
-                                "-i", video_path,
-                                "-c:v", "h264_nvenc",
-                                "-preset", "p1",
-                                "-tune", "hq",
-                                "-rc", "vbr",
-                                "-cq", "23",
-                                "-b:v", "5M",
-                                "-maxrate", "10M",
-                                "-bufsize", "20M",
-                                "-c:a", "copy",
-                                "-movflags", "+faststart+frag_keyframe+separate_moof+omit_tfhd_offset",
-                                "-pix_fmt", "yuv420p",
-                                "-avoid_negative_ts", "make_zero",
-                                "-fflags", "+genpts",
-                                compressed
-                            ]
-                        else:
-                            logging.info("🚀 GPU - Optimizing PyAV MP4 (adding silent audio) using NVENC")
-                            ffmpeg_cmd = [
-                                "ffmpeg", "-y",
-                                # "-hwaccel", "cuda",
-                                "-i", video_path,
-                                "-f", "lavfi", "-i", "anullsrc=channel_layout=stereo:sample_rate=44100",
-                                "-c:v", "h264_nvenc",
-                                "-preset", "p1",
-                                "-tune", "hq",
-                                "-rc", "vbr",
-                                "-cq", "23",
-                                "-b:v", "3M",
-                                "-maxrate", "5M",
-                                "-bufsize", "6M",
-                                "-c:a", "aac", "-ar", "44100", "-ac", "2", "-b:a", "64k",
-                                "-shortest",
-                                "-movflags", "+faststart",
-                                "-pix_fmt", "yuv420p",
-                                "-avoid_negative_ts", "make_zero",
-                                "-fflags", "+genpts",
-                                "-vsync", "cfr",
-                                compressed
-                            ]
-                    else:
-                        # CPU fallback for PyAV MP4
-                        if has_audio:
-                            logging.info("ℹ️ CPU - Optimizing PyAV MP4 (preserving audio) using libx264")
-                            ffmpeg_cmd = [
-                                "ffmpeg", "-y", "-i", video_path,
-                                "-c:v", "libx264", "-preset", "fast", "-crf", "23",
-                                "-maxrate", "10M", "-bufsize", "20M", 
-                                "-c:a", "copy",
-                                "-movflags", "+faststart+frag_keyframe+separate_moof+omit_tfhd_offset",
-                                "-profile:v", "baseline",
-                                "-level", "3.1",
-                                "-pix_fmt", "yuv420p",
-                                "-avoid_negative_ts", "make_zero",
-                                "-fflags", "+genpts",
-                                "-vsync", "cfr",
-                                compressed
-                            ]
-                        else:
-                            logging.info("ℹ️ CPU - Optimizing PyAV MP4 (adding silent audio) using libx264")
-                            ffmpeg_cmd = [
-                                "ffmpeg", "-y", "-i", video_path,
-                                "-f", "lavfi", "-i", "anullsrc=channel_layout=stereo:sample_rate=44100",
-                                "-c:v", "libx264", "-preset", "fast", "-crf", "23",
-                                "-maxrate", "3M", "-bufsize", "6M",
-                                "-c:a", "aac", "-ar", "44100", "-ac", "2", "-b:a", "64k",
-                                "-shortest",
-                                "-movflags", "+faststart", "-profile:v", "high", "-level", "4.0",
-                                "-pix_fmt", "yuv420p",
-                                "-avoid_negative_ts", "make_zero",
-                                "-fflags", "+genpts",
-                                "-vsync", "cfr",
-                                compressed
-                            ]
-
-            # ✅ ONLY EXECUTE COMPRESSION IF NOT SKIPPED
-            if not skip_compression:
-                try:
-                    logging.info(f"🔄 Running compression command...")
-                    # Create clean environment with GPU enabled
-                    ffmpeg_env = os.environ.copy()
-                    ffmpeg_env['CUDA_VISIBLE_DEVICES'] = '0'
-                    ffmpeg_env['CUDA_DEVICE_ORDER'] = 'PCI_BUS_ID'
-                    if 'NVIDIA_DISABLE' in ffmpeg_env:
-                        del ffmpeg_env['NVIDIA_DISABLE']
-
-                    logging.info(f"FFmpeg environment: CUDA_VISIBLE_DEVICES={ffmpeg_env.get('CUDA_VISIBLE_DEVICES')}")
-
-                    result = subprocess.run(ffmpeg_cmd, check=True, capture_output=True, text=True, timeout=600, env=ffmpeg_env)
-                    encoder_used = "GPU (NVENC)" if nvenc_available else "CPU (libx264)"
-                    logging.info(f"✅ Video compressed successfully using {encoder_used}: {compressed}")
-                except subprocess.TimeoutExpired:
-                    raise Exception("Video compression timed out - file may be too large or complex")
-                except subprocess.CalledProcessError as compression_error:
-                    logging.error(f"❌ Video compression failed: {compression_error}")
-                    logging.error(f"❌ FFmpeg stderr: {compression_error.stderr}")
-                    raise Exception(f"Video compression failed: {compression_error.stderr}")
-            else:
-                logging.info("✅ Compression skipped - using pre-optimized file")
-                compressed_size = os.path.getsize(compressed)
+                video_duration = 30.0
+                logging.warning(f"⚠ Using default duration assumption: {video_duration}s")
 
-            # Verify compressed file (runs for both cases)
-            if not os.path.exists(compressed) or os.path.getsize(compressed) == 0:
-                raise Exception("Compressed video file is empty or not created")
+        return {"has_audio": has_audio, "has_video": has_video, "video_duration": video_duration}
 
-            # Only get compressed_size if not already set
-            if 'compressed_size' not in locals():
-                compressed_size = os.path.getsize(compressed)
-            
+    def encoder(results):
+        nvenc_available = False
+        try:
+            check_nvenc = subprocess.run(
+                ['ffmpeg', '-h', 'encoder=h264_nvenc'],
+                capture_output=True,
+                text=True,
+                timeout=5
+            )
+            nvenc_available = (check_nvenc.returncode == 0)
+            if nvenc_available:
+                logging.info("🚀 GPU (NVENC) detected - Will use GPU acceleration for encoding")
+            else:
+                logging.info("ℹ️ GPU not available - Will use CPU encoding")
+        except:
+            logging.info("ℹ️ GPU check failed - Will use CPU encoding")
+        return {"nvenc_available": nvenc_available}
+
+    def compress(results):
+        has_audio = results["probe"]["has_audio"]
+        nvenc_available = results["encoder"]["nvenc_available"]
+        input_ext = os.path.splitext(video_path)[1].lower()
+        compressed = os.path.join(workdir, "compressed.mp4")
+
+        # If this is a final MP4 from recording_service, don't re-compress
+        if input_ext != '.webm' and "_final.mp4" in video_path:
+            logging.info("✅ Input is already optimized final MP4 from recording_service - skipping re-compression")
+            compressed = video_path
+            if not os.path.exists(compressed) or os.path.getsize(compressed) == 0:
+                raise Exception("Final MP4 file is missing or empty")
+            logging.info("✅ Compression skipped - using pre-optimized file")
+        else:
+            ffmpeg_cmd = _build_compression_command(video_path, compressed, input_ext, has_audio, nvenc_available)
             try:
-                verify_cmd = ["ffprobe", "-v", "quiet", "-print_format", "json", "-show_streams", "-show_format", compressed]
-                verify_result = subprocess.run(verify_cmd, capture_output=True, text=True, check=True, timeout=30)
-                verify_data = json.loads(verify_result.stdout)
-                
-                compressed_has_audio = any(stream.get('codec_type') == 'audio' for stream in verify_data.get('streams', []))
-                compressed_has_video = any(stream.get('codec_type') == 'video' for stream in verify_data.get('streams', []))
-                compressed_duration = float(verify_data.get('format', {}).get('duration', 0))
-                
-                logging.info(f"✅ Compressed file verification:")
-                logging.info(f"   Size: {compressed_size} bytes")
-                logging.info(f"   Has video: {compressed_has_video}")
-                logging.info(f"   Has audio: {compressed_has_audio}")
-                logging.info(f"   Duration: {compressed_duration:.2f}s")
-                logging.info(f"   Encoder: {'GPU (NVENC)' if nvenc_available else 'CPU (libx264)'}")
-                
-                if has_audio and compressed_has_audio:
-                    logging.info("✅ Audio preservation confirmed from PyAV source")
-                elif not has_audio and compressed_has_audio:
-                    logging.info("✅ Silent audio track added successfully")
-                        
-            except Exception as verify_error:
-                logging.warning(f"⚠ Could not verify compressed file: {verify_error}")
+                logging.info(f"🔄 Running compression command...")
+                # Create clean environment with GPU enabled
+                ffmpeg_env = os.environ.copy()
+                ffmpeg_env['CUDA_VISIBLE_DEVICES'] = '0'
+                ffmpeg_env['CUDA_DEVICE_ORDER'] = 'PCI_BUS_ID'
+                if 'NVIDIA_DISABLE' in ffmpeg_env:
+                    del ffmpeg_env['NVIDIA_DISABLE']
+
+                logging.info(f"FFmpeg environment: CUDA_VISIBLE_DEVICES={ffmpeg_env.get('CUDA_VISIBLE_DEVICES')}")
+
+                subprocess.run(ffmpeg_cmd, check=True, capture_output=True, text=True, timeout=600, env=ffmpeg_env)
+                encoder_used = "GPU (NVENC)" if nvenc_available else "CPU (libx264)"
+                logging.info(f"✅ Video compressed successfully using {encoder_used}: {compressed}")
+            except subprocess.TimeoutExpired:
+                raise Exception("Video compression timed out - file may be too large or complex")
+            except subprocess.CalledProcessError as compression_error:
+                logging.error(f"❌ Video compression failed: {compression_error}")
+                logging.error(f"❌ FFmpeg stderr: {compression_error.stderr}")
+                raise Exception(f"Video compression failed: {compression_error.stderr}")
+
+        if not os.path.exists(compressed) or os.path.getsize(compressed) == 0:
+            raise Exception("Compressed video file is empty or not created")
+        compressed_size = os.path.getsize(compressed)
+
+        compressed_duration = None
+        try:
+            verify_data = _probe_media(compressed)
+            streams = verify_data.get('streams', [])
+            compressed_has_audio = any(stream.get('codec_type') == 'audio' for stream in streams)
+            compressed_has_video = any(stream.get('codec_type') == 'video' for stream in streams)
+            compressed_duration = float(verify_data.get('format', {}).get('duration', 0))
+
+            logging.info(f"✅ Compressed file verification:")
+            logging.info(f"   Size: {compressed_size} bytes")
+            logging.info(f"   Has video: {compressed_has_video}")
+            logging.info(f"   Has audio: {compressed_has_audio}")
+            logging.info(f"   Duration: {compressed_duration:.2f}s")
+            logging.info(f"   Encoder: {'GPU (NVENC)' if nvenc_available else 'CPU (libx264)'}")
+
+            if has_audio and compressed_has_audio:
+                logging.info("✅ Audio preservation confirmed from PyAV source")
+            elif not has_audio and compressed_has_audio:
+                logging.info("✅ Silent audio track added successfully")
+        except Exception as verify_error:
+            logging.warning(f"⚠ Could not verify compressed file: {verify_error}")
 
-            # ========== ENHANCED AUDIO EXTRACTION FOR TRANSCRIPTION ==========
-            audio = os.path.join(workdir, "audio.wav")
-            
-            # Extract audio optimized for Whisper API (smaller file size)
-            audio_extract_cmd = [
-                "ffmpeg", "-y", "-i", compressed, 
-                "-ar", "16000",      # 16kHz sample rate
-                "-ac", "1",          # Mono
-                "-vn",               # No video
-                "-acodec", "libmp3lame",  # MP3 instead of WAV (much smaller!)
-                "-b:a", "64k",       # 64kbps bitrate
-                "-avoid_negative_ts", "make_zero",
-                audio.replace('.wav', '.mp3')  # Save as MP3
+        return {
+            "compressed": compressed,
+            "compressed_size": compressed_size,
+            "compressed_duration": compressed_duration,
+            "artifacts": [compressed],
+        }
+
+    def live_transcript(results):
+        # Transcript produced by the recorder while the meeting was running
+        doc = load_live_transcript(meeting_id, results["probe"]["video_duration"])
+        if not doc:
+            return {"segments": None}
+        segments = [
+            {"start": seg["start"], "end": seg["end"], "text": seg["text"], "speaker": seg.get("speaker")}
+            for seg in doc.get("segments", [])
+        ]
+        logging.info(f"📝 Using live transcript for {meeting_id}: {len(segments)} segments")
+        return {"segments": segments}
+
+    def extract_audio(results):
+        # Read straight from the source so extraction overlaps with compression
+        # (compression copies or adds silence, it never changes the speech track)
+        has_audio = results["probe"]["has_audio"]
+        video_duration = results["probe"]["video_duration"]
+        audio = os.path.join(workdir, "audio.mp3")
+
+        if results["live_transcript"]["segments"] is not None:
+            logging.info("⏭️ Audio extraction skipped - live transcript available")
+            return {"audio": None, "audio_size": 0, "audio_duration": video_duration,
+                    "fallback_used": False, "skipped": True, "artifacts": []}
+
+        # Extract audio optimized for Whisper API (smaller file size)
+        audio_extract_cmd = [
+            "ffmpeg", "-y", "-i", video_path,
+            "-ar", "16000",      # 16kHz sample rate
+            "-ac", "1",          # Mono
+            "-vn",               # No video
+            "-acodec", "libmp3lame",  # MP3 instead of WAV (much smaller!)
+            "-b:a", "64k",       # 64kbps bitrate
+            "-avoid_negative_ts", "make_zero",
+            audio
+        ]
+
+        fallback_used = False
+        try:
+            if not has_audio:
+                raise subprocess.CalledProcessError(1, audio_extract_cmd, stderr="Input has no audio stream")
+            subprocess.run(audio_extract_cmd, check=True, capture_output=True, text=True, timeout=120)
+            logging.info(f"✅ Audio extracted successfully: {audio}")
+
+            if not os.path.exists(audio) or os.path.getsize(audio) == 0:
+                raise Exception("Extracted audio file is empty")
+
+        except subprocess.CalledProcessError as audio_error:
+            logging.warning(f"⚠ Primary audio extraction failed: {audio_error}")
+
+            # Fallback: Generate silent audio
+            logging.info("🔇 Generating silent audio as fallback...")
+            fallback_used = True
+            silent_duration = max(10, int(video_duration)) if video_duration > 0 else 10
+            silent_cmd = [
+                "ffmpeg", "-y", "-f", "lavfi",
+                "-i", "anullsrc=channel_layout=mono:sample_rate=16000",
+                "-t", str(silent_duration),
+                "-acodec", "libmp3lame", "-b:a", "64k", audio
             ]
-            audio = audio.replace('.wav', '.mp3')  # Update audio path
-            
+
             try:
-                result = subprocess.run(audio_extract_cmd, check=True, capture_output=True, text=True, timeout=120)
-                logging.info(f"✅ Audio extracted successfully: {audio}")
-                
-                if not os.path.exists(audio) or os.path.getsize(audio) == 0:
-                    raise Exception("Extracted audio file is empty")
-                    
-                audio_size = os.path.getsize(audio)
-                logging.info(f"🔊 Audio file size: {audio_size} bytes")
-                    
-            except subprocess.CalledProcessError as audio_error:
-                logging.warning(f"⚠ Primary audio extraction failed: {audio_error}")
-                
-                # Fallback: Generate silent audio
-                logging.info("🔇 Generating silent audio as fallback...")
-                silent_duration = max(10, int(compressed_duration)) if 'compressed_duration' in locals() and compressed_duration > 0 else 10
-                silent_cmd = [
-                    "ffmpeg", "-y", "-f", "lavfi", 
-                    "-i", "anullsrc=channel_layout=mono:sample_rate=16000",
-                    "-t", str(silent_duration),
-                    "-acodec", "pcm_s16le", audio
-                ]
-                
-                try:
-                    subprocess.run(silent_cmd, check=True, capture_output=True, text=True, timeout=60)
-                    logging.info(f"✅ Silent audio generated: {audio} ({silent_duration}s)")
-                except subprocess.CalledProcessError as silent_error:
-                    logging.error(f"❌ Even silent audio generation failed: {silent_error}")
-                    raise Exception(f"All audio extraction methods failed: {audio_error.stderr}")
-            
-            # ========== TRANSCRIPTION WITH ERROR HANDLING ==========
-            transcript_text = ""
-            segments = []
-            
-            if os.path.exists(audio) and os.path.getsize(audio) > 0:
-                try:
-                    logging.info("🎤 Starting transcription...")
-                    
-                    # Check file size
-                    audio_size_mb = os.path.getsize(audio) / (1024 * 1024)
-                    logging.info(f"Audio file size: {audio_size_mb:.1f} MB")
-                    
-                    if audio_size_mb > 24:
-                        logging.warning(f"⚠️ Audio file too large ({audio_size_mb:.1f} MB), splitting into chunks...")
-                        
-                        # Split audio into 10-minute chunks
-                        chunk_duration = 600  # 10 minutes
-                        num_chunks = int(compressed_duration / chunk_duration) + 1
-                        
-                        all_segments = []
-                        for i in range(num_chunks):
-                            chunk_file = audio.replace('.mp3', f'_chunk{i}.mp3')
-                            start_time = i * chunk_duration
-                            
-                            # Extract chunk
-                            chunk_cmd = [
-                                "ffmpeg", "-y", "-i", compressed,
-                                "-ss", str(start_time),
-                                "-t", str(chunk_duration),
-                                "-ar", "16000", "-ac", "1", "-vn",
-                                "-acodec", "libmp3lame", "-b:a", "64k",
-                                chunk_file
-                            ]
-                            subprocess.run(chunk_cmd, check=True, capture_output=True, timeout=60)
-                            
-                            # Transcribe chunk
-                            logging.info(f"Transcribing chunk {i+1}/{num_chunks}...")
-                            with open(chunk_file, "rb") as f:
-                                chunk_result = openai.Audio.translate("whisper-1", file=f, response_format="verbose_json")
-                            
-                            # Adjust timestamps
-                            for seg in chunk_result["segments"]:
-                                seg["start"] += start_time
-                                seg["end"] += start_time
-                                all_segments.append(seg)
-                            
-                            os.remove(chunk_file)
-                        
-                        transcript_text = "".join([seg["text"] for seg in all_segments])
-                        segments = all_segments
-                        logging.info(f"✅ Transcription completed: {len(transcript_text)} chars, {len(segments)} segments (from {num_chunks} chunks)")
-                    else:
-                        # Small file - transcribe directly
-                        with open(audio, "rb") as f:
-                            result = openai.Audio.translate("whisper-1", file=f, response_format="verbose_json")
-                        transcript_text = "".join([seg["text"] for seg in result["segments"]])
-                        segments = result["segments"]
-                        logging.info(f"✅ Transcription completed: {len(transcript_text)} chars, {len(segments)} segments")
-                
-                except Exception as transcription_error:
-                    logging.error(f"❌ Transcription failed: {transcription_error}")
-                    transcript_text = "Transcription failed due to audio processing issues."
-                    segments = []
-            else:
-                logging.warning("⚠ No valid audio file for transcription")
-                transcript_text = "No audio available for transcription."
-                segments = []
+                subprocess.run(silent_cmd, check=True, capture_output=True, text=True, timeout=60)
+                logging.info(f"✅ Silent audio generated: {audio} ({silent_duration}s)")
+            except subprocess.CalledProcessError as silent_error:
+                logging.error(f"❌ Even silent audio generation failed: {silent_error}")
+                raise Exception(f"All audio extraction methods failed: {audio_error.stderr}")
 
-            # ========== SUBTITLE GENERATION WITH LOCAL MODEL (FAST!) ==========
-            subtitle_urls = {}
+        audio_size = os.path.getsize(audio) if os.path.exists(audio) else 0
+        logging.info(f"🔊 Audio file size: {audio_size} bytes")
 
-            # Get meeting type BEFORE subtitle generation
-            meeting_type = get_meeting_type(meeting_id)
-            logging.info(f"Meeting type for subtitles: {meeting_type}")
+        audio_duration = video_duration
+        try:
+            audio_duration = float(_probe_media(audio).get('format', {}).get('duration', 0)) or video_duration
+        except Exception:
+            pass
 
-            if segments and len(segments) > 0:
-                logging.info("🎬 Generating subtitles with local translation model...")
-                
-                try:
-                    import sys
-                    
-                    # Check if interpreter is shutting down
-                    if sys.is_finalizing():
-                        logging.warning("⚠️ Interpreter shutting down - skipping subtitle generation")
-                        subtitle_urls = {}
-                    else:
-                        # Initialize local translator (GPU-accelerated if available)
-                        try:
-                            local_translator = LocalIndianLanguageTranslator()
-                        except Exception as init_error:
-                            logging.error(f"❌ Failed to initialize local translator: {init_error}")
-                            logging.warning("⚠️ Falling back to no translation")
-                            subtitle_urls = {}
-                            local_translator = None
-                        
-                        if local_translator:
-                            # Translate all languages
-                            language_results = {}
-                            
-                            for lang in ["en", "hi", "te"]:
-                                try:
-                                    if lang == "en":
-                                        # English - just copy segments
-                                        language_results["en"] = segments.copy()
-                                        logging.info("✅ en segments ready (no translation needed)")
-                                    else:
-                                        # Translate using local model
-                                        translated_segments = local_translator.translate_segments(
-                                            segments, 
-                                            lang, 
-                                            batch_size=32  # Process 32 segments at once
-                                        )
-                                        language_results[lang] = translated_segments
-                                        logging.info(f"✅ {lang} translation completed")
-                                        
-                                except Exception as lang_error:
-                                    logging.error(f"❌ Failed to translate {lang}: {lang_error}")
-                            
-                            # Create SRT files and upload
-                            for lang, translated_segments in language_results.items():
-                                try:
-                                    srt_path = os.path.join(workdir, f"subs_{lang}.srt")
-                                    create_srt_from_segments(translated_segments, srt_path)
-                                    
-                                    if os.path.exists(srt_path) and os.path.getsize(srt_path) > 0:
-                                        logging.info(f"✅ {lang} SRT created ({os.path.getsize(srt_path)} bytes)")
-                                        
-                                        # Build subtitle path based on meeting type
-                                        subtitles_folder = build_s3_document_path(meeting_id, user_id, meeting_type, "subtitles")
-                                        s3_key = f"{subtitles_folder}/{meeting_id}_{user_id}_{lang}.srt"
-                                        subtitle_url = upload_to_aws_s3(srt_path, s3_key)
-                                                                    
-                                        if subtitle_url:
-                                            subtitle_urls[lang] = subtitle_url
-                                            logging.info(f"✅ {lang} subtitles uploaded")
-                                
-                                except Exception as srt_error:
-                                    logging.error(f"❌ Failed to create/upload {lang} SRT: {srt_error}")
-                            
-                            # Cleanup GPU memory
-                            try:
-                                local_translator.cleanup()
-                            except:
-                                pass
-                            
-                            logging.info(f"✅ Generated subtitles for languages: {list(subtitle_urls.keys())}")
-                
-                except Exception as subtitle_error:
-                    if "interpreter shutdown" in str(subtitle_error).lower():
-                        logging.warning("⚠️ Subtitle generation interrupted by shutdown")
-                    else:
-                        logging.error(f"❌ Subtitle generation error: {subtitle_error}")
-                        import traceback
-                        logging.error(f"Traceback: {traceback.format_exc()}")
+        return {
+            "audio": audio,
+            "audio_size": audio_size,
+            "audio_duration": audio_duration,
+            "fallback_used": fallback_used,
+            "artifacts": [audio],
+        }
+
+    def transcribe_file(path):
+        with open(path, "rb") as f:
+            return openai.Audio.translate("whisper-1", file=f, response_format="verbose_json")
+
+    def transcribe_chunk(audio, index, start_time):
+        partial_key = f"transcribe:chunk:{index}"
+        cached = checkpoint.get(partial_key)
+        if cached is not None:
+            return cached
+
+        chunk_file = os.path.join(workdir, f"audio_chunk{index}.mp3")
+        # Seek before -i and stream-copy: no re-decode of the preceding audio
+        chunk_cmd = [
+            "ffmpeg", "-y",
+            "-ss", str(start_time),
+            "-t", str(TRANSCRIBE_CHUNK_SECONDS),
+            "-i", audio,
+            "-c", "copy",
+            chunk_file
+        ]
+        subprocess.run(chunk_cmd, check=True, capture_output=True, timeout=60)
+
+        try:
+            chunk_result = transcribe_file(chunk_file)
+        finally:
+            if os.path.exists(chunk_file):
+                os.remove(chunk_file)
+
+        # Adjust timestamps
+        chunk_segments = []
+        for seg in chunk_result["segments"]:
+            chunk_segments.append({
+                **dict(seg),
+                "start": seg["start"] + start_time,
+                "end": seg["end"] + start_time,
+            })
+        checkpoint.put(partial_key, chunk_segments)
+        logging.info(f"✅ Transcribed chunk {index + 1} ({len(chunk_segments)} segments)")
+        return chunk_segments
+
+    def transcribe(results):
+        live_segments = results["live_transcript"]["segments"]
+        if live_segments is not None:
+            return {
+                "transcript_text": "".join([seg["text"] for seg in live_segments]),
+                "segments": live_segments,
+                "source": "live",
+            }
+
+        audio = results["extract_audio"]["audio"]
+        audio_duration = results["extract_audio"]["audio_duration"]
+        transcript_text = ""
+        segments = []
+
+        if not audio or not os.path.exists(audio) or os.path.getsize(audio) == 0:
+            logging.warning("⚠ No valid audio file for transcription")
+            return {"transcript_text": "No audio available for transcription.", "segments": []}
+
+        try:
+            logging.info("🎤 Starting transcription...")
+            audio_size_mb = os.path.getsize(audio) / (1024 * 1024)
+            logging.info(f"Audio file size: {audio_size_mb:.1f} MB")
+
+            if audio_size_mb > TRANSCRIBE_MAX_UPLOAD_MB:
+                num_chunks = int(audio_duration / TRANSCRIBE_CHUNK_SECONDS) + 1
+                logging.warning(
+                    f"⚠️ Audio file too large ({audio_size_mb:.1f} MB), transcribing {num_chunks} chunks "
+                    f"({TRANSCRIBE_CONCURRENCY} at a time)..."
+                )
+                with ThreadPoolExecutor(max_workers=max(1, TRANSCRIBE_CONCURRENCY), thread_name_prefix="transcribe-chunk") as executor:
+                    chunk_futures = [
+                        executor.submit(transcribe_chunk, audio, i, i * TRANSCRIBE_CHUNK_SECONDS)
+                        for i in range(num_chunks)
+                    ]
+                    for future in chunk_futures:
+                        segments.extend(future.result())
+                transcript_text = "".join([seg["text"] for seg in segments])
+                logging.info(f"✅ Transcription completed: {len(transcript_text)} chars, {len(segments)} segments (from {num_chunks} chunks)")
             else:
-                logging.warning("⚠ No segments available for subtitle generation")
-                
-            # ========== SUMMARY GENERATION ==========
-            summary = "Processing summary..."
+                result = transcribe_file(audio)
+                segments = [dict(seg) for seg in result["segments"]]
+                transcript_text = "".join([seg["text"] for seg in segments])
+                logging.info(f"✅ Transcription completed: {len(transcript_text)} chars, {len(segments)} segments")
+
+        except Exception as transcription_error:
+            logging.error(f"❌ Transcription failed: {transcription_error}")
+            transcript_text = "Transcription failed due to audio processing issues."
+            segments = []
+
+        return {"transcript_text": transcript_text, "segments": segments, "source": "whisper"}
+
+    def meeting_info(results):
+        meeting_type = get_meeting_type(meeting_id)
+        logging.info(f"📋 Meeting type for S3 organization: {meeting_type}")
+
+        schedule_meta = {}
+        if meeting_type == "ScheduleMeeting":
+            schedule_meta = get_schedule_meeting_metadata(meeting_id)
+            logging.info(f"Schedule metadata: {schedule_meta}")
+        return {"meeting_type": meeting_type, "schedule_meta": schedule_meta}
+
+    def upload_video(results):
+        meeting_type = results["meeting_info"]["meeting_type"]
+        # For ScheduleMeetings: videos/schedule_meetings/{schedule_id}_{title}/recording.mp4
+        # For others: videos/{meeting_id}_{user_id}_recording.mp4
+        video_s3_key = build_s3_video_path(meeting_id, user_id, meeting_type)
+        video_url = upload_to_aws_s3(results["compress"]["compressed"], video_s3_key)
+        if not video_url:
+            raise Exception("Failed to upload final video to S3")
+        logging.info(f"✅ Final MP4 uploaded to S3: {video_url}")
+        return {"video_url": video_url}
+
+    def make_subtitle_stage(lang):
+        def subtitles(results):
+            import sys
+
+            segments = results["transcribe"]["segments"]
+            if not segments:
+                logging.warning(f"⚠ No segments available for {lang} subtitle generation")
+                return {"url": None}
+            if sys.is_finalizing():
+                logging.warning("⚠️ Interpreter shutting down - skipping subtitle generation")
+                return {"url": None}
+
             try:
-                if transcript_text and len(transcript_text.strip()) > 10:
-                    summary = summarize_segment(transcript_text)
-                    logging.info(f"✅ Summary generated ({len(summary)} chars)")
+                if lang == "en":
+                    translated_segments = segments
                 else:
-                    summary = "No sufficient content available for summary generation."
-                    logging.warning("⚠ Insufficient content for summary")
-            except Exception as summary_error:
-                logging.warning(f"⚠ Summary generation failed: {summary_error}")
-                summary = "Summary generation failed due to processing issues."
-
-            # ========== CREATE DOCUMENTS ==========
-            transcript_path = os.path.join(workdir, "transcript.pdf")
-            summary_path = os.path.join(workdir, "summary.pdf")
-            
+                    translated_segments = get_translator().translate_segments(segments, lang, batch_size=32)
+                logging.info(f"✅ {lang} segments ready")
+
+                srt_path = os.path.join(workdir, f"subs_{lang}.srt")
+                create_srt_from_segments(translated_segments, srt_path)
+                if not os.path.exists(srt_path) or os.path.getsize(srt_path) == 0:
+                    return {"url": None}
+                logging.info(f"✅ {lang} SRT created ({os.path.getsize(srt_path)} bytes)")
+
+                subtitles_folder = build_s3_document_path(
+                    meeting_id, user_id, results["meeting_info"]["meeting_type"], "subtitles"
+                )
+                s3_key = f"{subtitles_folder}/{meeting_id}_{user_id}_{lang}.srt"
+                subtitle_url = upload_to_aws_s3(srt_path, s3_key)
+                if subtitle_url:
+                    logging.info(f"✅ {lang} subtitles uploaded")
+                return {"url": subtitle_url}
+
+            except Exception as subtitle_error:
+                if "interpreter shutdown" in str(subtitle_error).lower():
+                    logging.warning("⚠️ Subtitle generation interrupted by shutdown")
+                else:
+                    logging.error(f"❌ Failed to create/upload {lang} subtitles: {subtitle_error}")
+                return {"url": None}
+        return subtitles
+
+    def summary(results):
+        transcript_text = results["transcribe"]["transcript_text"]
+        try:
+            if transcript_text and len(transcript_text.strip()) > 10:
+                summary_text = summarize_segment(transcript_text)
+                logging.info(f"✅ Summary generated ({len(summary_text)} chars)")
+            else:
+                summary_text = "No sufficient content available for summary generation."
+                logging.warning("⚠ Insufficient content for summary")
+        except Exception as summary_error:
+            logging.warning(f"⚠ Summary generation failed: {summary_error}")
+            summary_text = "Summary generation failed due to processing issues."
+        return {"summary": summary_text}
+
+    def make_document_stage(doc_type, source_stage, source_key):
+        def document(results):
+            pdf_path = os.path.join(workdir, f"{doc_type}.pdf")
             try:
-                save_pdf(transcript_text, transcript_path)
-                save_pdf(summary, summary_path)
-                logging.info(f"✅ PDF documents created")
+                save_pdf(results[source_stage][source_key], pdf_path)
             except Exception as pdf_error:
-                logging.warning(f"⚠ PDF creation failed: {pdf_error}")
-
-            # ========== UPLOAD ONLY FINAL MP4 TO S3 (NOT INTERMEDIATE FILES) ==========
-            logging.info("☁ Starting S3 uploads - ONLY FINAL MP4...")
+                logging.warning(f"⚠ {doc_type} PDF creation failed: {pdf_error}")
+                return {"url": None}
+
+            if not os.path.exists(pdf_path) or os.path.getsize(pdf_path) == 0:
+                return {"url": None}
+            s3_key = build_s3_document_path(meeting_id, user_id, results["meeting_info"]["meeting_type"], doc_type)
+            url = upload_to_aws_s3(pdf_path, s3_key)
+            logging.info(f"✅ {doc_type} PDF uploaded: {bool(url)}")
+            return {"url": url}
+        return document
+
+    def save_document(results):
+        probe_result = results["probe"]
+        compress_result = results["compress"]
+        audio_result = results["extract_audio"]
+        meeting_type = results["meeting_info"]["meeting_type"]
+        schedule_meta = results["meeting_info"]["schedule_meta"] or {}
+        nvenc_available = results["encoder"]["nvenc_available"]
+        subtitle_urls = {
+            lang: results[f"subtitles_{lang}"]["url"]
+            for lang in SUBTITLE_LANGUAGES if results[f"subtitles_{lang}"].get("url")
+        }
+        logging.info(f"✅ Generated subtitles for languages: {list(subtitle_urls.keys())}")
 
-            # ✅ GET MEETING TYPE FIRST (needed for S3 path building)
-            meeting_type = get_meeting_type(meeting_id)
-            logging.info(f"📋 Meeting type for S3 organization: {meeting_type}")
+        video_url = results["upload_video"]["video_url"]
+        transcript_url = results["transcript_doc"]["url"]
+        summary_url = results["summary_doc"]["url"]
+        summary_text = results["summary"]["summary"]
 
-            # ✅ BUILD S3 PATH BASED ON MEETING TYPE
-            # For ScheduleMeetings: videos/schedule_meetings/{schedule_id}_{title}/recording.mp4
-            # For others: videos/{meeting_id}_{user_id}_recording.mp4
-            video_s3_key = build_s3_video_path(meeting_id, user_id, meeting_type)
+        visible_to_emails = get_meeting_participants_emails(meeting_id)
+        logging.info(f"✅ Recording will be visible to {len(visible_to_emails)} authorized users")
 
-            video_url = upload_to_aws_s3(compressed, video_s3_key)
-                        
-            if not video_url:
-                raise Exception("Failed to upload final video to S3")
-            
-            logging.info(f"✅ Final MP4 uploaded to S3: {video_url}")
-            
-            # Upload documents
-            transcript_url = None
-            summary_url = None
+        # Check if user provided custom name during stop recording
+        custom_name_doc = None
+        custom_recording_name = None
+        try:
+            custom_name_doc = collection.find_one({
+                "meeting_id": meeting_id,
+                "pending_name_update": True
+            })
+            if custom_name_doc:
+                custom_recording_name = custom_name_doc.get("custom_recording_name")
+                logger.info(f"Found custom recording name for {meeting_id}: {custom_recording_name}")
+        except Exception as name_check_error:
+            logger.warning(f"Failed to check for custom name: {name_check_error}")
+
+        # Determine filename based on custom name or fallback to original
+        if custom_recording_name:
+            display_filename = f"{custom_recording_name}.mp4"
+            original_filename = f"{custom_recording_name}.mp4"
+        else:
+            display_filename = os.path.basename(video_path)
+            original_filename = os.path.basename(video_path)
 
-            if os.path.exists(transcript_path) and os.path.getsize(transcript_path) > 0:
-                transcript_s3_key = build_s3_document_path(meeting_id, user_id, meeting_type, "transcript")
-                transcript_url = upload_to_aws_s3(transcript_path, transcript_s3_key)
-                
-            if os.path.exists(summary_path) and os.path.getsize(summary_path) > 0:
-                summary_s3_key = build_s3_document_path(meeting_id, user_id, meeting_type, "summary")
-                summary_url = upload_to_aws_s3(summary_path, summary_s3_key)
-            
-            logging.info(f"✅ S3 uploads completed")
+        compressed_duration = compress_result.get("compressed_duration")
+        video_document = {
+            "meeting_id": meeting_id,
+            "user_id": user_id,
+            "meeting_type": meeting_type,
+            "schedule_id": schedule_meta.get("schedule_id"),
+            "schedule_title": schedule_meta.get("schedule_title"),
+            "schedule_folder": schedule_meta.get("folder_path"),
+            "filename": display_filename,
+            "original_filename": original_filename,
+            "custom_recording_name": custom_recording_name,
+            "video_url": video_url,
+            "transcript_url": transcript_url,
+            "summary_url": summary_url,
+            "summary_text": summary_text,
+            "image_url": None,
+            "subtitles": subtitle_urls,
+            "timestamp": datetime.now(),
+            "visible_to": visible_to_emails,
+            "visible_to_lower": normalize_visible_to(visible_to_emails),
+            "file_size": compress_result["compressed_size"],
+            "duration": compressed_duration if compressed_duration is not None else probe_result["video_duration"],
+            "transcription_available": bool(transcript_url),
+            "summary_available": bool(summary_url),
+            "processing_status": "completed",
+            "subtitle_format": "enhanced_with_fallbacks",
+            "embedded_subtitles": False,
+            "audio_processing_status": "fallback_used" if audio_result["fallback_used"] else "success",
+            "audio_preserved": probe_result["has_audio"],
+            "source_format": "pyav_mp4",
+            "smooth_playback": True,
+            "file_type": "video/mp4",
+            "is_final_video": True,
+            "encoder_used": "GPU (NVENC)" if nvenc_available else "CPU (libx264)",
+            "gpu_accelerated": nvenc_available
+        }
 
-            # ========== GET PARTICIPANT EMAILS - FIXED VERSION (like old code) ==========
-            visible_to_emails = get_meeting_participants_emails(meeting_id)
+        logging.info(f"💾 Saving FINAL video data to MongoDB...")
+        existing_doc = collection.find_one({
+            "meeting_id": meeting_id,
+            "user_id": user_id,
+            "is_final_video": True
+        })
+        if existing_doc:
+            collection.update_one({"_id": existing_doc["_id"]}, {"$set": video_document})
+            logging.info(f"✅ Updated existing document")
+        else:
+            insert_result = collection.insert_one(video_document)
+            logging.info(f"✅ Created new document: {insert_result.inserted_id}")
 
-            logging.info(f"✅ Recording will be visible to {len(visible_to_emails)} authorized users")
+        # Clean up the pending custom name document
+        if custom_name_doc:
+            try:
+                collection.delete_one({"_id": custom_name_doc["_id"]})
+                logger.info(f"✅ Cleaned up pending custom name document for meeting {meeting_id}")
+            except Exception as cleanup_error:
+                logger.warning(f"Failed to cleanup custom name document: {cleanup_error}")
 
-            # ✅ GET MEETING TYPE BEFORE CREATING DOCUMENT
-            meeting_type = get_meeting_type(meeting_id)
-            logging.info(f"📋 Meeting type determined: {meeting_type}")
+        return {
+            "subtitle_urls": subtitle_urls,
+            "authorized_users_count": len(visible_to_emails),
+        }
 
-            # ✅ NEW: Check for custom recording name
-            custom_recording_name = None
+    def notify(results):
+        logging.info(f"📧 Sending recording completion notifications...")
+        notification_count = 0
+        try:
+            notification_count = send_recording_completion_notifications(
+                meeting_id=meeting_id,
+                video_url=results["upload_video"]["video_url"],
+                transcript_url=results["transcript_doc"]["url"],
+                summary_url=results["summary_doc"]["url"]
+            )
+            logging.info(f"✅ Sent {notification_count} notifications")
+        except Exception as notif_error:
+            logging.error(f"⚠ Failed to send notifications: {notif_error}")
+        return {"notification_count": notification_count}
+
+    def release_models():
+        translator = translator_holder.pop("translator", None)
+        if translator is not None:
             try:
-                custom_name_doc = self.collection.find_one({
-                    "meeting_id": meeting_id,
-                    "pending_name_update": True
-                })
-                if custom_name_doc:
-                    custom_recording_name = custom_name_doc.get("custom_recording_name")
-                    logger.info(f"Found custom recording name: {custom_recording_name}")
-            except Exception as e:
-                logger.warning(f"Failed to check custom name: {e}")
+                translator.cleanup()
+            except:
+                pass
 
-            # Get schedule metadata for ScheduleMeetings
-            schedule_meta = {}
-            if meeting_type == "ScheduleMeeting":
-                schedule_meta = get_schedule_meeting_metadata(meeting_id)
-                logging.info(f"Schedule metadata: {schedule_meta}")
+    graph.stage("probe", probe)
+    graph.stage("encoder", encoder)
+    graph.stage("meeting_info", meeting_info)
+    graph.stage("compress", compress, deps=("probe", "encoder"))
+    graph.stage("live_transcript", live_transcript, deps=("probe",))
+    graph.stage("extract_audio", extract_audio, deps=("probe", "live_transcript"))
+    graph.stage("upload_video", upload_video, deps=("compress", "meeting_info"))
+    graph.stage("transcribe", transcribe, deps=("extract_audio", "live_transcript"))
 
-            # ========== SAVE TO MONGODB - ONLY ONE VIDEO DOCUMENT ==========
-            # ========== SAVE TO MONGODB - ONLY ONE VIDEO DOCUMENT ==========
+    for lang in SUBTITLE_LANGUAGES:
+        graph.stage(f"subtitles_{lang}", make_subtitle_stage(lang), deps=("transcribe", "meeting_info"))
 
-            # ✅ NEW: Check if user provided custom name during stop recording
-            custom_name_doc = None
-            custom_recording_name = None
-            try:
-                custom_name_doc = collection.find_one({
-                    "meeting_id": meeting_id,
-                    "pending_name_update": True
-                })
-                if custom_name_doc:
-                    custom_recording_name = custom_name_doc.get("custom_recording_name")
-                    logger.info(f"Found custom recording name for {meeting_id}: {custom_recording_name}")
-            except Exception as name_check_error:
-                logger.warning(f"Failed to check for custom name: {name_check_error}")
-
-            # Determine filename based on custom name or fallback to original
-            if custom_recording_name:
-                display_filename = f"{custom_recording_name}.mp4"
-                original_filename = f"{custom_recording_name}.mp4"
-            else:
-                display_filename = os.path.basename(video_path)
-                original_filename = os.path.basename(video_path)
+    graph.stage("summary", summary, deps=("transcribe",))
+    graph.stage("transcript_doc", make_document_stage("transcript", "transcribe", "transcript_text"), deps=("transcribe", "meeting_info"))
+    graph.stage("summary_doc", make_document_stage("summary", "summary", "summary"), deps=("summary", "meeting_info"))
+    graph.stage("save_document", save_document, deps=(
+        "upload_video", "transcript_doc", "summary_doc", *[f"subtitles_{lang}" for lang in SUBTITLE_LANGUAGES]
+    ))
+    graph.stage("notify", notify, deps=("save_document",))
+    return graph, release_models
 
-            video_document = {
-                "meeting_id": meeting_id,
-                "user_id": user_id,
-                "meeting_type": meeting_type, 
-                "schedule_id": schedule_meta.get("schedule_id"),
-                "schedule_title": schedule_meta.get("schedule_title"),
-                "schedule_folder": schedule_meta.get("folder_path"),
-                "filename": display_filename,
-                "original_filename": original_filename,
-                "custom_recording_name": custom_recording_name,  # ✅ NEW FIELD
-                "video_url": video_url,
-                "transcript_url": transcript_url,
-                "summary_url": summary_url,
-                "summary_text": summary,
-                "image_url": None,
-                "subtitles": subtitle_urls,
-                "timestamp": datetime.now(),
-                "visible_to": visible_to_emails,
-                "file_size": compressed_size,
-                "duration": compressed_duration if 'compressed_duration' in locals() else video_duration,
-                "transcription_available": bool(transcript_url),
-                "summary_available": bool(summary_url),
-                "processing_status": "completed",
-                "subtitle_format": "enhanced_with_fallbacks",
-                "embedded_subtitles": False,
-                "audio_processing_status": "success" if os.path.exists(audio) else "fallback_used",
-                "audio_preserved": has_audio,
+
+def process_video_sync(video_path: str, meeting_id: str, user_id: str):
+    """
+    Process a finished recording: compress, transcribe, subtitle, summarize,
+    upload and register it.
+
+    Runs as a checkpointed stage graph (see _build_processing_graph and
+    processing_pipeline.StageGraph); a re-run for the same recording resumes
+    from the stages that already completed.
+    """
+    logging.info(f"🎬 Starting video processing: {video_path}")
+    input_size = 0
+    input_ext = "unknown"
+
+    try:
+        # Check input file
+        if not os.path.exists(video_path):
+            raise Exception(f"Input video file not found: {video_path}")
+
+        input_size = os.path.getsize(video_path)
+        logging.info(f"📁 Input file size: {input_size} bytes")
+
+        if input_size == 0:
+            raise Exception("Input video file is empty")
+
+        input_ext = os.path.splitext(video_path)[1].lower()
+        logging.info(f"📹 Processing {input_ext} file: {video_path}")
+
+        PipelineCheckpoint.prune_stale()
+        with PipelineCheckpoint(f"{meeting_id}_{user_id}_{input_size}") as checkpoint:
+            graph, release_models = _build_processing_graph(video_path, meeting_id, user_id, checkpoint)
+            try:
+                results = graph.run()
+            finally:
+                release_models()
+            checkpoint.discard()
+
+        probe_result = results["probe"]
+        compress_result = results["compress"]
+        nvenc_available = results["encoder"]["nvenc_available"]
+        saved = results["save_document"]
+        summary_text = results["summary"]["summary"]
+        compressed_duration = compress_result.get("compressed_duration")
+
+        result_dict = {
+            "status": "success",
+            "video_url": results["upload_video"]["video_url"],
+            "transcript_url": results["transcript_doc"]["url"],
+            "summary_url": results["summary_doc"]["url"],
+            "summary_image_url": None,
+            "subtitle_urls": saved["subtitle_urls"],
+            "file_size": compress_result["compressed_size"],
+            "meeting_id": meeting_id,
+            "user_id": user_id,
+            "subtitle_format": "enhanced_with_fallbacks",
+            "authorized_users_count": saved["authorized_users_count"],
+            "encoder_used": "GPU (NVENC)" if nvenc_available else "CPU (libx264)",
+            "gpu_accelerated": nvenc_available,
+            "processing_notes": {
+                "audio_extracted": results["extract_audio"]["audio_size"] > 0,
+                "transcription_successful": bool(results["transcribe"]["segments"]),
+                "transcript_source": results["transcribe"].get("source"),
+                "subtitles_generated": len(saved["subtitle_urls"]),
+                "summary_generated": len(summary_text) > 50,
+                "original_had_audio": probe_result["has_audio"],
+                "audio_preserved": True if probe_result["has_audio"] else False,
                 "source_format": "pyav_mp4",
-                "smooth_playback": True,
-                "file_type": "video/mp4",
-                "is_final_video": True,
-                "encoder_used": "GPU (NVENC)" if nvenc_available else "CPU (libx264)",
-                "gpu_accelerated": nvenc_available
+                "smooth_playback_enabled": True,
+                "duration_preserved": bool(compressed_duration and compressed_duration > 0),
+                "only_final_mp4_saved": True,
+                "gpu_acceleration_used": nvenc_available,
+                "stage_timings": graph.timings,
+                "resumed_stages": graph.resumed,
             }
-            
-            logging.info(f"💾 Saving FINAL video data to MongoDB...")
-            
-            existing_doc = collection.find_one({
-                "meeting_id": meeting_id, 
-                "user_id": user_id,
-                "is_final_video": True
-            })
+        }
 
-            if existing_doc:
-                collection.update_one({"_id": existing_doc["_id"]}, {"$set": video_document})
-                logging.info(f"✅ Updated existing document")
-            else:
-                result = collection.insert_one(video_document)
-                logging.info(f"✅ Created new document: {result.inserted_id}")
+        logging.info(f"✅ Video processing completed using {'GPU (NVENC)' if nvenc_available else 'CPU (libx264)'}")
+        return result_dict
 
-            # ✅ NEW: Clean up the pending custom name document
-            if custom_name_doc:
-                try:
-                    collection.delete_one({"_id": custom_name_doc["_id"]})
-                    logger.info(f"✅ Cleaned up pending custom name document for meeting {meeting_id}")
-                except Exception as cleanup_error:
-                    logger.warning(f"Failed to cleanup custom name document: {cleanup_error}")
-            
-            # ========== SEND NOTIFICATIONS ==========
-            logging.info(f"📧 Sending recording completion notifications...")
-            try:
-                notification_count = send_recording_completion_notifications(
-                    meeting_id=meeting_id,
-                    video_url=video_url,
-                    transcript_url=transcript_url,
-                    summary_url=summary_url
-                )
-                logging.info(f"✅ Sent {notification_count} notifications")
-            except Exception as notif_error:
-                logging.error(f"⚠ Failed to send notifications: {notif_error}")
-            
-            # ========== RETURN SUCCESS RESULT ==========
-            result_dict = {
-                "status": "success",
-                "video_url": video_url,
-                "transcript_url": transcript_url,
-                "summary_url": summary_url,
-                "summary_image_url": None,
-                "subtitle_urls": subtitle_urls,
-                "file_size": compressed_size,
-                "meeting_id": meeting_id,
-                "user_id": user_id,
-                "subtitle_format": "enhanced_with_fallbacks",
-                "authorized_users_count": len(visible_to_emails),
-                "encoder_used": "GPU (NVENC)" if nvenc_available else "CPU (libx264)",
-                "gpu_accelerated": nvenc_available,
-                "processing_notes": {
-                    "audio_extracted": os.path.exists(audio) and os.path.getsize(audio) > 0,
-                    "transcription_successful": bool(segments),
-                    "subtitles_generated": len(subtitle_urls),
-                    "summary_generated": len(summary) > 50,
-                    "original_had_audio": has_audio,
-                    "audio_preserved": True if has_audio else False,
-                    "source_format": "pyav_mp4",
-                    "smooth_playback_enabled": True,
-                    "duration_preserved": 'compressed_duration' in locals() and compressed_duration > 0,
-                    "only_final_mp4_saved": True,
-                    "gpu_acceleration_used": nvenc_available
-                }
+    except Exception as e:
+        logging.error(f"❌ Video processing failed: {e}")
+        import traceback
+        logging.error(f"❌ Full traceback: {traceback.format_exc()}")
+
+        return {
+            "status": "error",
+            "error": str(e),
+            "error_type": type(e.error).__name__ if isinstance(e, PipelineStageError) else type(e).__name__,
+            "video_url": None,
+            "transcript_url": None,
+            "summary_url": None,
+            "summary_image_url": None,
+            "subtitle_urls": {},
+            "file_size": 0,
+            "meeting_id": meeting_id,
+            "user_id": user_id,
+            "subtitle_format": "error",
+            "processing_notes": {
+                "failed_at": e.stage if isinstance(e, PipelineStageError) else "video_processing",
+                "input_file_size": input_size,
+                "input_extension": input_ext,
+                "source_format": "pyav_mp4",
+                "checkpoint_kept": isinstance(e, PipelineStageError),
             }
-            
-            logging.info(f"✅ Video processing completed using {'GPU (NVENC)' if nvenc_available else 'CPU (libx264)'}")
-            return result_dict
-            
+        }
+
+# === RECORDING LISTING INDEXES ===
+# Access is decided inside MongoDB: uploader (user_id) OR lower-cased email in visible_to_lower.
+# Both branches are covered by an index ending in the listing sort order so the $or can merge-sort.
+RECORDING_LISTING_MAX_LIMIT = int(os.getenv("RECORDING_LISTING_MAX_LIMIT", 100))
+RECORDING_LISTING_INDEXES = [
+    ("visible_to_lower_final_timestamp", [("visible_to_lower", ASCENDING), ("is_final_video", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)]),
+    ("user_id_timestamp", [("user_id", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)]),
+]
+_recording_indexes_ready = False
+_recording_indexes_lock = threading.Lock()
+
+
+def normalize_visible_to(emails) -> list:
+    """Lower-cased, de-duplicated email list stored next to visible_to for indexed access checks"""
+    return sorted({e.strip().lower() for e in (emails or []) if isinstance(e, str) and e.strip()})
+
+
+def ensure_recording_indexes() -> bool:
+    """Create the listing indexes once per process (create_index is a no-op when they exist)"""
+    global _recording_indexes_ready
+    if _recording_indexes_ready:
+        return True
+    with _recording_indexes_lock:
+        if _recording_indexes_ready:
+            return True
+        try:
+            for name, keys in RECORDING_LISTING_INDEXES:
+                collection.create_index(keys, name=name, background=True)
+            _recording_indexes_ready = True
+            logger.info("✅ Recording listing indexes ready")
         except Exception as e:
-            logging.error(f"❌ Video processing failed: {e}")
-            import traceback
-            logging.error(f"❌ Full traceback: {traceback.format_exc()}")
-            
-            return {
-                "status": "error",
-                "error": str(e),
-                "error_type": type(e).__name__,
-                "video_url": None,
-                "transcript_url": None,
-                "summary_url": None,
-                "summary_image_url": None,
-                "subtitle_urls": {},
-                "file_size": 0,
-                "meeting_id": meeting_id,
-                "user_id": user_id,
-                "subtitle_format": "error",
-                "processing_notes": {
-                    "failed_at": "video_processing",
-                    "input_file_size": input_size if 'input_size' in locals() else 0,
-                    "input_extension": input_ext if 'input_ext' in locals() else "unknown",
-                    "source_format": "pyav_mp4"
-                }
-            }
+            logger.warning(f"⚠️ Could not ensure recording listing indexes: {e}")
+    return _recording_indexes_ready
+
+
+def _user_id_variants(user_id: str) -> list:
+    """user_id is stored as str or int depending on the writer"""
+    variants = [str(user_id)]
+    if str(user_id).isdigit():
+        variants.append(int(user_id))
+    return variants
+
+
+def _encode_listing_cursor(video: dict) -> str:
+    timestamp = video.get("timestamp")
+    payload = {"t": timestamp.isoformat() if timestamp else None, "id": str(video["_id"])}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def _decode_listing_cursor(cursor: str) -> dict:
+    """Turn an opaque cursor into the 'strictly after (timestamp, _id)' filter for a descending listing"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        last_id = ObjectId(payload["id"])
+        last_timestamp = datetime.fromisoformat(payload["t"]) if payload.get("t") else None
+    except (ValueError, KeyError, TypeError, AttributeError, InvalidId) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+
+    if last_timestamp is None:
+        # Missing timestamps sort last in a descending listing
+        return {"timestamp": None, "_id": {"$lt": last_id}}
+    return {
+        "$or": [
+            {"timestamp": {"$lt": last_timestamp}},
+            {"timestamp": last_timestamp, "_id": {"$lt": last_id}},
+            # Rows without a timestamp sort after every dated row, so they are still ahead
+            {"timestamp": None},
+        ],
+    }
+
+
+def backfill_recording_listing_fields(batch_size: int = 500, dry_run: bool = False) -> dict:
+    """
+    One-time batch job: add visible_to_lower and meeting_type to final videos written before
+    the listing moved into MongoDB. Meeting types are looked up once per meeting.
+    """
+    stats = {"scanned": 0, "updated": 0, "visible_to_lower": 0, "meeting_type": 0, "batches": 0}
+    meeting_types = {}
+    pending = []
+
+    def flush():
+        if pending and not dry_run:
+            collection.bulk_write(pending, ordered=False)
+        if pending:
+            stats["batches"] += 1
+            stats["updated"] += len(pending)
+        pending.clear()
+
+    cursor = collection.find(
+        {
+            "is_final_video": True,
+            "$or": [
+                {"visible_to_lower": {"$exists": False}},
+                {"meeting_type": {"$in": [None, ""]}},
+            ],
+        },
+        {"meeting_id": 1, "meeting_type": 1, "visible_to": 1, "visible_to_lower": 1},
+    ).sort("_id", ASCENDING).batch_size(batch_size)
+
+    for video in cursor:
+        stats["scanned"] += 1
+        updates = {}
+        if "visible_to_lower" not in video:
+            updates["visible_to_lower"] = normalize_visible_to(video.get("visible_to"))
+            stats["visible_to_lower"] += 1
+        if not video.get("meeting_type"):
+            video_meeting_id = video.get("meeting_id")
+            if video_meeting_id not in meeting_types:
+                meeting_types[video_meeting_id] = get_meeting_type(video_meeting_id)
+            updates["meeting_type"] = meeting_types[video_meeting_id]
+            stats["meeting_type"] += 1
+        if updates:
+            pending.append(UpdateOne({"_id": video["_id"]}, {"$set": updates}))
+        if len(pending) >= batch_size:
+            flush()
+    flush()
+
+    logger.info(f"✅ Recording listing backfill{' (dry run)' if dry_run else ''}: {stats}")
+    return stats
+
+
+def _listing_display_name(video: dict) -> str:
+    # ✅ Set display name (prioritize custom name over filename)
+    if video.get('custom_recording_name'):
+        return video['custom_recording_name']
+    if video.get('display_name'):
+        return video['display_name']
+    # Fallback: clean up filename for display
+    filename = video.get('filename', 'Unnamed Recording')
+    # Remove technical prefixes like "raw_video_" and file extensions
+    if filename.startswith('raw_video_'):
+        filename = filename.replace('raw_video_', '').replace('_final.mp4', '').replace('.mp4', '')
+    return filename if filename else 'Unnamed Recording'
+
 
 # === 1. GET ALL VIDEOS ===
 @require_http_methods(["GET"])
 def get_all_videos(request):
-    """Get all video documents with pagination and filtering - STRICT ACCESS CONTROL + MEETING TYPE FILTER"""
+    """
+    Get final videos the caller may see - STRICT ACCESS CONTROL + MEETING TYPE FILTER.
+
+    Access (uploader or authorized email) is part of the MongoDB query, so pages are full and
+    `total` counts every accessible video. Pass `cursor` (the previous response's
+    pagination.next_cursor) for stable paging; `page` still works for the first pages.
+    """
     try:
         # Query parameters for pagination and filtering
-        page = int(request.GET.get('page', 1))
-        limit = int(request.GET.get('limit', 10))
+        page = max(int(request.GET.get('page', 1)), 1)
+        limit = min(max(int(request.GET.get('limit', 10)), 1), RECORDING_LISTING_MAX_LIMIT)
+        cursor = request.GET.get('cursor')
         user_id = request.GET.get('user_id')
         email = request.GET.get('email', '')
         meeting_id = request.GET.get('meeting_id')
         meeting_type = request.GET.get('meeting_type')  # ✅ NEW PARAMETER
+        email_lower = email.strip().lower()
+        # Counting is a second query; cursor pages skip it unless asked
+        report_total = not cursor or request.GET.get('include_total') == 'true'
 
-        # Build query filter - ONLY SHOW FINAL VIDEOS
-        query_filter = {"is_final_video": True}
-        
+        # Debug logging
+        logger.info(f"📋 Query params: email={email}, user_id={user_id}, meeting_id={meeting_id}, meeting_type={meeting_type}, cursor={bool(cursor)}")
+
+        # Shared per-branch filter - ONLY SHOW FINAL VIDEOS
+        branch_filter = {"is_final_video": True}
         if meeting_id:
-            query_filter['meeting_id'] = meeting_id
-        
+            branch_filter['meeting_id'] = meeting_id
+
         # ✅ NEW: Filter by meeting type
         if meeting_type:
             if meeting_type in ['CalendarMeeting', 'ScheduleMeeting', 'InstantMeeting']:
-                query_filter['meeting_type'] = meeting_type
+                branch_filter['meeting_type'] = meeting_type
                 logger.info(f"Filtering videos by meeting_type: {meeting_type}")
             else:
                 logger.warning(f"Invalid meeting_type parameter: {meeting_type}")
 
-        # Calculate skip value for pagination
-        skip = (page - 1) * limit
+        if cursor:
+            try:
+                branch_filter.update(_decode_listing_cursor(cursor))
+            except ValueError as e:
+                return JsonResponse({"Error": str(e)}, status=BAD_REQUEST_STATUS)
 
-        # Debug logging
-        logger.info(f"📋 Query params: email={email}, user_id={user_id}, meeting_id={meeting_id}, meeting_type={meeting_type}")
-        
-        # Fetch raw results
-        raw_videos = list(collection.find(query_filter).sort("timestamp", -1).skip(skip).limit(limit))
-        logger.info(f"📹 Raw videos found in MongoDB: {len(raw_videos)}")
+        # STRICT ACCESS CONTROL - ONLY 2 WAYS TO ACCESS:
+        # Way 1: User uploaded/created this video; Way 2: email is in visible_to (case-insensitive)
+        access_branches = []
+        if user_id:
+            access_branches.append({**branch_filter, "user_id": {"$in": _user_id_variants(user_id)}})
+        if email_lower:
+            access_branches.append({**branch_filter, "visible_to_lower": email_lower})
 
-        allowed_videos = []
-        for video in raw_videos:
-            video_user_id = video.get("user_id")
-            visible_to_emails = video.get("visible_to", [])
-            video_meeting_id = video.get("meeting_id")
-            
-            # STRICT ACCESS CONTROL - ONLY 2 WAYS TO ACCESS:
-            
-            # Way 1: User uploaded/created this video (is the original uploader)
-            user_uploaded = False
-            if user_id and video_user_id:
-                user_uploaded = str(video_user_id) == str(user_id)
-            
-            # Way 2: User's email is in the visible_to list (was authorized during processing)
-            email_authorized = False
-            if email and visible_to_emails:
-                # Case-insensitive email comparison
-                user_email_lower = email.strip().lower()
-                visible_emails_lower = [e.strip().lower() for e in visible_to_emails if e]
-                email_authorized = user_email_lower in visible_emails_lower
-            
-            # ALLOW ACCESS ONLY if user uploaded OR email is in visible_to list
-            has_access = user_uploaded or email_authorized
-            
-            # Debug logging for each video (detailed)
-            logger.debug(f"🎬 Video {video.get('_id')} (Meeting: {video_meeting_id}, Type: {video.get('meeting_type')}):")
-            logger.debug(f"   - Video uploader: {video_user_id}, Current user: {user_id}, Match: {user_uploaded}")
-            logger.debug(f"   - Visible to: {visible_to_emails}")
-            logger.debug(f"   - User email: {email}, Match: {email_authorized}")
-            logger.debug(f"   - Final access decision: {has_access}")
-            
-            if has_access:
-                # Process video data
-                video['_id'] = str(video['_id'])
-                video['timestamp'] = video['timestamp'].isoformat() if video.get('timestamp') else None
-                
-                # ✅ Ensure meeting_type is present (backfill if missing)
-                if not video.get('meeting_type'):
-                    video['meeting_type'] = get_meeting_type(video_meeting_id)
-                    # Update MongoDB with the meeting type
-                    try:
-                        collection.update_one(
-                            {"_id": ObjectId(video['_id'])},
-                            {"$set": {"meeting_type": video['meeting_type']}}
-                        )
-                        logger.info(f"Backfilled meeting_type for video {video['_id']}: {video['meeting_type']}")
-                    except Exception as backfill_error:
-                        logger.warning(f"Failed to backfill meeting_type: {backfill_error}")
-                
-                # ✅ Set display name (prioritize custom name over filename)
-                if video.get('custom_recording_name'):
-                    video['display_name'] = video['custom_recording_name']
-                elif video.get('display_name'):
-                    video['display_name'] = video['display_name']
-                else:
-                    # Fallback: clean up filename for display
-                    filename = video.get('filename', 'Unnamed Recording')
-                    # Remove technical prefixes like "raw_video_" and file extensions
-                    if filename.startswith('raw_video_'):
-                        filename = filename.replace('raw_video_', '').replace('_final.mp4', '').replace('.mp4', '')
-                    video['display_name'] = filename if filename else 'Unnamed Recording'
-                
-                # Add access reason for debugging
-                if user_uploaded:
-                    video['access_reason'] = 'uploader'
-                    logger.info(f"✅ Video {video.get('_id')}: Access granted (uploader)")
-                elif email_authorized:
-                    video['access_reason'] = 'authorized_email'
-                    logger.info(f"✅ Video {video.get('_id')}: Access granted (authorized email)")
-                
-                allowed_videos.append(video)
-            else:
-                logger.debug(f"❌ Video {video.get('_id')}: Access denied for user {user_id}/{email}")
+        videos = []
+        total = 0
+        if access_branches:
+            ensure_recording_indexes()
+            query_filter = access_branches[0] if len(access_branches) == 1 else {"$or": access_branches}
+
+            find_cursor = collection.find(query_filter).sort([("timestamp", DESCENDING), ("_id", DESCENDING)])
+            if not cursor:
+                find_cursor = find_cursor.skip((page - 1) * limit)
+            # One extra row tells us whether another page exists without a second query
+            videos = list(find_cursor.limit(limit + 1))
+
+            if report_total:
+                total = collection.count_documents(query_filter)
+
+        has_more = len(videos) > limit
+        videos = videos[:limit]
+        next_cursor = _encode_listing_cursor(videos[-1]) if has_more and videos else None
 
-        logger.info(f"✅ Videos after access filtering: {len(allowed_videos)}/{len(raw_videos)}")
+        for video in videos:
+            video['access_reason'] = (
+                'uploader' if user_id and str(video.get("user_id")) == str(user_id) else 'authorized_email'
+            )
+            video['_id'] = str(video['_id'])
+            video['timestamp'] = video['timestamp'].isoformat() if video.get('timestamp') else None
+            video['display_name'] = _listing_display_name(video)
+            # Rows without meeting_type are filled in by the backfill_recording_listing command
+            video['meeting_type'] = video.get('meeting_type')
+            video.pop('visible_to_lower', None)
+
+        logger.info(f"✅ Accessible videos returned: {len(videos)} (total={total if report_total else 'n/a'})")
 
         return JsonResponse({
             "status": "success",
-            "data": allowed_videos,
-            "videos": allowed_videos,  # Alternative key for compatibility
+            "data": videos,
+            "videos": videos,  # Alternative key for compatibility
             "pagination": {
-                "page": page,
+                "page": None if cursor else page,
                 "limit": limit,
-                "total": len(allowed_videos),
-                "total_pages": (len(allowed_videos) + limit - 1) // limit
+                "total": total if report_total else None,
+                "total_pages": (total + limit - 1) // limit if report_total else None,
+                "has_more": has_more,
+                "next_cursor": next_cursor,
             },
             "debug": {
-                "raw_count": len(raw_videos),
-                "filtered_count": len(allowed_videos),
+                "raw_count": len(videos),
+                "filtered_count": len(videos),
                 "query_params": {
                     "email": email,
                     "user_id": user_id,
                     "meeting_id": meeting_id,
-                    "meeting_type": meeting_type  # ✅ NEW
+                    "meeting_type": meeting_type,  # ✅ NEW
+                    "cursor": cursor,
                 }
             }
         })
@@ -2168,6 +2382,7 @@ def delete_video(request, id):
 
         # Delete video document from MongoDB
         delete_result = collection.delete_one({"_id": video_id})
+        invalidate_stream_cache(id)
         if delete_result.deleted_count == 0:
             return JsonResponse({"Error": "Failed to delete video document"}, status=500)
             
@@ -2183,10 +2398,111 @@ def delete_video(request, id):
         return JsonResponse({"Error": f"Server error: {str(e)}"}, status=500)
 
 # === 5. STREAM VIDEO ===
+# Streaming caches: resolved S3 target per video id, access decisions and S3 blocks
+video_block_cache = S3BlockCache(s3_client, AWS_S3_BUCKET)
+_stream_targets = TTLCache(VIDEO_STREAM_META_TTL)
+_stream_access = TTLCache(VIDEO_STREAM_ACCESS_TTL)
+
+STREAM_CONTENT_TYPES = {
+    '.mp4': 'video/mp4',
+    '.avi': 'video/x-msvideo',
+    '.mov': 'video/quicktime',
+    '.wmv': 'video/x-ms-wmv',
+    '.webm': 'video/webm',
+    '.mkv': 'video/x-matroska'
+}
+
+
+def _resolve_stream_target(id):
+    """
+    Video id -> {'meeting_id', 's3_key'} (cached for VIDEO_STREAM_META_TTL).
+
+    Returns:
+        (target, None) or (None, JsonResponse error)
+    """
+    target = _stream_targets.get(id)
+    if target is not None:
+        return target, None
+
+    # Find video document
+    try:
+        video = collection.find_one({"_id": ObjectId(id)})
+    except Exception as id_error:
+        logger.error(f"Invalid video ID format: {id}, Error: {id_error}")
+        return None, JsonResponse({"Error": "Invalid video ID format"}, status=400)
+
+    if not video:
+        logger.warning(f"Video ID {id} not found in MongoDB")
+        return None, JsonResponse({"Error": "Video not found"}, status=404)
+
+    if not video.get("video_url"):
+        logger.error(f"Video URL not found in MongoDB for ID {id}")
+        return None, JsonResponse({"Error": "Video URL not found"}, status=404)
+
+    # Verify URL and attempt repair if broken
+    logger.info(f"Verifying video URL for streaming: {id}")
+    video = verify_and_repair_video_url(video)
+
+    video_url = video.get("video_url")
+    if not video_url:
+        logger.error(f"Video URL still missing after repair attempt for ID {id}")
+        return None, JsonResponse({"Error": "Video not accessible"}, status=404)
+
+    # Extract S3 key with improved method
+    s3_key = extract_s3_key_from_url(video_url, AWS_S3_BUCKET)
+    if not s3_key:
+        logger.error(f"Failed to extract S3 key from URL: {video_url}")
+        return None, JsonResponse({"Error": "Invalid video URL format"}, status=400)
+
+    logger.info(f"S3 Key extracted: {s3_key}")
+    target = {"meeting_id": video.get("meeting_id", id), "s3_key": s3_key}
+    _stream_targets.set(id, target)
+    return target, None
+
+
+def invalidate_stream_cache(id):
+    """Forget the cached streaming target (and S3 metadata) of a deleted/changed video"""
+    target = _stream_targets.get(id)
+    _stream_targets.pop(id)
+    if target:
+        video_block_cache.invalidate(target["s3_key"])
+
+
+def _stream_access_allowed(meeting_id, email, user_id):
+    """is_user_allowed with the decision cached for VIDEO_STREAM_ACCESS_TTL"""
+    cache_key = (str(meeting_id), email.strip().lower(), str(user_id))
+    allowed = _stream_access.get(cache_key)
+    if allowed is None:
+        allowed = is_user_allowed(meeting_id, email=email, user_id=user_id)
+        if not allowed:
+            allowed = is_user_allowed_debug(meeting_id, email=email, user_id=user_id)
+        _stream_access.set(cache_key, bool(allowed))
+    return allowed
+
+
+def _apply_stream_headers(response, meta):
+    response['Accept-Ranges'] = 'bytes'
+    response['Cache-Control'] = 'public, max-age=3600'
+    if meta.get('etag'):
+        response['ETag'] = f'"{meta["etag"]}"'
+    response['Access-Control-Allow-Origin'] = '*'
+    response['Access-Control-Allow-Methods'] = 'GET, HEAD, OPTIONS'
+    response['Access-Control-Allow-Headers'] = 'Range, Content-Type, Accept'
+    response['Access-Control-Expose-Headers'] = 'Content-Range, Accept-Ranges, Content-Length, ETag'
+    return response
+
+
 @require_http_methods(["GET", "HEAD", "OPTIONS"])
 @csrf_exempt
 def stream_video(request, id):
-    """Optimized video streaming with automatic URL repair and better error handling."""
+    """
+    Range-aware video streaming.
+
+    Video lookup/URL repair, access decisions and S3 metadata are cached;
+    bytes are served from S3BlockCache (memory + disk blocks with read-ahead).
+    With ?delivery=redirect (or VIDEO_STREAM_MODE=redirect) GET requests are
+    redirected to a presigned S3 URL instead of being proxied.
+    """
     
     # Handle CORS preflight
     if request.method == 'OPTIONS':
@@ -2199,91 +2515,65 @@ def stream_video(request, id):
         return response
     
     try:
-        # Find video document
-        try:
-            video = collection.find_one({"_id": ObjectId(id)})
-        except Exception as id_error:
-            logger.error(f"Invalid video ID format: {id}, Error: {id_error}")
-            return JsonResponse({"Error": "Invalid video ID format"}, status=400)
-            
-        if not video:
-            logger.warning(f"Video ID {id} not found in MongoDB")
-            return JsonResponse({"Error": "Video not found"}, status=404)
+        target, error_response = _resolve_stream_target(id)
+        if error_response is not None:
+            return error_response
 
         # Access control check
         email = request.GET.get('email', '')
         user_id = request.GET.get('user_id', '')
-        meeting_id = video.get("meeting_id", id)
+        meeting_id = target["meeting_id"]
         
         try:
-            access_allowed = is_user_allowed(meeting_id, email=email, user_id=user_id)
-            if not access_allowed:
-                access_allowed = is_user_allowed_debug(meeting_id, email=email, user_id=user_id)
-                
-            if not access_allowed:
+            if not _stream_access_allowed(meeting_id, email, user_id):
                 logger.warning(f"Access denied for user {user_id}/{email} to video {id}")
                 return JsonResponse({"Error": "Access denied"}, status=403)
         except Exception as access_error:
             logger.warning(f"Access control check failed: {access_error}")
 
-        # Get video URL and verify/repair if needed
-        video_url = video.get("video_url")
-        if not video_url:
-            logger.error(f"Video URL not found in MongoDB for ID {id}")
-            return JsonResponse({"Error": "Video URL not found"}, status=404)
-
-        # Verify URL and attempt repair if broken
-        logger.info(f"Verifying video URL for streaming: {id}")
-        video = verify_and_repair_video_url(video)
-        
-        video_url = video.get("video_url")
-        if not video_url:
-            logger.error(f"Video URL still missing after repair attempt for ID {id}")
-            return JsonResponse({"Error": "Video not accessible"}, status=404)
-
-        # Extract S3 key with improved method
-        s3_key = extract_s3_key_from_url(video_url, AWS_S3_BUCKET)
-        if not s3_key:
-            logger.error(f"Failed to extract S3 key from URL: {video_url}")
-            return JsonResponse({"Error": "Invalid video URL format"}, status=400)
-
-        logger.info(f"S3 Key extracted: {s3_key}")
-
-        # Check file size
-        file_size = get_s3_object_size(s3_key)
-        if file_size <= 0:
+        s3_key = target["s3_key"]
+        meta = video_block_cache.head(s3_key)
+        if not meta or meta['size'] <= 0:
             logger.error(f"Video file not found or empty in S3: {s3_key}")
+            # Re-verify (and possibly repair) the URL on the next request
+            _stream_targets.pop(id)
+            video_block_cache.invalidate(s3_key)
             return JsonResponse({"Error": "Video file not accessible in S3"}, status=404)
-
-        logger.info(f"Video file found in S3: {s3_key} ({file_size} bytes)")
+        file_size = meta['size']
 
         # Determine content type
         file_ext = os.path.splitext(s3_key)[1].lower()
-        content_type_map = {
-            '.mp4': 'video/mp4',
-            '.avi': 'video/x-msvideo',
-            '.mov': 'video/quicktime',
-            '.wmv': 'video/x-ms-wmv',
-            '.webm': 'video/webm',
-            '.mkv': 'video/x-matroska'
-        }
-        content_type = content_type_map.get(file_ext, 'video/mp4')
-        logger.info(f"Content type: {content_type}")
+        content_type = STREAM_CONTENT_TYPES.get(file_ext, 'video/mp4')
 
         # Handle HEAD requests
         if request.method == 'HEAD':
             response = HttpResponse(content_type=content_type)
-            response['Accept-Ranges'] = 'bytes'
             response['Content-Length'] = str(file_size)
-            response['Cache-Control'] = 'public, max-age=3600'
-            response['Access-Control-Allow-Origin'] = '*'
             logger.info(f"HEAD request served for video {id}")
+            return _apply_stream_headers(response, meta)
+
+        # Presigned redirect: S3 serves the bytes (and ranges) directly
+        delivery = request.GET.get('delivery', VIDEO_STREAM_MODE).lower()
+        if delivery == 'redirect':
+            response = HttpResponse(status=302)
+            response['Location'] = video_block_cache.presigned_url(s3_key, content_type)
+            response['Cache-Control'] = 'private, max-age=300'
+            response['Access-Control-Allow-Origin'] = '*'
             return response
 
+        def stream_blocks(start, end):
+            sent = 0
+            try:
+                for chunk in video_block_cache.iter_range(s3_key, meta, start, end):
+                    sent += len(chunk)
+                    yield chunk
+            except Exception as chunk_error:
+                logger.error(f"Error streaming video {id} at byte {start + sent}: {chunk_error}")
+            logger.debug(f"Streamed {sent} bytes of video {id} ({start}-{end})")
+
         # Handle range requests
         range_header = request.META.get('HTTP_RANGE')
         if range_header:
-            import re
             range_match = re.match(r'bytes=(\d+)-(\d*)', range_header)
             if range_match:
                 start = int(range_match.group(1))
@@ -2309,80 +2599,27 @@ def stream_video(request, id):
                 range_size = end - start + 1
                 logger.info(f"Range request: {start}-{end} ({range_size} bytes)")
 
-                # For large ranges, use streaming response
                 if range_size > 5 * 1024 * 1024:  # 5MB+
-                    def stream_large_range():
-                        chunk_size = 2 * 1024 * 1024  # 2MB chunks
-                        current = start
-                        chunks_sent = 0
-                        while current <= end:
-                            try:
-                                chunk_end = min(current + chunk_size - 1, end)
-                                chunk = stream_from_s3(s3_key, current, chunk_end)
-                                if chunk:
-                                    yield chunk
-                                    chunks_sent += 1
-                                    current = chunk_end + 1
-                                else:
-                                    logger.warning(f"Empty chunk received at byte {current}")
-                                    break
-                            except Exception as chunk_error:
-                                logger.error(f"Error streaming chunk: {chunk_error}")
-                                break
-                        logger.info(f"Streamed {chunks_sent} chunks for range request")
-                    
-                    response = StreamingHttpResponse(stream_large_range(), status=206, content_type=content_type)
+                    response = StreamingHttpResponse(stream_blocks(start, end), status=206, content_type=content_type)
                 else:
                     # Small ranges - get all at once
-                    content = stream_from_s3(s3_key, start, end)
-                    if content is None:
-                        logger.error(f"Failed to stream range {start}-{end}")
+                    try:
+                        content = video_block_cache.read_range(s3_key, meta, start, end)
+                    except Exception as range_error:
+                        logger.error(f"Failed to stream range {start}-{end}: {range_error}")
                         return JsonResponse({"Error": "Failed to stream video range"}, status=500)
                     response = HttpResponse(content, status=206, content_type=content_type)
 
                 response['Content-Range'] = f'bytes {start}-{end}/{file_size}'
-                response['Accept-Ranges'] = 'bytes'
                 response['Content-Length'] = str(range_size)
-                response['Cache-Control'] = 'public, max-age=3600'
-                response['Access-Control-Allow-Origin'] = '*'
-                response['Access-Control-Allow-Methods'] = 'GET, HEAD, OPTIONS'
-                response['Access-Control-Allow-Headers'] = 'Range, Content-Type, Accept'
-                response['Access-Control-Expose-Headers'] = 'Content-Range, Accept-Ranges, Content-Length'
-                
-                return response
+                return _apply_stream_headers(response, meta)
 
         # For full file requests, use streaming response
-        def stream_full_file():
-            chunk_size = 2 * 1024 * 1024  # 2MB chunks for smooth streaming
-            start = 0
-            chunks_sent = 0
-            while start < file_size:
-                try:
-                    end = min(start + chunk_size - 1, file_size - 1)
-                    chunk = stream_from_s3(s3_key, start, end)
-                    if chunk:
-                        yield chunk
-                        chunks_sent += 1
-                        start = end + 1
-                    else:
-                        logger.warning(f"Empty chunk received at byte {start}")
-                        break
-                except Exception as chunk_error:
-                    logger.error(f"Error streaming full file chunk: {chunk_error}")
-                    break
-            logger.info(f"Streamed {chunks_sent} chunks for full file request")
-
-        response = StreamingHttpResponse(stream_full_file(), content_type=content_type)
-        response['Accept-Ranges'] = 'bytes'
+        response = StreamingHttpResponse(stream_blocks(0, file_size - 1), content_type=content_type)
         response['Content-Length'] = str(file_size)
-        response['Cache-Control'] = 'public, max-age=3600'
-        response['Access-Control-Allow-Origin'] = '*'
-        response['Access-Control-Allow-Methods'] = 'GET, HEAD, OPTIONS'
-        response['Access-Control-Allow-Headers'] = 'Range, Content-Type, Accept'
-        response['Access-Control-Expose-Headers'] = 'Content-Range, Accept-Ranges, Content-Length'
 
         logger.info(f"Streaming full video file {id} ({file_size} bytes)")
-        return response
+        return _apply_stream_headers(response, meta)
         
     except Exception as e:
         logger.error(f"Stream error for video {id}: {e}")
@@ -3583,6 +3820,7 @@ def permanent_delete_video(request, id):
 
         # Delete from MongoDB
         collection.delete_one({"_id": video_id})
+        invalidate_stream_cache(id)
 
         return JsonResponse({
             "Message": "Recording permanently deleted",
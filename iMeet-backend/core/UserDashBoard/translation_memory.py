@@ -0,0 +1,213 @@
+# core/UserDashBoard/translation_memory.py
+
+"""
+Translation Memory for Subtitle Translation
+===========================================
+The same phrases ("okay", "yes sir", repeated instructions) were being
+re-translated by the MarianMT models in every meeting.
+
+TranslationMemory remembers translations keyed by
+(model + generation settings, normalized source text):
+- a per-process LRU (TRANSLATION_MEMORY_LOCAL_SIZE entries) in front of
+- a Redis tier shared by every worker/node: one hash per model
+  (field = sha1 of the normalized text) plus a sorted set of last-use
+  times; the least recently used entries beyond
+  TRANSLATION_MEMORY_MAX_ENTRIES are evicted on write
+
+TRANSLATION_MEMORY_BACKEND: 'auto' (Redis when reachable, default),
+'redis', 'memory' (per-process only) or 'off'.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+import redis
+
+logger = logging.getLogger("video_processor")
+
+TRANSLATION_MEMORY_BACKEND = os.getenv("TRANSLATION_MEMORY_BACKEND", "auto").lower()
+TRANSLATION_MEMORY_LOCAL_SIZE = int(os.getenv("TRANSLATION_MEMORY_LOCAL_SIZE", 20000))
+TRANSLATION_MEMORY_MAX_ENTRIES = int(os.getenv("TRANSLATION_MEMORY_MAX_ENTRIES", 500000))
+
+TRANSLATION_MEMORY_REDIS_CONFIG = {
+    'host': os.getenv("TRANSLATION_MEMORY_REDIS_HOST", os.getenv("REDIS_HOST", "localhost")),
+    'port': int(os.getenv("TRANSLATION_MEMORY_REDIS_PORT", os.getenv("REDIS_PORT", 6379))),
+    'db': int(os.getenv("TRANSLATION_MEMORY_REDIS_DB", 8)),
+    'decode_responses': True,
+    'socket_timeout': int(os.getenv("TRANSLATION_MEMORY_REDIS_SOCKET_TIMEOUT", 5)),
+    'socket_connect_timeout': int(os.getenv("TRANSLATION_MEMORY_REDIS_CONNECT_TIMEOUT", 5)),
+    'retry_on_timeout': True,
+}
+
+MEMORY_KEYS = {
+    'entries': 'translation_memory:{model}',
+    'lru': 'translation_memory:{model}:lru',
+}
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_source_text(text: str) -> str:
+    """Cache key form of a source segment: NFKC, collapsed whitespace, case-folded"""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text or "")).strip().casefold()
+
+
+class TranslationMemory:
+    """Local LRU + optional shared Redis tier"""
+
+    def __init__(self, client=None, local_size=TRANSLATION_MEMORY_LOCAL_SIZE,
+                 max_entries=TRANSLATION_MEMORY_MAX_ENTRIES):
+        self.redis = client
+        self.local_size = local_size
+        self.max_entries = max_entries
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.evicted = 0
+
+    @property
+    def backend_name(self):
+        return 'redis' if self.redis is not None else 'memory'
+
+    @staticmethod
+    def _field(normalized):
+        return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+    def _remember_local(self, model, normalized, translation):
+        key = (model, normalized)
+        self._local[key] = translation
+        self._local.move_to_end(key)
+        while len(self._local) > self.local_size:
+            self._local.popitem(last=False)
+
+    def get_many(self, model: str, normalized_texts) -> dict:
+        """
+        Look up translations.
+
+        Returns:
+            dict normalized text -> translation for every hit
+        """
+        found = {}
+        missing = []
+        with self._lock:
+            for normalized in normalized_texts:
+                key = (model, normalized)
+                if key in self._local:
+                    self._local.move_to_end(key)
+                    found[normalized] = self._local[key]
+                else:
+                    missing.append(normalized)
+        self.local_hits += len(found)
+
+        if missing and self.redis is not None:
+            try:
+                fields = [self._field(normalized) for normalized in missing]
+                values = self.redis.hmget(MEMORY_KEYS['entries'].format(model=model), fields)
+                hits = {normalized: value for normalized, value in zip(missing, values) if value is not None}
+                if hits:
+                    # Refresh recency so shared LRU keeps phrases that keep coming back
+                    now = time.time()
+                    self.redis.zadd(
+                        MEMORY_KEYS['lru'].format(model=model),
+                        {self._field(normalized): now for normalized in hits}
+                    )
+                    with self._lock:
+                        for normalized, translation in hits.items():
+                            self._remember_local(model, normalized, translation)
+                    found.update(hits)
+                    self.shared_hits += len(hits)
+                missing = [normalized for normalized in missing if normalized not in hits]
+            except Exception as e:
+                logger.warning(f"⚠️ Translation memory lookup failed: {e}")
+
+        self.misses += len(missing)
+        return found
+
+    def put_many(self, model: str, translations: dict):
+        """Store normalized text -> translation pairs"""
+        if not translations:
+            return
+        with self._lock:
+            for normalized, translation in translations.items():
+                self._remember_local(model, normalized, translation)
+        self.stored += len(translations)
+
+        if self.redis is None:
+            return
+        try:
+            entries_key = MEMORY_KEYS['entries'].format(model=model)
+            lru_key = MEMORY_KEYS['lru'].format(model=model)
+            now = time.time()
+            mapped = {self._field(normalized): translation for normalized, translation in translations.items()}
+
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.hset(entries_key, mapping=mapped)
+            pipe.zadd(lru_key, {field: now for field in mapped})
+            pipe.zcard(lru_key)
+            size = pipe.execute()[-1]
+
+            overflow = size - self.max_entries
+            if overflow > 0:
+                stale = [field for field, _ in self.redis.zpopmin(lru_key, overflow)]
+                if stale:
+                    self.redis.hdel(entries_key, *stale)
+                    self.evicted += len(stale)
+        except Exception as e:
+            logger.warning(f"⚠️ Translation memory store failed: {e}")
+
+    def stats(self) -> dict:
+        lookups = self.local_hits + self.shared_hits + self.misses
+        return {
+            'backend': self.backend_name,
+            'local_entries': len(self._local),
+            'local_hits': self.local_hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'hit_rate': round((self.local_hits + self.shared_hits) / lookups, 3) if lookups else None,
+            'stored': self.stored,
+            'evicted': self.evicted,
+        }
+
+
+def create_translation_memory():
+    """Pick the translation memory tier from TRANSLATION_MEMORY_BACKEND (None = disabled)"""
+    if TRANSLATION_MEMORY_BACKEND == 'off':
+        return None
+    if TRANSLATION_MEMORY_BACKEND == 'memory':
+        logger.info("🗂️ Translation memory: in-process LRU only")
+        return TranslationMemory()
+
+    try:
+        client = redis.Redis(**TRANSLATION_MEMORY_REDIS_CONFIG)
+        client.ping()
+        logger.info("✅ Translation memory: Redis tier connected")
+        return TranslationMemory(client)
+    except Exception as e:
+        if TRANSLATION_MEMORY_BACKEND == 'redis':
+            raise
+        logger.warning(f"⚠️ Translation memory Redis not available, using in-process LRU: {e}")
+        return TranslationMemory()
+
+
+_translation_memory = None
+_translation_memory_lock = threading.Lock()
+
+
+def get_translation_memory():
+    """Process-wide TranslationMemory, connected on first use"""
+    global _translation_memory
+    if _translation_memory is None:
+        with _translation_memory_lock:
+            if _translation_memory is None:
+                _translation_memory = create_translation_memory() or False
+    return _translation_memory or None
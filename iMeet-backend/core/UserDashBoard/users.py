@@ -10,6 +10,7 @@ from django.utils import timezone
 import pytz
 import json
 import logging
+from core.utils.schema_bootstrap import schema_task
 import re
 import os
 import random
@@ -79,7 +80,8 @@ s3_client = boto3.client(
 
 # MongoDB Configuration
 MONGO_URI = os.getenv("MONGO_URI")
-mongo_client = MongoClient(MONGO_URI)
+# Connects on the first query, i.e. in the worker rather than a preloading gunicorn master
+mongo_client = MongoClient(MONGO_URI, connect=False)
 db = mongo_client[os.getenv("MONGO_DB", "connectlydb")]
 profile_photos_collection = db["profile_photos"]
 
@@ -184,6 +186,7 @@ def send_OTP_email(email, OTP):
         logging.error(f"Failed to send OTP to {email}: {e}")
         return False
 
+@schema_task("tbl_Users", order=10)
 def create_user_table():
     """Create tbl_Users table with profile_photo_id, edited_photo_id, photo_code and face_embedding_id columns"""
     try:
@@ -213,7 +216,9 @@ def create_user_table():
             logging.debug("tbl_Users table created with profile_photo_id, edited_photo_id, photo_code, face_embedding_id")
     except (ProgrammingError, OperationalError) as e:
         logging.error(f"Failed to create tbl_Users table: {e}")
+        raise
 
+@schema_task("tbl_OTP_Reset", order=15)
 def create_otp_table():
     try:
         with connection.cursor() as cursor:
@@ -230,6 +235,7 @@ def create_otp_table():
             logging.debug("tbl_OTP_Reset table created or exists")
     except Exception as e:
         logging.error(f"Failed to create tbl_OTP_Reset table: {e}")
+        raise
 
 def get_mongo_client():
     """Get MongoDB client connection"""
@@ -0,0 +1,363 @@
+# core/UserDashBoard/video_streaming.py
+
+"""
+Range-Aware S3 Streaming for stream_video
+=========================================
+stream_video used to do a Mongo lookup, up to four MySQL access queries,
+two S3 HEADs (verify_and_repair_video_url + get_s3_object_size) and one
+synchronous 2MB GetObject per chunk on every request - and a browser seeking
+through a 1-hour recording issues a new request per seek.
+
+This module provides:
+- TTLCache: small thread-safe TTL map used for video lookups, access
+  decisions and S3 object metadata
+- S3BlockCache: fixed-size, block-aligned reads of S3 objects with
+    * an in-memory LRU tier (VIDEO_STREAM_MEMORY_CACHE_MB)
+    * a local-disk LRU tier (VIDEO_STREAM_DISK_CACHE_DIR / _MB)
+    * single-flight fetches (concurrent viewers of the same block share
+      one GetObject)
+    * read-ahead of the next VIDEO_STREAM_READAHEAD_BLOCKS blocks on a
+      background pool while the current block is being sent
+  Blocks are keyed by (S3 key, ETag, block index), so a re-uploaded
+  recording never serves stale bytes
+- presigned URL generation (cached until shortly before expiry) for the
+  redirect delivery mode, where S3 serves the bytes directly
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+logger = logging.getLogger("video_processor")
+
+VIDEO_STREAM_MODE = os.getenv("VIDEO_STREAM_MODE", "proxy").lower()  # proxy | redirect
+VIDEO_STREAM_BLOCK_SIZE = int(os.getenv("VIDEO_STREAM_BLOCK_SIZE", 1024 * 1024))
+VIDEO_STREAM_READAHEAD_BLOCKS = int(os.getenv("VIDEO_STREAM_READAHEAD_BLOCKS", 4))
+VIDEO_STREAM_PREFETCH_WORKERS = int(os.getenv("VIDEO_STREAM_PREFETCH_WORKERS", 8))
+VIDEO_STREAM_MEMORY_CACHE_MB = int(os.getenv("VIDEO_STREAM_MEMORY_CACHE_MB", 256))
+VIDEO_STREAM_DISK_CACHE_MB = int(os.getenv("VIDEO_STREAM_DISK_CACHE_MB", 4096))
+VIDEO_STREAM_DISK_CACHE_DIR = os.getenv(
+    "VIDEO_STREAM_DISK_CACHE_DIR", os.path.join(tempfile.gettempdir(), "imeet_video_blocks")
+)
+VIDEO_STREAM_META_TTL = float(os.getenv("VIDEO_STREAM_META_TTL", 300))
+VIDEO_STREAM_ACCESS_TTL = float(os.getenv("VIDEO_STREAM_ACCESS_TTL", 60))
+VIDEO_STREAM_PRESIGN_EXPIRY = int(os.getenv("VIDEO_STREAM_PRESIGN_EXPIRY", 3600))
+
+
+class TTLCache:
+    """Thread-safe dict with per-entry expiry and a size bound"""
+
+    _MISSING = object()
+
+    def __init__(self, ttl, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, self._MISSING)
+            if entry is not self._MISSING and entry[0] > now:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not self._MISSING:
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'entries': len(self._data), 'hits': self.hits, 'misses': self.misses}
+
+
+class S3BlockCache:
+    """Block-aligned S3 reads with memory + disk LRU tiers, single-flight and read-ahead"""
+
+    def __init__(self, s3_client, bucket, block_size=VIDEO_STREAM_BLOCK_SIZE,
+                 memory_bytes=VIDEO_STREAM_MEMORY_CACHE_MB * 1024 * 1024,
+                 disk_bytes=VIDEO_STREAM_DISK_CACHE_MB * 1024 * 1024,
+                 disk_dir=VIDEO_STREAM_DISK_CACHE_DIR,
+                 readahead=VIDEO_STREAM_READAHEAD_BLOCKS,
+                 prefetch_workers=VIDEO_STREAM_PREFETCH_WORKERS):
+        self.s3 = s3_client
+        self.bucket = bucket
+        self.block_size = block_size
+        self.readahead = readahead
+
+        self.memory_limit = memory_bytes
+        self._memory = OrderedDict()  # block key -> bytes
+        self._memory_bytes = 0
+
+        self.disk_limit = disk_bytes
+        self.disk_dir = disk_dir
+        self._disk = OrderedDict()  # block key -> (path, size)
+        self._disk_bytes = 0
+        self._disk_scanned = False
+
+        self._lock = threading.Lock()
+        self._inflight = {}  # block key -> Future
+        self._prefetcher = ThreadPoolExecutor(max_workers=max(1, prefetch_workers), thread_name_prefix="VideoPrefetch")
+
+        self.meta = TTLCache(VIDEO_STREAM_META_TTL)
+        self._presigned = TTLCache(max(60, VIDEO_STREAM_PRESIGN_EXPIRY - 300))
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.s3_fetches = 0
+        self.s3_bytes = 0
+        self.prefetched = 0
+        self.shared_fetches = 0
+
+    # ---------------------------------------------------------------- metadata
+    def head(self, s3_key):
+        """
+        Cached HEAD of an object.
+
+        Returns:
+            dict with 'size', 'etag', 'content_type', or None if missing/unreadable
+        """
+        cached = self.meta.get(s3_key)
+        if cached is not None:
+            return cached
+        try:
+            response = self.s3.head_object(Bucket=self.bucket, Key=s3_key)
+        except Exception as e:
+            logger.error(f"Failed to get S3 object size for {s3_key}: {e}")
+            return None
+        meta = {
+            'size': int(response['ContentLength']),
+            'etag': str(response.get('ETag', '')).strip('"'),
+            'content_type': response.get('ContentType'),
+        }
+        self.meta.set(s3_key, meta)
+        return meta
+
+    def invalidate(self, s3_key):
+        self.meta.pop(s3_key)
+        self._presigned.pop(s3_key)
+
+    def presigned_url(self, s3_key, content_type=None):
+        """Presigned GET URL, reused until shortly before it expires"""
+        url = self._presigned.get(s3_key)
+        if url is None:
+            params = {'Bucket': self.bucket, 'Key': s3_key}
+            if content_type:
+                params['ResponseContentType'] = content_type
+            url = self.s3.generate_presigned_url('get_object', Params=params, ExpiresIn=VIDEO_STREAM_PRESIGN_EXPIRY)
+            self._presigned.set(s3_key, url)
+        return url
+
+    # ---------------------------------------------------------------- tiers
+    @staticmethod
+    def _object_id(s3_key, etag):
+        return hashlib.sha1(f"{s3_key}|{etag}".encode("utf-8")).hexdigest()
+
+    def _disk_path(self, block_key):
+        object_id, index = block_key
+        return os.path.join(self.disk_dir, object_id[:2], object_id, f"{index}.blk")
+
+    def _scan_disk(self):
+        """Adopt blocks left by earlier processes (oldest first) so the budget holds across restarts"""
+        self._disk_scanned = True
+        if self.disk_limit <= 0 or not os.path.isdir(self.disk_dir):
+            return
+        found = []
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                if not name.endswith(".blk"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                    found.append((stat.st_mtime, (os.path.basename(root), int(name[:-4])), path, stat.st_size))
+                except (OSError, ValueError):
+                    continue
+        for _, block_key, path, size in sorted(found):
+            self._disk[block_key] = (path, size)
+            self._disk_bytes += size
+        self._trim_disk()
+
+    def _remember_memory(self, block_key, data):
+        if self.memory_limit <= 0:
+            return
+        previous = self._memory.pop(block_key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[block_key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.memory_limit and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _trim_disk(self):
+        while self._disk_bytes > self.disk_limit and self._disk:
+            _, (path, size) = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _remember_disk(self, block_key, data):
+        if self.disk_limit <= 0:
+            return
+        path = self._disk_path(block_key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"⚠️ Video block cache write failed: {e}")
+            return
+        with self._lock:
+            if block_key not in self._disk:
+                self._disk[block_key] = (path, len(data))
+                self._disk_bytes += len(data)
+            self._trim_disk()
+
+    def _cached(self, block_key):
+        """Block bytes from memory or disk (promoted to memory), else None"""
+        with self._lock:
+            if not self._disk_scanned:
+                self._scan_disk()
+            data = self._memory.get(block_key)
+            if data is not None:
+                self._memory.move_to_end(block_key)
+                self.memory_hits += 1
+                return data
+            disk_entry = self._disk.get(block_key)
+            if disk_entry is not None:
+                self._disk.move_to_end(block_key)
+
+        if disk_entry is None:
+            return None
+        try:
+            with open(disk_entry[0], "rb") as f:
+                data = f.read()
+        except OSError:
+            with self._lock:
+                if self._disk.pop(block_key, None) is not None:
+                    self._disk_bytes -= disk_entry[1]
+            return None
+        with self._lock:
+            self.disk_hits += 1
+            self._remember_memory(block_key, data)
+        return data
+
+    # ---------------------------------------------------------------- fetch
+    def _fetch(self, s3_key, block_key, start, end):
+        response = self.s3.get_object(Bucket=self.bucket, Key=s3_key, Range=f"bytes={start}-{end}")
+        data = response['Body'].read()
+        with self._lock:
+            self.s3_fetches += 1
+            self.s3_bytes += len(data)
+            self._remember_memory(block_key, data)
+        self._remember_disk(block_key, data)
+        return data
+
+    def _block_future(self, s3_key, meta, index, prefetch=False):
+        """Future for a block: shared with an in-flight fetch, or a new fetch"""
+        block_key = (self._object_id(s3_key, meta['etag']), index)
+        with self._lock:
+            future = self._inflight.get(block_key)
+            if future is not None:
+                if not prefetch:
+                    self.shared_fetches += 1
+                return future, block_key, False
+            future = Future()
+            self._inflight[block_key] = future
+        return future, block_key, True
+
+    def _run_fetch(self, s3_key, meta, index, future, block_key):
+        start = index * self.block_size
+        end = min(start + self.block_size, meta['size']) - 1
+        try:
+            future.set_result(self._fetch(s3_key, block_key, start, end))
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._inflight.pop(block_key, None)
+
+    def get_block(self, s3_key, meta, index):
+        """Bytes of block `index` (blocking)"""
+        block_key = (self._object_id(s3_key, meta['etag']), index)
+        data = self._cached(block_key)
+        if data is not None:
+            return data
+        future, block_key, owner = self._block_future(s3_key, meta, index)
+        if owner:
+            self._run_fetch(s3_key, meta, index, future, block_key)
+        return future.result()
+
+    def prefetch(self, s3_key, meta, first_index):
+        """Queue the next `readahead` blocks that are neither cached nor in flight"""
+        last_index = (meta['size'] - 1) // self.block_size
+        for index in range(first_index, min(first_index + self.readahead, last_index + 1)):
+            block_key = (self._object_id(s3_key, meta['etag']), index)
+            with self._lock:
+                if block_key in self._memory or block_key in self._disk:
+                    continue
+            future, block_key, owner = self._block_future(s3_key, meta, index, prefetch=True)
+            if owner:
+                self.prefetched += 1
+                self._prefetcher.submit(self._run_fetch, s3_key, meta, index, future, block_key)
+
+    def iter_range(self, s3_key, meta, start, end):
+        """Yield the bytes start..end (inclusive) block by block, reading ahead as it goes"""
+        first = start // self.block_size
+        last = end // self.block_size
+        for index in range(first, last + 1):
+            if self.readahead:
+                self.prefetch(s3_key, meta, index + 1)
+            block = self.get_block(s3_key, meta, index)
+            block_start = index * self.block_size
+            lo = max(start - block_start, 0)
+            hi = min(end - block_start + 1, len(block))
+            if lo >= hi:
+                break
+            yield block[lo:hi] if (lo or hi != len(block)) else block
+
+    def read_range(self, s3_key, meta, start, end):
+        return b"".join(self.iter_range(s3_key, meta, start, end))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'block_size': self.block_size,
+                'memory_blocks': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'disk_blocks': len(self._disk),
+                'disk_bytes': self._disk_bytes,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                's3_fetches': self.s3_fetches,
+                's3_bytes': self.s3_bytes,
+                'shared_fetches': self.shared_fetches,
+                'prefetched': self.prefetched,
+                'inflight': len(self._inflight),
+                'metadata': self.meta.stats(),
+            }
@@ -12,6 +12,7 @@ from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.urls import path
 from django.db import connection
+from core.WebSocketConnection.meeting_events import publish_meeting_event
 
 # Configure logging
 logger = logging.getLogger('cache_hand_raise')
@@ -151,6 +152,21 @@ class CacheOnlyHandRaiseManager:
             self.redis_client.set(status_key, json.dumps(status_data))
             
             logger.info(f"✋ User {user_id} ({user_name}) raised hand in meeting {meeting_id}")
+            
+            # Same shape as get_raised_hands() entries
+            publish_meeting_event(meeting_id, 'hand_raise', 'hand_raised', {
+                'id': f"hand_{user_id}_{int(hand_data['raised_at'])}",
+                'user_id': hand_data['user_id'],
+                'user': {
+                    'user_id': hand_data['user_id'],
+                    'full_name': hand_data['user_name'],
+                    'profile_picture': None
+                },
+                'timestamp': hand_data['timestamp'],
+                'status': hand_data['status'],
+                'participant_identity': participant_identity,
+                'raised_at': hand_data['raised_at']
+            })
             return True
             
         except Exception as e:
@@ -178,6 +194,7 @@ class CacheOnlyHandRaiseManager:
             self.redis_client.lrem(queue_key, 0, user_id)
             
             logger.info(f"✋ User {user_id} lowered hand in meeting {meeting_id}")
+            publish_meeting_event(meeting_id, 'hand_raise', 'hand_lowered', {'user_id': str(user_id)})
             return True
             
         except Exception as e:
@@ -228,6 +245,13 @@ class CacheOnlyHandRaiseManager:
                 self.redis_client.set(status_key, json.dumps(status_data))
             
             logger.info(f"✅ Host {host_user_id} {action}d hand from {participant_user_id}")
+            publish_meeting_event(meeting_id, 'hand_raise', 'hand_acknowledged', {
+                'user_id': str(participant_user_id),
+                'status': hand_data['status'],
+                'action': action,
+                'acknowledged_by': host_user_id,
+                'acknowledged_at': hand_data['acknowledged_at']
+            })
             return True
             
         except Exception as e:
@@ -250,6 +274,7 @@ class CacheOnlyHandRaiseManager:
             self.redis_client.delete(hands_key, queue_key)
             
             logger.info(f"🧹 Host {host_user_id} cleared {hands_count} hands in meeting {meeting_id}")
+            publish_meeting_event(meeting_id, 'hand_raise', 'hands_cleared', {'cleared_by': str(host_user_id)})
             return hands_count
             
         except Exception as e:
@@ -17,6 +17,7 @@ from django.urls import path
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
 from django.conf import settings
+from core.WebSocketConnection.meeting_events import publish_meeting_event
 
 # Configure logging
 logger = logging.getLogger('cache_chat')
@@ -231,6 +232,10 @@ class EnhancedCacheOnlyChatManager:
             self.redis_client.set(status_key, json.dumps(status_data))
             
             logger.info(f"📝 Message added instantly (private: {is_private}, recipients: {len(recipients)})")
+            
+            if message.get('message_type') == 'file' and message.get('file_id'):
+                message['download_url'] = f'/api/cache-chat/files/{message["file_id"]}/'
+            publish_meeting_event(meeting_id, 'chat', 'message', message)
             return message_id
             
         except Exception as e:
@@ -529,6 +534,7 @@ class EnhancedCacheOnlyChatManager:
                 self.redis_client.set(status_key, json.dumps(status_data))
             
             logger.info(f"🗑 File deleted: {file_id} from meeting {meeting_id}")
+            publish_meeting_event(meeting_id, 'chat', 'file_deleted', {'file_id': file_id})
             return True, "File deleted successfully"
             
         except Exception as e:
@@ -585,6 +591,8 @@ class EnhancedCacheOnlyChatManager:
             logger.info(f"   - Total files deleted: {file_count}")
             logger.info(f"   - Redis keys deleted: {deleted_keys}")
             
+            publish_meeting_event(meeting_id, 'chat', 'ended')
+            
             return {
                 'messages_deleted': message_count,
                 'files_deleted': file_count,
@@ -613,6 +621,11 @@ class EnhancedCacheOnlyChatManager:
             else:
                 self.redis_client.hdel(typing_key, str(user_id))
             
+            publish_meeting_event(meeting_id, 'chat', 'typing', {
+                'user_id': str(user_id),
+                'user_name': user_name,
+                'is_typing': is_typing
+            })
             return True
             
         except Exception as e:
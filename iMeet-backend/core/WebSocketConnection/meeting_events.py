@@ -0,0 +1,90 @@
+# meeting_events.py - Push fan-out for in-meeting events (chat, reactions, hand raise, whiteboard)
+"""
+Publishes deltas to every WebSocket connected to a meeting through the
+Channels layer, so clients no longer have to poll the cache-only endpoints.
+
+The cache managers call publish_meeting_event() right after a successful
+Redis write. Publishing is best-effort: a missing or failing channel layer is
+logged and never breaks the write that triggered it.
+"""
+import hashlib
+import logging
+import re
+import time
+
+from asgiref.sync import async_to_sync
+
+try:
+    from channels.layers import get_channel_layer
+    CHANNELS_AVAILABLE = True
+except ImportError:
+    get_channel_layer = None
+    CHANNELS_AVAILABLE = False
+
+logger = logging.getLogger('meeting_events')
+
+# Categories a client can subscribe to
+EVENT_CATEGORIES = ('chat', 'reactions', 'hand_raise', 'whiteboard')
+
+# Channels group names: ASCII alphanumerics, hyphens, underscores or periods, < 100 chars
+_GROUP_NAME_INVALID = re.compile(r'[^0-9A-Za-z_.-]')
+_GROUP_NAME_MAX = 90
+
+_channel_layer = None
+_last_error_log = 0.0
+
+
+def meeting_group_name(meeting_id) -> str:
+    """Channels group that every socket of a meeting joins"""
+    name = f"meeting.{_GROUP_NAME_INVALID.sub('_', str(meeting_id))}"
+    if len(name) > _GROUP_NAME_MAX:
+        name = f"meeting.{hashlib.sha1(str(meeting_id).encode()).hexdigest()}"
+    return name
+
+
+def _get_layer():
+    global _channel_layer
+    if _channel_layer is None and CHANNELS_AVAILABLE:
+        _channel_layer = get_channel_layer()
+    return _channel_layer
+
+
+def publish_meeting_event(meeting_id, category: str, event: str, data=None) -> bool:
+    """
+    Send one delta to every socket connected to the meeting.
+
+    Args:
+        meeting_id: Meeting the event belongs to
+        category: One of EVENT_CATEGORIES
+        event: Event name within the category (e.g. 'message', 'hand_raised')
+        data: JSON-serializable payload
+
+    Returns:
+        True if the event was handed to the channel layer
+    """
+    global _last_error_log
+
+    if not meeting_id:
+        return False
+
+    layer = _get_layer()
+    if layer is None:
+        return False
+
+    try:
+        async_to_sync(layer.group_send)(meeting_group_name(meeting_id), {
+            'type': 'meeting.event',
+            'meeting_id': str(meeting_id),
+            'category': category,
+            'event': event,
+            'data': data if data is not None else {},
+            'sent_at': time.time()
+        })
+        return True
+    except Exception as e:
+        # Rate-limit: a down Redis would otherwise log once per write
+        now = time.time()
+        if now - _last_error_log > 10:
+            logger.warning(f"⚠️ Failed to publish {category}.{event} for meeting {meeting_id}: {e}")
+            _last_error_log = now
+        return False
@@ -3,7 +3,7 @@ from core.WebSocketConnection import enhanced_logging_config
 from django.db import connection, transaction, models
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
-from core.AI_Attendance.Attendance import start_attendance_tracking, stop_attendance_tracking
+from core.UserDashBoard.recording_acl import refresh_recording_acl
 from django.views.decorators.csrf import csrf_exempt
 from django.urls import path
 from django.utils import timezone
@@ -17,7 +17,9 @@ import jwt
 from datetime import datetime, timedelta
 import json
 import logging
+from core.utils.schema_bootstrap import schema_task
 import uuid
+import re
 import aiopg
 import redis
 from django.core.mail import send_mail
@@ -59,15 +61,6 @@ logger = logging.getLogger('meetings')
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-# Add to your existing imports in meetings.py
-try:
-    from core.AI_Attendance.Attendance import start_attendance_tracking, stop_attendance_tracking
-    ATTENDANCE_ENABLED = True
-    print("✅ Attendance module loaded successfully")
-except ImportError as e:
-    ATTENDANCE_ENABLED = False
-    print(f"⚠️ Attendance module not available: {e}")
-
 # LiveKit Integration
 # FIXED: Check LiveKit availability FIRST before using it
 try:
@@ -113,6 +106,8 @@ except Exception as e:
 TBL_MEETINGS = 'tbl_Meetings'
 TBL_CALENDAR_MEETING = 'tbl_CalendarMeetings'
 TBL_SCHEDULED_MEETINGS = 'tbl_ScheduledMeetings'
+TBL_MEETING_INVITEES = 'tbl_MeetingInvitees'
+TBL_MEETING_INVITATIONS = 'tbl_Meeting_Invitations'
 
 SUCCESS_STATUS = 200
 CREATED_STATUS = 201
@@ -1762,6 +1757,7 @@ class Meetings(models.Model):
     def __str__(self):
         return self.meeting_name or "Unnamed Meeting"
 
+@schema_task("tbl_Meetings", order=20)
 def create_meetings_table():
     try:
         with connection.cursor() as cursor:
@@ -1801,7 +1797,9 @@ def create_meetings_table():
             logging.debug("tbl_Meetings table created or exists with LiveKit columns")
     except Exception as e:
         logging.error(f"Failed to create tbl_Meetings table: {e}")
+        raise
 
+@schema_task("tbl_ScheduledMeetings", order=30)
 def create_scheduled_meetings_table():
     try:
         with connection.cursor() as cursor:
@@ -1850,7 +1848,9 @@ def create_scheduled_meetings_table():
             logging.debug("✅ tbl_ScheduledMeetings table created or already exists with new date columns.")
     except Exception as e:
         logging.error(f"❌ Failed to create tbl_ScheduledMeetings table: {e}")
+        raise
 
+@schema_task("tbl_CalendarMeetings", order=30)
 def create_calendar_meeting_table():
     """Create calendar meetings table with calendar integration support"""
     try:
@@ -1890,6 +1890,143 @@ def create_calendar_meeting_table():
             logging.debug("tbl_CalendarMeetings table created or exists with calendar integration")
     except Exception as e:
         logging.error(f"Failed to create tbl_CalendarMeetings table: {e}")
+        raise
+
+@schema_task("tbl_MeetingInvitees", order=40)
+def create_meeting_invitees_table():
+    """
+    Normalized invitee index: one (meeting, lower-cased email, role) row per invite, so
+    "my meetings" lookups are indexed joins instead of LIKE scans over joined email columns.
+    Kept in sync by sync_meeting_invitees(); existing meetings via `manage.py backfill_meeting_invitees`.
+    """
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS tbl_MeetingInvitees (
+                    meeting_id VARCHAR(20) NOT NULL,
+                    email_lower VARCHAR(255) NOT NULL,
+                    role VARCHAR(20) NOT NULL,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (meeting_id, role, email_lower),
+                    KEY IX_MeetingInvitees_Email (email_lower, meeting_id),
+                    CONSTRAINT FK_MeetingInvitees_Meetings FOREIGN KEY (meeting_id)
+                        REFERENCES tbl_Meetings(ID)
+                        ON DELETE CASCADE
+                )
+            """)
+        logging.debug("tbl_MeetingInvitees table created or exists")
+    except Exception as e:
+        logging.error(f"Failed to create tbl_MeetingInvitees table: {e}")
+        raise
+
+def split_invitee_emails(value) -> list:
+    """Lower-cased, de-duplicated addresses from a comma/semicolon joined column (or a list)"""
+    if not value:
+        return []
+    parts = value if isinstance(value, (list, tuple, set)) else re.split(r'[;,]', str(value))
+    emails = []
+    for part in parts:
+        email = str(part).strip().lower()
+        if email and '@' in email and len(email) <= 255 and email not in emails:
+            emails.append(email)
+    return emails
+
+def _collect_meeting_invitees(cursor, meeting_ids) -> dict:
+    """meeting_id -> set of (email_lower, role) from the scheduled, calendar and invitation tables"""
+    invitees = {str(meeting_id): set() for meeting_id in meeting_ids}
+    if not invitees:
+        return invitees
+    placeholders = ','.join(['%s'] * len(invitees))
+    ids = list(invitees)
+
+    cursor.execute(f"SELECT id, email FROM {TBL_SCHEDULED_MEETINGS} WHERE id IN ({placeholders})", ids)
+    for meeting_id, email in cursor.fetchall():
+        invitees[str(meeting_id)].update((e, 'invitee') for e in split_invitee_emails(email))
+
+    cursor.execute(
+        f"SELECT ID, email, guestEmails, attendees FROM {TBL_CALENDAR_MEETING} WHERE ID IN ({placeholders})", ids
+    )
+    for meeting_id, organizer, guest_emails, attendees in cursor.fetchall():
+        rows = invitees[str(meeting_id)]
+        rows.update((e, 'organizer') for e in split_invitee_emails(organizer))
+        rows.update((e, 'guest') for e in split_invitee_emails(guest_emails))
+        rows.update((e, 'attendee') for e in split_invitee_emails(attendees))
+
+    try:
+        cursor.execute(f"SELECT Meeting_ID, Email FROM {TBL_MEETING_INVITATIONS} WHERE Meeting_ID IN ({placeholders})", ids)
+        for meeting_id, email in cursor.fetchall():
+            if str(meeting_id) in invitees:
+                invitees[str(meeting_id)].update((e, 'invitation') for e in split_invitee_emails(email))
+    except (ProgrammingError, OperationalError):
+        pass  # Invitation table is optional
+
+    return invitees
+
+def _replace_meeting_invitees(cursor, meeting_ids) -> int:
+    invitees = _collect_meeting_invitees(cursor, meeting_ids)
+    if not invitees:
+        return 0
+    placeholders = ','.join(['%s'] * len(invitees))
+    cursor.execute(f"DELETE FROM {TBL_MEETING_INVITEES} WHERE meeting_id IN ({placeholders})", list(invitees))
+    rows = [(meeting_id, email, role) for meeting_id, pairs in invitees.items() for email, role in pairs]
+    if rows:
+        cursor.executemany(
+            f"INSERT IGNORE INTO {TBL_MEETING_INVITEES} (meeting_id, email_lower, role) VALUES (%s, %s, %s)", rows
+        )
+    return len(rows)
+
+def sync_meeting_invitees(meeting_id, cursor=None):
+    """Rebuild tbl_MeetingInvitees rows of one meeting from its email columns; returns the row count (None on error)"""
+    create_meeting_invitees_table()
+    try:
+        if cursor is not None:
+            return _replace_meeting_invitees(cursor, [meeting_id])
+        with connection.cursor() as cursor:
+            return _replace_meeting_invitees(cursor, [meeting_id])
+    except Exception as e:
+        logging.error(f"Failed to sync invitees for meeting {meeting_id}: {e}")
+        return None
+
+def get_meeting_invitee_emails(meeting_id) -> list:
+    """Invited (lower-cased) emails of a meeting; syncs meetings the backfill has not reached yet"""
+    create_meeting_invitees_table()
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT DISTINCT email_lower FROM {TBL_MEETING_INVITEES} WHERE meeting_id = %s", [meeting_id])
+        emails = [row[0] for row in cursor.fetchall()]
+        if not emails and _replace_meeting_invitees(cursor, [meeting_id]):
+            cursor.execute(f"SELECT DISTINCT email_lower FROM {TBL_MEETING_INVITEES} WHERE meeting_id = %s", [meeting_id])
+            emails = [row[0] for row in cursor.fetchall()]
+    return emails
+
+def backfill_meeting_invitees(batch_size=1000, log=None) -> dict:
+    """One-time batch job: index the invitees of every scheduled/calendar meeting, keyset-paged by meeting ID"""
+    create_meeting_invitees_table()
+    stats = {"meetings": 0, "invitees": 0, "batches": 0}
+    last_id = ''
+    while True:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(f"""
+                    SELECT id FROM (
+                        SELECT id FROM {TBL_SCHEDULED_MEETINGS}
+                        UNION
+                        SELECT ID FROM {TBL_CALENDAR_MEETING}
+                    ) meetings
+                    WHERE id > %s
+                    ORDER BY id
+                    LIMIT %s
+                """, [last_id, batch_size])
+                meeting_ids = [row[0] for row in cursor.fetchall()]
+                if not meeting_ids:
+                    break
+                stats["invitees"] += _replace_meeting_invitees(cursor, meeting_ids)
+        stats["meetings"] += len(meeting_ids)
+        stats["batches"] += 1
+        last_id = meeting_ids[-1]
+        if log:
+            log(f"Indexed {stats['meetings']} meetings ({stats['invitees']} invitees), last ID {last_id}")
+    logging.info(f"✅ Meeting invitee backfill complete: {stats}")
+    return stats
 
 def send_meeting_invitations(data):
     """
@@ -2167,6 +2304,7 @@ def Create_Calendar_Meeting(request):
     """FIXED: Create Calendar Meeting with duplicate prevention + fully working mail + notification system"""
     create_meetings_table()
     create_calendar_meeting_table()
+    create_meeting_invitees_table()
     ensure_notification_tables()
 
     try:
@@ -2313,6 +2451,7 @@ def Create_Calendar_Meeting(request):
                     json.dumps(data.get('reminderTimes', [15, 30])),
                     1, 1, 1, 1, 1, 1, created_at
                 ])
+                sync_meeting_invitees(meeting_id, cursor)
         logging.info(f"✅ Calendar meeting created: {meeting_id}")
     except Exception as e:
         logging.error(f"DB insert failed: {e}")
@@ -2406,6 +2545,7 @@ def Create_Schedule_Meeting(request):
         # Ensure tables exist - INCLUDING NOTIFICATION TABLES
         create_meetings_table()
         create_scheduled_meetings_table()
+        create_meeting_invitees_table()
         ensure_notification_tables()  # PRESERVED: Notification tables
 
         # Parse JSON data - UNCHANGED
@@ -2745,6 +2885,7 @@ def Create_Schedule_Meeting(request):
                     ]
                     
                     cursor.execute(scheduled_query, scheduled_params)
+                    sync_meeting_invitees(meeting_data['id'], cursor)
                     logging.info("Database inserts completed successfully")
                     
         except Exception as e:
@@ -3800,6 +3941,10 @@ def Update_Meeting(request, id):
         logging.error(f"UPDATE_MEETING: Full traceback: {traceback.format_exc()}")
         return JsonResponse({"Error": f"Database error: {str(e)}"}, status=500)
 
+    # Invites or host may have changed: re-index invitees, rebuild the recording ACL if this meeting has one
+    sync_meeting_invitees(id)
+    refresh_recording_acl(id, only_if_materialized=True)
+
     # Return success response
     return JsonResponse({
         "Message": "Meeting updated successfully",
@@ -4656,12 +4801,22 @@ def Get_User_Schedule_Meetings(request):
                 sm.created_at, sm.email,
                 m.Status, m.Meeting_Link, m.Is_Recording_Enabled, m.Waiting_Room_Enabled,
                 m.Meeting_Name, m.Meeting_Type, m.LiveKit_Room_Name, m.LiveKit_Room_SID,
-                u.full_name as host_full_name, u.email as host_email
-            FROM tbl_ScheduledMeetings sm
+                u.full_name as host_full_name, u.email as host_email,
+                mine.is_invited
+            FROM (
+                -- Hosted meetings + invites, both index lookups (no LIKE scan over sm.email)
+                SELECT matches.meeting_id, MAX(matches.is_invited) AS is_invited
+                FROM (
+                    SELECT id AS meeting_id, 0 AS is_invited FROM tbl_ScheduledMeetings WHERE host_id = %s
+                    UNION ALL
+                    SELECT meeting_id, 1 AS is_invited FROM tbl_MeetingInvitees WHERE email_lower = %s
+                ) matches
+                GROUP BY matches.meeting_id
+            ) mine
+            INNER JOIN tbl_ScheduledMeetings sm ON sm.id = mine.meeting_id
             INNER JOIN tbl_Meetings m ON sm.id = m.ID
             LEFT JOIN tbl_Users u ON sm.host_id = u.ID
-            WHERE (sm.host_id = %s OR (sm.email IS NOT NULL AND sm.email LIKE %s))
-              AND m.Status NOT IN ('deleted', 'cancelled', 'recurrence_ended')
+            WHERE m.Status NOT IN ('deleted', 'cancelled', 'recurrence_ended')
               AND (
                   (sm.is_recurring = 0 AND sm.end_time >= %s)
                   OR
@@ -4672,11 +4827,10 @@ def Get_User_Schedule_Meetings(request):
             ORDER BY sm.start_time ASC
             """
             
-            email_pattern = f'%{user_email}%' if user_email else ''
             one_week_ago = current_datetime - timedelta(days=7)
             
             cursor.execute(query, [
-                user_id, email_pattern, current_datetime, current_date, current_date, one_week_ago, current_datetime
+                user_id or None, user_email.strip().lower(), current_datetime, current_date, current_date, one_week_ago, current_datetime
             ])
             rows = cursor.fetchall()
 
@@ -4691,7 +4845,7 @@ def Get_User_Schedule_Meetings(request):
                         participant_emails = [email.strip() for email in row[30].split(',') if email.strip()]
                     
                     is_host = str(row[1]) == str(user_id)
-                    is_participant = user_email in participant_emails if user_email else False
+                    is_participant = bool(row[41])
                     
                     if is_host or is_participant:
                         # UNCHANGED: Original recurring meeting logic
@@ -4822,27 +4976,24 @@ def Get_User_Calendar_Meetings(request):
                 cm.Settings_SendInvitations, cm.Settings_SetReminders, cm.Settings_AddMeetingLink,
                 cm.Settings_AddToHostCalendar, cm.Settings_AddToParticipantCalendars,
                 cm.CreatedAt, m.Status, m.Is_Recording_Enabled, m.Waiting_Room_Enabled,
-                m.LiveKit_Room_Name, m.LiveKit_Room_SID, m.Meeting_Name as meeting_name
-            FROM tbl_CalendarMeetings cm
+                m.LiveKit_Room_Name, m.LiveKit_Room_SID, m.Meeting_Name as meeting_name,
+                mine.is_invited
+            FROM (
+                -- Hosted meetings + organizer/guest/attendee invites from the invitee index
+                SELECT matches.meeting_id, MAX(matches.is_invited) AS is_invited
+                FROM (
+                    SELECT ID AS meeting_id, 0 AS is_invited FROM tbl_CalendarMeetings WHERE Host_ID = %s
+                    UNION ALL
+                    SELECT meeting_id, 1 AS is_invited FROM tbl_MeetingInvitees WHERE email_lower = %s
+                ) matches
+                GROUP BY matches.meeting_id
+            ) mine
+            INNER JOIN tbl_CalendarMeetings cm ON cm.ID = mine.meeting_id
             INNER JOIN tbl_Meetings m ON cm.ID = m.ID
-            WHERE (
-                cm.Host_ID = %s 
-                OR (cm.guestEmails IS NOT NULL AND cm.guestEmails LIKE %s)
-                OR (cm.attendees IS NOT NULL AND cm.attendees LIKE %s)
-                OR (cm.email = %s)
-            )
-            AND (m.Status IS NULL OR m.Status NOT IN ('deleted', 'cancelled'))
+            WHERE (m.Status IS NULL OR m.Status NOT IN ('deleted', 'cancelled'))
             """
             
-            # UNCHANGED: Original parameter building
-            params = []
-            if user_id:
-                params.append(user_id)
-            else:
-                params.append(None)
-                
-            email_pattern = f'%{user_email}%' if user_email else '%'
-            params.extend([email_pattern, email_pattern, user_email or ''])
+            params = [user_id or None, user_email.strip().lower()]
             
             if start_date and end_date:
                 base_query += " AND cm.startTime BETWEEN %s AND %s"
@@ -4895,13 +5046,7 @@ def Get_User_Calendar_Meetings(request):
                     reminder_minutes = parse_reminder_minutes(row[12])
                     
                     is_host = str(row[1]) == str(user_id) if user_id else False
-                    is_participant = False
-                    
-                    if user_email:
-                        is_participant = (
-                            user_email.lower() in [email.lower() for email in final_email_list] or 
-                            user_email.lower() == (row[6] or '').lower()
-                        )
+                    is_participant = bool(row[26])
                     
                     # UNCHANGED: All original meeting data structure
                     meeting = {
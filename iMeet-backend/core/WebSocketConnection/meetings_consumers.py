@@ -0,0 +1,139 @@
+# meetings_consumers.py - WebSocket consumer for in-meeting push events
+"""
+One socket per participant per meeting. On connect the client gets a
+snapshot of chat, reactions, raised hands and whiteboard state (the same data
+the polling endpoints return), after which it only receives deltas published
+through meeting_events.publish_meeting_event().
+
+Query string:
+    user_id   - used to filter private chat messages
+    is_host   - 'true' to receive every private message
+    snapshot  - 'false' to skip the initial snapshot
+"""
+import logging
+import time
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from core.WebSocketConnection.meeting_events import EVENT_CATEGORIES, meeting_group_name
+
+logger = logging.getLogger('meeting_events')
+
+
+def can_see_chat_message(message, user_id, is_host):
+    """Same private-message rule as EnhancedCacheOnlyChatManager.get_messages"""
+    if not message.get('is_private', False):
+        return True
+    current_user_id = str(user_id) if user_id else None
+    if is_host:
+        return True
+    if not current_user_id:
+        return False
+    if current_user_id == str(message.get('user_id', '')):
+        return True
+    return current_user_id in [str(r) for r in message.get('recipients', [])]
+
+
+def build_meeting_snapshot(meeting_id, user_id=None, is_host=False):
+    """Initial state for a freshly connected socket"""
+    from core.WebSocketConnection.chat_messages import enhanced_cache_chat_manager
+    from core.WebSocketConnection.reactions import cache_reactions_manager
+    from core.WebSocketConnection.cache_only_hand_raise import cache_hand_raise_manager
+    from core.Whiteboard.whiteboard import WhiteboardCache
+
+    snapshot = {}
+    try:
+        snapshot['chat'] = {
+            'messages': enhanced_cache_chat_manager.get_messages(meeting_id, 100, 0, user_id=user_id, is_host=is_host)
+        }
+    except Exception as e:
+        logger.warning(f"⚠️ Snapshot chat failed for {meeting_id}: {e}")
+
+    try:
+        snapshot['reactions'] = {'reactions': cache_reactions_manager.get_active_reactions(meeting_id)}
+    except Exception as e:
+        logger.warning(f"⚠️ Snapshot reactions failed for {meeting_id}: {e}")
+
+    try:
+        snapshot['hand_raise'] = {'raised_hands': cache_hand_raise_manager.get_raised_hands(meeting_id)}
+    except Exception as e:
+        logger.warning(f"⚠️ Snapshot hand raise failed for {meeting_id}: {e}")
+
+    try:
+        board = WhiteboardCache.get_board_snapshot(meeting_id)
+        undo_count = WhiteboardCache.get_undo_count(meeting_id)
+        redo_count = WhiteboardCache.get_redo_count(meeting_id)
+        snapshot['whiteboard'] = {
+            'drawings': board['drawings'],
+            'cursor': board['cursor'],
+            'settings': WhiteboardCache.get_settings(meeting_id),
+            'undo_count': undo_count,
+            'redo_count': redo_count,
+            'can_undo': undo_count > 0,
+            'can_redo': redo_count > 0
+        }
+    except Exception as e:
+        logger.warning(f"⚠️ Snapshot whiteboard failed for {meeting_id}: {e}")
+
+    return snapshot
+
+
+class MeetingConsumer(AsyncJsonWebsocketConsumer):
+    """Fan-out socket for chat, reactions, hand raise and whiteboard deltas"""
+
+    async def connect(self):
+        self.meeting_id = self.scope['url_route']['kwargs']['meeting_id']
+        self.group_name = meeting_group_name(self.meeting_id)
+
+        params = parse_qs(self.scope.get('query_string', b'').decode())
+        self.user_id = params.get('user_id', [None])[0]
+        self.is_host = params.get('is_host', ['false'])[0].lower() == 'true'
+        send_snapshot = params.get('snapshot', ['true'])[0].lower() != 'false'
+
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+        logger.info(f"🔌 WebSocket connected: meeting={self.meeting_id} user={self.user_id} host={self.is_host}")
+
+        if send_snapshot:
+            snapshot = await database_sync_to_async(build_meeting_snapshot)(
+                self.meeting_id, self.user_id, self.is_host
+            )
+            await self.send_json({
+                'type': 'snapshot',
+                'meeting_id': self.meeting_id,
+                'data': snapshot,
+                'sent_at': time.time()
+            })
+
+    async def disconnect(self, close_code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+        logger.info(f"🔌 WebSocket disconnected: meeting={getattr(self, 'meeting_id', None)} code={close_code}")
+
+    async def receive_json(self, content, **kwargs):
+        # Writes still go through the HTTP endpoints; the socket is push-only
+        if content.get('type') == 'ping':
+            await self.send_json({'type': 'pong', 'sent_at': time.time()})
+
+    async def meeting_event(self, event):
+        """Handler for publish_meeting_event() group messages"""
+        category = event.get('category')
+        if category not in EVENT_CATEGORIES:
+            return
+
+        data = event.get('data') or {}
+        if category == 'chat' and event.get('event') == 'message':
+            if not can_see_chat_message(data, self.user_id, self.is_host):
+                return
+
+        await self.send_json({
+            'type': 'event',
+            'meeting_id': event.get('meeting_id'),
+            'category': category,
+            'event': event.get('event'),
+            'data': data,
+            'sent_at': event.get('sent_at')
+        })
@@ -2,6 +2,7 @@
 # Replace your existing notification methods with these
 import json
 import logging
+from core.utils.schema_bootstrap import schema_task
 import uuid
 from datetime import datetime, timedelta
 from django.http import JsonResponse
@@ -16,6 +17,7 @@ import pytz
 def short_id():
     return uuid.uuid4().hex[:20]
 
+@schema_task("tbl_Notifications", order=40)
 def ensure_notification_tables():
     """Create notification tables with proper constraints using VARCHAR(20) IDs."""
     try:
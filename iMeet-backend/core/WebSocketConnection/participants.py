@@ -3,7 +3,6 @@ from core.WebSocketConnection import enhanced_logging_config
 from django.db import connection, transaction
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
-from core.AI_Attendance.Attendance import start_attendance_tracking, stop_attendance_tracking
 from django.views.decorators.csrf import csrf_exempt
 from django.urls import path
 from django.utils import timezone
@@ -22,18 +21,12 @@ from datetime import timedelta  # Add this import at the top
 import redis
 from django.conf import settings   
 
-# Add this import section at the top after other imports
-try:
-    from core.AI_Attendance.Attendance import (
-        record_participant_join_attendance, 
-        record_participant_leave_attendance,
-        calculate_meeting_end_attendance
-    )
-    ATTENDANCE_INTEGRATION = True
-    logging.info("✅ ATTENDANCE: Enhanced integration modules loaded successfully")
-except ImportError as e:
-    ATTENDANCE_INTEGRATION = False
-    logging.warning(f"⚠️ ATTENDANCE: Enhanced integration not available - {e}")
+# Attendance (inference pool, session store, write-behind) loads on the first attendance
+# call, so workers with it in DISABLED_URL_MODULES never import it
+import importlib.util
+from core.utils.lazy_imports import lazy_import
+attendance = lazy_import("core.AI_Attendance.Attendance")
+ATTENDANCE_INTEGRATION = importlib.util.find_spec("core.AI_Attendance.Attendance") is not None
 
 # IST Timezone configuration
 IST_TIMEZONE = pytz.timezone('Asia/Kolkata')
@@ -778,7 +771,7 @@ def record_participant_join(request):
                 # Attendance integration
                 if ATTENDANCE_INTEGRATION:
                     try:
-                        record_participant_join_attendance(meeting_id, str(user_id), join_time)
+                        attendance.record_participant_join_attendance(meeting_id, str(user_id), join_time)
                         logging.info(f"✅ ATTENDANCE: Started for user {user_id}")
                     except Exception as e:
                         logging.warning(f"⚠️ ATTENDANCE: {e}")
@@ -875,7 +868,7 @@ def record_participant_leave(request):
                     
                     if ATTENDANCE_INTEGRATION:
                         try:
-                            record_participant_leave_attendance(meeting_id, str(user_id), leave_time)
+                            attendance.record_participant_leave_attendance(meeting_id, str(user_id), leave_time)
                         except Exception as e:
                             logging.warning(f"⚠️ ATTENDANCE: {e}")
                     
@@ -1056,7 +1049,7 @@ def record_participant_leave(request):
                 # Attendance integration
                 if ATTENDANCE_INTEGRATION:
                     try:
-                        record_participant_leave_attendance(meeting_id, str(user_id), leave_time)
+                        attendance.record_participant_leave_attendance(meeting_id, str(user_id), leave_time)
                     except Exception as e:
                         logging.warning(f"⚠️ ATTENDANCE: {e}")
                 
@@ -3248,7 +3241,7 @@ def end_meeting(request, meeting_id):
         # ===== Step 4: Attendance integration (AI_Attendance) =====
         if ATTENDANCE_INTEGRATION:
             try:
-                calculate_meeting_end_attendance(meeting_id, end_time)
+                attendance.calculate_meeting_end_attendance(meeting_id, end_time)
             except Exception as e:
                 logging.warning(f"⚠️ ATTENDANCE integration error: {e}")
 
@@ -4324,7 +4317,7 @@ def remove_participant_from_meeting(request):
         # Stop attendance tracking
         if ATTENDANCE_INTEGRATION:
             try:
-                stop_attendance_tracking(meeting_id, user_id_to_remove)
+                attendance.stop_attendance_tracking(meeting_id, user_id_to_remove)
                 logging.info("[REMOVE-PARTICIPANT] Stopped attendance tracking")
             except Exception as e:
                 logging.warning(f"[REMOVE-PARTICIPANT] Attendance stop error: {e}")
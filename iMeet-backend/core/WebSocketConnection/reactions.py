@@ -12,6 +12,7 @@ from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.urls import path
 from django.db import connection
+from core.WebSocketConnection.meeting_events import publish_meeting_event
 
 # Configure logging
 logger = logging.getLogger('cache_reactions')
@@ -201,6 +202,23 @@ class CacheOnlyReactionsManager:
                 self.redis_client.set(status_key, json.dumps(status_data))
             
             logger.info(f"😊 User {user_id} ({user_name}) added reaction {emoji} in meeting {meeting_id}")
+            
+            # Same shape as get_active_reactions() entries
+            publish_meeting_event(meeting_id, 'reactions', 'reaction_added', {
+                'id': reaction_data['id'],
+                'user_id': reaction_data['user_id'],
+                'user': {
+                    'user_id': reaction_data['user_id'],
+                    'full_name': reaction_data['user_name'],
+                    'profile_picture': None
+                },
+                'emoji': emoji,
+                'reaction_type': reaction_type,
+                'timestamp': reaction_data['created_at'],
+                'participant_identity': participant_identity,
+                'expires_at': reaction_data['expires_at'],
+                'time_remaining': CACHE_SETTINGS['REACTION_DISPLAY_TTL']
+            })
             return True
             
         except Exception as e:
@@ -350,6 +368,7 @@ class CacheOnlyReactionsManager:
             self.redis_client.delete(reactions_key)
             
             logger.info(f"🧹 Host {host_user_id} cleared {reactions_count} reactions in meeting {meeting_id}")
+            publish_meeting_event(meeting_id, 'reactions', 'reactions_cleared', {'cleared_by': str(host_user_id)})
             return reactions_count
             
         except Exception as e:
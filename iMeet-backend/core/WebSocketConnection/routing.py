@@ -23,5 +23,6 @@ from .meetings_consumers import MeetingConsumer
 
 websocket_urlpatterns = [
     # FIXED: Handle all meeting ID formats including instant
-    re_path(r'wss/meeting/(?P<meeting_id>[^/]+)/$', MeetingConsumer.as_asgi()),
-]
\ No newline at end of file
+    re_path(r'^wss/meeting/(?P<meeting_id>[^/]+)/?$', MeetingConsumer.as_asgi()),
+    re_path(r'^ws/meeting/(?P<meeting_id>[^/]+)/?$', MeetingConsumer.as_asgi()),
+]
@@ -15,6 +15,7 @@ import traceback
 from redis.connection import ConnectionPool
 from redis.retry import Retry
 from redis.backoff import ExponentialBackoff
+from core.WebSocketConnection.meeting_events import publish_meeting_event
 
 logger = logging.getLogger('whiteboard')
 IST_TIMEZONE = pytz.timezone("Asia/Kolkata")
@@ -113,7 +114,12 @@ CACHE_KEYS = {
     'undo_stack': 'whiteboard:undo:{meeting_id}',
     'redo_stack': 'whiteboard:redo:{meeting_id}',
     'checkpoints': 'whiteboard:checkpoints:{meeting_id}',
-    'permissions': 'whiteboard:permissions:{meeting_id}'
+    'permissions': 'whiteboard:permissions:{meeting_id}',
+    'items': 'whiteboard:items:{meeting_id}',
+    'order': 'whiteboard:order:{meeting_id}',
+    'seq': 'whiteboard:seq:{meeting_id}',
+    'stroke_log': 'whiteboard:log:{meeting_id}',
+    'log_floor': 'whiteboard:log_floor:{meeting_id}'
 }
 
 # Cache TTL (Time To Live) in seconds
@@ -129,6 +135,12 @@ CACHE_TTL = {
     'permissions': 3600
 }
 
+# Undo/redo depth per meeting
+MAX_HISTORY_ACTIONS = 50
+
+# Stroke log entries kept before the board is compacted into a checkpoint
+WHITEBOARD_LOG_COMPACT_THRESHOLD = int(os.getenv("WHITEBOARD_LOG_COMPACT_THRESHOLD", 2000))
+
 # ============================================
 # WHITEBOARDCACHE CLASS - OPTIMIZED
 # ============================================
@@ -195,61 +207,341 @@ class WhiteboardCache:
         return WhiteboardCache.safe_redis_operation(operation, False)
     
     # ============================================
-    # DRAWINGS MANAGEMENT
+    # DRAWINGS MANAGEMENT - APPEND-ONLY STROKE LOG
     # ============================================
+    #
+    # Board state lives in three keys per meeting:
+    #   items  - hash drawing_id -> drawing JSON (current state)
+    #   order  - sorted set drawing_id scored by insertion sequence (z-order)
+    #   log    - Redis stream of operations; stream IDs are the sync cursor
+    #
+    # Adding a stroke is a single MULTI (HSET + ZADD + XADD), so cost does not
+    # grow with board size and concurrent drawers cannot overwrite each other.
+    # Log entries are idempotent upserts/removals by drawing_id, so a client may
+    # replay ops it already has. Once the log grows past the compaction
+    # threshold the board is snapshotted through save_checkpoint() and entries
+    # before that point are trimmed; cursors older than the trim point get a
+    # full resync.
+    
+    @staticmethod
+    def _drawing_keys(meeting_id: str) -> Dict[str, str]:
+        return {
+            'items': CACHE_KEYS['items'].format(meeting_id=meeting_id),
+            'order': CACHE_KEYS['order'].format(meeting_id=meeting_id),
+            'seq': CACHE_KEYS['seq'].format(meeting_id=meeting_id),
+            'log': CACHE_KEYS['stroke_log'].format(meeting_id=meeting_id),
+            'log_floor': CACHE_KEYS['log_floor'].format(meeting_id=meeting_id),
+        }
+    
+    @staticmethod
+    def _refresh_ttl(pipe, keys: Dict[str, str]):
+        for name in ('items', 'order', 'seq', 'log', 'log_floor'):
+            pipe.expire(keys[name], CACHE_TTL['drawings'])
+    
+    @staticmethod
+    def _log_entry(op: str, drawings: List[Dict] = None, drawing_ids: List[str] = None) -> Dict[str, str]:
+        entry = {'op': op}
+        if drawings is not None:
+            entry['drawings'] = json.dumps(drawings)
+        if drawing_ids is not None:
+            entry['drawing_ids'] = json.dumps(drawing_ids)
+        return entry
+    
+    @staticmethod
+    def _decode_log_entry(entry_id, fields) -> Dict:
+        op = {'cursor': entry_id, 'op': fields.get('op')}
+        if 'drawings' in fields:
+            op['drawings'] = json.loads(fields['drawings'])
+        if 'drawing_ids' in fields:
+            op['drawing_ids'] = json.loads(fields['drawing_ids'])
+        return op
+    
+    @staticmethod
+    def _parse_cursor(cursor) -> tuple:
+        """Stream ID 'ms-seq' -> (ms, seq) for ordering comparisons"""
+        try:
+            ms, _, seq = str(cursor).partition('-')
+            return int(ms), int(seq or 0)
+        except (TypeError, ValueError):
+            return 0, 0
+    
+    @staticmethod
+    def _next_scores(keys: Dict[str, str], count: int) -> List[int]:
+        """Reserve `count` z-order positions at the top of the board"""
+        last = redis_client.incrby(keys['seq'], count)
+        return list(range(last - count + 1, last + 1))
+    
+    @staticmethod
+    def _migrate_legacy_drawings(meeting_id: str, keys: Dict[str, str]):
+        """Move a pre-stroke-log JSON blob into the items/order keys once"""
+        legacy_key = CACHE_KEYS['drawings'].format(meeting_id=meeting_id)
+        data = redis_client.get(legacy_key)
+        if not data:
+            return
+        drawings = [d for d in json.loads(data) if isinstance(d, dict)]
+        for drawing in drawings:
+            drawing.setdefault('drawing_id', str(uuid.uuid4()))
+        if drawings and not redis_client.exists(keys['order']):
+            scores = WhiteboardCache._next_scores(keys, len(drawings))
+            pipe = redis_client.pipeline(transaction=True)
+            pipe.hset(keys['items'], mapping={d['drawing_id']: json.dumps(d) for d in drawings})
+            pipe.zadd(keys['order'], {d['drawing_id']: s for d, s in zip(drawings, scores)})
+            pipe.xadd(keys['log'], WhiteboardCache._log_entry('reset', drawings=drawings))
+            WhiteboardCache._refresh_ttl(pipe, keys)
+            pipe.execute()
+            logger.info(f"🔁 Migrated {len(drawings)} legacy drawings to stroke log for meeting {meeting_id}")
+        redis_client.delete(legacy_key)
+    
+    @staticmethod
+    def _append_log(meeting_id: str, keys: Dict[str, str], pipe, entry: Dict[str, str]) -> Optional[str]:
+        """Add the log entry to a write pipeline, execute it and return the new cursor"""
+        xadd_index = len(pipe)
+        pipe.xadd(keys['log'], entry)
+        WhiteboardCache._refresh_ttl(pipe, keys)
+        pipe.xlen(keys['log'])
+        results = pipe.execute()
+        cursor = results[xadd_index]
+        log_length = results[-1]
+        
+        if log_length > WHITEBOARD_LOG_COMPACT_THRESHOLD:
+            WhiteboardCache.compact_stroke_log(meeting_id)
+        
+        return cursor
     
     @staticmethod
     def get_drawings(meeting_id: str) -> List[Dict]:
-        """Get all drawings from cache - OPTIMIZED LOGGING"""
+        """Get all drawings in z-order"""
+        state = WhiteboardCache.get_board_snapshot(meeting_id)
+        return state['drawings']
+    
+    @staticmethod
+    def get_board_snapshot(meeting_id: str) -> Dict:
+        """Atomic read of all drawings plus the log cursor they correspond to"""
         def operation():
-            key = CACHE_KEYS['drawings'].format(meeting_id=meeting_id)
-            data = redis_client.get(key)
-            result = json.loads(data) if data else []
+            keys = WhiteboardCache._drawing_keys(meeting_id)
+            if not redis_client.exists(keys['order']):
+                WhiteboardCache._migrate_legacy_drawings(meeting_id, keys)
+            
+            pipe = redis_client.pipeline(transaction=True)
+            pipe.xrevrange(keys['log'], count=1)
+            pipe.zrange(keys['order'], 0, -1)
+            pipe.hgetall(keys['items'])
+            last_entry, ordered_ids, items = pipe.execute()
+            
+            drawings = [json.loads(items[drawing_id]) for drawing_id in ordered_ids if drawing_id in items]
+            cursor = last_entry[0][0] if last_entry else '0-0'
             
             # ✅ FIXED: Only log occasionally, use DEBUG level
             if log_limiter.should_log(f"get_drawings_{meeting_id}"):
-                logger.debug(f"📊 Retrieved {len(result)} drawings from cache")
+                logger.debug(f"📊 Retrieved {len(drawings)} drawings from cache")
             
-            return result
+            return {'drawings': drawings, 'cursor': cursor}
+        
+        result = WhiteboardCache.safe_redis_operation(operation, None)
+        return result if isinstance(result, dict) else {'drawings': [], 'cursor': '0-0'}
+    
+    @staticmethod
+    def get_drawings_by_ids(meeting_id: str, drawing_ids: List[str]) -> List[Dict]:
+        """Fetch only the listed drawings (missing ids are skipped)"""
+        if not drawing_ids:
+            return []
+        
+        def operation():
+            keys = WhiteboardCache._drawing_keys(meeting_id)
+            values = redis_client.hmget(keys['items'], drawing_ids)
+            return [json.loads(v) for v in values if v]
         
         result = WhiteboardCache.safe_redis_operation(operation, [])
         return result if isinstance(result, list) else []
     
     @staticmethod
-    def set_drawings(meeting_id: str, drawings: List[Dict]) -> bool:
-        """Save drawings to cache - OPTIMIZED LOGGING"""
+    def count_drawings(meeting_id: str) -> int:
         def operation():
-            key = CACHE_KEYS['drawings'].format(meeting_id=meeting_id)
-            
-            # ✅ FIXED: Only log occasionally, use DEBUG level
-            if log_limiter.should_log(f"set_drawings_{meeting_id}"):
-                logger.debug(f"💾 Saving {len(drawings)} drawings to cache")
+            return redis_client.zcard(WhiteboardCache._drawing_keys(meeting_id)['order'])
+        
+        return WhiteboardCache.safe_redis_operation(operation, 0) or 0
+    
+    @staticmethod
+    def get_changes_since(meeting_id: str, cursor: str, limit: int = 1000) -> Dict:
+        """
+        Log entries after `cursor`.
+        
+        Returns:
+            {'ops': [...], 'cursor': latest cursor, 'full_sync': bool,
+             'has_more': bool}. full_sync means the cursor predates the last
+            compaction and the caller must reload the whole board.
+        """
+        def operation():
+            keys = WhiteboardCache._drawing_keys(meeting_id)
+            floor = redis_client.get(keys['log_floor'])
+            if floor and WhiteboardCache._parse_cursor(cursor) < WhiteboardCache._parse_cursor(floor):
+                return {'ops': [], 'cursor': cursor, 'full_sync': True, 'has_more': False}
+            
+            entries = redis_client.xrange(keys['log'], min=f"({cursor}", max='+', count=limit + 1)
+            has_more = len(entries) > limit
+            entries = entries[:limit]
+            ops = [WhiteboardCache._decode_log_entry(entry_id, fields) for entry_id, fields in entries]
+            
+            return {
+                'ops': ops,
+                'cursor': ops[-1]['cursor'] if ops else cursor,
+                'full_sync': False,
+                'has_more': has_more
+            }
+        
+        result = WhiteboardCache.safe_redis_operation(operation, None)
+        if not isinstance(result, dict):
+            return {'ops': [], 'cursor': cursor, 'full_sync': True, 'has_more': False}
+        return result
+    
+    @staticmethod
+    def add_drawing(meeting_id: str, drawing: Dict) -> bool:
+        """Append a single drawing - O(1), no read of the existing board"""
+        cursor = WhiteboardCache.add_drawings(meeting_id, [drawing])
+        return cursor is not None
+    
+    @staticmethod
+    def add_drawings(meeting_id: str, drawings: List[Dict], scores: List[float] = None) -> Optional[str]:
+        """
+        Upsert drawings on top of the board (or at the given z-order scores).
+        
+        Returns:
+            New log cursor, or None on failure
+        """
+        if not drawings:
+            return None
+        
+        def operation():
+            keys = WhiteboardCache._drawing_keys(meeting_id)
+            positions = scores or WhiteboardCache._next_scores(keys, len(drawings))
+            
+            pipe = redis_client.pipeline(transaction=True)
+            pipe.hset(keys['items'], mapping={d['drawing_id']: json.dumps(d) for d in drawings})
+            pipe.zadd(keys['order'], {d['drawing_id']: s for d, s in zip(drawings, positions)})
+            cursor = WhiteboardCache._append_log(
+                meeting_id, keys, pipe, WhiteboardCache._log_entry('add', drawings=drawings)
+            )
             
-            redis_client.setex(key, CACHE_TTL['drawings'], json.dumps(drawings))
+            # ✅ FIXED: Only log important events
+            if log_limiter.should_log(f"drawing_added_{meeting_id}"):
+                logger.debug(f"✅ {len(drawings)} drawing(s) added at cursor {cursor}")
             
-            # ✅ FIXED: Remove verification logging (too verbose)
-            # Verification is implicit - if setex succeeds, data is saved
+            return cursor
+        
+        cursor = WhiteboardCache.safe_redis_operation(operation, None)
+        if cursor:
+            if len(drawings) == 1:
+                publish_meeting_event(meeting_id, 'whiteboard', 'drawing_added', {
+                    'drawing': drawings[0],
+                    'cursor': cursor
+                })
+            else:
+                publish_meeting_event(meeting_id, 'whiteboard', 'drawings_added', {
+                    'drawings': drawings,
+                    'cursor': cursor
+                })
+        return cursor
+    
+    @staticmethod
+    def update_drawings(meeting_id: str, drawings: List[Dict]) -> Optional[str]:
+        """Replace existing drawings in place (z-order unchanged)"""
+        if not drawings:
+            return None
+        
+        def operation():
+            keys = WhiteboardCache._drawing_keys(meeting_id)
+            pipe = redis_client.pipeline(transaction=True)
+            pipe.hset(keys['items'], mapping={d['drawing_id']: json.dumps(d) for d in drawings})
+            return WhiteboardCache._append_log(
+                meeting_id, keys, pipe, WhiteboardCache._log_entry('update', drawings=drawings)
+            )
+        
+        cursor = WhiteboardCache.safe_redis_operation(operation, None)
+        if cursor:
+            publish_meeting_event(meeting_id, 'whiteboard', 'drawings_updated', {
+                'drawings': drawings,
+                'cursor': cursor
+            })
+        return cursor
+    
+    @staticmethod
+    def remove_drawings(meeting_id: str, drawing_ids: List[str]) -> Optional[Dict]:
+        """
+        Remove drawings by id.
+        
+        Returns:
+            {'removed': [drawings], 'scores': {drawing_id: z-order}, 'cursor': str}
+            (scores let an undo put items back where they were), or None
+        """
+        if not drawing_ids:
+            return None
+        
+        def operation():
+            keys = WhiteboardCache._drawing_keys(meeting_id)
+            read = redis_client.pipeline(transaction=False)
+            read.hmget(keys['items'], drawing_ids)
+            for drawing_id in drawing_ids:
+                read.zscore(keys['order'], drawing_id)
+            values, *scores = read.execute()
+            
+            removed = []
+            removed_scores = {}
+            for drawing_id, value, score in zip(drawing_ids, values, scores):
+                if value:
+                    removed.append(json.loads(value))
+                    removed_scores[drawing_id] = score
+            
+            if not removed:
+                return {'removed': [], 'scores': {}, 'cursor': None}
+            
+            removed_ids = list(removed_scores.keys())
+            pipe = redis_client.pipeline(transaction=True)
+            pipe.hdel(keys['items'], *removed_ids)
+            pipe.zrem(keys['order'], *removed_ids)
+            cursor = WhiteboardCache._append_log(
+                meeting_id, keys, pipe, WhiteboardCache._log_entry('remove', drawing_ids=removed_ids)
+            )
             
-            return True
+            return {'removed': removed, 'scores': removed_scores, 'cursor': cursor}
         
-        return WhiteboardCache.safe_redis_operation(operation, False)
+        result = WhiteboardCache.safe_redis_operation(operation, None)
+        if result and result['cursor']:
+            publish_meeting_event(meeting_id, 'whiteboard', 'drawings_removed', {
+                'drawing_ids': list(result['scores'].keys()),
+                'cursor': result['cursor']
+            })
+        return result
     
     @staticmethod
-    def add_drawing(meeting_id: str, drawing: Dict) -> bool:
-        """Add a single drawing to cache - OPTIMIZED LOGGING"""
-        try:
-            drawings = WhiteboardCache.get_drawings(meeting_id)
-            drawings.append(drawing)
-            success = WhiteboardCache.set_drawings(meeting_id, drawings)
+    def set_drawings(meeting_id: str, drawings: List[Dict]) -> bool:
+        """Replace the whole board (clear, checkpoint restore, session init)"""
+        def operation():
+            keys = WhiteboardCache._drawing_keys(meeting_id)
             
-            # ✅ FIXED: Only log important events
-            if success and log_limiter.should_log(f"drawing_added_{meeting_id}"):
-                logger.debug(f"✅ Drawing added, total: {len(drawings)}")
+            # ✅ FIXED: Only log occasionally, use DEBUG level
+            if log_limiter.should_log(f"set_drawings_{meeting_id}"):
+                logger.debug(f"💾 Saving {len(drawings)} drawings to cache")
             
-            return success
-        except Exception as e:
-            logger.error(f"❌ Error adding drawing: {e}")
-            return False
+            positions = WhiteboardCache._next_scores(keys, len(drawings)) if drawings else []
+            pipe = redis_client.pipeline(transaction=True)
+            pipe.delete(keys['items'], keys['order'])
+            if drawings:
+                pipe.hset(keys['items'], mapping={d['drawing_id']: json.dumps(d) for d in drawings})
+                pipe.zadd(keys['order'], {d['drawing_id']: s for d, s in zip(drawings, positions)})
+            entry = WhiteboardCache._log_entry('reset', drawings=drawings) if drawings else WhiteboardCache._log_entry('clear')
+            return WhiteboardCache._append_log(meeting_id, keys, pipe, entry)
+        
+        cursor = WhiteboardCache.safe_redis_operation(operation, None)
+        if cursor:
+            if drawings:
+                publish_meeting_event(meeting_id, 'whiteboard', 'drawings_replaced', {
+                    'drawings': drawings,
+                    'total_drawings': len(drawings),
+                    'cursor': cursor
+                })
+            else:
+                publish_meeting_event(meeting_id, 'whiteboard', 'cleared', {'cursor': cursor})
+        return cursor is not None
     
     @staticmethod
     def clear_drawings(meeting_id: str) -> bool:
@@ -259,6 +551,44 @@ class WhiteboardCache:
             logger.info(f"🗑️ Cleared all drawings for meeting {meeting_id}")
         return success
     
+    @staticmethod
+    def compact_stroke_log(meeting_id: str) -> bool:
+        """Snapshot the board into a checkpoint and trim the log up to it"""
+        try:
+            snapshot = WhiteboardCache.get_board_snapshot(meeting_id)
+            cursor = snapshot['cursor']
+            if cursor == '0-0':
+                return False
+            
+            checkpoint_data = {
+                'meeting_id': meeting_id,
+                'drawings': snapshot['drawings'],
+                'settings': WhiteboardCache.get_settings(meeting_id),
+                'total_drawings': len(snapshot['drawings']),
+                'created_by': 'system',
+                'name': f'Auto checkpoint {timezone.now().strftime("%H:%M:%S")}',
+                'checkpoint_timestamp': timezone.now().isoformat(),
+                'log_cursor': cursor,
+                'auto_compaction': True
+            }
+            if not WhiteboardCache.save_checkpoint(meeting_id, checkpoint_data):
+                return False
+            
+            def operation():
+                keys = WhiteboardCache._drawing_keys(meeting_id)
+                pipe = redis_client.pipeline(transaction=True)
+                pipe.set(keys['log_floor'], cursor, ex=CACHE_TTL['drawings'])
+                pipe.xtrim(keys['log'], minid=cursor)
+                trimmed = pipe.execute()[-1]
+                logger.info(f"🗜️ Compacted whiteboard log for meeting {meeting_id}: trimmed {trimmed} ops up to {cursor}")
+                return True
+            
+            return WhiteboardCache.safe_redis_operation(operation, False)
+        except Exception as e:
+            logger.error(f"❌ Error compacting whiteboard log: {e}")
+            return False
+    
+    
     # ============================================
     # SETTINGS MANAGEMENT
     # ============================================
@@ -296,170 +626,210 @@ class WhiteboardCache:
             
             return True
         
-        return WhiteboardCache.safe_redis_operation(operation, False)
+        success = WhiteboardCache.safe_redis_operation(operation, False)
+        if success:
+            publish_meeting_event(meeting_id, 'whiteboard', 'settings_updated', {'settings': settings})
+        return success
     
     # ============================================
-    # UNDO STACK MANAGEMENT
+    # UNDO / REDO STACK MANAGEMENT
     # ============================================
+    #
+    # Each stack is a Redis list of small inverse-operation records (ids plus
+    # deltas, see apply_history_action), so push/pop are O(1) and the stacks
+    # no longer hold copies of the whole board.
     
     @staticmethod
-    def get_undo_stack(meeting_id: str) -> List[Dict]:
-        """Get undo stack from cache - OPTIMIZED LOGGING"""
+    def _stack_key(kind: str, meeting_id: str) -> str:
+        return CACHE_KEYS[f'{kind}_stack'].format(meeting_id=meeting_id)
+    
+    @staticmethod
+    def _migrate_legacy_stack(key: str):
+        """Convert a pre-list JSON-array stack in place"""
+        data = redis_client.get(key)
+        actions = json.loads(data) if data else []
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.delete(key)
+        if actions:
+            pipe.rpush(key, *[json.dumps(a) for a in actions[-MAX_HISTORY_ACTIONS:]])
+        pipe.execute()
+    
+    @staticmethod
+    def _stack_operation(kind: str, meeting_id: str, func, default_value=None):
+        """Run func(key) on a stack list, migrating an old JSON-array stack on WRONGTYPE"""
+        key = WhiteboardCache._stack_key(kind, meeting_id)
+        
         def operation():
-            key = CACHE_KEYS['undo_stack'].format(meeting_id=meeting_id)
-            data = redis_client.get(key)
-            result = json.loads(data) if data else []
-            
-            # ✅ FIXED: Only log occasionally, use DEBUG level
-            if log_limiter.should_log(f"get_undo_{meeting_id}"):
-                logger.debug(f"📊 Undo stack: {len(result)} items")
-            
-            return result
+            try:
+                return func(key)
+            except redis.ResponseError as e:
+                if 'WRONGTYPE' not in str(e):
+                    raise
+                WhiteboardCache._migrate_legacy_stack(key)
+                return func(key)
+        
+        return WhiteboardCache.safe_redis_operation(operation, default_value)
+    
+    @staticmethod
+    def _publish_stack_count(meeting_id: str, kind: str, count: int):
+        publish_meeting_event(meeting_id, 'whiteboard', f'{kind}_stack_changed', {
+            f'{kind}_count': count,
+            f'can_{kind}': count > 0
+        })
+    
+    @staticmethod
+    def _get_stack(kind: str, meeting_id: str) -> List[Dict]:
+        def func(key):
+            return [json.loads(a) for a in redis_client.lrange(key, 0, -1)]
         
-        result = WhiteboardCache.safe_redis_operation(operation, [])
+        result = WhiteboardCache._stack_operation(kind, meeting_id, func, [])
         return result if isinstance(result, list) else []
     
     @staticmethod
-    def set_undo_stack(meeting_id: str, undo_stack: List[Dict]) -> bool:
-        """Save undo stack to cache - OPTIMIZED LOGGING"""
-        def operation():
-            key = CACHE_KEYS['undo_stack'].format(meeting_id=meeting_id)
-            undo_stack_limited = undo_stack[-50:]  # Keep only last 50 actions
-            redis_client.setex(key, CACHE_TTL['undo_stack'], json.dumps(undo_stack_limited))
-            
-            # ✅ FIXED: Only log occasionally, use DEBUG level
-            if log_limiter.should_log(f"set_undo_{meeting_id}"):
-                logger.debug(f"📝 Undo stack updated: {len(undo_stack_limited)} items (max=50)")
-            
+    def _set_stack(kind: str, meeting_id: str, actions: List[Dict]) -> bool:
+        actions_limited = actions[-MAX_HISTORY_ACTIONS:]
+        
+        def func(key):
+            pipe = redis_client.pipeline(transaction=True)
+            pipe.delete(key)
+            if actions_limited:
+                pipe.rpush(key, *[json.dumps(a) for a in actions_limited])
+                pipe.expire(key, CACHE_TTL[f'{kind}_stack'])
+            pipe.execute()
             return True
         
-        return WhiteboardCache.safe_redis_operation(operation, False)
+        success = WhiteboardCache._stack_operation(kind, meeting_id, func, False)
+        if success:
+            WhiteboardCache._publish_stack_count(meeting_id, kind, len(actions_limited))
+        return success
     
     @staticmethod
-    def push_undo_action(meeting_id: str, action: Dict) -> bool:
-        """Push action to undo stack - OPTIMIZED LOGGING"""
-        try:
-            # ✅ FIXED: Only log important undo operations
-            if log_limiter.should_log(f"push_undo_{meeting_id}"):
-                logger.debug(f"🔖 Pushing undo action for meeting {meeting_id}")
-            
-            undo_stack = WhiteboardCache.get_undo_stack(meeting_id)
-            undo_stack.append(action)
-            success = WhiteboardCache.set_undo_stack(meeting_id, undo_stack)
-            
-            # ✅ FIXED: Remove verification logging (handled by set_undo_stack)
-            
-            return success
-        except Exception as e:
-            logger.error(f"❌ Error pushing undo action: {e}")
+    def _push_stack(kind: str, meeting_id: str, action: Dict) -> bool:
+        def func(key):
+            pipe = redis_client.pipeline(transaction=True)
+            pipe.rpush(key, json.dumps(action))
+            pipe.ltrim(key, -MAX_HISTORY_ACTIONS, -1)
+            pipe.expire(key, CACHE_TTL[f'{kind}_stack'])
+            pipe.llen(key)
+            return pipe.execute()[-1]
+        
+        count = WhiteboardCache._stack_operation(kind, meeting_id, func, None)
+        if count is None:
             return False
+        WhiteboardCache._publish_stack_count(meeting_id, kind, count)
+        return True
+    
+    @staticmethod
+    def _pop_stack(kind: str, meeting_id: str) -> Optional[Dict]:
+        def func(key):
+            pipe = redis_client.pipeline(transaction=True)
+            pipe.rpop(key)
+            pipe.llen(key)
+            return pipe.execute()
+        
+        result = WhiteboardCache._stack_operation(kind, meeting_id, func, None)
+        if not result or result[0] is None:
+            return None
+        
+        raw_action, remaining = result
+        WhiteboardCache._publish_stack_count(meeting_id, kind, remaining)
+        return json.loads(raw_action)
+    
+    @staticmethod
+    def _stack_count(kind: str, meeting_id: str) -> int:
+        def func(key):
+            return redis_client.llen(key)
+        
+        return WhiteboardCache._stack_operation(kind, meeting_id, func, 0) or 0
+    
+    @staticmethod
+    def get_undo_stack(meeting_id: str) -> List[Dict]:
+        """Get undo stack from cache"""
+        return WhiteboardCache._get_stack('undo', meeting_id)
+    
+    @staticmethod
+    def get_undo_count(meeting_id: str) -> int:
+        """Number of actions on the undo stack"""
+        return WhiteboardCache._stack_count('undo', meeting_id)
+    
+    @staticmethod
+    def set_undo_stack(meeting_id: str, undo_stack: List[Dict]) -> bool:
+        """Replace the undo stack (keeps the last MAX_HISTORY_ACTIONS)"""
+        return WhiteboardCache._set_stack('undo', meeting_id, undo_stack)
+    
+    @staticmethod
+    def push_undo_action(meeting_id: str, action: Dict) -> bool:
+        """Push action to undo stack - O(1)"""
+        # ✅ FIXED: Only log important undo operations
+        if log_limiter.should_log(f"push_undo_{meeting_id}"):
+            logger.debug(f"🔖 Pushing undo action for meeting {meeting_id}")
+        return WhiteboardCache._push_stack('undo', meeting_id, action)
     
     @staticmethod
     def pop_undo_action(meeting_id: str) -> Optional[Dict]:
         """Pop action from undo stack - KEEP LOGGING (important event)"""
-        try:
-            undo_stack = WhiteboardCache.get_undo_stack(meeting_id)
-            if not undo_stack:
-                logger.warning(f"⚠️ Undo stack is empty for meeting {meeting_id}")
-                return None
-            
-            action = undo_stack.pop()
-            WhiteboardCache.set_undo_stack(meeting_id, undo_stack)
-            
-            # Log undo operations (important for debugging)
-            logger.info(f"↩️ Undo action popped. Stack: {len(undo_stack)} items remaining")
-            
-            return action
-        except Exception as e:
-            logger.error(f"❌ Error popping undo action: {e}")
+        action = WhiteboardCache._pop_stack('undo', meeting_id)
+        if action is None:
+            logger.warning(f"⚠️ Undo stack is empty for meeting {meeting_id}")
             return None
-    
-    # ============================================
-    # REDO STACK MANAGEMENT
-    # ============================================
+        
+        # Log undo operations (important for debugging)
+        logger.info(f"↩️ Undo action popped: {action.get('type')}")
+        return action
     
     @staticmethod
     def get_redo_stack(meeting_id: str) -> List[Dict]:
-        """Get redo stack from cache - OPTIMIZED LOGGING"""
-        def operation():
-            key = CACHE_KEYS['redo_stack'].format(meeting_id=meeting_id)
-            data = redis_client.get(key)
-            result = json.loads(data) if data else []
-            
-            # ✅ FIXED: Only log occasionally, use DEBUG level
-            if log_limiter.should_log(f"get_redo_{meeting_id}"):
-                logger.debug(f"🔁 Redo stack: {len(result)} items")
-            
-            return result
-        
-        result = WhiteboardCache.safe_redis_operation(operation, [])
-        return result if isinstance(result, list) else []
+        """Get redo stack from cache"""
+        return WhiteboardCache._get_stack('redo', meeting_id)
+    
+    @staticmethod
+    def get_redo_count(meeting_id: str) -> int:
+        """Number of actions on the redo stack"""
+        return WhiteboardCache._stack_count('redo', meeting_id)
     
     @staticmethod
     def set_redo_stack(meeting_id: str, redo_stack: List[Dict]) -> bool:
-        """Save redo stack to cache - OPTIMIZED LOGGING"""
-        def operation():
-            key = CACHE_KEYS['redo_stack'].format(meeting_id=meeting_id)
-            redo_stack_limited = redo_stack[-50:]  # Keep only last 50 actions
-            redis_client.setex(key, CACHE_TTL['redo_stack'], json.dumps(redo_stack_limited))
-            
-            # ✅ FIXED: Only log occasionally, use DEBUG level
-            if log_limiter.should_log(f"set_redo_{meeting_id}"):
-                logger.debug(f"🔁 Redo stack updated: {len(redo_stack_limited)} items")
-            
-            return True
-        
-        return WhiteboardCache.safe_redis_operation(operation, False)
+        """Replace the redo stack (keeps the last MAX_HISTORY_ACTIONS)"""
+        return WhiteboardCache._set_stack('redo', meeting_id, redo_stack)
     
     @staticmethod
     def push_redo_action(meeting_id: str, action: Dict) -> bool:
-        """Push action to redo stack - OPTIMIZED LOGGING"""
-        try:
-            # ✅ FIXED: Only log important redo operations
-            if log_limiter.should_log(f"push_redo_{meeting_id}"):
-                logger.debug(f"🔖 Pushing redo action for meeting {meeting_id}")
-            
-            redo_stack = WhiteboardCache.get_redo_stack(meeting_id)
-            redo_stack.append(action)
-            success = WhiteboardCache.set_redo_stack(meeting_id, redo_stack)
-            
-            # ✅ FIXED: Remove verification logging
-            
-            return success
-        except Exception as e:
-            logger.error(f"❌ Error pushing redo action: {e}")
-            return False
+        """Push action to redo stack - O(1)"""
+        # ✅ FIXED: Only log important redo operations
+        if log_limiter.should_log(f"push_redo_{meeting_id}"):
+            logger.debug(f"🔖 Pushing redo action for meeting {meeting_id}")
+        return WhiteboardCache._push_stack('redo', meeting_id, action)
     
     @staticmethod
     def pop_redo_action(meeting_id: str) -> Optional[Dict]:
         """Pop action from redo stack - KEEP LOGGING (important event)"""
-        try:
-            redo_stack = WhiteboardCache.get_redo_stack(meeting_id)
-            if not redo_stack:
-                logger.warning(f"⚠️ Redo stack is empty for meeting {meeting_id}")
-                return None
-            
-            action = redo_stack.pop()
-            WhiteboardCache.set_redo_stack(meeting_id, redo_stack)
-            
-            # Log redo operations (important for debugging)
-            logger.info(f"↪️ Redo action popped. Stack: {len(redo_stack)} items remaining")
-            
-            return action
-        except Exception as e:
-            logger.error(f"❌ Error popping redo action: {e}")
+        action = WhiteboardCache._pop_stack('redo', meeting_id)
+        if action is None:
+            logger.warning(f"⚠️ Redo stack is empty for meeting {meeting_id}")
             return None
+        
+        # Log redo operations (important for debugging)
+        logger.info(f"↪️ Redo action popped: {action.get('type')}")
+        return action
     
     @staticmethod
     def clear_redo_stack(meeting_id: str) -> bool:
-        """Clear redo stack - OPTIMIZED LOGGING"""
-        success = WhiteboardCache.set_redo_stack(meeting_id, [])
+        """Clear redo stack - O(1)"""
+        def func(key):
+            return redis_client.delete(key)
+        
+        deleted = WhiteboardCache._stack_operation('redo', meeting_id, func, None)
+        if deleted is None:
+            return False
+        if deleted:
+            WhiteboardCache._publish_stack_count(meeting_id, 'redo', 0)
         
         # ✅ FIXED: Only log occasionally
-        if success and log_limiter.should_log(f"clear_redo_{meeting_id}"):
+        if log_limiter.should_log(f"clear_redo_{meeting_id}"):
             logger.debug(f"🧹 Cleared redo stack for meeting {meeting_id}")
         
-        return success
+        return True
+    
     
     # ============================================
     # CHECKPOINT MANAGEMENT
@@ -481,6 +851,9 @@ class WhiteboardCache:
         """Save checkpoint to cache - KEEP LOGGING (important event)"""
         try:
             checkpoints = WhiteboardCache.get_checkpoints(meeting_id)
+            if checkpoint_data.get('auto_compaction'):
+                # Only the latest compaction snapshot is worth keeping
+                checkpoints = [c for c in checkpoints if not c.get('data', {}).get('auto_compaction')]
             checkpoint = {
                 'id': str(uuid.uuid4()),
                 'name': checkpoint_data.get('name', f'Checkpoint {len(checkpoints) + 1}'),
@@ -547,6 +920,211 @@ class WhiteboardCache:
             return False
 
 
+# ================================
+# UNDO / REDO INVERSE OPERATIONS
+# ================================
+#
+# History actions store only what changed:
+#   add_drawing / add_text  - the added drawing (undo removes it by id)
+#   delete_selected         - the removed drawings and their z-order scores
+#   move_selected           - ids plus delta_x / delta_y
+#   update_text             - {field: {'from': old, 'to': new}}
+#   clear_whiteboard / navigate_to_checkpoint - the replaced board (these
+#       replace everything, so the previous board is the minimal inverse)
+# Actions written before this format (with a full 'previous_state') are
+# still understood and are converted on their first undo.
+
+# update_text request field -> stored drawing field
+TEXT_UPDATE_FIELDS = {
+    'text': 'text_content',
+    'x': 'x',
+    'y': 'y',
+    'font_size': 'font_size',
+    'color': 'stroke_color',
+    'width': 'width',
+    'height': 'height',
+}
+
+
+def translate_drawing(drawing: Dict, delta_x, delta_y, timestamp: str) -> Dict:
+    """Copy of a drawing shifted by (delta_x, delta_y)"""
+    moved_drawing = drawing.copy()
+    
+    # Handle different drawing types
+    if drawing.get('tool_type') == 'text':
+        moved_drawing['x'] = drawing.get('x', 0) + delta_x
+        moved_drawing['y'] = drawing.get('y', 0) + delta_y
+    else:
+        # For path-based drawings, move all points
+        if 'drawing_data' in drawing and 'points' in drawing['drawing_data']:
+            moved_drawing['drawing_data'] = drawing['drawing_data'].copy()
+            moved_drawing['drawing_data']['points'] = [
+                {'x': pt['x'] + delta_x, 'y': pt['y'] + delta_y}
+                for pt in drawing['drawing_data']['points']
+            ]
+        elif 'points' in drawing:
+            moved_drawing['points'] = [
+                {'x': pt['x'] + delta_x, 'y': pt['y'] + delta_y}
+                for pt in drawing['points']
+            ]
+    
+    moved_drawing['timestamp'] = timestamp
+    return moved_drawing
+
+
+def _move_drawings(meeting_id: str, drawing_ids: List[str], delta_x, delta_y, timestamp: str) -> List[Dict]:
+    drawings = WhiteboardCache.get_drawings_by_ids(meeting_id, drawing_ids)
+    moved = [translate_drawing(d, delta_x, delta_y, timestamp) for d in drawings]
+    if moved and not WhiteboardCache.update_drawings(meeting_id, moved):
+        raise RuntimeError("Failed to move drawings")
+    return moved
+
+
+def _apply_field_changes(meeting_id: str, drawing_id: str, changes: Dict, side: str, timestamp: str) -> List[Dict]:
+    drawings = WhiteboardCache.get_drawings_by_ids(meeting_id, [drawing_id])
+    if not drawings:
+        return []
+    updated = drawings[0]
+    for field, values in changes.items():
+        updated[field] = values[side]
+    updated['timestamp'] = timestamp
+    if not WhiteboardCache.update_drawings(meeting_id, [updated]):
+        raise RuntimeError("Failed to update drawing")
+    return [updated]
+
+
+def _upgrade_legacy_action(meeting_id: str, action: Dict) -> Dict:
+    """Turn a full-snapshot history action into its delta form"""
+    previous_state = action.get('previous_state')
+    action_type = action.get('type')
+    if previous_state is None or action_type in ('clear_whiteboard', 'navigate_to_checkpoint'):
+        return action
+    
+    upgraded = {k: v for k, v in action.items() if k != 'previous_state'}
+    if action_type == 'delete_selected' and 'removed' not in action:
+        selected = set(action.get('selected_ids', []))
+        upgraded['removed'] = [d for d in previous_state if d.get('drawing_id') in selected]
+        upgraded['scores'] = {}
+    elif action_type == 'update_text' and 'changes' not in action:
+        drawing_id = action.get('drawing_id')
+        before = next((d for d in previous_state if d.get('drawing_id') == drawing_id), None)
+        current = WhiteboardCache.get_drawings_by_ids(meeting_id, [drawing_id])
+        changes = {}
+        if before and current:
+            for field in set(TEXT_UPDATE_FIELDS.values()):
+                if before.get(field) != current[0].get(field):
+                    changes[field] = {'from': before.get(field), 'to': current[0].get(field)}
+        upgraded['changes'] = changes
+    return upgraded
+
+
+def apply_history_action(meeting_id: str, action: Dict, direction: str, timestamp: str) -> Optional[Dict]:
+    """
+    Undo (direction='undo') or re-apply (direction='redo') one history action.
+    
+    Returns:
+        {'action': record to push on the opposite stack,
+         'changes': {'added': [...], 'removed_ids': [...], 'updated': [...],
+                     'drawings': [...] only when the whole board was replaced}}
+        or None if the action could not be applied
+    """
+    undo = direction == 'undo'
+    action = _upgrade_legacy_action(meeting_id, action)
+    action_type = action.get('type')
+    changes = {'added': [], 'removed_ids': [], 'updated': []}
+    
+    if action_type in ('add_drawing', 'add_text'):
+        drawing_id = action.get('drawing_id') or (action.get('drawing') or {}).get('drawing_id')
+        if undo:
+            result = WhiteboardCache.remove_drawings(meeting_id, [drawing_id])
+            if result is None:
+                return None
+            if result['removed']:
+                action = dict(action, drawing=result['removed'][0], score=result['scores'].get(drawing_id))
+            changes['removed_ids'] = list(result['scores'].keys())
+        else:
+            drawing = action.get('drawing')
+            if not drawing:
+                return None
+            scores = [action['score']] if action.get('score') is not None else None
+            if not WhiteboardCache.add_drawings(meeting_id, [drawing], scores=scores):
+                return None
+            changes['added'] = [drawing]
+    
+    elif action_type == 'delete_selected':
+        if undo:
+            removed = action.get('removed', [])
+            scores = action.get('scores') or {}
+            if removed:
+                positions = [scores.get(d['drawing_id']) for d in removed]
+                restore_scores = positions if all(p is not None for p in positions) else None
+                if not WhiteboardCache.add_drawings(meeting_id, removed, scores=restore_scores):
+                    return None
+            changes['added'] = removed
+        else:
+            drawing_ids = [d['drawing_id'] for d in action.get('removed', [])]
+            result = WhiteboardCache.remove_drawings(meeting_id, drawing_ids)
+            if result is None:
+                return None
+            action = dict(action, removed=result['removed'], scores=result['scores'])
+            changes['removed_ids'] = list(result['scores'].keys())
+    
+    elif action_type == 'move_selected':
+        sign = -1 if undo else 1
+        changes['updated'] = _move_drawings(
+            meeting_id,
+            action.get('selected_ids', []),
+            sign * action.get('delta_x', 0),
+            sign * action.get('delta_y', 0),
+            timestamp
+        )
+    
+    elif action_type == 'update_text':
+        changes['updated'] = _apply_field_changes(
+            meeting_id, action.get('drawing_id'), action.get('changes', {}),
+            'from' if undo else 'to', timestamp
+        )
+    
+    elif action_type == 'clear_whiteboard':
+        current_drawings = WhiteboardCache.get_drawings(meeting_id)
+        if undo:
+            restored = action.get('previous_state', [])
+            WhiteboardCache.set_drawings(meeting_id, restored)
+            changes['drawings'] = restored
+        else:
+            action = dict(action, previous_state=current_drawings)
+            WhiteboardCache.set_drawings(meeting_id, [])
+            changes['drawings'] = []
+    
+    elif action_type == 'navigate_to_checkpoint':
+        current_drawings = WhiteboardCache.get_drawings(meeting_id)
+        current_settings = WhiteboardCache.get_settings(meeting_id)
+        if undo:
+            restored = action.get('previous_state', [])
+            WhiteboardCache.set_drawings(meeting_id, restored)
+            if action.get('previous_settings'):
+                WhiteboardCache.set_settings(meeting_id, action['previous_settings'])
+            changes['drawings'] = restored
+        else:
+            checkpoint = next(
+                (c for c in WhiteboardCache.get_checkpoints(meeting_id) if c['id'] == action.get('checkpoint_id')),
+                None
+            )
+            if not checkpoint:
+                logger.warning(f"⚠️ Cannot redo navigation - checkpoint {action.get('checkpoint_id')} no longer cached")
+                return None
+            restored = checkpoint['data'].get('drawings', [])
+            WhiteboardCache.set_drawings(meeting_id, restored)
+            WhiteboardCache.set_settings(meeting_id, checkpoint['data'].get('settings', {'background_color': '#ffffff', 'grid_enabled': False}))
+            changes['drawings'] = restored
+        action = dict(action, previous_state=current_drawings, previous_settings=current_settings)
+    
+    else:
+        logger.warning(f"⚠️ Unknown history action type: {action_type}")
+    
+    return {'action': action, 'changes': changes}
+
+
 # ================================
 # ENDPOINT IMPLEMENTATIONS
 # ================================
@@ -602,18 +1180,50 @@ def create_whiteboard_session(request):
 @require_http_methods(["GET"])
 @csrf_exempt
 def get_whiteboard_state(request, meeting_id):
-    """Get complete whiteboard state - OPTIMIZED LOGGING"""
+    """
+    Get whiteboard state.
+    
+    Without `since` the full board is returned along with a `cursor`. With
+    `?since=<cursor>` only the stroke-log ops after that cursor are returned;
+    if the cursor predates the last compaction `full_sync` is true and the
+    full board is included instead.
+    """
     try:
         # ✅ ONLY log occasionally, not every call
         if log_limiter.should_log(f"get_state_{meeting_id}"):
             logger.info(f"📊 Getting whiteboard state for meeting {meeting_id}")
         
+        since = request.GET.get('since')
+        if since:
+            changes = WhiteboardCache.get_changes_since(meeting_id, since)
+            if not changes['full_sync']:
+                undo_count = WhiteboardCache.get_undo_count(meeting_id)
+                redo_count = WhiteboardCache.get_redo_count(meeting_id)
+                return JsonResponse({
+                    'success': True,
+                    'whiteboard': {
+                        'meeting_id': meeting_id,
+                        'full_sync': False,
+                        'ops': changes['ops'],
+                        'cursor': changes['cursor'],
+                        'has_more': changes['has_more'],
+                        'can_undo': undo_count > 0,
+                        'can_redo': redo_count > 0,
+                        'undo_count': undo_count,
+                        'redo_count': redo_count,
+                        'updated_at': timezone.now().isoformat()
+                    }
+                })
+        
         drawings = []
+        cursor = '0-0'
         undo_stack = []
         redo_stack = []
         
         try:
-            drawings = WhiteboardCache.get_drawings(meeting_id) or []
+            snapshot = WhiteboardCache.get_board_snapshot(meeting_id)
+            drawings = snapshot['drawings']
+            cursor = snapshot['cursor']
             undo_stack = WhiteboardCache.get_undo_stack(meeting_id) or []
             redo_stack = WhiteboardCache.get_redo_stack(meeting_id) or []
             
@@ -626,6 +1236,8 @@ def get_whiteboard_state(request, meeting_id):
         
         whiteboard_state = {
             'meeting_id': meeting_id,
+            'full_sync': True,
+            'cursor': cursor,
             'drawings': drawings,
             'total_drawings': len(drawings),
             'can_undo': len(undo_stack) > 0,
@@ -672,7 +1284,6 @@ def add_drawing(request):
             return JsonResponse({'success': False, 'error': 'meeting_id and user_id are required'}, status=400)
 
         current_time = timezone.now().astimezone(IST_TIMEZONE)
-        current_drawings = WhiteboardCache.get_drawings(meeting_id) or []
 
         # ✅ CRITICAL FIX: Handle both shape and path (freehand) drawings
         drawing_data = data.get('drawing_data', {})
@@ -713,9 +1324,9 @@ def add_drawing(request):
             'layer_index': data.get('layer_index', 0)
         }
 
-        new_drawings = current_drawings + [drawing]
-        
-        if not WhiteboardCache.set_drawings(meeting_id, new_drawings):
+        # O(1) append to the stroke log - the existing board is never read
+        cursor = WhiteboardCache.add_drawings(meeting_id, [drawing])
+        if not cursor:
             return JsonResponse({'success': False, 'error': 'Failed to save drawing'}, status=500)
 
         # ✅ CRITICAL: Store COMPLETE drawing in undo stack
@@ -729,22 +1340,22 @@ def add_drawing(request):
         WhiteboardCache.push_undo_action(meeting_id, undo_action)
         WhiteboardCache.clear_redo_stack(meeting_id)
 
-        updated_undo_stack = WhiteboardCache.get_undo_stack(meeting_id) or []
-        updated_redo_stack = WhiteboardCache.get_redo_stack(meeting_id) or []
+        undo_count = WhiteboardCache.get_undo_count(meeting_id)
+        redo_count = WhiteboardCache.get_redo_count(meeting_id)
 
-        logger.info(f"✅ Drawing added: {drawing_id} ({tool_type}), Undo stack: {len(updated_undo_stack)}")
+        logger.info(f"✅ Drawing added: {drawing_id} ({tool_type}), Undo stack: {undo_count}")
 
         return JsonResponse({
             'success': True,
             'message': 'Drawing added successfully',
             'drawing': drawing,
-            'drawings': new_drawings,
+            'cursor': cursor,
             'state': {
-                'can_undo': len(updated_undo_stack) > 0,
-                'can_redo': len(updated_redo_stack) > 0,
-                'undo_count': len(updated_undo_stack),
-                'redo_count': len(updated_redo_stack),
-                'total_drawings': len(new_drawings)
+                'can_undo': undo_count > 0,
+                'can_redo': redo_count > 0,
+                'undo_count': undo_count,
+                'redo_count': redo_count,
+                'total_drawings': WhiteboardCache.count_drawings(meeting_id)
             }
         })
 
@@ -756,186 +1367,88 @@ def add_drawing(request):
 @require_http_methods(["POST"])
 @csrf_exempt
 def undo_action(request):
-    """Undo the last action - COMPLETELY FIXED"""
-    try:
-        data = json.loads(request.body)
-        meeting_id = data.get('meeting_id')
-        user_id = data.get('user_id')
-
-        logger.info(f"🔄 UNDO START - Meeting: {meeting_id}")
-
-        current_drawings = WhiteboardCache.get_drawings(meeting_id) or []
-        current_time = timezone.now().astimezone(IST_TIMEZONE)
-        
-        logger.info(f"📊 BEFORE UNDO: {len(current_drawings)} drawings")
-
-        # Get the last action from undo stack
-        last_action = WhiteboardCache.pop_undo_action(meeting_id)
-        if not last_action:
-            logger.warning("⚠️ Nothing to undo")
-            return JsonResponse({'success': False, 'error': 'Nothing to undo'}, status=400)
-
-        logger.info(f"🔍 Undo action type: {last_action['type']}")
-
-        if last_action['type'] == 'add_drawing':
-            drawing_id_to_remove = last_action.get('drawing_id')
-            drawing_to_restore = last_action.get('drawing')
-            
-            if not drawing_id_to_remove:
-                logger.error("❌ No drawing_id in undo action")
-                return JsonResponse({'success': False, 'error': 'Invalid undo data'}, status=400)
-            
-            logger.info(f"🗑️ Removing drawing: {drawing_id_to_remove}")
-            
-            # ✅ Remove the specific drawing
-            new_drawings = [d for d in current_drawings if d.get('drawing_id') != drawing_id_to_remove]
-            
-            logger.info(f"📊 AFTER UNDO: {len(new_drawings)} drawings (removed 1)")
-            
-            # ✅ Save the COMPLETE drawing to redo stack
-            if drawing_to_restore:
-                redo_action = {
-                    'type': 'add_drawing',
-                    'drawing_id': drawing_id_to_remove,
-                    'drawing': drawing_to_restore,  # Complete drawing with all data
-                    'timestamp': current_time.isoformat(),
-                    'user_id': user_id
-                }
-                WhiteboardCache.push_redo_action(meeting_id, redo_action)
-                logger.info(f"✅ Saved to redo stack: {drawing_id_to_remove}")
-            
-            WhiteboardCache.set_drawings(meeting_id, new_drawings)
-            
-        elif last_action['type'] == 'clear_whiteboard':
-            previous_drawings = last_action.get('previous_state', [])
-            logger.info(f"🔄 Restoring {len(previous_drawings)} drawings after clear")
-            
-            redo_action = {
-                'type': 'clear_whiteboard',
-                'previous_state': current_drawings.copy(),
-                'timestamp': current_time.isoformat(),
-                'user_id': user_id
-            }
-            WhiteboardCache.push_redo_action(meeting_id, redo_action)
-            WhiteboardCache.set_drawings(meeting_id, previous_drawings)
-            new_drawings = previous_drawings
-        else:
-            new_drawings = current_drawings
-
-        updated_undo = WhiteboardCache.get_undo_stack(meeting_id) or []
-        updated_redo = WhiteboardCache.get_redo_stack(meeting_id) or []
-
-        logger.info(f"✅ Undo complete - Undo: {len(updated_undo)}, Redo: {len(updated_redo)}")
-
-        return JsonResponse({
-            'success': True,
-            'message': 'Action undone successfully',
-            'undone_action': last_action['type'],
-            'drawings': new_drawings,
-            'state': {
-                'can_undo': len(updated_undo) > 0,
-                'can_redo': len(updated_redo) > 0,
-                'undo_count': len(updated_undo),
-                'redo_count': len(updated_redo),
-                'total_drawings': len(new_drawings)
-            }
-        })
-
-    except Exception as e:
-        logger.error(f"❌ UNDO ERROR: {e}")
-        logger.error(traceback.format_exc())
-        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+    """Undo the last action by applying its inverse - O(changed items)"""
+    return _apply_history_request(request, 'undo')
 
 
 @require_http_methods(["POST"])
 @csrf_exempt
 def redo_action(request):
-    """Redo the last undone action - COMPLETELY FIXED"""
+    """Redo the last undone action - O(changed items)"""
+    return _apply_history_request(request, 'redo')
+
+
+def _apply_history_request(request, direction):
+    label = direction.upper()
     try:
         data = json.loads(request.body)
         meeting_id = data.get('meeting_id')
         user_id = data.get('user_id')
-
-        logger.info(f"🔄 REDO START - Meeting: {meeting_id}")
-
-        current_drawings = WhiteboardCache.get_drawings(meeting_id) or []
+        
+        logger.info(f"🔄 {label} START - Meeting: {meeting_id}")
+        
         current_time = timezone.now().astimezone(IST_TIMEZONE)
         
-        logger.info(f"📊 BEFORE REDO: {len(current_drawings)} drawings")
-
-        # Get the last action from redo stack
-        last_redo_action = WhiteboardCache.pop_redo_action(meeting_id)
-        if not last_redo_action:
-            logger.warning("⚠️ Nothing to redo")
-            return JsonResponse({'success': False, 'error': 'Nothing to redo'}, status=400)
-
-        logger.info(f"🔍 Redo action type: {last_redo_action['type']}")
-
-        if last_redo_action['type'] == 'add_drawing':
-            drawing_to_restore = last_redo_action.get('drawing')
-            
-            if not drawing_to_restore:
-                logger.error("❌ Cannot redo - missing drawing data")
-                return JsonResponse({'success': False, 'error': 'Cannot redo - missing drawing data'}, status=400)
-            
-            drawing_id = drawing_to_restore.get('drawing_id')
-            logger.info(f"➕ Re-adding drawing: {drawing_id}")
-            
-            # ✅ Add the complete drawing back to the END
-            new_drawings = current_drawings + [drawing_to_restore]
-            
-            logger.info(f"📊 AFTER REDO: {len(new_drawings)} drawings (added 1)")
-            
-            # ✅ Save to undo stack for potential re-undo
-            undo_action = {
-                'type': 'add_drawing',
-                'drawing_id': drawing_id,
-                'drawing': drawing_to_restore.copy(),
-                'timestamp': current_time.isoformat(),
-                'user_id': user_id
-            }
-            WhiteboardCache.push_undo_action(meeting_id, undo_action)
-            WhiteboardCache.set_drawings(meeting_id, new_drawings)
-                
-        elif last_redo_action['type'] == 'clear_whiteboard':
-            logger.info(f"🗑️ Re-clearing whiteboard")
-            new_drawings = []
-            
-            undo_action = {
-                'type': 'clear_whiteboard',
-                'previous_state': current_drawings.copy(),
-                'timestamp': current_time.isoformat(),
-                'user_id': user_id
-            }
-            WhiteboardCache.push_undo_action(meeting_id, undo_action)
-            WhiteboardCache.set_drawings(meeting_id, new_drawings)
+        if direction == 'undo':
+            last_action = WhiteboardCache.pop_undo_action(meeting_id)
         else:
-            new_drawings = current_drawings
-
-        updated_undo = WhiteboardCache.get_undo_stack(meeting_id) or []
-        updated_redo = WhiteboardCache.get_redo_stack(meeting_id) or []
-
-        logger.info(f"✅ Redo complete - Undo: {len(updated_undo)}, Redo: {len(updated_redo)}")
-
+            last_action = WhiteboardCache.pop_redo_action(meeting_id)
+        
+        if not last_action:
+            logger.warning(f"⚠️ Nothing to {direction}")
+            return JsonResponse({'success': False, 'error': f'Nothing to {direction}'}, status=400)
+        
+        logger.info(f"🔍 {label} action type: {last_action.get('type')}")
+        
+        result = apply_history_action(meeting_id, last_action, direction, current_time.isoformat())
+        if result is None:
+            # Put it back so the user can retry
+            if direction == 'undo':
+                WhiteboardCache.push_undo_action(meeting_id, last_action)
+            else:
+                WhiteboardCache.push_redo_action(meeting_id, last_action)
+            return JsonResponse({'success': False, 'error': f'Cannot {direction} - action data unavailable'}, status=400)
+        
+        next_action = dict(result['action'], timestamp=current_time.isoformat(), user_id=user_id)
+        if direction == 'undo':
+            WhiteboardCache.push_redo_action(meeting_id, next_action)
+        else:
+            WhiteboardCache.push_undo_action(meeting_id, next_action)
+        
+        changes = result['changes']
+        undo_count = WhiteboardCache.get_undo_count(meeting_id)
+        redo_count = WhiteboardCache.get_redo_count(meeting_id)
+        
+        logger.info(
+            f"✅ {label} complete - +{len(changes['added'])} -{len(changes['removed_ids'])} "
+            f"~{len(changes['updated'])} | Undo: {undo_count}, Redo: {redo_count}"
+        )
+        
+        # Clients clear the canvas and redraw `drawings`, so always send the full board;
+        # `changes` carries the delta for clients that apply it incrementally
+        drawings = changes['drawings'] if 'drawings' in changes else WhiteboardCache.get_drawings(meeting_id)
+        
         return JsonResponse({
             'success': True,
-            'message': 'Action redone successfully',
-            'redone_action': last_redo_action['type'],
-            'drawings': new_drawings,
+            'message': f'Action {direction}ne successfully',
+            f'{direction}ne_action': last_action.get('type'),
+            'drawings': drawings,
+            'changes': changes,
             'state': {
-                'can_undo': len(updated_undo) > 0,
-                'can_redo': len(updated_redo) > 0,
-                'undo_count': len(updated_undo),
-                'redo_count': len(updated_redo),
-                'total_drawings': len(new_drawings)
+                'can_undo': undo_count > 0,
+                'can_redo': redo_count > 0,
+                'undo_count': undo_count,
+                'redo_count': redo_count,
+                'total_drawings': len(drawings)
             }
         })
-
+    
     except Exception as e:
-        logger.error(f"❌ REDO ERROR: {e}")
+        logger.error(f"❌ {label} ERROR: {e}")
         logger.error(traceback.format_exc())
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
+
 @require_http_methods(["POST"])
 @csrf_exempt
 def clear_whiteboard(request):
@@ -1171,6 +1684,7 @@ def navigate_to_state(request):
             
             undo_action = {
                 'type': 'navigate_to_checkpoint',
+                'checkpoint_id': checkpoint_id,
                 'previous_state': current_drawings.copy(),
                 'previous_settings': current_settings.copy(),
                 'timestamp': current_time.isoformat(),
@@ -1270,7 +1784,8 @@ def get_cache_status(request):
                 
                 for key_type, pattern in [
                     ('sessions', 'whiteboard:session:*'),
-                    ('drawings', 'whiteboard:drawings:*'),
+                    ('drawings', 'whiteboard:items:*'),
+                    ('stroke_logs', 'whiteboard:log:*'),
                     ('settings', 'whiteboard:settings:*'),
                     ('history', 'whiteboard:history:*'),
                     ('checkpoints', 'whiteboard:checkpoints:*'),
@@ -1338,14 +1853,6 @@ def add_text(request):
         
         current_time = timezone.now().astimezone(IST_TIMEZONE)
         
-        # Initialize variables
-        current_drawings = []
-        
-        try:
-            current_drawings = WhiteboardCache.get_drawings(meeting_id) or []
-        except Exception as cache_error:
-            logger.error(f"Cache error: {cache_error}")
-        
         # Create text object
         text_drawing = {
             'drawing_id': text_id,
@@ -1371,7 +1878,7 @@ def add_text(request):
         undo_action = {
             'type': 'add_text',
             'drawing_id': text_id,
-            'previous_state': current_drawings.copy() if current_drawings else [],
+            'drawing': text_drawing,
             'timestamp': current_time.isoformat(),
             'user_id': user_id
         }
@@ -1432,59 +1939,40 @@ def update_text(request):
             }, status=400)
         
         current_time = timezone.now().astimezone(IST_TIMEZONE)
-        current_drawings = []
         
         try:
-            current_drawings = WhiteboardCache.get_drawings(meeting_id) or []
+            existing = WhiteboardCache.get_drawings_by_ids(meeting_id, [text_id])
         except Exception as cache_error:
             logger.error(f"Cache error: {cache_error}")
             return JsonResponse({'success': False, 'error': 'Failed to get drawings'}, status=500)
         
-        # Find and update the text
-        text_found = False
-        updated_drawings = []
-        
-        for drawing in current_drawings:
-            if drawing.get('drawing_id') == text_id and drawing.get('tool_type') == 'text':
-                text_found = True
-                # Update text properties
-                updated_drawing = drawing.copy()
-                if 'text' in data:
-                    updated_drawing['text_content'] = data['text']
-                if 'x' in data:
-                    updated_drawing['x'] = data['x']
-                if 'y' in data:
-                    updated_drawing['y'] = data['y']
-                if 'font_size' in data:
-                    updated_drawing['font_size'] = data['font_size']
-                if 'color' in data:
-                    updated_drawing['stroke_color'] = data['color']
-                if 'width' in data:
-                    updated_drawing['width'] = data['width']
-                if 'height' in data:
-                    updated_drawing['height'] = data['height']
-                
-                updated_drawing['timestamp'] = current_time.isoformat()
-                updated_drawings.append(updated_drawing)
-            else:
-                updated_drawings.append(drawing)
-        
-        if not text_found:
+        if not existing or existing[0].get('tool_type') != 'text':
             return JsonResponse({'success': False, 'error': 'Text not found'}, status=404)
         
+        # Update text properties, remembering only the fields that changed
+        updated_drawing = existing[0].copy()
+        changes = {}
+        for request_field, drawing_field in TEXT_UPDATE_FIELDS.items():
+            if request_field in data and data[request_field] != updated_drawing.get(drawing_field):
+                changes[drawing_field] = {'from': updated_drawing.get(drawing_field), 'to': data[request_field]}
+                updated_drawing[drawing_field] = data[request_field]
+        updated_drawing['timestamp'] = current_time.isoformat()
+        
         # Save for undo
         undo_action = {
             'type': 'update_text',
             'drawing_id': text_id,
-            'previous_state': current_drawings.copy(),
+            'changes': changes,
             'timestamp': current_time.isoformat(),
             'user_id': user_id
         }
         
         try:
-            WhiteboardCache.push_undo_action(meeting_id, undo_action)
-            WhiteboardCache.clear_redo_stack(meeting_id)
-            WhiteboardCache.set_drawings(meeting_id, updated_drawings)
+            if not WhiteboardCache.update_drawings(meeting_id, [updated_drawing]):
+                return JsonResponse({'success': False, 'error': 'Failed to update text'}, status=500)
+            if changes:
+                WhiteboardCache.push_undo_action(meeting_id, undo_action)
+                WhiteboardCache.clear_redo_stack(meeting_id)
         except Exception as update_error:
             logger.error(f"Error updating text: {update_error}")
             return JsonResponse({'success': False, 'error': 'Failed to update text'}, status=500)
@@ -1492,6 +1980,7 @@ def update_text(request):
         return JsonResponse({
             'success': True,
             'message': 'Text updated successfully',
+            'drawing': updated_drawing,
             'broadcast_data': {
                 'type': 'whiteboard_text_update',
                 'meeting_id': meeting_id,
@@ -1577,38 +2066,30 @@ def delete_selected_items(request):
             return JsonResponse({'success': False, 'error': 'No items selected'}, status=400)
         
         current_time = timezone.now().astimezone(IST_TIMEZONE)
-        current_drawings = []
         
+        # Remove selected items - only they are read, and only they go to the undo stack
         try:
-            current_drawings = WhiteboardCache.get_drawings(meeting_id) or []
-        except Exception as cache_error:
-            logger.error(f"Cache error: {cache_error}")
-            return JsonResponse({'success': False, 'error': 'Failed to get drawings'}, status=500)
-        
-        # Save for undo
-        undo_action = {
-            'type': 'delete_selected',
-            'selected_ids': selected_ids,
-            'previous_state': current_drawings.copy(),
-            'timestamp': current_time.isoformat(),
-            'user_id': user_id
-        }
+            result = WhiteboardCache.remove_drawings(meeting_id, selected_ids)
+        except Exception as delete_error:
+            logger.error(f"Error deleting items: {delete_error}")
+            result = None
         
-        # Remove selected items
-        updated_drawings = [
-            drawing for drawing in current_drawings 
-            if drawing.get('drawing_id') not in selected_ids
-        ]
+        if result is None:
+            return JsonResponse({'success': False, 'error': 'Failed to delete items'}, status=500)
         
-        deleted_count = len(current_drawings) - len(updated_drawings)
+        deleted_count = len(result['removed'])
         
-        try:
+        if deleted_count:
+            undo_action = {
+                'type': 'delete_selected',
+                'selected_ids': selected_ids,
+                'removed': result['removed'],
+                'scores': result['scores'],
+                'timestamp': current_time.isoformat(),
+                'user_id': user_id
+            }
             WhiteboardCache.push_undo_action(meeting_id, undo_action)
             WhiteboardCache.clear_redo_stack(meeting_id)
-            WhiteboardCache.set_drawings(meeting_id, updated_drawings)
-        except Exception as delete_error:
-            logger.error(f"Error deleting items: {delete_error}")
-            return JsonResponse({'success': False, 'error': 'Failed to delete items'}, status=500)
         
         logger.info(f"Deleted {deleted_count} items from meeting {meeting_id}")
         
@@ -1656,62 +2137,26 @@ def move_selected_items(request):
             return JsonResponse({'success': False, 'error': 'No items selected'}, status=400)
         
         current_time = timezone.now().astimezone(IST_TIMEZONE)
-        current_drawings = []
         
+        # Move selected items - the undo record is just ids + delta
         try:
-            current_drawings = WhiteboardCache.get_drawings(meeting_id) or []
-        except Exception as cache_error:
-            logger.error(f"Cache error: {cache_error}")
-            return JsonResponse({'success': False, 'error': 'Failed to get drawings'}, status=500)
-        
-        # Save for undo
-        undo_action = {
-            'type': 'move_selected',
-            'selected_ids': selected_ids,
-            'previous_state': current_drawings.copy(),
-            'delta_x': delta_x,
-            'delta_y': delta_y,
-            'timestamp': current_time.isoformat(),
-            'user_id': user_id
-        }
-        
-        # Move selected items
-        updated_drawings = []
-        for drawing in current_drawings:
-            if drawing.get('drawing_id') in selected_ids:
-                moved_drawing = drawing.copy()
-                
-                # Handle different drawing types
-                if drawing.get('tool_type') == 'text':
-                    moved_drawing['x'] = drawing.get('x', 0) + delta_x
-                    moved_drawing['y'] = drawing.get('y', 0) + delta_y
-                else:
-                    # For path-based drawings, move all points
-                    if 'drawing_data' in drawing and 'points' in drawing['drawing_data']:
-                        moved_drawing['drawing_data'] = drawing['drawing_data'].copy()
-                        moved_drawing['drawing_data']['points'] = [
-                            {'x': pt['x'] + delta_x, 'y': pt['y'] + delta_y}
-                            for pt in drawing['drawing_data']['points']
-                        ]
-                    elif 'points' in drawing:
-                        moved_drawing['points'] = [
-                            {'x': pt['x'] + delta_x, 'y': pt['y'] + delta_y}
-                            for pt in drawing['points']
-                        ]
-                
-                moved_drawing['timestamp'] = current_time.isoformat()
-                updated_drawings.append(moved_drawing)
-            else:
-                updated_drawings.append(drawing)
-        
-        try:
-            WhiteboardCache.push_undo_action(meeting_id, undo_action)
-            WhiteboardCache.clear_redo_stack(meeting_id)
-            WhiteboardCache.set_drawings(meeting_id, updated_drawings)
+            moved_drawings = _move_drawings(meeting_id, selected_ids, delta_x, delta_y, current_time.isoformat())
         except Exception as move_error:
             logger.error(f"Error moving items: {move_error}")
             return JsonResponse({'success': False, 'error': 'Failed to move items'}, status=500)
         
+        if moved_drawings:
+            undo_action = {
+                'type': 'move_selected',
+                'selected_ids': [d['drawing_id'] for d in moved_drawings],
+                'delta_x': delta_x,
+                'delta_y': delta_y,
+                'timestamp': current_time.isoformat(),
+                'user_id': user_id
+            }
+            WhiteboardCache.push_undo_action(meeting_id, undo_action)
+            WhiteboardCache.clear_redo_stack(meeting_id)
+        
         return JsonResponse({
             'success': True,
             'message': f'Moved {len(selected_ids)} items',
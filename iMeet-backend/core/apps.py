@@ -84,13 +84,16 @@ class CoreConfig(AppConfig):
     
     def ready(self):
         """Initialize LiveKit cleanup scheduler on app startup"""
+        # Schema bootstrap runs from SampleDB/asgi.py / wsgi.py, not here: ready() also
+        # runs for migrate, makemigrations and every other management command
         try:
             from apscheduler.schedulers.background import BackgroundScheduler
-            from core.WebSocketConnection.meetings import livekit_service
             
             scheduler = BackgroundScheduler()
             
             # DISABLED: Cleanup scheduler disabled for testing
+            # (re-enable together with the import; it loads meetings.py and its dependencies)
+            # from core.WebSocketConnection.meetings import livekit_service
             # scheduler.add_job(
             #     func=livekit_service.cleanup_empty_rooms,
             #     trigger="interval",
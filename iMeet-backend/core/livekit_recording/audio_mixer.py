@@ -0,0 +1,236 @@
+# core/livekit_recording/audio_mixer.py
+
+"""
+Recorder Audio Buffers and Mixer
+================================
+NumPy replacements for the Python-list audio path of
+StreamingRecordingWithChunks.
+
+- AudioTrackBuffer: preallocated int16 ring buffer per audio track that
+  hands out fixed-size chunks without per-sample Python objects
+- AudioTimelineMixer: shared float32 timeline (allocated in fixed-length
+  blocks) that chunks are added into as they are flushed, plus a per-sample
+  overlap count. render() applies the same overlap normalization, AGC and
+  clipping the recorder always used and streams int16 PCM out block by block
+
+All sample positions are interleaved stereo samples (2 per frame).
+"""
+
+import logging
+
+import numpy as np
+
+logger = logging.getLogger('recording_service_module')
+
+SAMPLE_RATE = 48000
+CHANNELS = 2
+MIXER_BLOCK_SECONDS = 60
+
+
+class AudioTrackBuffer:
+    """Preallocated int16 ring buffer for one participant track"""
+
+    def __init__(self, participant: str, source: str, start_time: float,
+                 chunk_size: int, capacity_chunks: int = 8):
+        self.participant = participant
+        self.source = source
+        self.start_time = start_time
+        self.chunk_size = chunk_size
+
+        self._buffer = np.zeros(chunk_size * capacity_chunks, dtype=np.int16)
+        self._read = 0
+        self._size = 0
+        self.samples_flushed = 0
+
+    def __len__(self):
+        return self._size
+
+    def _grow(self, needed: int):
+        capacity = len(self._buffer)
+        new_capacity = capacity
+        while new_capacity < needed:
+            new_capacity *= 2
+        grown = np.zeros(new_capacity, dtype=np.int16)
+        grown[:self._size] = self._peek(self._size)
+        self._buffer = grown
+        self._read = 0
+
+    def _peek(self, count: int) -> np.ndarray:
+        """Return the oldest `count` samples as one array (copies only on wrap-around)"""
+        capacity = len(self._buffer)
+        end = self._read + count
+        if end <= capacity:
+            return self._buffer[self._read:end]
+        return np.concatenate((self._buffer[self._read:], self._buffer[:end - capacity]))
+
+    def write(self, samples: np.ndarray):
+        """Append interleaved int16 samples"""
+        count = len(samples)
+        if count == 0:
+            return
+        if self._size + count > len(self._buffer):
+            self._grow(self._size + count)
+
+        capacity = len(self._buffer)
+        start = (self._read + self._size) % capacity
+        first = min(count, capacity - start)
+        self._buffer[start:start + first] = samples[:first]
+        if first < count:
+            self._buffer[:count - first] = samples[first:]
+        self._size += count
+
+    def pop_chunk(self, count: int = None) -> np.ndarray:
+        """Remove and return the oldest `count` samples (default: one chunk)"""
+        count = min(self.chunk_size if count is None else count, self._size)
+        chunk = self._peek(count).copy()
+        self._read = (self._read + count) % len(self._buffer)
+        self._size -= count
+        self.samples_flushed += count
+        return chunk
+
+    @property
+    def next_timestamp(self) -> float:
+        """Timeline position (seconds) of the next sample to be flushed"""
+        return self.start_time + self.samples_flushed / (SAMPLE_RATE * CHANNELS)
+
+
+class AudioTimelineMixer:
+    """Shared mix timeline that flushed chunks are summed into"""
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, channels: int = CHANNELS,
+                 block_seconds: int = MIXER_BLOCK_SECONDS):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.block_samples = sample_rate * channels * block_seconds
+        self._sums = {}
+        self._counts = {}
+        self.end_sample = 0
+        self.chunks_mixed = 0
+        self.chunks_skipped = 0
+        self.participants = set()
+        self.sources = {}
+
+    def __bool__(self):
+        return self.chunks_mixed > 0
+
+    @property
+    def duration(self) -> float:
+        return self.end_sample / (self.sample_rate * self.channels)
+
+    def _block(self, index: int):
+        if index not in self._sums:
+            self._sums[index] = np.zeros(self.block_samples, dtype=np.float32)
+            self._counts[index] = np.zeros(self.block_samples, dtype=np.uint8)
+        return self._sums[index], self._counts[index]
+
+    def add(self, timestamp: float, samples: np.ndarray, participant: str = 'unknown',
+            source: str = 'microphone'):
+        """Mix interleaved int16 samples in at `timestamp` seconds"""
+        if samples is None or len(samples) == 0 or timestamp < 0:
+            self.chunks_skipped += 1
+            return
+
+        # Start on a frame boundary so left/right never swap
+        start = int(timestamp * self.sample_rate) * self.channels
+        remaining = samples
+        position = start
+        while len(remaining):
+            block_index, offset = divmod(position, self.block_samples)
+            span = min(len(remaining), self.block_samples - offset)
+            sums, counts = self._block(block_index)
+            sums[offset:offset + span] += remaining[:span]
+            counts[offset:offset + span] = np.minimum(counts[offset:offset + span], 254) + 1
+            remaining = remaining[span:]
+            position += span
+
+        self.end_sample = max(self.end_sample, start + len(samples))
+        self.chunks_mixed += 1
+        self.participants.add(participant)
+        self.sources[source] = self.sources.get(source, 0) + 1
+
+    def render(self, total_samples: int, write_pcm):
+        """
+        Normalize, apply AGC and stream int16 PCM through write_pcm(bytes).
+
+        Returns:
+            Dict with mixing stats, or None if the mix is silent
+        """
+        total_samples -= total_samples % self.channels
+        block_count = -(-total_samples // self.block_samples)
+
+        # Pass 1: overlap normalization in place + global peak
+        max_amplitude = 0.0
+        max_overlap = 0
+        overlap_samples = 0
+        for index in range(block_count):
+            if index not in self._sums:
+                continue
+            sums, counts = self._sums[index], self._counts[index]
+            overlap = counts > 1
+            if overlap.any():
+                sums[overlap] /= np.sqrt(counts[overlap].astype(np.float32))
+                overlap_samples += int(np.count_nonzero(overlap))
+                max_overlap = max(max_overlap, int(counts.max()))
+            max_amplitude = max(max_amplitude, float(np.max(np.abs(sums))))
+
+        if max_amplitude == 0:
+            return None
+
+        if max_overlap:
+            logger.info(f"🎵 Audio mixing: {max_overlap} max speakers, "
+                        f"{(overlap_samples / max(total_samples, 1)) * 100:.1f}% overlap")
+
+        # Same AGC decision as before, made once on the global peak
+        scale = 1.0
+        knee = None
+        if max_amplitude > 28000:
+            knee = (20000.0, 0.7)
+            logger.info("🔊 AGC: Soft-knee compression applied")
+        elif max_amplitude < 8000:
+            scale = 18000.0 / max_amplitude
+            logger.info(f"🔊 AGC: Boosted {max_amplitude:.0f} → 18000")
+        elif max_amplitude > 20000:
+            scale = 18000.0 / max_amplitude
+            logger.info("🔊 AGC: Gentle compression")
+        else:
+            logger.info(f"🔊 AGC: Optimal range ({max_amplitude:.0f})")
+
+        # Pass 2: AGC + clip, one block at a time
+        clipped_samples = 0
+        final_max = 0
+        silent_block = None
+        for index in range(block_count):
+            length = min(self.block_samples, total_samples - index * self.block_samples)
+            if index not in self._sums:
+                if silent_block is None or len(silent_block) != length:
+                    silent_block = np.zeros(length, dtype=np.int16)
+                write_pcm(silent_block.tobytes())
+                continue
+
+            block = self._sums[index][:length]
+            if knee is not None:
+                threshold, ratio = knee
+                above = np.abs(block) > threshold
+                block[above] = np.sign(block[above]) * (threshold + (np.abs(block[above]) - threshold) * ratio)
+            elif scale != 1.0:
+                block *= scale
+
+            clipped_samples += int(np.count_nonzero((block < -32768) | (block > 32767)))
+            pcm = np.clip(block, -32768, 32767).astype(np.int16)
+            final_max = max(final_max, int(np.max(np.abs(pcm.astype(np.int32)))))
+            write_pcm(pcm.tobytes())
+
+            # Rendered blocks are not needed again
+            del self._sums[index]
+            del self._counts[index]
+
+        return {
+            'max_amplitude': max_amplitude,
+            'final_max': final_max,
+            'clipped_samples': clipped_samples,
+            'total_samples': total_samples
+        }
+
+    def clear(self):
+        self._sums = {}
+        self._counts = {}
@@ -0,0 +1,110 @@
+# core/livekit_recording/frame_index.py
+
+"""
+Frame Index for Recording Finalize
+==================================
+Maps every output frame slot of a fixed-FPS recording to a captured source
+frame in one vectorized pass.
+
+The selection rule is the same one StreamingRecordingWithChunks has always
+used, only computed with np.searchsorted instead of per-frame dict probing:
+
+- timestamps are quantized to 1ms keys; for duplicate keys the latest
+  frame wins
+- each output slot takes the nearest key (ties go to the earlier frame)
+- if the nearest frame is 10s or more away, the latest frame is used
+
+Kept free of LiveKit / Django imports so it can be benchmarked standalone.
+"""
+
+import numpy as np
+
+# Frames farther than this from the target slot fall back to the last frame
+MAX_NEAREST_DISTANCE_MS = 10_000
+
+
+class FrameIndex:
+    """Sorted, de-duplicated 1ms timestamp keys plus the source position of each"""
+
+    __slots__ = ('keys', 'positions')
+
+    def __init__(self, keys: np.ndarray, positions: np.ndarray):
+        self.keys = keys
+        self.positions = positions
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def duration(self) -> float:
+        return float(self.keys[-1]) / 1000.0 if len(self.keys) else 0.0
+
+
+def build_frame_index(timestamps) -> FrameIndex:
+    """
+    Build a FrameIndex from capture timestamps (seconds, any order).
+
+    Args:
+        timestamps: Sequence of frame timestamps; position i refers to the
+            i-th captured frame
+
+    Returns:
+        FrameIndex whose positions point back into the original sequence
+    """
+    ts = np.asarray(timestamps, dtype=np.float64)
+    if ts.size == 0:
+        return FrameIndex(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+
+    # Sorting on the float timestamp means the last entry of each 1ms run
+    # is the latest frame within that millisecond
+    order = np.argsort(ts, kind='stable')
+    sorted_keys = (ts[order] * 1000).astype(np.int64)
+    is_last_of_run = np.empty(len(sorted_keys), dtype=bool)
+    is_last_of_run[:-1] = sorted_keys[1:] != sorted_keys[:-1]
+    is_last_of_run[-1] = True
+
+    return FrameIndex(sorted_keys[is_last_of_run], order[is_last_of_run])
+
+
+def select_frames(index: FrameIndex, total_frames: int, frame_interval: float) -> np.ndarray:
+    """
+    Pick a source frame for every output slot.
+
+    Args:
+        index: FrameIndex from build_frame_index
+        total_frames: Number of output frames
+        frame_interval: Seconds between output frames
+
+    Returns:
+        int64 array of length total_frames with source positions, or -1 for
+        every slot when the index is empty
+    """
+    if total_frames <= 0:
+        return np.empty(0, dtype=np.int64)
+    if len(index) == 0:
+        return np.full(total_frames, -1, dtype=np.int64)
+
+    targets = (np.arange(total_frames, dtype=np.float64) * frame_interval * 1000).astype(np.int64)
+    return select_frames_at(index, targets)
+
+
+def select_frames_at(index: FrameIndex, target_keys: np.ndarray) -> np.ndarray:
+    """Vectorized nearest-frame lookup for arbitrary 1ms target keys"""
+    keys = index.keys
+    n = len(keys)
+    if n == 0:
+        return np.full(len(target_keys), -1, dtype=np.int64)
+
+    right = np.searchsorted(keys, target_keys, side='left')
+    left = np.clip(right - 1, 0, n - 1)
+    right = np.clip(right, 0, n - 1)
+
+    left_distance = np.abs(target_keys - keys[left])
+    right_distance = np.abs(keys[right] - target_keys)
+
+    use_left = left_distance <= right_distance
+    chosen = np.where(use_left, left, right)
+    distance = np.where(use_left, left_distance, right_distance)
+
+    chosen[distance >= MAX_NEAREST_DISTANCE_MS] = n - 1
+    return index.positions[chosen]
@@ -0,0 +1,383 @@
+# core/livekit_recording/live_encoder.py
+
+"""
+Live Frame Encoder
+==================
+Encodes recorder frames through one long-lived FFmpeg pipe while the meeting
+is running, instead of holding every raw frame in RAM until finalize.
+
+Only frames inside a short lookahead window are kept in memory. Output slot
+k (at k / fps seconds) is written once the recording clock has passed it by
+LIVE_ENCODER_LOOKAHEAD_SECONDS, using the same nearest-frame rule as
+frame_index.select_frames over the frames seen so far. The output is MPEG-TS
+so the growing file can be chunk-uploaded safely and finalize only has to
+remux it.
+"""
+
+import bisect
+import logging
+import os
+import subprocess
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from core.livekit_recording.frame_index import build_frame_index, select_frames_at
+
+logger = logging.getLogger('recording_service_module')
+
+LIVE_ENCODER_LOOKAHEAD_SECONDS = float(os.getenv("LIVE_ENCODER_LOOKAHEAD_SECONDS", "1.0"))
+RAW_VIDEO_EXTENSION = '.ts'
+OUTPUT_WIDTH = 1280
+OUTPUT_HEIGHT = 720
+
+_nvenc_available = None
+_nvenc_lock = threading.Lock()
+
+
+def nvenc_available() -> bool:
+    """Check (once per process) whether FFmpeg can use the NVIDIA H.264 encoder"""
+    global _nvenc_available
+    if _nvenc_available is not None:
+        return _nvenc_available
+    with _nvenc_lock:
+        if _nvenc_available is None:
+            try:
+                check_nvenc = subprocess.run(
+                    ['ffmpeg', '-h', 'encoder=h264_nvenc'],
+                    capture_output=True, text=True, timeout=5
+                )
+                _nvenc_available = check_nvenc.returncode == 0
+            except Exception:
+                _nvenc_available = False
+    return _nvenc_available
+
+
+class LiveFrameEncoder:
+    """Bounded-memory, fixed-FPS encoder fed by StreamingRecordingWithChunks"""
+
+    def __init__(self, output_path: str, output_fps: int, clock, placeholder_factory,
+                 lookahead: float = LIVE_ENCODER_LOOKAHEAD_SECONDS):
+        self.output_path = output_path
+        self.output_fps = output_fps
+        self.frame_interval = 1.0 / output_fps
+        self.lookahead = lookahead
+        self.clock = clock
+        self.placeholder_factory = placeholder_factory
+
+        self._lock = threading.Lock()
+        self._pending_timestamps = []
+        self._pending_frames = []
+        self._next_slot = 0
+
+        self._process = None
+        self._stderr_log = None
+        self._writer_thread = None
+        self._running = False
+        self._broken = False
+        self._final_slots = None
+
+        self._last_written = None
+        self._last_written_bytes = None
+        self._last_source = None
+        self._duplicate_run = 0
+
+        self.frames_received = 0
+        self.frames_written = 0
+        self.real_frames = 0
+        self.duplicate_frames = 0
+        self.placeholder_frames = 0
+        self.late_frames_dropped = 0
+
+    # ------------------------------------------------------------------
+    # FFmpeg process
+    # ------------------------------------------------------------------
+    def _build_ffmpeg_cmd(self):
+        cmd = [
+            'ffmpeg', '-y',
+            '-hide_banner', '-nostats', '-loglevel', 'error',
+            '-f', 'rawvideo',
+            '-vcodec', 'rawvideo',
+            '-pix_fmt', 'bgr24',
+            '-s', f'{OUTPUT_WIDTH}x{OUTPUT_HEIGHT}',
+            '-r', str(self.output_fps),
+            '-i', '-'
+        ]
+
+        if nvenc_available():
+            logger.info(f"🚀 GPU LIVE ENCODING @ {self.output_fps} FPS")
+            cmd += [
+                '-c:v', 'h264_nvenc',
+                '-preset', 'p2',
+                '-tune', 'hq',
+                '-rc', 'vbr',
+                '-cq', '23',
+                '-b:v', '4M',
+                '-maxrate', '6M',
+                '-bufsize', '12M',
+                '-pix_fmt', 'yuv420p',
+                '-g', str(int(self.output_fps)),
+                '-bf', '2',
+                '-refs', '2',
+                '-profile:v', 'high',
+                '-level', '4.1',
+            ]
+        else:
+            logger.info(f"⚙️ CPU LIVE ENCODING @ {self.output_fps} FPS")
+            cmd += [
+                '-c:v', 'libx264',
+                '-preset', 'ultrafast',
+                '-crf', '25',
+                '-pix_fmt', 'yuv420p',
+                '-g', str(int(self.output_fps)),
+                '-bf', '0',
+                '-refs', '1',
+                '-tune', 'zerolatency',
+                '-profile:v', 'high',
+                '-level', '4.1',
+            ]
+
+        # MPEG-TS is append-only, so the chunk uploader never sees bytes
+        # that FFmpeg later rewrites (unlike the AVI header/index)
+        cmd += ['-muxdelay', '0', '-muxpreload', '0', '-f', 'mpegts', self.output_path]
+        return cmd
+
+    def start(self):
+        """Spawn FFmpeg and the slot writer thread"""
+        ffmpeg_env = os.environ.copy()
+        ffmpeg_env['CUDA_VISIBLE_DEVICES'] = '0'
+        ffmpeg_env['CUDA_DEVICE_ORDER'] = 'PCI_BUS_ID'
+        ffmpeg_env.pop('NVIDIA_DISABLE', None)
+
+        # stderr goes to a file: nobody drains a pipe for the length of a meeting
+        self._stderr_log = open(f"{self.output_path}.ffmpeg.log", 'wb')
+        self._process = subprocess.Popen(
+            self._build_ffmpeg_cmd(),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=self._stderr_log,
+            env=ffmpeg_env,
+            bufsize=10485760
+        )
+        self._running = True
+        self._writer_thread = threading.Thread(
+            target=self._writer_loop,
+            daemon=True,
+            name="LiveFrameEncoder"
+        )
+        self._writer_thread.start()
+        logger.info(f"🎞️ Live encoder started (PID: {self._process.pid}) -> {self.output_path}")
+
+    # ------------------------------------------------------------------
+    # Frame intake
+    # ------------------------------------------------------------------
+    def add_frame(self, frame, timestamp: float):
+        """Hand a source frame to the encoder (kept only until its slots are written)"""
+        with self._lock:
+            self.frames_received += 1
+            next_target = self._next_slot * self.frame_interval
+
+            if self._pending_timestamps and timestamp < self._pending_timestamps[0] and timestamp < next_target:
+                # Older than every frame still eligible for an unwritten slot
+                self.late_frames_dropped += 1
+                return
+
+            position = bisect.bisect_right(self._pending_timestamps, timestamp)
+            self._pending_timestamps.insert(position, timestamp)
+            self._pending_frames.insert(position, frame)
+
+    def pending_count(self) -> int:
+        return len(self._pending_frames)
+
+    def _take_ready_slots(self, until_time: float, max_slots: int = None):
+        """Resolve every unwritten slot up to until_time to a frame (or None)"""
+        with self._lock:
+            last_slot = int(until_time / self.frame_interval) if until_time >= 0 else -1
+            if max_slots is not None:
+                last_slot = min(last_slot, max_slots - 1)
+            if last_slot < self._next_slot:
+                return []
+
+            slots = np.arange(self._next_slot, last_slot + 1, dtype=np.int64)
+            if self._pending_timestamps:
+                index = build_frame_index(self._pending_timestamps)
+                targets = (slots.astype(np.float64) * self.frame_interval * 1000).astype(np.int64)
+                positions = select_frames_at(index, targets)
+                frames = [self._pending_frames[p] for p in positions]
+            else:
+                frames = [None] * len(slots)
+
+            self._next_slot = last_slot + 1
+
+            # Keep the latest frame at or before the next slot, drop the rest
+            next_target = self._next_slot * self.frame_interval
+            keep_from = max(bisect.bisect_right(self._pending_timestamps, next_target) - 1, 0)
+            if keep_from:
+                del self._pending_timestamps[:keep_from]
+                del self._pending_frames[:keep_from]
+
+            return frames
+
+    # ------------------------------------------------------------------
+    # Output
+    # ------------------------------------------------------------------
+    def _write_slot(self, frame):
+        if self._broken:
+            return
+
+        if frame is None:
+            if self._last_written is not None:
+                self._duplicate_run += 1
+                self.duplicate_frames += 1
+                if self._duplicate_run > self.output_fps * 3:
+                    # Subtle aging for content older than 3 seconds
+                    self._last_written = cv2.addWeighted(
+                        self._last_written, 0.95,
+                        cv2.GaussianBlur(self._last_written, (3, 3), 0.5), 0.05, 0
+                    )
+                    self._last_written_bytes = self._last_written.tobytes()
+                data = self._last_written_bytes
+            else:
+                frame = self.placeholder_factory(self.frames_written, self.frames_written * self.frame_interval)
+                self.placeholder_frames += 1
+                data = None
+        elif frame is self._last_source:
+            # Nearest frame for this slot is the one already written (capture slower than output fps)
+            self._duplicate_run += 1
+            self.duplicate_frames += 1
+            data = self._last_written_bytes
+        else:
+            self._duplicate_run = 0
+            self.real_frames += 1
+            self._last_source = frame
+            data = None
+
+        if data is None:
+            if frame.shape[:2] != (OUTPUT_HEIGHT, OUTPUT_WIDTH):
+                frame = cv2.resize(frame, (OUTPUT_WIDTH, OUTPUT_HEIGHT))
+            if frame is not self._last_written:
+                self._last_written = frame
+                self._last_written_bytes = frame.tobytes()
+            data = self._last_written_bytes
+
+        try:
+            self._process.stdin.write(data)
+            self.frames_written += 1
+        except (BrokenPipeError, IOError, ValueError) as e:
+            self._broken = True
+            logger.error(f"❌ Live encoder pipe error at frame {self.frames_written}: {e}")
+
+    def _writer_loop(self):
+        last_log_time = time.time()
+        while self._running:
+            try:
+                for frame in self._take_ready_slots(self.clock() - self.lookahead):
+                    self._write_slot(frame)
+
+                now = time.time()
+                if now - last_log_time >= 10:
+                    logger.info(
+                        f"🎬 LIVE encode: {self.frames_written} written | Real: {self.real_frames} | "
+                        f"Dupe: {self.duplicate_frames} | Pending: {self.pending_count()} | "
+                        f"Late dropped: {self.late_frames_dropped}"
+                    )
+                    last_log_time = now
+            except Exception as e:
+                logger.warning(f"⚠️ Live encoder loop error: {e}")
+
+            time.sleep(self.frame_interval)
+
+        self._write_final_slots()
+
+    def _write_final_slots(self):
+        """Write every slot left up to the total set by finish()"""
+        total_frames = self._final_slots
+        if total_frames is None:
+            return
+        for frame in self._take_ready_slots(total_frames * self.frame_interval, max_slots=total_frames):
+            self._write_slot(frame)
+
+    def finish(self, total_frames: int, timeout: int = 120) -> bool:
+        """
+        Write the remaining slots up to total_frames and close FFmpeg.
+
+        Returns:
+            True if FFmpeg exited cleanly
+        """
+        # The writer thread drains the remaining slots itself on its way out, so
+        # only one thread ever writes to FFmpeg's stdin
+        self._final_slots = total_frames
+        self._running = False
+        if self._writer_thread and self._writer_thread.is_alive():
+            self._writer_thread.join(timeout=timeout)
+            if self._writer_thread.is_alive():
+                logger.error(f"❌ Live encoder writer still busy after {timeout}s - aborting FFmpeg")
+                self.abort()
+                return False
+        else:
+            self._write_final_slots()
+
+        logger.info(
+            f"✅ LIVE encode complete: {self.frames_written} frames @ {self.output_fps} FPS | "
+            f"Real: {self.real_frames} | Dupe: {self.duplicate_frames} | "
+            f"Placeholder: {self.placeholder_frames} | Late dropped: {self.late_frames_dropped}"
+        )
+
+        with self._lock:
+            self._pending_timestamps = []
+            self._pending_frames = []
+        self._last_written = None
+        self._last_written_bytes = None
+        self._last_source = None
+
+        if self._process is None:
+            return False
+
+        try:
+            self._process.stdin.close()
+            return_code = self._process.wait(timeout=timeout)
+            if return_code != 0:
+                logger.error(f"❌ FFmpeg exited with code {return_code}")
+                logger.error(f"FFmpeg stderr: {self._read_stderr_tail()}")
+                return False
+            return True
+        except subprocess.TimeoutExpired:
+            logger.warning("⚠️ FFmpeg timeout - killing process")
+            self._process.kill()
+            self._process.wait()
+            return False
+        except Exception as e:
+            logger.warning(f"FFmpeg close warning: {e}")
+            return False
+        finally:
+            self._close_stderr_log()
+
+    def _read_stderr_tail(self, limit: int = 1000) -> str:
+        try:
+            with open(self._stderr_log.name, 'rb') as f:
+                return f.read().decode('utf-8', errors='ignore')[-limit:]
+        except Exception:
+            return ""
+
+    def _close_stderr_log(self):
+        if self._stderr_log is None:
+            return
+        log_path = self._stderr_log.name
+        try:
+            self._stderr_log.close()
+            os.remove(log_path)
+        except Exception:
+            pass
+        self._stderr_log = None
+
+    def abort(self):
+        """Kill FFmpeg without flushing (used on error paths)"""
+        self._running = False
+        try:
+            if self._process and self._process.poll() is None:
+                self._process.kill()
+        except Exception:
+            pass
+        self._close_stderr_log()
@@ -0,0 +1,423 @@
+# core/livekit_recording/live_transcription.py
+
+"""
+Live Transcription for Recordings
+=================================
+Transcription used to start only after the meeting ended and the final MP4
+had been produced, so long meetings waited an hour or more for a transcript.
+
+LiveTranscriptionSession transcribes while the meeting is still running:
+- StreamingRecordingWithChunks feeds every flushed audio chunk of every
+  participant track (microphone / screen_share_audio) into feed()
+- each track is cut into rolling windows of ~LIVE_TRANSCRIPTION_WINDOW_SECONDS,
+  split at the quietest 20 ms near the window end so words are not cut
+- full windows are downmixed to 16 kHz mono and transcribed on a small
+  worker pool by a pluggable transcriber; silent windows are skipped
+- every transcribed window is stored in Mongo as soon as it is ready, and
+  finish() writes the merged, time-ordered transcript for the meeting
+
+process_video_sync picks the stored transcript up (load_live_transcript) and
+skips Whisper on the final audio, so only summarization remains after the
+meeting. If a window could not be transcribed the transcript is stored as
+"incomplete" and the pipeline falls back to transcribing the final audio.
+
+Transcribers (LIVE_TRANSCRIPTION_BACKEND):
+- "auto" (default): whisper if OPENAI_API_KEY is set, otherwise disabled
+- "whisper": OpenAI Whisper (same translate-to-English call as the pipeline)
+- "off": disabled
+- "package.module:ClassName": any BaseTranscriber subclass
+"""
+
+import importlib
+import io
+import logging
+import os
+import threading
+import time
+import uuid
+import wave
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from core.livekit_recording.audio_mixer import SAMPLE_RATE, CHANNELS
+
+logger = logging.getLogger('recording_service_module')
+
+LIVE_TRANSCRIPTION_BACKEND = os.getenv("LIVE_TRANSCRIPTION_BACKEND", "auto")
+LIVE_TRANSCRIPTION_MODEL = os.getenv("LIVE_TRANSCRIPTION_MODEL", "whisper-1")
+LIVE_TRANSCRIPTION_WINDOW_SECONDS = float(os.getenv("LIVE_TRANSCRIPTION_WINDOW_SECONDS", 30))
+LIVE_TRANSCRIPTION_WORKERS = int(os.getenv("LIVE_TRANSCRIPTION_WORKERS", 2))
+LIVE_TRANSCRIPTION_MAX_PENDING = int(os.getenv("LIVE_TRANSCRIPTION_MAX_PENDING", 32))
+LIVE_TRANSCRIPTION_MIN_RMS = float(os.getenv("LIVE_TRANSCRIPTION_MIN_RMS", 150))
+LIVE_TRANSCRIPTION_FINISH_TIMEOUT = float(os.getenv("LIVE_TRANSCRIPTION_FINISH_TIMEOUT", 180))
+LIVE_TRANSCRIPT_COLLECTION = os.getenv("LIVE_TRANSCRIPT_COLLECTION", "live_transcripts")
+LIVE_TRANSCRIPT_WINDOW_COLLECTION = os.getenv("LIVE_TRANSCRIPT_WINDOW_COLLECTION", "live_transcript_windows")
+
+TRANSCRIBE_SAMPLE_RATE = 16000
+_DOWNSAMPLE = SAMPLE_RATE // TRANSCRIBE_SAMPLE_RATE
+_SPLIT_SEARCH_SECONDS = 3.0
+_SPLIT_FRAME_SECONDS = 0.02
+
+
+# ================================================================
+# TRANSCRIBERS
+# ================================================================
+
+class BaseTranscriber(ABC):
+    """Turns one window of 16 kHz mono int16 PCM into segments"""
+
+    name = "base"
+
+    @abstractmethod
+    def transcribe(self, pcm: np.ndarray, sample_rate: int) -> list:
+        """
+        Returns:
+            List of {'start', 'end', 'text'} dicts, times relative to the window start
+        """
+
+
+class WhisperTranscriber(BaseTranscriber):
+    """OpenAI Whisper; translates to English like process_video_sync does"""
+
+    name = "whisper"
+
+    def __init__(self, model=LIVE_TRANSCRIPTION_MODEL):
+        import openai
+        self.openai = openai
+        self.model = model
+        if not getattr(openai, "api_key", None):
+            openai.api_key = os.getenv("OPENAI_API_KEY")
+
+    def transcribe(self, pcm, sample_rate):
+        wav_buffer = io.BytesIO()
+        with wave.open(wav_buffer, 'wb') as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(sample_rate)
+            wav_file.writeframes(pcm.tobytes())
+        wav_buffer.seek(0)
+        wav_buffer.name = "window.wav"  # the API infers the format from the name
+
+        result = self.openai.Audio.translate(self.model, file=wav_buffer, response_format="verbose_json")
+        return [
+            {"start": float(seg["start"]), "end": float(seg["end"]), "text": seg["text"]}
+            for seg in result.get("segments", [])
+        ]
+
+
+def create_transcriber(backend=LIVE_TRANSCRIPTION_BACKEND):
+    """Build the configured transcriber (None = live transcription disabled)"""
+    backend = (backend or "off").strip()
+    try:
+        if backend == "auto":
+            return WhisperTranscriber() if os.getenv("OPENAI_API_KEY") else None
+        if backend == "whisper":
+            return WhisperTranscriber()
+        if backend == "off":
+            return None
+        if ":" in backend:
+            module_name, class_name = backend.split(":", 1)
+            transcriber_class = getattr(importlib.import_module(module_name), class_name)
+            if not (isinstance(transcriber_class, type) and issubclass(transcriber_class, BaseTranscriber)):
+                raise TypeError(f"{backend} is not a BaseTranscriber subclass")
+            return transcriber_class()
+        logger.warning(f"⚠️ Unknown LIVE_TRANSCRIPTION_BACKEND '{backend}', live transcription disabled")
+    except Exception as e:
+        logger.error(f"❌ Could not create live transcriber '{backend}': {e}")
+    return None
+
+
+# ================================================================
+# STORAGE
+# ================================================================
+
+class LiveTranscriptStore:
+    """Mongo persistence: one doc per transcribed window + one merged doc per meeting"""
+
+    def __init__(self, mongo_uri=None, db_name=None):
+        self._mongo_uri = mongo_uri or os.getenv("MONGO_URI")
+        self._db_name = db_name or os.getenv("MONGO_DB", "connectlydb")
+        self._db = None
+        self._lock = threading.Lock()
+
+    @property
+    def db(self):
+        if self._db is None:
+            with self._lock:
+                if self._db is None:
+                    from pymongo import MongoClient
+                    self._db = MongoClient(self._mongo_uri)[self._db_name]
+        return self._db
+
+    def save_window(self, window_doc):
+        self.db[LIVE_TRANSCRIPT_WINDOW_COLLECTION].insert_one(dict(window_doc))
+
+    def save_transcript(self, meeting_id, session_id, segments, duration, status, stats):
+        self.db[LIVE_TRANSCRIPT_COLLECTION].update_one(
+            {"meeting_id": meeting_id},
+            {"$set": {
+                "meeting_id": meeting_id,
+                "session_id": session_id,
+                "status": status,
+                "segments": segments,
+                "duration": duration,
+                "stats": stats,
+                "completed_at": datetime.now(),
+            }},
+            upsert=True
+        )
+
+    def load_transcript(self, meeting_id):
+        return self.db[LIVE_TRANSCRIPT_COLLECTION].find_one({"meeting_id": meeting_id})
+
+
+live_transcript_store = LiveTranscriptStore()
+
+
+def load_live_transcript(meeting_id, duration=None, max_age_hours=24):
+    """
+    Return the complete live transcript for a meeting's latest recording, or None.
+
+    Args:
+        duration: Duration of the video being processed; transcripts of a
+                  different recording (duration mismatch) are ignored
+    """
+    try:
+        doc = live_transcript_store.load_transcript(meeting_id)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not load live transcript for {meeting_id}: {e}")
+        return None
+
+    if not doc or doc.get("status") != "complete":
+        return None
+    completed_at = doc.get("completed_at")
+    if completed_at and datetime.now() - completed_at > timedelta(hours=max_age_hours):
+        return None
+    if duration and doc.get("duration"):
+        tolerance = max(10.0, 0.05 * duration)
+        if abs(float(doc["duration"]) - float(duration)) > tolerance:
+            logger.info(f"ℹ️ Live transcript for {meeting_id} is for another recording "
+                        f"({doc['duration']:.0f}s vs {duration:.0f}s)")
+            return None
+    return doc
+
+
+# ================================================================
+# SESSION
+# ================================================================
+
+class _TrackWindow:
+    __slots__ = ('participant', 'source', 'start', 'chunks', 'samples', 'index')
+
+    def __init__(self, participant, source):
+        self.participant = participant
+        self.source = source
+        self.start = None
+        self.chunks = []
+        self.samples = 0
+        self.index = 0
+
+
+class LiveTranscriptionSession:
+    """Rolling-window transcription of one recording's participant tracks"""
+
+    def __init__(self, meeting_id, transcriber, store=live_transcript_store,
+                 window_seconds=LIVE_TRANSCRIPTION_WINDOW_SECONDS, workers=LIVE_TRANSCRIPTION_WORKERS):
+        self.meeting_id = meeting_id
+        self.session_id = uuid.uuid4().hex
+        self.transcriber = transcriber
+        self.store = store
+        self.window_samples = int(window_seconds * SAMPLE_RATE) * CHANNELS
+
+        self._tracks = {}
+        self._lock = threading.RLock()  # done-callbacks may run inside _cut_window
+        self._segments = []
+        self._futures = set()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="LiveTranscribe")
+        self._closed = False
+
+        self.windows_submitted = 0
+        self.windows_transcribed = 0
+        self.windows_silent = 0
+        self.windows_failed = 0
+        self.windows_dropped = 0
+        self.transcribe_seconds = 0.0
+
+        logger.info(f"📝 Live transcription ({transcriber.name}) enabled for {meeting_id}, "
+                    f"{window_seconds:.0f}s windows")
+
+    # ---------------------------------------------------------------- feed
+    def feed(self, participant, source, timestamp, samples):
+        """Add one flushed chunk (interleaved stereo int16 at SAMPLE_RATE) of a track"""
+        if self._closed or samples is None or len(samples) == 0:
+            return
+        key = (participant, source)
+        with self._lock:
+            track = self._tracks.get(key)
+            if track is None:
+                track = self._tracks[key] = _TrackWindow(participant, source)
+            if track.start is None:
+                track.start = timestamp
+            track.chunks.append(samples)
+            track.samples += len(samples)
+
+            if track.samples >= self.window_samples:
+                self._cut_window(track)
+
+    def _cut_window(self, track, final=False):
+        """Hand the track's buffered audio to a worker (caller holds _lock)"""
+        audio = np.concatenate(track.chunks) if len(track.chunks) > 1 else track.chunks[0]
+        split = len(audio) if final else self._quiet_split_point(audio)
+
+        window, remainder = audio[:split], audio[split:]
+        start = track.start
+        index = track.index
+
+        track.index += 1
+        track.chunks = [remainder] if len(remainder) else []
+        track.samples = len(remainder)
+        track.start = start + split / (SAMPLE_RATE * CHANNELS) if len(remainder) else None
+
+        if len(self._futures) >= LIVE_TRANSCRIPTION_MAX_PENDING:
+            self.windows_dropped += 1
+            logger.warning(f"⚠️ Live transcription backlog for {self.meeting_id}: "
+                           f"dropped window {index} of {track.participant}")
+            return
+
+        self.windows_submitted += 1
+        future = self._executor.submit(
+            self._transcribe_window, track.participant, track.source, index, start, window
+        )
+        self._futures.add(future)
+        future.add_done_callback(self._discard_future)
+
+    def _discard_future(self, future):
+        with self._lock:
+            self._futures.discard(future)
+
+    def _quiet_split_point(self, audio):
+        """Index (frame aligned) of the quietest 20 ms in the last few seconds of the window"""
+        end = min(len(audio), self.window_samples)
+        frame = int(_SPLIT_FRAME_SECONDS * SAMPLE_RATE) * CHANNELS
+        search = int(_SPLIT_SEARCH_SECONDS * SAMPLE_RATE) * CHANNELS
+        begin = max(frame, end - search)
+        frames = (end - begin) // frame
+        if frames <= 0:
+            return end
+        region = audio[begin:begin + frames * frame].astype(np.float32).reshape(frames, frame)
+        quietest = int(np.argmin(np.mean(region * region, axis=1)))
+        return begin + quietest * frame + (frame // (2 * CHANNELS)) * CHANNELS
+
+    # ---------------------------------------------------------------- workers
+    @staticmethod
+    def _to_mono_16k(window):
+        frames = len(window) // CHANNELS
+        mono = window[:frames * CHANNELS].reshape(frames, CHANNELS).astype(np.float32).mean(axis=1)
+        usable = len(mono) - len(mono) % _DOWNSAMPLE
+        return mono[:usable].reshape(-1, _DOWNSAMPLE).mean(axis=1)
+
+    def _transcribe_window(self, participant, source, index, start, window):
+        try:
+            pcm = self._to_mono_16k(window)
+            duration = len(pcm) / TRANSCRIBE_SAMPLE_RATE
+            if len(pcm) == 0 or float(np.sqrt(np.mean(pcm * pcm))) < LIVE_TRANSCRIPTION_MIN_RMS:
+                self.windows_silent += 1
+                return
+
+            began = time.time()
+            raw_segments = self.transcriber.transcribe(
+                np.clip(pcm, -32768, 32767).astype(np.int16), TRANSCRIBE_SAMPLE_RATE
+            )
+            self.transcribe_seconds += time.time() - began
+
+            segments = [
+                {
+                    "start": round(start + float(seg["start"]), 3),
+                    "end": round(start + min(float(seg["end"]), duration), 3),
+                    "text": seg["text"],
+                    "speaker": participant,
+                    "source": source,
+                }
+                for seg in raw_segments if str(seg.get("text", "")).strip()
+            ]
+            with self._lock:
+                self._segments.extend(segments)
+            self.windows_transcribed += 1
+
+            if self.store is not None:
+                try:
+                    self.store.save_window({
+                        "meeting_id": self.meeting_id,
+                        "session_id": self.session_id,
+                        "participant": participant,
+                        "source": source,
+                        "window_index": index,
+                        "start": round(start, 3),
+                        "end": round(start + duration, 3),
+                        "segments": segments,
+                        "created_at": datetime.now(),
+                    })
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not store live transcript window: {e}")
+
+        except Exception as e:
+            self.windows_failed += 1
+            logger.error(f"❌ Live transcription failed for {participant} window {index}: {e}")
+
+    # ---------------------------------------------------------------- results
+    def segments(self):
+        """Transcribed segments so far, in timeline order"""
+        with self._lock:
+            return sorted(self._segments, key=lambda seg: (seg["start"], seg["end"]))
+
+    def stats(self) -> dict:
+        return {
+            'backend': self.transcriber.name,
+            'windows_submitted': self.windows_submitted,
+            'windows_transcribed': self.windows_transcribed,
+            'windows_silent': self.windows_silent,
+            'windows_failed': self.windows_failed,
+            'windows_dropped': self.windows_dropped,
+            'pending': len(self._futures),
+            'segments': len(self._segments),
+            'transcribe_seconds': round(self.transcribe_seconds, 1),
+        }
+
+    def finish(self, duration, timeout=LIVE_TRANSCRIPTION_FINISH_TIMEOUT) -> dict:
+        """Transcribe the remaining audio, wait for workers and store the merged transcript"""
+        with self._lock:
+            self._closed = True
+            for track in self._tracks.values():
+                if track.samples > 0:
+                    self._cut_window(track, final=True)
+            pending = list(self._futures)
+
+        _, not_done = wait(pending, timeout=timeout)
+        self._executor.shutdown(wait=False)
+
+        stats = self.stats()
+        complete = not not_done and not self.windows_failed and not self.windows_dropped
+        status = "complete" if complete else "incomplete"
+        segments = self.segments()
+
+        if self.store is not None:
+            try:
+                self.store.save_transcript(self.meeting_id, self.session_id, segments, duration, status, stats)
+            except Exception as e:
+                logger.error(f"❌ Could not store live transcript for {self.meeting_id}: {e}")
+                status = "unsaved"
+
+        logger.info(f"📝 Live transcript for {self.meeting_id}: {status}, {len(segments)} segments, "
+                    f"{stats['windows_transcribed']} windows ({stats['windows_silent']} silent)")
+        return {'status': status, 'segments': len(segments), **stats}
+
+
+def create_live_transcription(meeting_id):
+    """LiveTranscriptionSession for a new recording, or None when disabled"""
+    transcriber = create_transcriber()
+    if transcriber is None:
+        return None
+    return LiveTranscriptionSession(meeting_id, transcriber)
@@ -0,0 +1,244 @@
+# core/livekit_recording/recording_scheduler.py
+
+"""
+Recording Scheduler
+===================
+Keeps a recording node within its CPU/memory budget when many meetings
+record at once.
+
+- One shared asyncio loop (one thread) runs every LiveKit recording bot,
+  instead of one thread + event loop per meeting
+- Admission control: new recordings are refused (status "busy") when the
+  concurrent-recording limit, CPU budget or free-memory floor is exceeded
+- Finalization (S3 download, ffmpeg mux, pipeline trigger) runs on a small
+  dedicated worker pool fed by a priority queue, so simultaneous stops do
+  not all run ffmpeg at once; shorter recordings finalize first
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    psutil = None
+    PSUTIL_AVAILABLE = False
+
+logger = logging.getLogger('recording_service_module')
+
+RECORDING_MAX_CONCURRENT = int(os.getenv("RECORDING_MAX_CONCURRENT", max(2, os.cpu_count() or 2)))
+RECORDING_MAX_CPU_PERCENT = float(os.getenv("RECORDING_MAX_CPU_PERCENT", 85))
+RECORDING_MEM_PER_RECORDING_MB = int(os.getenv("RECORDING_MEM_PER_RECORDING_MB", 400))
+RECORDING_MIN_FREE_MEM_MB = int(os.getenv("RECORDING_MIN_FREE_MEM_MB", 1024))
+RECORDING_FINALIZE_WORKERS = int(os.getenv("RECORDING_FINALIZE_WORKERS", max(1, (os.cpu_count() or 2) // 4)))
+
+
+class RecordingScheduler:
+    """Shared bot loop + admission control + prioritized finalize workers"""
+
+    def __init__(self, max_concurrent=RECORDING_MAX_CONCURRENT, finalize_workers=RECORDING_FINALIZE_WORKERS):
+        self.max_concurrent = max_concurrent
+        self.finalize_workers = max(1, finalize_workers)
+
+        self._lock = threading.Lock()
+        self._loop = None
+        self._loop_thread = None
+
+        # meeting_id -> {'admitted_at', 'future'}
+        self._live = {}
+        self.rejected = 0
+
+        # Finalize priority queue: (priority, seq, job)
+        self._finalize_heap = []
+        self._finalize_seq = itertools.count()
+        self._finalize_cond = threading.Condition(self._lock)
+        self._finalize_threads = []
+        self._finalizing = {}  # meeting_id -> started_at
+        self.finalized = 0
+        self.finalize_failed = 0
+
+        if PSUTIL_AVAILABLE:
+            psutil.cpu_percent(interval=None)  # prime the non-blocking sampler
+
+    # ================================================================
+    # SHARED LOOP
+    # ================================================================
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is not None and not self._loop.is_closed():
+                return self._loop
+            # Publish loop and thread before releasing the lock so concurrent callers reuse them
+            loop = asyncio.new_event_loop()
+
+            def run_loop():
+                asyncio.set_event_loop(loop)
+                try:
+                    loop.run_forever()
+                finally:
+                    loop.close()
+
+            self._loop = loop
+            self._loop_thread = threading.Thread(target=run_loop, daemon=True, name="RecordingBotLoop")
+            self._loop_thread.start()
+        logger.info("🔁 Shared recording event loop started")
+        return loop
+
+    def run_bot(self, meeting_id, coro) -> Future:
+        """Schedule a bot coroutine on the shared loop; the admission slot is freed when it ends"""
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        with self._lock:
+            if meeting_id in self._live:
+                self._live[meeting_id]['future'] = future
+
+        def release(_):
+            with self._lock:
+                self._live.pop(meeting_id, None)
+        future.add_done_callback(release)
+        return future
+
+    # ================================================================
+    # ADMISSION CONTROL
+    # ================================================================
+
+    def _resource_check(self, live_count):
+        if live_count >= self.max_concurrent:
+            return f"Recording node at capacity ({live_count}/{self.max_concurrent} recordings)"
+        if not PSUTIL_AVAILABLE:
+            return None
+
+        cpu = psutil.cpu_percent(interval=None)
+        if cpu >= RECORDING_MAX_CPU_PERCENT:
+            return f"Recording node CPU at {cpu:.0f}% (limit {RECORDING_MAX_CPU_PERCENT:.0f}%)"
+
+        available_mb = psutil.virtual_memory().available / (1024 * 1024)
+        if available_mb - RECORDING_MEM_PER_RECORDING_MB < RECORDING_MIN_FREE_MEM_MB:
+            return f"Recording node memory low ({available_mb:.0f} MB available)"
+        return None
+
+    def try_admit(self, meeting_id):
+        """
+        Reserve a recording slot.
+
+        Returns:
+            (True, None) when admitted, (False, reason) otherwise
+        """
+        with self._lock:
+            if meeting_id in self._live:
+                return True, None
+            reason = self._resource_check(len(self._live))
+            if reason:
+                self.rejected += 1
+                logger.warning(f"🚦 Recording for {meeting_id} not admitted: {reason}")
+                return False, reason
+            self._live[meeting_id] = {'admitted_at': time.time(), 'future': None}
+        return True, None
+
+    def release(self, meeting_id):
+        """Give back a slot reserved by try_admit() when the bot never started"""
+        with self._lock:
+            entry = self._live.get(meeting_id)
+            if entry is not None and entry['future'] is None:
+                self._live.pop(meeting_id, None)
+
+    # ================================================================
+    # FINALIZE POOL
+    # ================================================================
+
+    def _ensure_finalize_workers(self):
+        with self._lock:
+            self._finalize_threads = [t for t in self._finalize_threads if t.is_alive()]
+            for i in range(len(self._finalize_threads), self.finalize_workers):
+                worker = threading.Thread(
+                    target=self._finalize_worker, daemon=True, name=f"RecordingFinalize-{i}"
+                )
+                worker.start()
+                self._finalize_threads.append(worker)
+
+    def submit_finalize(self, meeting_id, func, *args, priority=0.0):
+        """
+        Queue a finalization job. Lower priority values run first
+        (callers pass the recording duration, so short recordings finish first).
+        """
+        self._ensure_finalize_workers()
+        with self._finalize_cond:
+            heapq.heappush(self._finalize_heap, (priority, next(self._finalize_seq), {
+                'meeting_id': meeting_id,
+                'func': func,
+                'args': args,
+                'queued_at': time.time(),
+            }))
+            position = len(self._finalize_heap)
+            self._finalize_cond.notify()
+        logger.info(f"📥 Finalization queued for {meeting_id} (priority {priority:.0f}, queue {position})")
+        return position
+
+    def _finalize_worker(self):
+        while True:
+            with self._finalize_cond:
+                while not self._finalize_heap:
+                    self._finalize_cond.wait()
+                _, _, job = heapq.heappop(self._finalize_heap)
+                self._finalizing[job['meeting_id']] = time.time()
+
+            waited = time.time() - job['queued_at']
+            logger.info(f"🎬 Finalizing {job['meeting_id']} (waited {waited:.1f}s in queue)")
+            try:
+                job['func'](*job['args'])
+                self.finalized += 1
+            except Exception as e:
+                self.finalize_failed += 1
+                logger.error(f"❌ Finalization failed for {job['meeting_id']}: {e}")
+            finally:
+                with self._lock:
+                    self._finalizing.pop(job['meeting_id'], None)
+
+    # ================================================================
+    # STATUS
+    # ================================================================
+
+    def finalize_state(self, meeting_id):
+        """'finalizing', ('queued', position) or None"""
+        with self._lock:
+            if meeting_id in self._finalizing:
+                return 'finalizing', None
+            for position, (_, _, job) in enumerate(sorted(self._finalize_heap), start=1):
+                if job['meeting_id'] == meeting_id:
+                    return 'queued', position
+        return None, None
+
+    def get_status(self) -> dict:
+        with self._lock:
+            status = {
+                'live_recordings': len(self._live),
+                'max_concurrent': self.max_concurrent,
+                'admission_rejections': self.rejected,
+                'shared_loop_running': bool(self._loop_thread and self._loop_thread.is_alive()),
+                'finalize_workers': self.finalize_workers,
+                'finalize_workers_busy': len(self._finalizing),
+                'finalize_queue_depth': len(self._finalize_heap),
+                'finalize_queue': [job['meeting_id'] for _, _, job in sorted(self._finalize_heap)],
+                'finalizing': list(self._finalizing.keys()),
+                'finalized': self.finalized,
+                'finalize_failed': self.finalize_failed,
+            }
+        if PSUTIL_AVAILABLE:
+            status['cpu_percent'] = psutil.cpu_percent(interval=None)
+            status['memory_available_mb'] = round(psutil.virtual_memory().available / (1024 * 1024))
+        return status
+
+    def shutdown(self):
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(loop.stop)
+
+
+recording_scheduler = RecordingScheduler()
@@ -53,6 +53,9 @@ def start_stream_recording(request, meeting_id):
             
             logger.info(f"Stream recording started for meeting {meeting_id}")
             return JsonResponse(result)
+        elif result.get("status") == "busy":
+            # Recording node over its CPU/memory/concurrency budget
+            return JsonResponse(result, status=503)
         else:
             return JsonResponse(result, status=500)
             
@@ -119,7 +122,8 @@ def list_active_stream_recordings(request):
         return JsonResponse({
             "status": "success",
             "active_recordings": active_recordings,
-            "total_count": len(active_recordings)
+            "total_count": len(active_recordings),
+            "scheduler": stream_recording_service.get_scheduler_status()
         })
         
     except Exception as e:
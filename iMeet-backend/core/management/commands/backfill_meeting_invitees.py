@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'One-time backfill of tbl_MeetingInvitees from the scheduled/calendar email columns and invitations'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Meetings per transaction',
+        )
+
+    def handle(self, *args, **options):
+        from core.WebSocketConnection.meetings import backfill_meeting_invitees
+
+        stats = backfill_meeting_invitees(batch_size=options['batch_size'], log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {stats['invitees']} invitees for {stats['meetings']} meetings in {stats['batches']} batches"
+        ))
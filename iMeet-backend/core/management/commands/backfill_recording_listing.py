@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'One-time backfill of visible_to_lower and meeting_type on final videos, plus the listing indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Documents per bulk_write',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Count what would change without writing',
+        )
+        parser.add_argument(
+            '--skip-indexes',
+            action='store_true',
+            help='Do not create the listing indexes',
+        )
+
+    def handle(self, *args, **options):
+        from core.UserDashBoard.recordings import backfill_recording_listing_fields, ensure_recording_indexes
+
+        if not options['skip_indexes'] and not options['dry_run']:
+            if ensure_recording_indexes():
+                self.stdout.write(self.style.SUCCESS("Listing indexes ready"))
+            else:
+                self.stdout.write(self.style.WARNING("Could not create listing indexes, see logs"))
+
+        stats = backfill_recording_listing_fields(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        prefix = "Would update" if options['dry_run'] else "Updated"
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} {stats['updated']} of {stats['scanned']} scanned videos in {stats['batches']} batches "
+            f"({stats['visible_to_lower']} visible_to_lower, {stats['meeting_type']} meeting_type)"
+        ))
@@ -0,0 +1,114 @@
+from django.core.management.base import BaseCommand
+import os
+import time
+import numpy as np
+from core.livekit_recording.frame_index import build_frame_index, select_frames
+from core.livekit_recording.live_encoder import (
+    LIVE_ENCODER_LOOKAHEAD_SECONDS, OUTPUT_HEIGHT, OUTPUT_WIDTH, LiveFrameEncoder,
+)
+
+
+def _synthetic_timestamps(duration_seconds, capture_fps, gap_every, gap_length, seed=7):
+    """Jittered capture timestamps with periodic gaps (e.g. screen share paused)"""
+    rng = np.random.default_rng(seed)
+    count = int(duration_seconds * capture_fps)
+    timestamps = np.arange(count, dtype=np.float64) / capture_fps
+    timestamps += rng.normal(0, 0.25 / capture_fps, count)
+    if gap_every > 0 and gap_length > 0:
+        in_gap = (timestamps % gap_every) < gap_length
+        timestamps = timestamps[~in_gap]
+    return np.clip(timestamps, 0, None)
+
+
+def _replay_live(timestamps, total_frames, output_fps, lookahead):
+    """
+    Feed timestamps (in capture order) through LiveFrameEncoder's slot selection
+    the way its writer loop does, without FFmpeg. Frames are their capture positions.
+    """
+    encoder = LiveFrameEncoder(os.devnull, output_fps, clock=lambda: 0.0,
+                               placeholder_factory=lambda *args: None, lookahead=lookahead)
+    frame_interval = encoder.frame_interval
+    selection = []
+    peak_pending = 0
+    tick = 0.0
+    for position, ts in enumerate(timestamps):
+        while ts >= tick:
+            selection.extend(encoder._take_ready_slots(tick - lookahead))
+            tick += frame_interval
+        encoder.add_frame(position, float(ts))
+        peak_pending = max(peak_pending, encoder.pending_count())
+    selection.extend(encoder._take_ready_slots(total_frames * frame_interval, max_slots=total_frames))
+    slots = np.array([-1 if frame is None else frame for frame in selection], dtype=np.int64)
+    return slots, peak_pending, encoder.late_frames_dropped
+
+
+class Command(BaseCommand):
+    help = 'Benchmark live-encoder frame selection on synthetic 1h / 3h recordings'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=float,
+            nargs='+',
+            default=[1.0, 3.0],
+            help='Synthetic recording lengths in hours',
+        )
+        parser.add_argument(
+            '--output-fps',
+            type=int,
+            default=20,
+            help='Output FPS used by StreamingRecordingWithChunks',
+        )
+        parser.add_argument(
+            '--capture-fps',
+            type=float,
+            default=15.0,
+            help='Average rate of captured source frames',
+        )
+        parser.add_argument(
+            '--gap-every',
+            type=float,
+            default=300.0,
+            help='Insert a capture gap every N seconds (0 disables gaps)',
+        )
+        parser.add_argument(
+            '--gap-length',
+            type=float,
+            default=20.0,
+            help='Length of each capture gap in seconds',
+        )
+        parser.add_argument(
+            '--lookahead',
+            type=float,
+            default=LIVE_ENCODER_LOOKAHEAD_SECONDS,
+            help='Live encoder lookahead window in seconds',
+        )
+
+    def handle(self, *args, **options):
+        output_fps = options['output_fps']
+        frame_interval = 1.0 / output_fps
+        frame_mb = OUTPUT_WIDTH * OUTPUT_HEIGHT * 3 / (1024 * 1024)
+
+        for hours in options['hours']:
+            duration = hours * 3600
+            timestamps = _synthetic_timestamps(
+                duration, options['capture_fps'], options['gap_every'], options['gap_length']
+            )
+            total_frames = int(duration * output_fps)
+
+            start = time.perf_counter()
+            live, peak_pending, late_dropped = _replay_live(
+                timestamps, total_frames, output_fps, options['lookahead']
+            )
+            live_ms = (time.perf_counter() - start) * 1000
+
+            # Offline nearest-frame selection over the whole recording, for reference
+            offline = select_frames(build_frame_index(timestamps), total_frames, frame_interval)
+            mismatches = int(np.sum(live != offline))
+
+            self.stdout.write(self.style.SUCCESS(
+                f"{hours:g}h: {len(timestamps):,} captured -> {len(live):,} output frames | "
+                f"live select {live_ms:.1f}ms ({live_ms * 1000 / max(len(live), 1):.1f}us/slot) | "
+                f"peak pending {peak_pending} frames (~{peak_pending * frame_mb:.0f} MB) | "
+                f"late dropped {late_dropped} | {mismatches} slots differ from offline selection"
+            ))
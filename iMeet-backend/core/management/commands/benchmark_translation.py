@@ -0,0 +1,114 @@
+from django.core.management.base import BaseCommand
+import random
+import time
+
+
+# Short acknowledgements repeat constantly in class recordings; sentences mostly don't
+_REPEATED_PHRASES = [
+    "Okay.", "Yes sir.", "Can you hear me?", "Is my screen visible?", "Please mute your microphone.",
+    "Any questions?", "Let's continue.", "Thank you.", "Good morning everyone.", "Right.",
+]
+_WORDS = (
+    "the student will solve each problem on the board before we move to the next chapter "
+    "please open your notebook and write down the formula for the area of a circle "
+    "tomorrow we have a test on fractions decimals percentages and simple interest"
+).split()
+
+
+def _synthetic_segments(count, repeat_ratio, seed=11):
+    rng = random.Random(seed)
+    segments = []
+    for index in range(count):
+        if rng.random() < repeat_ratio:
+            text = rng.choice(_REPEATED_PHRASES)
+        else:
+            text = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(4, 40))).capitalize() + "."
+        segments.append({"start": index * 4.0, "end": index * 4.0 + 3.5, "text": f" {text}"})
+    return segments
+
+
+def _legacy_translate(translator, segments, lang, batch_size):
+    """Previous in-order batching without translation memory, kept for comparison"""
+    translated = []
+    for batch_idx in range(0, len(segments), batch_size):
+        batch = segments[batch_idx:batch_idx + batch_size]
+        translated.extend(translator.translate_batch([seg["text"].strip() for seg in batch], lang))
+    return translated
+
+
+class Command(BaseCommand):
+    help = 'Benchmark subtitle translation (segments/sec) on CPU: legacy batching vs length buckets + translation memory'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--segments',
+            type=int,
+            default=600,
+            help='Number of synthetic transcript segments (600 ~ 40 minutes of class)',
+        )
+        parser.add_argument(
+            '--repeat-ratio',
+            type=float,
+            default=0.25,
+            help='Fraction of segments that are short repeated phrases',
+        )
+        parser.add_argument(
+            '--lang',
+            default='hi',
+            help='Target language',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=32,
+            help='Batch size passed to translate_segments',
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=0,
+            help='torch.set_num_threads value (0 keeps the default)',
+        )
+        parser.add_argument(
+            '--skip-legacy',
+            action='store_true',
+            help='Only time the bucketed path',
+        )
+
+    def handle(self, *args, **options):
+        import torch
+        from core.UserDashBoard.recordings import LocalIndianLanguageTranslator
+        from core.UserDashBoard.translation_memory import TranslationMemory
+
+        if options['threads']:
+            torch.set_num_threads(options['threads'])
+
+        lang = options['lang']
+        batch_size = options['batch_size']
+        segments = _synthetic_segments(options['segments'], options['repeat_ratio'])
+
+        translator = LocalIndianLanguageTranslator(use_memory=False)
+        translator.device = "cpu"
+        translator.load_model(lang)
+        self.stdout.write(
+            f"{len(segments)} segments, {len({seg['text'] for seg in segments})} distinct, "
+            f"torch threads {torch.get_num_threads()}"
+        )
+
+        if not options['skip_legacy']:
+            start = time.perf_counter()
+            _legacy_translate(translator, segments, lang, batch_size)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"legacy in-order batches: {elapsed:.1f}s ({len(segments) / elapsed:.1f} segments/sec)")
+
+        # Fresh per-process memory so the cold run measures bucketing + in-meeting dedup only
+        translator.memory = TranslationMemory()
+        for label in ("bucketed, cold memory", "bucketed, warm memory"):
+            start = time.perf_counter()
+            translator.translate_segments(segments, lang, batch_size=batch_size)
+            elapsed = time.perf_counter() - start
+            run = translator.last_run
+            self.stdout.write(self.style.SUCCESS(
+                f"{label}: {elapsed:.1f}s ({len(segments) / elapsed:.1f} segments/sec) | "
+                f"{run['translated']} translated, {run['memory_hits']} memory hits, {run['batches']} batches"
+            ))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Create every registered table/index once and report how much per-request DDL time it saves'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--measure',
+            type=int,
+            default=0,
+            help='Re-run each DDL task N times to show the per-request cost handlers no longer pay',
+        )
+
+    def handle(self, *args, **options):
+        from core.utils.schema_bootstrap import format_report, schema_registry
+
+        report = schema_registry.run_all(force=True)
+        for item in report:
+            line = f"{item['name']:<28} {item['status']:<8} {item['ms']:8.1f} ms"
+            if item.get('error'):
+                line += f"  {item['error']}"
+            self.stdout.write(self.style.ERROR(line) if item['status'] == 'failed' else line)
+        self.stdout.write(self.style.SUCCESS(format_report(report)))
+
+        if options['measure']:
+            self.stdout.write(f"\nPer-call DDL cost (avg of {options['measure']} runs), now skipped by handlers:")
+            total = 0.0
+            for item in report:
+                if item['status'] != 'ok':
+                    continue
+                cost = schema_registry.measure_repeat(item['name'], options['measure'])
+                total += cost
+                self.stdout.write(f"{item['name']:<28} {cost:8.1f} ms")
+            self.stdout.write(self.style.SUCCESS(
+                f"A handler that ensured every table spent {total:.1f} ms on DDL per request"
+            ))
@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand
+import logging
+import threading
+import time
+
+
+class Command(BaseCommand):
+    help = (
+        'Serve face detection/embedding over a unix socket so every web worker on the host '
+        'shares one loaded InsightFace model (workers need FACE_INFERENCE_MODE=socket)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--socket',
+            default=None,
+            help='Socket path (default FACE_INFERENCE_SOCKET)',
+        )
+        parser.add_argument(
+            '--max-batch',
+            type=int,
+            default=None,
+            help='Requests per micro-batch (default FACE_INFERENCE_MAX_BATCH)',
+        )
+        parser.add_argument(
+            '--batch-wait-ms',
+            type=float,
+            default=None,
+            help='How long a batch waits for more requests (default FACE_INFERENCE_BATCH_WAIT_MS)',
+        )
+        parser.add_argument(
+            '--stats-interval',
+            type=int,
+            default=300,
+            help='Seconds between stats log lines (0 disables)',
+        )
+
+    def handle(self, *args, **options):
+        from core.FaceAuth import face_inference
+
+        logger = logging.getLogger("face_inference")
+        service = face_inference.FaceInferenceService(
+            max_batch=options['max_batch'] or face_inference.FACE_INFERENCE_MAX_BATCH,
+            batch_wait_ms=(
+                options['batch_wait_ms'] if options['batch_wait_ms'] is not None
+                else face_inference.FACE_INFERENCE_BATCH_WAIT_MS
+            ),
+        )
+        service.load()
+
+        socket_path = options['socket'] or face_inference.FACE_INFERENCE_SOCKET
+        server = face_inference.FaceInferenceServer(socket_path, service=service)
+        self.stdout.write(self.style.SUCCESS(
+            f"Face inference server on {socket_path} (max batch {service.max_batch}, "
+            f"wait {service.batch_wait * 1000:.0f} ms)"
+        ))
+
+        if options['stats_interval']:
+            def _log_stats():
+                while True:
+                    time.sleep(options['stats_interval'])
+                    logger.info(f"📊 Face inference: {service.stats()}")
+            threading.Thread(target=_log_stats, name="face-inference-stats", daemon=True).start()
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write("Face inference server stopped")
@@ -0,0 +1,183 @@
+from django.core.management.base import BaseCommand, CommandError
+import asyncio
+import json
+import time
+from collections import Counter
+
+import httpx
+import numpy as np
+
+
+async def _run_load(base_url, paths, method, headers, concurrency, duration, total_requests, timeout):
+    """Closed-loop load: `concurrency` clients each send the next request as soon as one finishes"""
+    latencies = []
+    statuses = Counter()
+    errors = Counter()
+    sent = 0
+    deadline = time.perf_counter() + duration if duration else None
+
+    def next_index():
+        nonlocal sent
+        if total_requests and sent >= total_requests:
+            return None
+        if deadline and time.perf_counter() >= deadline:
+            return None
+        sent += 1
+        return sent
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, timeout=timeout, limits=limits) as client:
+        async def worker():
+            while True:
+                index = next_index()
+                if index is None:
+                    return
+                path = paths[index % len(paths)]
+                start = time.perf_counter()
+                try:
+                    # Read the whole body so streaming endpoints are measured end to end
+                    async with client.stream(method, path) as response:
+                        async for _ in response.aiter_raw():
+                            pass
+                    statuses[response.status_code] += 1
+                except httpx.HTTPError as e:
+                    errors[type(e).__name__] += 1
+                    continue
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    lat = np.asarray(latencies) if latencies else np.zeros(1)
+    completed = len(latencies)
+    return {
+        'base_url': base_url,
+        'paths': paths,
+        'concurrency': concurrency,
+        'seconds': elapsed,
+        'completed': completed,
+        'requests_per_sec': completed / elapsed if elapsed else 0.0,
+        'p50_ms': float(np.percentile(lat, 50)),
+        'p95_ms': float(np.percentile(lat, 95)),
+        'p99_ms': float(np.percentile(lat, 99)),
+        'max_ms': float(lat.max()),
+        'statuses': {str(code): count for code, count in sorted(statuses.items())},
+        'errors': dict(errors),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test a running server (runserver or the gunicorn/uvicorn profile) and report '
+        'requests/sec and latency; --save one run and --compare it against another'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--base-url',
+            default='http://127.0.0.1:8000',
+            help='Server to test',
+        )
+        parser.add_argument(
+            '--path',
+            action='append',
+            dest='paths',
+            default=None,
+            help='Path to request, repeatable; requests rotate through them (default /admin/login/)',
+        )
+        parser.add_argument(
+            '--method',
+            default='GET',
+            help='HTTP method',
+        )
+        parser.add_argument(
+            '--header',
+            action='append',
+            default=[],
+            help='Extra header "Name: value", repeatable (e.g. Authorization)',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            nargs='+',
+            default=[10, 50],
+            help='Concurrent clients; one run per value',
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=20.0,
+            help='Seconds per run (0 to use --requests only)',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=0,
+            help='Stop each run after N requests (0 = no limit)',
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=60.0,
+            help='Per-request timeout in seconds',
+        )
+        parser.add_argument(
+            '--save',
+            default=None,
+            help='Write results as JSON (e.g. baseline-runserver.json)',
+        )
+        parser.add_argument(
+            '--compare',
+            default=None,
+            help='JSON from an earlier --save run to compare against',
+        )
+
+    def handle(self, *args, **options):
+        if not options['duration'] and not options['requests']:
+            raise CommandError('Set --duration or --requests')
+
+        headers = {}
+        for header in options['header']:
+            name, sep, value = header.partition(':')
+            if not sep:
+                raise CommandError(f'Header must look like "Name: value", got {header!r}')
+            headers[name.strip()] = value.strip()
+        paths = options['paths'] or ['/admin/login/']
+
+        results = []
+        for concurrency in options['concurrency']:
+            result = asyncio.run(_run_load(
+                options['base_url'], paths, options['method'].upper(), headers, concurrency,
+                options['duration'], options['requests'], options['timeout'],
+            ))
+            results.append(result)
+            line = (
+                f"c={concurrency:<4} {result['requests_per_sec']:8.1f} req/s  "
+                f"p50 {result['p50_ms']:7.1f} ms  p95 {result['p95_ms']:7.1f} ms  "
+                f"p99 {result['p99_ms']:7.1f} ms  statuses {result['statuses']}"
+            )
+            if result['errors']:
+                self.stdout.write(self.style.ERROR(f"{line}  errors {result['errors']}"))
+            else:
+                self.stdout.write(line)
+
+        if options['save']:
+            with open(options['save'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Saved {len(results)} runs to {options['save']}")
+
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = {run['concurrency']: run for run in json.load(f)}
+            self.stdout.write(f"\nCompared with {options['compare']} ({next(iter(baseline.values()), {}).get('base_url', '?')}):")
+            for result in results:
+                before = baseline.get(result['concurrency'])
+                if not before:
+                    continue
+                speedup = result['requests_per_sec'] / before['requests_per_sec'] if before['requests_per_sec'] else float('inf')
+                self.stdout.write(self.style.SUCCESS(
+                    f"c={result['concurrency']:<4} {before['requests_per_sec']:8.1f} -> "
+                    f"{result['requests_per_sec']:8.1f} req/s ({speedup:.2f}x), "
+                    f"p95 {before['p95_ms']:.1f} -> {result['p95_ms']:.1f} ms"
+                ))
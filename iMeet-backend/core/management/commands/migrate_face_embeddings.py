@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'One-time migration of face embeddings to normalized float32 bytes with integer user_id'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Documents per bulk_write',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Count what would change without writing',
+        )
+
+    def handle(self, *args, **options):
+        from core.UserDashBoard.face_embeddings import migrate_embeddings_to_binary
+
+        stats = migrate_embeddings_to_binary(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        prefix = "Would update" if options['dry_run'] else "Updated"
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} {stats['updated']} of {stats['scanned']} scanned documents in {stats['batches']} batches "
+            f"({stats['embeddings']} embeddings re-encoded, {stats['user_ids']} user_ids converted, "
+            f"{stats['skipped']} skipped)"
+        ))
@@ -0,0 +1,115 @@
+from django.core.management.base import BaseCommand, CommandError
+import ast
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+
+# Libraries that should only load when a request needs them
+HEAVY_MODULES = [
+    'torch', 'transformers', 'cv2', 'mediapipe', 'insightface', 'onnxruntime',
+    'scipy', 'graphviz', 'openai', 'whisper',
+]
+
+# Runs in a fresh interpreter per URL module so import costs are not shared
+PROBE = r'''
+import json, sys, time
+
+def rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+import django
+django.setup()
+base_rss = rss_mb()
+start = time.perf_counter()
+error = None
+try:
+    __import__(sys.argv[1])
+except Exception as e:
+    error = f"{type(e).__name__}: {e}"
+print(json.dumps({
+    'module': sys.argv[1],
+    'import_ms': (time.perf_counter() - start) * 1000,
+    'rss_mb': rss_mb() - base_rss,
+    'heavy': [name for name in json.loads(sys.argv[2]) if name in sys.modules],
+    'error': error,
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = (
+        'Import each URL module in a fresh process and report import time, memory and which '
+        'heavy ML libraries it pulls in (use with DISABLED_URL_MODULES to size worker pools)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--modules',
+            nargs='+',
+            default=None,
+            help='Modules to profile (default: URL_MODULES from ROOT_URLCONF)',
+        )
+
+    def handle(self, *args, **options):
+        from django.conf import settings
+
+        modules = options['modules'] or self._url_modules(settings.ROOT_URLCONF)
+        env = dict(os.environ, SCHEMA_BOOTSTRAP_MODE='external')
+        env.setdefault('DJANGO_SETTINGS_MODULE', 'SampleDB.settings')
+
+        self.stdout.write(f"{'module':<46} {'import':>9} {'rss':>9}  heavy libraries")
+        total_ms = total_mb = 0.0
+        for module in modules:
+            proc = subprocess.run(
+                [sys.executable, '-c', PROBE, module, json.dumps(HEAVY_MODULES)],
+                capture_output=True, text=True, env=env,
+            )
+            try:
+                result = json.loads(proc.stdout.strip().splitlines()[-1])
+            except (IndexError, ValueError):
+                self.stdout.write(self.style.ERROR(
+                    f"{module:<46} probe failed: {proc.stderr.strip().splitlines()[-1:] or proc.returncode}"
+                ))
+                continue
+
+            total_ms += result['import_ms']
+            total_mb += result['rss_mb']
+            line = (
+                f"{module:<46} {result['import_ms']:7.0f}ms {result['rss_mb']:7.1f}MB  "
+                f"{', '.join(result['heavy']) or '-'}"
+            )
+            if result['error']:
+                self.stdout.write(self.style.ERROR(f"{line}  ({result['error']})"))
+            elif result['heavy']:
+                self.stdout.write(self.style.WARNING(line))
+            else:
+                self.stdout.write(line)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(modules)} modules: {total_ms:.0f} ms, {total_mb:.1f} MB above a bare django.setup() "
+            f"(modules sharing dependencies are counted more than once)"
+        ))
+
+    def _url_modules(self, urlconf):
+        """URL_MODULES from the urlconf source, without importing (and paying for) every module"""
+        spec = importlib.util.find_spec(urlconf)
+        if spec is None or not spec.origin:
+            raise CommandError(f"Cannot locate {urlconf}")
+        with open(spec.origin) as f:
+            tree = ast.parse(f.read())
+        for node in tree.body:
+            if isinstance(node, ast.Assign) and any(
+                isinstance(target, ast.Name) and target.id == 'URL_MODULES' for target in node.targets
+            ):
+                return ast.literal_eval(node.value)
+        raise CommandError(f"{urlconf} has no URL_MODULES list; pass --modules")
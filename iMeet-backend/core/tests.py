@@ -1,3 +1,85 @@
-from django.test import TestCase
+from django.test import SimpleTestCase
 
-# Create your tests here.
+import numpy as np
+
+from core.livekit_recording.audio_mixer import CHANNELS, SAMPLE_RATE
+from core.livekit_recording.live_transcription import (
+    LIVE_TRANSCRIPTION_MIN_RMS, BaseTranscriber, LiveTranscriptionSession, create_transcriber,
+)
+
+
+class StubTranscriber(BaseTranscriber):
+    """Offline stand-in: one placeholder segment per voiced second-long run (tests only)"""
+
+    name = "stub"
+
+    def transcribe(self, pcm, sample_rate):
+        frame = sample_rate
+        segments = []
+        run_start = None
+        for index in range(0, len(pcm) // frame + 1):
+            block = pcm[index * frame:(index + 1) * frame].astype(np.float32)
+            voiced = len(block) > 0 and float(np.sqrt(np.mean(block ** 2))) >= LIVE_TRANSCRIPTION_MIN_RMS
+            if voiced and run_start is None:
+                run_start = index
+            elif not voiced and run_start is not None:
+                segments.append({"start": float(run_start), "end": float(index), "text": " [speech]"})
+                run_start = None
+        if run_start is not None:
+            segments.append({"start": float(run_start), "end": len(pcm) / sample_rate, "text": " [speech]"})
+        return segments
+
+
+class MemoryTranscriptStore:
+    """LiveTranscriptStore without Mongo"""
+
+    def __init__(self):
+        self.windows = []
+        self.transcripts = {}
+
+    def save_window(self, window_doc):
+        self.windows.append(dict(window_doc))
+
+    def save_transcript(self, meeting_id, session_id, segments, duration, status, stats):
+        self.transcripts[meeting_id] = {"status": status, "segments": segments, "duration": duration}
+
+
+def _stereo_chunk(seconds, amplitude):
+    """Interleaved stereo int16 at SAMPLE_RATE, as StreamingRecordingWithChunks flushes it"""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    mono = (amplitude * np.sin(2 * np.pi * 440 * t)).astype(np.int16)
+    return np.repeat(mono, CHANNELS)
+
+
+class LiveTranscriptionTests(SimpleTestCase):
+
+    def test_session_transcribes_voiced_windows_through_stub(self):
+        store = MemoryTranscriptStore()
+        session = LiveTranscriptionSession("meeting-1", StubTranscriber(), store=store,
+                                           window_seconds=1.0, workers=1)
+
+        timestamp = 5.0
+        for seconds, amplitude in [(1.0, 8000)] * 3 + [(1.0, 0)] * 2:
+            for _ in range(10):
+                session.feed("alice", "microphone", timestamp, _stereo_chunk(seconds / 10, amplitude))
+                timestamp += seconds / 10
+
+        result = session.finish(duration=timestamp)
+
+        self.assertEqual(result["status"], "complete")
+        self.assertGreaterEqual(result["windows_transcribed"], 3)
+        self.assertGreaterEqual(result["windows_silent"], 1)
+        transcript = store.transcripts["meeting-1"]
+        self.assertEqual(transcript["status"], "complete")
+        self.assertTrue(transcript["segments"])
+        for segment in transcript["segments"]:
+            self.assertEqual(segment["speaker"], "alice")
+            self.assertEqual(segment["source"], "microphone")
+            # Window-relative times are shifted onto the recording timeline
+            self.assertGreaterEqual(segment["start"], 5.0)
+            self.assertLessEqual(segment["end"], 8.1)
+        self.assertEqual(len(store.windows), result["windows_transcribed"])
+
+    def test_custom_backend_must_subclass_base_transcriber(self):
+        self.assertIsInstance(create_transcriber("core.tests:StubTranscriber"), StubTranscriber)
+        self.assertIsNone(create_transcriber("core.tests:MemoryTranscriptStore"))
@@ -0,0 +1,83 @@
+# core/utils/lazy_imports.py
+
+"""
+Lazy Imports
+============
+URL modules are imported when Django loads ROOT_URLCONF, so a module-level
+`import torch` is paid by every worker, including ones that only serve chat
+or login. Heavy libraries are bound through lazy_import() instead:
+
+    torch = lazy_import("torch")
+
+    def translate(...):
+        with torch.no_grad():   # the real import happens here, once
+            ...
+
+The import time of every lazy module that was actually loaded is recorded,
+so `python manage.py profile_startup` can show which requests pulled it in.
+"""
+
+import importlib
+import logging
+import sys
+import threading
+import time
+import types
+
+logger = logging.getLogger(__name__)
+
+_lazy_modules = {}
+_load_times_ms = {}
+_lock = threading.Lock()
+
+
+class LazyModule(types.ModuleType):
+    """Module placeholder that imports the real module on first attribute access"""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__['_lazy_target'] = None
+
+    def _load(self):
+        module = self.__dict__['_lazy_target']
+        if module is None:
+            with _lock:
+                module = self.__dict__['_lazy_target']
+                if module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self.__name__)
+                    _load_times_ms[self.__name__] = (time.perf_counter() - start) * 1000
+                    logger.info(f"📦 Lazy import of {self.__name__} took {_load_times_ms[self.__name__]:.0f} ms")
+                    self.__dict__['_lazy_target'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__['_lazy_target'] is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name) -> LazyModule:
+    """Placeholder for `name`; returns the real module if something already imported it"""
+    if name in sys.modules and not isinstance(sys.modules[name], LazyModule):
+        return sys.modules[name]
+    with _lock:
+        module = _lazy_modules.get(name)
+        if module is None:
+            module = _lazy_modules[name] = LazyModule(name)
+        return module
+
+
+def is_loaded(name) -> bool:
+    """True once the real module is in sys.modules (imported lazily or by anything else)"""
+    return name in sys.modules
+
+
+def lazy_load_times() -> dict:
+    """Import time (ms) of each lazy module that has been loaded in this process"""
+    return dict(_load_times_ms)
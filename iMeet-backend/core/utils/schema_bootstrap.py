@@ -0,0 +1,149 @@
+# core/utils/schema_bootstrap.py
+
+"""
+One-time Schema Bootstrap
+=========================
+Request handlers (Login_User, Create_Schedule_Meeting, get_user_notifications, ...)
+start by calling create_user_table() / create_meetings_table() /
+ensure_notification_tables() etc. Each of those issues CREATE TABLE IF NOT EXISTS
+(and information_schema queries) - on every request, taking metadata locks.
+
+Every such DDL function is registered here with @schema_task. The wrapped function
+runs its DDL at most once per process; after that, the handler call is a set lookup.
+A task must raise when its DDL fails: only tasks that returned normally are marked
+done, failed ones are logged and retried on the next handler call.
+All registered DDL runs together:
+- when the server application is created (SampleDB/asgi.py, wsgi.py) with
+  SCHEMA_BOOTSTRAP_MODE=startup (default); never in other manage.py commands
+- via `python manage.py bootstrap_schema` (any mode)
+
+SCHEMA_BOOTSTRAP_MODE:
+    startup   run the registry when the server starts, log a timing report
+    lazy      each DDL function runs the first time a handler calls it
+    external  handlers never issue DDL; run the management command on deploy
+"""
+
+import functools
+import importlib
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_BOOTSTRAP_MODE = os.getenv("SCHEMA_BOOTSTRAP_MODE", "startup").lower()
+
+# Modules whose DDL functions register themselves on import
+SCHEMA_MODULES = [
+    "core.UserDashBoard.users",
+    "core.WebSocketConnection.meetings",
+    "core.WebSocketConnection.notifications",
+    "core.UserDashBoard.feedback",
+    "core.UserDashBoard.meeting_invitations",
+]
+
+
+class SchemaRegistry:
+    """Named DDL tasks, run in dependency order, each at most once per process"""
+
+    def __init__(self):
+        self._tasks = {}  # name -> (order, func)
+        self._done = set()
+        self._lock = threading.RLock()
+        self.report = []
+
+    def register(self, name, func, order):
+        self._tasks[name] = (order, func)
+
+    def is_done(self, name) -> bool:
+        return name in self._done
+
+    def tasks(self):
+        return sorted(self._tasks.items(), key=lambda item: (item[1][0], item[0]))
+
+    def run(self, name, force=False, raise_errors=False) -> dict:
+        """Run one task unless it already ran in this process"""
+        with self._lock:
+            if name in self._done and not force:
+                return {"name": name, "status": "skipped", "ms": 0.0}
+            func = self._tasks[name][1]
+            start = time.perf_counter()
+            try:
+                func()
+                self._done.add(name)
+                return {"name": name, "status": "ok", "ms": (time.perf_counter() - start) * 1000}
+            except Exception as e:
+                if raise_errors:
+                    raise
+                logger.error(f"❌ Schema task {name} failed: {e}")
+                return {"name": name, "status": "failed", "ms": (time.perf_counter() - start) * 1000, "error": str(e)}
+
+    def run_all(self, force=False) -> list:
+        load_schema_modules()
+        self.report = [self.run(name, force=force) for name, _ in self.tasks()]
+        return self.report
+
+    def measure_repeat(self, name, repeats=5) -> float:
+        """Average ms of re-running a task's DDL - what each handler call used to pay"""
+        func = self._tasks[name][1]
+        start = time.perf_counter()
+        for _ in range(repeats):
+            func()
+        return (time.perf_counter() - start) * 1000 / repeats
+
+
+schema_registry = SchemaRegistry()
+
+
+def schema_task(name, order=50):
+    """
+    Register a DDL function with the schema registry.
+
+    The returned wrapper is what handlers keep calling: it runs the DDL until it
+    succeeds once (unless SCHEMA_BOOTSTRAP_MODE=external) and is a no-op afterwards.
+    A failure is logged and the handler carries on, as it did before the registry.
+    Lower order runs first (tables other tables reference).
+    """
+    def decorator(func):
+        schema_registry.register(name, func, order)
+
+        @functools.wraps(func)
+        def ensure_schema():
+            if schema_registry.is_done(name) or SCHEMA_BOOTSTRAP_MODE == "external":
+                return None
+            schema_registry.run(name)
+            return None
+
+        ensure_schema.run_ddl = func
+        return ensure_schema
+    return decorator
+
+
+def load_schema_modules():
+    for module in SCHEMA_MODULES:
+        try:
+            importlib.import_module(module)
+        except Exception as e:
+            logger.error(f"❌ Could not import {module} for schema bootstrap: {e}")
+
+
+def format_report(report) -> str:
+    total = sum(item["ms"] for item in report)
+    failed = [item["name"] for item in report if item["status"] == "failed"]
+    summary = f"{len(report)} schema tasks in {total:.0f} ms"
+    if failed:
+        summary += f", failed: {', '.join(failed)}"
+    return summary
+
+
+def bootstrap_on_startup():
+    """Run every registered DDL task once when the server app is built (SCHEMA_BOOTSTRAP_MODE=startup)"""
+    if SCHEMA_BOOTSTRAP_MODE != "startup":
+        logger.info(f"🗄️ [STARTUP] Schema bootstrap mode: {SCHEMA_BOOTSTRAP_MODE}")
+        return []
+    report = schema_registry.run_all()
+    for item in report:
+        logger.debug(f"   {item['name']}: {item['status']} ({item['ms']:.1f} ms)")
+    logger.info(f"🗄️ [STARTUP] Schema bootstrap: {format_report(report)}; handlers skip DDL from now on")
+    return report